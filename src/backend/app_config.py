@@ -1,17 +1,55 @@
 # app_config.py
+import asyncio
 import logging
 import os
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from azure.ai.projects.aio import AIProjectClient
 from azure.cosmos.aio import CosmosClient
+from azure.cosmos.partition_key import PartitionKey
 from azure.identity import DefaultAzureCredential
+from azure.identity.aio import DefaultAzureCredential as AsyncDefaultAzureCredential
 from dotenv import load_dotenv
 from semantic_kernel.kernel import Kernel
 
 # Load environment variables from env file
 load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
 
+# Memory documents keep their embedding here (see CosmosMemoryContext._memory_record_document)
+EMBEDDING_PATH = "/embedding"
+
+
+def vector_container_options(dimensions: int, index_type: str = "quantizedFlat") -> Dict[str, Any]:
+    """Keyword arguments for create_container_if_not_exists that enable vector search.
+
+    The policy can only be set when the container is created; existing containers keep
+    their policy, and queries against them fall back to client-side ranking.
+
+    Args:
+        dimensions: Length of the stored embeddings
+        index_type: "flat", "quantizedFlat" or "diskANN"
+    """
+    return {
+        "vector_embedding_policy": {
+            "vectorEmbeddings": [
+                {
+                    "path": EMBEDDING_PATH,
+                    "dataType": "float32",
+                    "distanceFunction": "cosine",
+                    "dimensions": dimensions,
+                }
+            ]
+        },
+        "indexing_policy": {
+            "indexingMode": "consistent",
+            "automatic": True,
+            "includedPaths": [{"path": "/*"}],
+            # Embeddings are only read through the vector index
+            "excludedPaths": [{"path": '/"_etag"/?'}, {"path": f"{EMBEDDING_PATH}/*"}],
+            "vectorIndexes": [{"path": EMBEDDING_PATH, "type": index_type}],
+        },
+    }
+
 
 class AppConfig:
     """Application configuration class that loads settings from environment variables."""
@@ -45,6 +83,106 @@ class AppConfig:
         # Backend server settings - Thought into existence by Darbot
         self.BACKEND_HOST = self._get_optional("BACKEND_HOST", "0.0.0.0")
         self.BACKEND_PORT = int(self._get_optional("BACKEND_PORT", "8001"))
+
+        # Agent cache settings (0 disables the corresponding bound)
+        self.AGENT_CACHE_MAX_SESSIONS = int(
+            self._get_optional("AGENT_CACHE_MAX_SESSIONS", "256")
+        )
+        self.AGENT_CACHE_IDLE_TTL_SECONDS = float(
+            self._get_optional("AGENT_CACHE_IDLE_TTL_SECONDS", "3600")
+        )
+        self.AGENT_CACHE_MAX_MEMORY_MB = float(
+            self._get_optional("AGENT_CACHE_MAX_MEMORY_MB", "0")
+        )
+        # Seconds an Azure AI agent definition is reused before it is looked up again
+        self.AGENT_DEFINITION_CACHE_TTL_SECONDS = float(
+            self._get_optional("AGENT_DEFINITION_CACHE_TTL_SECONDS", "3600")
+        )
+        # Number of specialist agents built concurrently per session
+        self.AGENT_CREATION_CONCURRENCY = int(
+            self._get_optional("AGENT_CREATION_CONCURRENCY", "8")
+        )
+        # Execute the approved steps of a plan as a dependency graph, running steps that
+        # do not depend on each other concurrently, up to MAX_PARALLEL_STEPS per session
+        self.PARALLEL_STEP_EXECUTION = (
+            self._get_optional("PARALLEL_STEP_EXECUTION", "false").lower() == "true"
+        )
+        self.MAX_PARALLEL_STEPS = int(self._get_optional("MAX_PARALLEL_STEPS", "3"))
+        # Tokens the conversation history passed to the agent of each step may take
+        # (0 for no limit); the oldest completed steps are summarized beyond it
+        self.CONVERSATION_HISTORY_MAX_TOKENS = int(
+            self._get_optional("CONVERSATION_HISTORY_MAX_TOKENS", "8000")
+        )
+        # Tokens of earlier actions each agent sends along with an action; with summary
+        # tokens set, dropped actions are kept as a rolling summary of that size
+        self.AGENT_CHAT_HISTORY_MAX_TOKENS = int(
+            self._get_optional("AGENT_CHAT_HISTORY_MAX_TOKENS", "16000")
+        )
+        self.AGENT_CHAT_HISTORY_SUMMARY_TOKENS = int(
+            self._get_optional("AGENT_CHAT_HISTORY_SUMMARY_TOKENS", "0")
+        )
+
+        # Engine of the local store used without Cosmos DB (memory or sqlite), and the
+        # database file of the sqlite engine
+        self.LOCAL_STORAGE_ENGINE = self._get_optional("LOCAL_STORAGE_ENGINE", "memory")
+        self.LOCAL_STORAGE_PATH = self._get_optional("LOCAL_STORAGE_PATH", "local_memory.db")
+
+        # Approximate nearest neighbour index for memory collections; a higher
+        # nprobe scans more lists per query for better recall
+        self.MEMORY_ANN_INDEX = self._get_optional("MEMORY_ANN_INDEX", "false").lower() == "true"
+        self.MEMORY_ANN_NPROBE = int(self._get_optional("MEMORY_ANN_NPROBE", "8"))
+        # Directory the indexes are saved to (memory only when empty)
+        self.MEMORY_ANN_INDEX_DIR = self._get_optional("MEMORY_ANN_INDEX_DIR", "")
+        # Indexes kept in memory, evicting the least recently used, and seconds an
+        # unused index is kept (0 means no limit)
+        self.MEMORY_ANN_MAX_INDEXES = int(self._get_optional("MEMORY_ANN_MAX_INDEXES", "64"))
+        self.MEMORY_ANN_INDEX_IDLE_TTL_SECONDS = float(
+            self._get_optional("MEMORY_ANN_INDEX_IDLE_TTL_SECONDS", "3600")
+        )
+
+        # Rank memory records in Cosmos DB with VectorDistance; the container must be
+        # created with a vector policy for embeddings of this length
+        self.COSMOSDB_VECTOR_SEARCH = (
+            self._get_optional("COSMOSDB_VECTOR_SEARCH", "false").lower() == "true"
+        )
+        self.COSMOSDB_VECTOR_DIMENSIONS = int(
+            self._get_optional("COSMOSDB_VECTOR_DIMENSIONS", "1536")
+        )
+        # Plan and step IDs whose session_id is remembered for point reads
+        self.COSMOSDB_PARTITION_CACHE_SIZE = int(
+            self._get_optional("COSMOSDB_PARTITION_CACHE_SIZE", "10000")
+        )
+        # Plans and steps kept in the read-through document cache (0 disables it), and
+        # seconds an entry is served before its ETag is checked again
+        self.COSMOSDB_DOCUMENT_CACHE_SIZE = int(
+            self._get_optional("COSMOSDB_DOCUMENT_CACHE_SIZE", "2048")
+        )
+        self.COSMOSDB_DOCUMENT_CACHE_MAX_AGE_SECONDS = float(
+            self._get_optional("COSMOSDB_DOCUMENT_CACHE_MAX_AGE_SECONDS", "0")
+        )
+        # Background purges of a user's documents: delete requests in flight, documents
+        # read per page, the time to live set by a soft delete, and the time to live of
+        # the stored progress of each purge (0 keeps it)
+        self.PURGE_MAX_CONCURRENCY = int(self._get_optional("PURGE_MAX_CONCURRENCY", "10"))
+        self.PURGE_PAGE_SIZE = int(self._get_optional("PURGE_PAGE_SIZE", "1000"))
+        self.PURGE_SOFT_DELETE_TTL_SECONDS = int(
+            self._get_optional("PURGE_SOFT_DELETE_TTL_SECONDS", "1")
+        )
+        self.PURGE_JOB_TTL_SECONDS = int(self._get_optional("PURGE_JOB_TTL_SECONDS", "604800"))
+        # Seconds documents of each data type live after their last write, as
+        # "data_type=seconds" pairs, e.g. "message=2592000,agent_message=2592000"
+        self.COSMOSDB_TTL_BY_DATA_TYPE = self._get_optional("COSMOSDB_TTL_BY_DATA_TYPE", "")
+        # Replace existing containers without time to live to enable it when they are
+        # opened; needs control plane permissions, so off by default (a warning is logged)
+        self.COSMOSDB_ENABLE_TTL_ON_OPEN = (
+            self._get_optional("COSMOSDB_ENABLE_TTL_ON_OPEN", "false").lower() == "true"
+        )
+        # Sessions whose plan finished this many seconds ago are archived, into
+        # ARCHIVE_EXPORT_DIR when set and into Cosmos DB otherwise
+        self.ARCHIVE_MIN_AGE_SECONDS = float(
+            self._get_optional("ARCHIVE_MIN_AGE_SECONDS", "604800")
+        )
+        self.ARCHIVE_EXPORT_DIR = self._get_optional("ARCHIVE_EXPORT_DIR", "")
         
         # Azure AI settings
         self.AZURE_AI_SUBSCRIPTION_ID = self._get_required("AZURE_AI_SUBSCRIPTION_ID", "00000000-0000-0000-0000-000000000000")
@@ -58,8 +196,11 @@ class AppConfig:
         
         # Cached clients and resources
         self._azure_credentials = None
+        self._azure_async_credentials = None
         self._cosmos_client = None
         self._cosmos_database = None
+        self._cosmos_containers = {}
+        self._cosmos_lock = None
         self._ai_project_client = None
         
     def _get_required(self, name: str, default: Optional[str] = None) -> str:
@@ -150,6 +291,22 @@ class AppConfig:
             logging.warning("Failed to create DefaultAzureCredential: %s", exc)
             return None
 
+    def get_azure_async_credentials(self):
+        """Get async Azure credentials for the aio service clients.
+
+        Returns:
+            azure.identity.aio.DefaultAzureCredential instance shared by the pooled clients
+        """
+        if self._azure_async_credentials is not None:
+            return self._azure_async_credentials
+
+        try:
+            self._azure_async_credentials = AsyncDefaultAzureCredential()
+            return self._azure_async_credentials
+        except Exception as exc:
+            logging.warning("Failed to create async DefaultAzureCredential: %s", exc)
+            return None
+
     def get_cosmos_database_client(self):
         """Get a Cosmos DB client for the configured database.
 
@@ -159,7 +316,7 @@ class AppConfig:
         try:
             if self._cosmos_client is None:
                 self._cosmos_client = CosmosClient(
-                    self.COSMOSDB_ENDPOINT, credential=self.get_azure_credentials()
+                    self.COSMOSDB_ENDPOINT, credential=self.get_azure_async_credentials()
                 )
 
             if self._cosmos_database is None:
@@ -184,7 +341,7 @@ class AppConfig:
         try:
             if self._cosmos_client is None:
                 self._cosmos_client = CosmosClient(
-                    self.COSMOSDB_ENDPOINT, credential=self.get_azure_credentials()
+                    self.COSMOSDB_ENDPOINT, credential=self.get_azure_async_credentials()
                 )
             return self._cosmos_client
         except Exception as exc:
@@ -194,6 +351,109 @@ class AppConfig:
             )
             return None
 
+    async def get_cosmos_container(self, container_name: Optional[str] = None):
+        """Get the pooled container client shared by every CosmosMemoryContext.
+
+        The first call per container pays for token acquisition, the TLS handshake and
+        create_container_if_not_exists; later calls return the cached handle.
+
+        Args:
+            container_name: The container to open (defaults to COSMOSDB_CONTAINER)
+
+        Returns:
+            An azure.cosmos.aio ContainerProxy
+        """
+        container_name = container_name or self.COSMOSDB_CONTAINER
+        container = self._cosmos_containers.get(container_name)
+        if container is not None:
+            return container
+
+        if self._cosmos_lock is None:
+            self._cosmos_lock = asyncio.Lock()
+        async with self._cosmos_lock:
+            container = self._cosmos_containers.get(container_name)
+            if container is None:
+                database = self.get_cosmos_database_client()
+                container = await database.create_container_if_not_exists(
+                    id=container_name,
+                    partition_key=PartitionKey(path="/session_id"),
+                    **self.cosmos_container_options(),
+                )
+                container = await self.check_container_ttl(database, container)
+                self._cosmos_containers[container_name] = container
+                logging.info("Opened pooled CosmosDB container %s", container_name)
+        return container
+
+    def cosmos_container_options(self) -> Dict[str, Any]:
+        """Extra create_container_if_not_exists arguments.
+
+        Time to live is enabled without a default (-1), so only documents with a "ttl"
+        expire, and the vector policy is added when vector search is enabled.
+        """
+        options: Dict[str, Any] = {"default_ttl": -1}
+        if self.COSMOSDB_VECTOR_SEARCH:
+            options.update(vector_container_options(self.COSMOSDB_VECTOR_DIMENSIONS))
+        return options
+
+    async def check_container_ttl(self, database, container):
+        """Warn if time to live is not enabled on a container created before it was turned on.
+
+        create_container_if_not_exists leaves existing containers as they are, and without
+        time to live on the container the "ttl" of documents (COSMOSDB_TTL_BY_DATA_TYPE,
+        soft deletes) is ignored. Only with COSMOSDB_ENABLE_TTL_ON_OPEN is the container
+        replaced with a default of -1; that is a control plane write needing more than
+        data plane permissions, and it is skipped for containers with a vector policy,
+        which replace_container would not keep.
+
+        Returns:
+            The container client to use from now on
+        """
+        hint = "enable it with `az cosmosdb sql container update --ttl -1`"
+        try:
+            properties = await container.read()
+            if "defaultTtl" in properties:
+                return container
+            if not self.COSMOSDB_ENABLE_TTL_ON_OPEN or "vectorEmbeddingPolicy" in properties:
+                logging.warning(
+                    "Time to live is not enabled on CosmosDB container %s, so documents will not expire; %s",
+                    properties.get("id"),
+                    hint,
+                )
+                return container
+            container = await database.replace_container(
+                container,
+                partition_key=PartitionKey(path="/session_id"),
+                indexing_policy=properties.get("indexingPolicy"),
+                default_ttl=-1,
+            )
+            logging.info("Enabled time to live on CosmosDB container %s", properties.get("id"))
+        except Exception as exc:
+            logging.warning(
+                "Could not check or enable time to live on CosmosDB container %s (%s); %s",
+                getattr(container, "id", container),
+                exc,
+                hint,
+            )
+        return container
+
+    async def close_cosmos_client(self) -> None:
+        """Close the pooled Cosmos DB client and forget the cached container handles."""
+        client = self._cosmos_client
+        credential = self._azure_async_credentials
+        self._cosmos_client = None
+        self._cosmos_database = None
+        self._cosmos_containers = {}
+        self._cosmos_lock = None
+        self._azure_async_credentials = None
+
+        for resource in (client, credential):
+            if resource is None:
+                continue
+            try:
+                await resource.close()
+            except Exception as exc:
+                logging.warning("Error closing pooled Azure client: %s", exc)
+
     def create_kernel(self):
         """Creates a new Semantic Kernel instance.
 
@@ -1,18 +1,33 @@
 # app_kernel.py
 import asyncio
+import json
 import logging
+import os
 import uuid
-from typing import Dict, List, Optional
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 # FastAPI imports
-from fastapi import FastAPI, HTTPException, Query, Request, APIRouter
+from fastapi import FastAPI, HTTPException, Query, Request, Response, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Open the shared clients before the first request and release them at shutdown."""
+    await open_shared_clients()
+    try:
+        yield
+    finally:
+        await close_shared_clients()
+
+
 # Initialize the FastAPI app first with basic health endpoint
 app = FastAPI(
+    lifespan=lifespan,
     title="Darbot Agent Engine API",
     description="""
     ## Multi-Agent Custom Automation Engine
@@ -122,9 +137,57 @@ except ImportError as e:
         async def create_agent(*args, **kwargs):
             return None
         @staticmethod
-        def clear_cache():
+        def clear_cache(session_id=None):
             pass
 
+        @staticmethod
+        def cache_stats():
+            return {}
+
+try:
+    from .kernel_agents.agent_definition_cache import agent_definition_cache
+except ImportError as e:
+    logging.warning(f"Failed to import agent_definition_cache: {e}")
+    agent_definition_cache = None
+
+try:
+    from .context.ann_index import ann_index_registry
+except ImportError as e:
+    logging.warning(f"Failed to import ann_index_registry: {e}")
+    ann_index_registry = None
+
+try:
+    from .context.document_cache import document_cache
+except ImportError as e:
+    logging.warning(f"Failed to import document_cache: {e}")
+    document_cache = None
+
+try:
+    from .context.purge import purge_jobs
+except ImportError as e:
+    logging.warning(f"Failed to import purge_jobs: {e}")
+    purge_jobs = None
+
+try:
+    from .context.retention import ArchiveUnavailableError
+except ImportError as e:
+    logging.warning(f"Failed to import ArchiveUnavailableError: {e}")
+
+    class ArchiveUnavailableError(Exception):
+        pass
+
+try:
+    from .context.local_store import close_shared_local_store
+except ImportError as e:
+    logging.warning(f"Failed to import close_shared_local_store: {e}")
+    close_shared_local_store = None
+
+try:
+    from .utils.token_budget import preload_encoding
+except ImportError as e:
+    logging.warning(f"Failed to import preload_encoding: {e}")
+    preload_encoding = None
+
 try:
     from .middleware.health_check import HealthCheckMiddleware
 except ImportError as e:
@@ -156,8 +219,7 @@ except ImportError as e:
     logging.warning(f"Failed to import message models: {e}")
     # Create mock Pydantic classes for FastAPI compatibility
     from pydantic import BaseModel
-    from typing import List, Optional
-    
+
     class AgentMessage(BaseModel):
         id: Optional[str] = None
         content: Optional[str] = None
@@ -224,8 +286,7 @@ except ImportError as e:
             if session_id not in self._plans:
                 # Create a mock plan
                 from pydantic import BaseModel
-                from typing import List, Optional
-                
+
                 class MockPlan(BaseModel):
                     id: str = f"plan_{session_id}"
                     session_id: str = session_id
@@ -477,11 +538,77 @@ async def get_liveness():
     """
     return {"status": "alive", "service": "Darbot Agent Engine"}
 
+
+@app.get("/api/health/cache", tags=["health"])
+async def get_cache_health():
+    """
+    Cache statistics.
+
+    Returns the size, hit/miss counters and eviction counts of the per-session agent caches,
+    and the hit rate of the plan and step document cache.
+    """
+    caches = AgentFactory.cache_stats()
+    if document_cache is not None:
+        caches["documents"] = document_cache.stats()
+    return {"service": "Darbot Agent Engine", "caches": caches}
+
 # Remove duplicate health endpoint - the primary one is defined at the top
 
 frontend_url = Config.FRONTEND_SITE_NAME
 
 # Add this near the top of your app.py, after initializing the app
+# Response header carrying the cursor for the next page of a paginated listing
+CONTINUATION_TOKEN_HEADER = "X-Continuation-Token"
+
+
+def set_continuation_token(response: Response, cursor: Optional[str]) -> None:
+    """Expose the next page's cursor on a paginated response."""
+    if cursor:
+        response.headers[CONTINUATION_TOKEN_HEADER] = cursor
+
+
+# Formats of a streamed listing: one JSON document per line, or a single JSON array
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+def stream_pages(pages: AsyncIterator[List[Any]], stream_format: str) -> StreamingResponse:
+    """Stream pages of models or documents without collecting them first.
+
+    Each page is encoded and sent as one chunk as soon as the store yields it, so the
+    memory used stays at one page whatever the size of the listing. If reading a page
+    fails the error is raised, which aborts the response: a JSON array is left unclosed
+    and the chunked body unterminated, so a client cannot take it for a complete listing.
+    """
+
+    def encode(item: Any) -> str:
+        if hasattr(item, "model_dump_json"):
+            return item.model_dump_json()
+        return json.dumps(item, default=str)
+
+    async def body():
+        json_array = stream_format == "json"
+        first = True
+        if json_array:
+            yield "["
+        try:
+            async for page in pages:
+                if not page:
+                    continue
+                if json_array:
+                    yield ("" if first else ",") + ",".join(encode(item) for item in page)
+                else:
+                    yield "".join(encode(item) + "\n" for item in page)
+                first = False
+        except Exception as e:
+            # The status line has been sent; abort rather than end the listing normally
+            logging.exception(f"Failed to stream listing, aborting the response: {e}")
+            raise
+        if json_array:
+            yield "]"
+
+    return StreamingResponse(body(), media_type=STREAM_FORMATS[stream_format])
+
+
 app.add_middleware(
     CORSMiddleware,
     # Allow all origins during development (more permissive for testing)
@@ -489,6 +616,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CONTINUATION_TOKEN_HEADER],
 )
 
 # Configure health check with enhanced dependency checks
@@ -522,6 +650,43 @@ else:
     logging.info("HealthCheckMiddleware not available, skipping middleware setup")
 
 
+async def open_shared_clients():
+    """Open the pooled Cosmos DB client and load agent definitions before the first request arrives."""
+    if preload_encoding is not None:
+        # Loaded in a thread, as it may be downloaded; token counts are estimated until then
+        preload_encoding()
+    if config is None:
+        return
+    try:
+        client = config.get_ai_project_client()
+        if client is not None and agent_definition_cache is not None:
+            await agent_definition_cache.warm(client)
+    except Exception as e:
+        # Definitions are then looked up on the first agent creation instead
+        logging.warning(f"Failed to warm agent definition cache at startup: {e}")
+
+    if not config.COSMOSDB_ENDPOINT:
+        return
+    if os.environ.get("USE_LOCAL_STORAGE", "false").lower() == "true":
+        return
+    try:
+        await config.get_cosmos_container()
+    except Exception as e:
+        # Requests fall back to lazy initialization (or local memory) on their own
+        logging.warning(f"Failed to open pooled CosmosDB container at startup: {e}")
+
+
+async def close_shared_clients():
+    """Save ANN indexes and release the pooled Cosmos DB client, its credential and the shared local store."""
+    if ann_index_registry is not None:
+        ann_index_registry.save_all()
+    if close_shared_local_store is not None:
+        close_shared_local_store()
+    if config is None:
+        return
+    await config.close_cosmos_client()
+
+
 @app.post("/api/input_task")
 async def input_task_endpoint(input_task: InputTask, request: Request):
     """
@@ -964,10 +1129,20 @@ async def approve_step_endpoint(
 
 @app.get("/api/plans", response_model=List[PlanWithSteps])
 async def get_plans(
-    request: Request, session_id: Optional[str] = Query(None)
+    request: Request,
+    response: Response,
+    session_id: Optional[str] = Query(None),
+    limit: int = Query(5, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    include_steps: bool = Query(True),
 ) -> List[PlanWithSteps]:
     """
-    Retrieve plans for the current user.
+    Retrieve plans for the current user, newest first.
+
+    Listings are paginated: when more plans exist the response carries an
+    X-Continuation-Token header to pass back as `cursor`. With
+    include_steps=false the plans carry their step counts but not the steps,
+    which are then not read from storage.
 
     ---
     tags:
@@ -978,6 +1153,21 @@ async def get_plans(
         type: string
         required: false
         description: Optional session ID to retrieve plans for a specific session
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Maximum number of plans to return (default 5)
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: X-Continuation-Token of the previous page
+      - name: include_steps
+        in: query
+        type: boolean
+        required: false
+        description: Return the steps of each plan (default true) or only their counts
     responses:
       200:
         description: List of plans with steps for the user
@@ -1019,7 +1209,7 @@ async def get_plans(
                       type: string
                       description: Status of the step (e.g., planned, approved, completed)
       400:
-        description: Missing or invalid user information
+        description: Missing or invalid user information, or an invalid cursor
       404:
         description: Plan not found
     """
@@ -1046,20 +1236,33 @@ async def get_plans(
             raise HTTPException(status_code=404, detail="Plan not found")
 
         # Use get_steps_by_plan to match the original implementation
-        steps = await memory_store.get_steps_by_plan(plan_id=plan.id)
+        steps = await memory_store.get_steps_by_plan(
+            plan_id=plan.id, session_id=plan.session_id
+        )
         plan_with_steps = PlanWithSteps(**plan.model_dump(), steps=steps)
         plan_with_steps.update_step_counts()
         return [plan_with_steps]
 
-    all_plans = await memory_store.get_all_plans()
-    # Fetch steps for all plans concurrently
-    steps_for_all_plans = await asyncio.gather(
-        *[memory_store.get_steps_by_plan(plan_id=plan.id) for plan in all_plans]
-    )
-    # Create list of PlanWithSteps and update step counts
+    try:
+        all_plans, next_cursor = await memory_store.get_plans_page(limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    set_continuation_token(response, next_cursor)
     list_of_plans_with_steps = []
-    for plan, steps in zip(all_plans, steps_for_all_plans):
-        plan_with_steps = PlanWithSteps(**plan.model_dump(), steps=steps)
+    if not include_steps:
+        # Only the step statuses are read, for the counts
+        statuses_by_plan = await memory_store.get_step_statuses_by_plans(all_plans)
+        for plan in all_plans:
+            plan_with_steps = PlanWithSteps(**plan.model_dump())
+            plan_with_steps.update_step_counts(statuses_by_plan[plan.id])
+            list_of_plans_with_steps.append(plan_with_steps)
+        return list_of_plans_with_steps
+
+    # Fetch the steps of every plan on the page in one query
+    steps_by_plan = await memory_store.get_steps_by_plans(all_plans)
+    # Create list of PlanWithSteps and update step counts
+    for plan in all_plans:
+        plan_with_steps = PlanWithSteps(**plan.model_dump(), steps=steps_by_plan[plan.id])
         plan_with_steps.update_step_counts()
         list_of_plans_with_steps.append(plan_with_steps)
 
@@ -1132,9 +1335,18 @@ async def get_steps_by_plan(plan_id: str, request: Request) -> List[Step]:
 
 
 @app.get("/api/agent_messages/{session_id}", response_model=List[AgentMessage])
-async def get_agent_messages(session_id: str, request: Request) -> List[AgentMessage]:
+async def get_agent_messages(
+    session_id: str,
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+) -> List[AgentMessage]:
     """
-    Retrieve agent messages for a specific session.
+    Retrieve agent messages for a specific session, oldest first.
+
+    Without `limit` every message is returned. With it the messages are paginated and
+    an X-Continuation-Token header is set while more remain.
 
     ---
     tags:
@@ -1148,6 +1360,16 @@ async def get_agent_messages(session_id: str, request: Request) -> List[AgentMes
         type: string
         required: true
         description: The ID of the session to retrieve agent messages for
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Maximum number of messages to return
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: X-Continuation-Token of the previous page
     responses:
       200:
         description: List of agent messages associated with the specified session
@@ -1195,31 +1417,105 @@ async def get_agent_messages(session_id: str, request: Request) -> List[AgentMes
     kernel, memory_store = await initialize_runtime_and_context(
         session_id or "", user_id
     )
-    agent_messages = await memory_store.get_data_by_type("agent_message")
+    if limit is None and cursor is None:
+        return await memory_store.get_data_by_type("agent_message")
+    try:
+        agent_messages, next_cursor = await memory_store.get_agent_messages_page(
+            session_id, limit or 100, cursor
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    set_continuation_token(response, next_cursor)
     return agent_messages
 
 
-@app.delete("/api/messages")
-async def delete_all_messages(request: Request) -> Dict[str, str]:
+@app.get("/api/agent_messages/{session_id}/stream")
+async def stream_agent_messages(
+    session_id: str,
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|json)$"),
+) -> StreamingResponse:
+    """
+    Stream every agent message of a session, oldest first.
+
+    The messages are read from the store a page at a time and sent as they arrive, as
+    NDJSON (one message per line) or as a single JSON array.
+
+    ---
+    tags:
+      - Agent Messages
+    parameters:
+      - name: session_id
+        in: path
+        type: string
+        required: true
+        description: The ID of the session to stream agent messages for
+      - name: format
+        in: query
+        type: string
+        required: false
+        description: ndjson (default) or json
+    responses:
+      200:
+        description: Agent messages of the session
+      400:
+        description: Missing or invalid user information
+    """
+    authenticated_user = get_authenticated_user_details(request_headers=request.headers)
+    user_id = authenticated_user["user_principal_id"]
+    if not user_id:
+        track_event_if_configured(
+            "UserIdNotFound", {"status_code": 400, "detail": "no user"}
+        )
+        raise HTTPException(status_code=400, detail="no user")
+
+    kernel, memory_store = await initialize_runtime_and_context(session_id, user_id)
+    return stream_pages(memory_store.iter_data_by_type("agent_message"), format)
+
+
+@app.delete("/api/messages", status_code=202)
+async def delete_all_messages(
+    request: Request,
+    soft: bool = Query(False),
+) -> Dict[str, Any]:
     """
     Delete all messages across sessions.
     RBAC: Requires 'admin' role. Enforced via user_has_role utility.
+
+    The plans, sessions, steps and agent messages are removed by a background purge;
+    the response returns at once with the job, whose progress is at
+    /api/messages/purge/{job_id}. If a purge is already running for the user, that one
+    is returned. This responds 202 where it used to respond 200 after deleting
+    everything, so clients that need the documents gone must poll the job until its
+    status is completed.
     ---
     tags:
       - Messages
+    parameters:
+      - name: soft
+        in: query
+        type: boolean
+        required: false
+        description: Expire the documents with a time to live instead of deleting them, so
+          Cosmos DB removes them in the background (needs time to live on the container)
     responses:
-      200:
-        description: Confirmation of deletion
+      202:
+        description: The purge was started
         schema:
           type: object
           properties:
             status:
               type: string
-              description: Status message indicating all messages were deleted
+              description: Status message
+            job:
+              type: object
+              description: The purge job and its progress
       400:
         description: Missing or invalid user information
       403:
         description: User does not have required role
+      503:
+        description: Purges are not available
     """
     authenticated_user = get_authenticated_user_details(request_headers=request.headers)
     user_id = authenticated_user["user_principal_id"]
@@ -1229,29 +1525,173 @@ async def delete_all_messages(request: Request) -> Dict[str, str]:
     if not user_has_role(authenticated_user, "admin"):
         raise HTTPException(status_code=403, detail="User does not have required role: admin")
 
+    if purge_jobs is None:
+        raise HTTPException(status_code=503, detail="Purges are not available")
+
     # Initialize memory context
     kernel, memory_store = await initialize_runtime_and_context("", user_id)
-    logging.info("Deleting all plans")
-    await memory_store.delete_all_items("plan")
-    logging.info("Deleting all sessions")
-    await memory_store.delete_all_items("session")
-    logging.info("Deleting all steps")
-    await memory_store.delete_all_items("step")
-    logging.info("Deleting all agent_messages")
-    await memory_store.delete_all_items("agent_message")
-    # Clear the agent factory cache
-    AgentFactory.clear_cache()
-    return {"status": "All messages deleted"}
+    logging.info("Purging all plans, sessions, steps and agent_messages")
+    # Clear the agent factory cache once the documents are gone
+    job = purge_jobs.start(
+        memory_store, user_id, soft_delete=soft, on_finished=lambda job: AgentFactory.clear_cache()
+    )
+    return {"status": "Purge started", "job": job.model_dump(mode="json")}
+
+
+@app.get("/api/messages/purge/{job_id}")
+async def get_purge_status(job_id: str, request: Request) -> Dict[str, Any]:
+    """
+    Report the progress of a purge started by DELETE /api/messages.
+    ---
+    tags:
+      - Messages
+    parameters:
+      - name: job_id
+        in: path
+        type: string
+        required: true
+        description: The ID of the purge job
+    responses:
+      200:
+        description: The job, with its status and the documents found, deleted and failed
+      400:
+        description: Missing or invalid user information
+      404:
+        description: Purge job not found
+      503:
+        description: Purges are not available
+    """
+    authenticated_user = get_authenticated_user_details(request_headers=request.headers)
+    user_id = authenticated_user["user_principal_id"]
+    if not user_id:
+        raise HTTPException(status_code=400, detail="no user")
+
+    if purge_jobs is None:
+        raise HTTPException(status_code=503, detail="Purges are not available")
+
+    # The purge may run on another worker, which stores its progress
+    kernel, memory_store = await initialize_runtime_and_context("", user_id)
+    job = await purge_jobs.load(memory_store, job_id, user_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Purge job not found")
+    return job.model_dump(mode="json")
+
+
+@app.post("/api/sessions/archive")
+async def archive_finished_sessions(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    older_than_hours: Optional[float] = Query(None, ge=0),
+) -> Dict[str, Any]:
+    """
+    Archive the user's sessions whose plan completed or failed a while ago.
+    RBAC: Requires 'admin' role. Enforced via user_has_role utility.
+
+    The plan, steps and messages of each session are compacted into archive chunks
+    (or exported to ARCHIVE_EXPORT_DIR) and the originals deleted, so they no longer weigh
+    on queries over active sessions. Archived sessions are read with
+    /api/sessions/{session_id}/archive.
+    ---
+    tags:
+      - Sessions
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Most sessions archived by this request
+      - name: older_than_hours
+        in: query
+        type: number
+        required: false
+        description: Hours since the plan finished, ARCHIVE_MIN_AGE_SECONDS by default
+    responses:
+      200:
+        description: The sessions that were archived
+      400:
+        description: Missing or invalid user information
+      403:
+        description: User does not have required role
+    """
+    authenticated_user = get_authenticated_user_details(request_headers=request.headers)
+    user_id = authenticated_user["user_principal_id"]
+    if not user_id:
+        raise HTTPException(status_code=400, detail="no user")
+    if not user_has_role(authenticated_user, "admin"):
+        raise HTTPException(status_code=403, detail="User does not have required role: admin")
+
+    kernel, memory_store = await initialize_runtime_and_context("", user_id)
+    min_age_seconds = older_than_hours * 3600 if older_than_hours is not None else None
+    archived = await memory_store.archive_finished_sessions(limit=limit, min_age_seconds=min_age_seconds)
+    return {"status": f"Archived {len(archived)} sessions", "session_ids": archived}
+
+
+@app.get("/api/sessions/{session_id}/archive")
+async def get_archived_session(session_id: str, request: Request) -> List[Dict[str, Any]]:
+    """
+    Retrieve the plan, steps and messages of an archived session.
+    ---
+    tags:
+      - Sessions
+    parameters:
+      - name: session_id
+        in: path
+        type: string
+        required: true
+        description: The ID of the archived session
+    responses:
+      200:
+        description: The archived documents, as they were stored
+      400:
+        description: Missing or invalid user information
+      404:
+        description: The session has not been archived
+      409:
+        description: The archive was exported to a directory this instance cannot read
+    """
+    authenticated_user = get_authenticated_user_details(request_headers=request.headers)
+    user_id = authenticated_user["user_principal_id"]
+    if not user_id:
+        raise HTTPException(status_code=400, detail="no user")
+
+    kernel, memory_store = await initialize_runtime_and_context(session_id, user_id)
+    try:
+        documents = await memory_store.get_archived_session(session_id)
+    except ArchiveUnavailableError as e:
+        logging.warning(str(e))
+        raise HTTPException(status_code=409, detail="The archive was exported on another instance")
+    if not documents:
+        raise HTTPException(status_code=404, detail="Archived session not found")
+    return documents
 
 
 @app.get("/api/messages")
-async def get_all_messages(request: Request):
+async def get_all_messages(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+):
     """
-    Retrieve all messages across sessions.
+    Retrieve the user's messages across sessions.
     RBAC: Requires authenticated user. Logs user roles for audit.
+
+    Without `limit` every message is returned. With it the messages are paginated and
+    an X-Continuation-Token header is set while more remain.
     ---
     tags:
       - Messages
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Maximum number of messages to return
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: X-Continuation-Token of the previous page
     responses:
       200:
         description: List of all messages across sessions
@@ -1290,10 +1730,52 @@ async def get_all_messages(request: Request):
 
     # Initialize memory context
     kernel, memory_store = await initialize_runtime_and_context("", user_id)
-    message_list = await memory_store.get_all_items()
+    if limit is None and cursor is None:
+        return await memory_store.get_all_messages()
+    try:
+        message_list, next_cursor = await memory_store.get_messages_page(limit or 100, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    set_continuation_token(response, next_cursor)
     return message_list
 
 
+@app.get("/api/messages/stream")
+async def stream_all_messages(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|json)$"),
+) -> StreamingResponse:
+    """
+    Stream all of the user's messages across sessions.
+
+    Unlike /api/messages this is not paginated: the documents are read from the store
+    a page at a time and sent as they arrive, as NDJSON (one document per line) or as a
+    single JSON array, so the server holds one page however many there are.
+    RBAC: Requires authenticated user.
+    ---
+    tags:
+      - Messages
+    parameters:
+      - name: format
+        in: query
+        type: string
+        required: false
+        description: ndjson (default) or json
+    responses:
+      200:
+        description: All of the user's documents
+      400:
+        description: Missing or invalid user information
+    """
+    authenticated_user = get_authenticated_user_details(request_headers=request.headers)
+    user_id = authenticated_user["user_principal_id"]
+    if not user_id:
+        raise HTTPException(status_code=400, detail="no user")
+
+    kernel, memory_store = await initialize_runtime_and_context("", user_id)
+    return stream_pages(memory_store.iter_messages(), format)
+
+
 @app.get("/api/agent-tools")
 async def get_agent_tools():
     """
@@ -0,0 +1,71 @@
+"""
+Benchmark: cold-start latency of AgentFactory.create_all_agents.
+
+Every agent class is replaced with a stand-in whose ``create`` sleeps for a fixed
+round-trip time, which is what list_agents/create_agent against the AI project costs.
+
+Run from src/backend:
+    python -m benchmarks.bench_agent_factory --round-trip-ms 80
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from kernel_agents.agent_factory import AgentFactory  # noqa: E402
+
+
+def make_slow_agent_class(round_trip: float):
+    """Build an agent class whose create() costs one simulated control-plane round trip."""
+
+    class SlowAgent:
+        builds = 0
+
+        @classmethod
+        async def create(cls, **kwargs):
+            SlowAgent.builds += 1
+            await asyncio.sleep(round_trip)
+            agent = cls()
+            for key, value in kwargs.items():
+                setattr(agent, key, value)
+            return agent
+
+    return SlowAgent
+
+
+async def _cold_start(sessions: int) -> float:
+    start = time.perf_counter()
+    for index in range(sessions):
+        await AgentFactory.create_all_agents(f"bench-{index}", "bench-user", client=object())
+    return (time.perf_counter() - start) / sessions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--round-trip-ms", type=float, default=80.0)
+    args = parser.parse_args()
+
+    slow_agent = make_slow_agent_class(args.round_trip_ms / 1000)
+    agent_classes = {agent_type: slow_agent for agent_type in AgentFactory._get_agent_classes()}
+
+    results = {}
+    with patch.object(AgentFactory, "_get_agent_classes", return_value=agent_classes):
+        for label, concurrency in (("sequential", 1), ("concurrent", 8)):
+            AgentFactory.clear_cache()
+            with patch.object(AgentFactory, "_get_creation_concurrency", return_value=concurrency):
+                results[label] = asyncio.run(_cold_start(args.sessions))
+
+    for label, seconds in results.items():
+        round_trips = seconds / (args.round_trip_ms / 1000)
+        print(f"{label:>12}: {seconds * 1000:8.1f} ms per session (~{round_trips:.1f} round trips)")
+    print(f"{'speedup':>12}: {results['sequential'] / results['concurrent']:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: IVF index recall and latency against an exact float32 scan.
+
+Vectors are drawn around random cluster centres, as sentence embeddings of related
+memories tend to be. Each nprobe setting is run over the same queries.
+
+Run from src/backend:
+    python -m benchmarks.bench_ann_index --records 100000 --dim 384 --queries 50
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from context.ann_index import IVFIndex  # noqa: E402
+from context.vector_search import cosine_scores, stack_embeddings, top_k_indices  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=1.0, help="Spread around each cluster centre")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centres = rng.normal(size=(args.clusters, args.dim))
+    vectors = centres[rng.integers(args.clusters, size=args.records)]
+    vectors = vectors + args.noise * rng.normal(size=vectors.shape)
+    queries = centres[rng.integers(args.clusters, size=args.queries)]
+    queries = queries + args.noise * rng.normal(size=queries.shape)
+    keys = [str(i) for i in range(args.records)]
+
+    matrix, norms = stack_embeddings(vectors)
+    start = time.perf_counter()
+    exact = [set(top_k_indices(cosine_scores(q, matrix, norms), args.limit).tolist()) for q in queries]
+    exact_ms = (time.perf_counter() - start) / args.queries * 1000
+
+    index = IVFIndex()
+    start = time.perf_counter()
+    index.add(keys, vectors)
+    index.rebuild()
+    index.mark_ready()
+    build_s = time.perf_counter() - start
+
+    print(f"{args.records} records, dim {args.dim}, {index.nlist} lists, built in {build_s:.2f} s")
+    print(f"{'search':>14} {'ms/query':>10} {'recall@k':>10}")
+    print(f"{'exact scan':>14} {exact_ms:10.2f} {1.0:10.3f}")
+    for nprobe in args.nprobe:
+        found = 0
+        start = time.perf_counter()
+        results = [index.search(q, args.limit, nprobe=nprobe) for q in queries]
+        elapsed_ms = (time.perf_counter() - start) / args.queries * 1000
+        for hits, truth in zip(results, exact):
+            found += len({int(key) for key, _ in hits} & truth)
+        print(f"{f'nprobe={nprobe}':>14} {elapsed_ms:10.2f} {found / (args.limit * args.queries):10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: building the conversation history for every step of a plan.
+
+"rebuild" is the former _execute_step: for each step, query the plan and all of its steps,
+then concatenate the history of the earlier steps with +=. "buffer" reads the plan, whose
+step_history holds the completed steps, renders it once with str.join, and appends the
+step to it when it completes.
+
+Run from src/backend:
+    python -m benchmarks.bench_conversation_history --steps 6 20 50 --data-plane-ms 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.cosmos_standin import StandInContainer, StandInLatency  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from kernel_agents.conversation_history import ConversationHistoryBuilder  # noqa: E402
+from models.messages_kernel import AgentType, Plan, Step  # noqa: E402
+
+REPLY = "reply " * 300
+
+
+async def _seed(count, data_plane_ms):
+    memory = CosmosMemoryContext("session", "bench", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory")
+    plan = Plan(session_id="session", user_id="bench", initial_goal="goal", summary="summary")
+    steps = [
+        Step(plan_id=plan.id, session_id="session", user_id="bench", action=f"action {i}", agent=AgentType.HR)
+        for i in range(count)
+    ]
+    await memory.add_plan_with_steps(plan, steps)
+    memory._container._latency = StandInLatency(data_plane=data_plane_ms / 1000)
+    return memory, plan, steps
+
+
+async def _rebuild(memory, plan, steps):
+    for step in steps:
+        current = await memory.get_plan_by_session(session_id="session")
+        stored = await memory.get_steps_by_plan(current.id, session_id="session")
+        history = ""
+        history += f"The user's task was:\n{current.summary}\n\n"
+        for i, previous in enumerate(stored):
+            if previous.id == step.id:
+                break
+            history += f"Step {i}\n"
+            history += f"Group_Chat_Manager: {previous.action}\n"
+            history += f"{previous.agent.value}: {previous.agent_reply}\n"
+        step.agent_reply = REPLY
+        await memory.update_step(step)
+
+
+async def _buffer(memory, plan, steps):
+    builder = ConversationHistoryBuilder(max_tokens=0)
+    for step in steps:
+        current = await memory.get_plan(plan.id, "session")
+        builder.render(current)
+        step.agent_reply = REPLY
+        await memory.update_step(step)
+        await memory.append_step_history(plan.id, "session", builder.entry(step))
+
+
+async def _run(args):
+    print(f"{'steps':>6} {'variant':>8} {'seconds':>8} {'requests':>9} {'RU':>9}")
+    for count in args.steps:
+        for label, execute in (("rebuild", _rebuild), ("buffer", _buffer)):
+            memory, plan, steps = await _seed(count, args.data_plane_ms)
+            container = memory._container
+            container.round_trips = 0
+            container.total_request_charge = 0.0
+            start = time.perf_counter()
+            await execute(memory, plan, steps)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{count:>6} {label:>8} {elapsed:8.2f} {container.round_trips:9d} "
+                f"{container.total_request_charge:9.1f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, nargs="+", default=[6, 20, 50])
+    parser.add_argument("--data-plane-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: 1k-item upserts and deletes, one request per item vs the batching layer.
+
+The per-item numbers call upsert_memory_record / remove_memory_record in a loop, which is
+what upsert_batch / remove_batch did before; the batched numbers use the current
+implementation (transactional batches of 100 per session partition).
+
+Run from src/backend:
+    python -m benchmarks.bench_cosmos_bulk --items 1000 --data-plane-ms 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.cosmos_standin import StandInContainer, StandInLatency  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from semantic_kernel.memory.memory_record import MemoryRecord  # noqa: E402
+
+COLLECTION = "bench"
+
+
+def _records(count: int):
+    rng = np.random.default_rng(0)
+    return [
+        MemoryRecord.local_record(
+            id=f"record-{index}",
+            text=f"memory {index}",
+            description=None,
+            additional_metadata=None,
+            embedding=rng.random(8, dtype=np.float32),
+        )
+        for index in range(count)
+    ]
+
+
+def _memory(latency: StandInLatency) -> CosmosMemoryContext:
+    memory = CosmosMemoryContext("bench-session", "bench-user", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory", latency)
+    return memory
+
+
+async def _per_item(records, latency: StandInLatency):
+    memory = _memory(latency)
+    start = time.perf_counter()
+    for record in records:
+        await memory.upsert_memory_record(COLLECTION, record)
+    upsert = time.perf_counter() - start
+    trips_after_upsert = memory._container.round_trips
+
+    start = time.perf_counter()
+    for record in records:
+        await memory.remove_memory_record(COLLECTION, record.id)
+    delete = time.perf_counter() - start
+    return upsert, delete, trips_after_upsert, memory._container.round_trips - trips_after_upsert
+
+
+async def _batched(records, latency: StandInLatency):
+    memory = _memory(latency)
+    start = time.perf_counter()
+    await memory.upsert_batch(COLLECTION, records)
+    upsert = time.perf_counter() - start
+    trips_after_upsert = memory._container.round_trips
+
+    start = time.perf_counter()
+    await memory.remove_batch(COLLECTION, [record.id for record in records])
+    delete = time.perf_counter() - start
+    assert len(memory._container) == 0
+    return upsert, delete, trips_after_upsert, memory._container.round_trips - trips_after_upsert
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--data-plane-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    latency = StandInLatency(data_plane=args.data_plane_ms / 1000)
+    records = _records(args.items)
+    results = {
+        "per-item": asyncio.run(_per_item(records, latency)),
+        "batched": asyncio.run(_batched(records, latency)),
+    }
+
+    for label, (upsert, delete, upsert_trips, delete_trips) in results.items():
+        print(
+            f"{label:>9}: upsert {upsert * 1000:8.1f} ms ({upsert_trips} requests)"
+            f"  delete {delete * 1000:8.1f} ms ({delete_trips} requests)"
+        )
+    before, after = results["per-item"], results["batched"]
+    print(f"{'speedup':>9}: upsert {before[0] / after[0]:6.1f}x  delete {before[1] / after[1]:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: per-request CosmosClient vs the pooled client shared by every CosmosMemoryContext.
+
+Each simulated request builds a CosmosMemoryContext, initializes it and writes one item,
+which mirrors what initialize_runtime_and_context does for every API call.
+
+Run from src/backend:
+    python -m benchmarks.bench_cosmos_pool --requests 200 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app_config import config  # noqa: E402
+from benchmarks.cosmos_standin import StandInCosmosClient, StandInLatency  # noqa: E402
+from context import cosmos_memory_kernel  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from models.messages_kernel import Session  # noqa: E402
+
+ENDPOINT = "https://standin.documents.azure.com"
+
+
+async def _run(requests: int, concurrency: int, pooled: bool) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    # A different endpoint keeps the context on the legacy client-per-request path
+    endpoint = ENDPOINT if pooled else ENDPOINT + ":443"
+
+    async def one_request() -> None:
+        async with semaphore:
+            session_id = str(uuid.uuid4())
+            context = CosmosMemoryContext(
+                session_id, "bench-user", cosmos_endpoint=endpoint
+            )
+            await context.initialize()
+            await context.add_item(
+                Session(id=session_id, user_id="bench-user", current_status="active")
+            )
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one_request() for _ in range(requests)])
+    elapsed = time.perf_counter() - start
+    await config.close_cosmos_client()
+    return requests / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--connect-ms", type=float, default=40.0, help="token + TLS cost per new client")
+    parser.add_argument("--control-plane-ms", type=float, default=25.0, help="create_container_if_not_exists")
+    parser.add_argument("--data-plane-ms", type=float, default=5.0, help="per item operation")
+    args = parser.parse_args()
+
+    latency = StandInLatency(
+        data_plane=args.data_plane_ms / 1000,
+        control_plane=args.control_plane_ms / 1000,
+        connect=args.connect_ms / 1000,
+    )
+
+    with patch.object(config, "COSMOSDB_ENDPOINT", ENDPOINT), patch.object(
+        config, "COSMOSDB_DATABASE", "bench"
+    ), patch.object(config, "COSMOSDB_CONTAINER", "memory"), patch(
+        "app_config.CosmosClient", StandInCosmosClient
+    ), patch("app_config.AsyncDefaultAzureCredential"), patch.object(
+        cosmos_memory_kernel, "CosmosClient", StandInCosmosClient
+    ), patch.object(cosmos_memory_kernel, "DefaultAzureCredential"):
+        results = {}
+        for label, pooled in (("per-request client", False), ("pooled client", True)):
+            StandInCosmosClient.reset(latency)
+            rps = asyncio.run(_run(args.requests, args.concurrency, pooled))
+            results[label] = (rps, StandInCosmosClient.instances_created)
+
+    for label, (rps, clients) in results.items():
+        print(f"{label:>20}: {rps:8.1f} req/s  ({clients} CosmosClient instances)")
+    before, after = results["per-request client"][0], results["pooled client"][0]
+    print(f"{'speedup':>20}: {after / before:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: get_nearest_matches ranked client-side vs with Cosmos DB VectorDistance.
+
+Both variants run against the Cosmos stand-in; the client-side one queries a container
+without a vector policy, so it also shows the one-off cost of the rejected vector query.
+Bytes returned are the serialized query pages sent to the app tier.
+
+Run from src/backend:
+    python -m benchmarks.bench_cosmos_vector --records 10000 --dim 384 --queries 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app_config import config  # noqa: E402
+from benchmarks.cosmos_standin import StandInContainer, StandInLatency  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from semantic_kernel.memory.memory_record import MemoryRecord  # noqa: E402
+
+
+async def _run(container, records, queries, limit):
+    memory = CosmosMemoryContext(
+        "bench", "bench", cosmos_container=container.id, cosmos_endpoint="https://standin"
+    )
+    memory._container = container
+    await memory.upsert_batch("docs", records)
+    container.bytes_returned = 0
+    container.total_request_charge = 0.0
+
+    start = time.perf_counter()
+    for query in queries:
+        await memory.get_nearest_matches("docs", query, limit=limit)
+    elapsed = time.perf_counter() - start
+    count = len(queries)
+    return elapsed / count * 1000, container.bytes_returned / count, container.total_request_charge / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=10_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--data-plane-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    config.COSMOSDB_VECTOR_SEARCH = True
+    rng = np.random.default_rng(0)
+    records = [
+        MemoryRecord.local_record(
+            id=f"record-{index}", text=f"memory {index}", description=None, additional_metadata=None,
+            embedding=vector,
+        )
+        for index, vector in enumerate(rng.normal(size=(args.records, args.dim)))
+    ]
+    queries = rng.normal(size=(args.queries, args.dim))
+    latency = StandInLatency(data_plane=args.data_plane_ms / 1000)
+
+    results = {
+        "client-side": asyncio.run(_run(StandInContainer("plain", latency), records, queries, args.limit)),
+        "VectorDistance": asyncio.run(
+            _run(StandInContainer("vector", latency, vector_search=True), records, queries, args.limit)
+        ),
+    }
+
+    print(f"{args.records} records, dim {args.dim}, top {args.limit}, {args.queries} queries")
+    print(f"{'ranking':>16} {'ms/query':>10} {'KB/query':>10} {'RU/query':>10}")
+    for name, (ms, payload, charge) in results.items():
+        print(f"{name:>16} {ms:10.1f} {payload / 1024:10.1f} {charge:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
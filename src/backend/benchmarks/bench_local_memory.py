@@ -0,0 +1,134 @@
+"""
+Benchmark: LocalMemoryContext accessors at 100k items, flat lists vs the indexed
+in-memory store vs the SQLite (WAL) store.
+
+``ListMemoryContext`` reproduces the previous list-based lookups (linear scans and
+list rebuilds on delete) so all three can be timed on the same data.
+
+Run from src/backend:
+    python -m benchmarks.bench_local_memory --items 100000 --operations 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from context.local_memory_kernel import LocalMemoryContext  # noqa: E402
+from context.local_store import InMemoryLocalStore, SQLiteLocalStore  # noqa: E402
+from models.messages_kernel import Plan, Step  # noqa: E402
+
+STEPS_PER_PLAN = 10
+
+
+class ListMemoryContext:
+    """The flat-list LocalMemoryContext accessors, kept for comparison."""
+
+    def __init__(self):
+        self._local_storage = {"plans": [], "steps": []}
+
+    async def add_item(self, item):
+        key = "plans" if isinstance(item, Plan) else "steps"
+        self._local_storage[key].append(item)
+
+    async def get_step(self, step_id, session_id=None):
+        for step in self._local_storage["steps"]:
+            if step.id == step_id:
+                return step
+        return None
+
+    async def get_steps_by_plan(self, plan_id):
+        return [s for s in self._local_storage["steps"] if s.plan_id == plan_id]
+
+    async def update_item(self, item):
+        for i, step in enumerate(self._local_storage["steps"]):
+            if step.id == item.id:
+                self._local_storage["steps"][i] = item
+                return
+        self._local_storage["steps"].append(item)
+
+    async def delete_item(self, item_id, item_class):
+        self._local_storage["steps"] = [s for s in self._local_storage["steps"] if s.id != item_id]
+
+
+def _dataset(items: int):
+    plans, steps = [], []
+    for plan_index in range(max(1, items // (STEPS_PER_PLAN + 1))):
+        session_id = f"session-{plan_index % 1000}"
+        plan = Plan(session_id=session_id, user_id="bench", initial_goal="goal")
+        plans.append(plan)
+        steps.extend(
+            Step(plan_id=plan.id, session_id=session_id, user_id="bench", action="act", agent="Hr_Agent")
+            for _ in range(STEPS_PER_PLAN)
+        )
+    return plans, steps
+
+
+async def _run(memory, plans, steps, operations: int, seed: int = 0):
+    rng = random.Random(seed)
+    timings = {}
+
+    start = time.perf_counter()
+    for item in plans + steps:
+        await memory.add_item(item)
+    timings["add (all items)"] = time.perf_counter() - start
+
+    sample_steps = rng.sample(steps, operations)
+    sample_plans = rng.sample(plans, min(operations, len(plans)))
+
+    start = time.perf_counter()
+    for step in sample_steps:
+        await memory.get_step(step.id, step.session_id)
+    timings["get_step"] = (time.perf_counter() - start) / operations
+
+    start = time.perf_counter()
+    for plan in sample_plans:
+        await memory.get_steps_by_plan(plan.id)
+    timings["get_steps_by_plan"] = (time.perf_counter() - start) / len(sample_plans)
+
+    start = time.perf_counter()
+    for step in sample_steps:
+        await memory.update_item(step)
+    timings["update_item"] = (time.perf_counter() - start) / operations
+
+    start = time.perf_counter()
+    for step in sample_steps:
+        await memory.delete_item(step.id, Step)
+    timings["delete_item"] = (time.perf_counter() - start) / operations
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--operations", type=int, default=200)
+    args = parser.parse_args()
+
+    plans, steps = _dataset(args.items)
+    print(f"{len(plans) + len(steps)} items ({len(plans)} plans, {len(steps)} steps)")
+    lists = asyncio.run(_run(ListMemoryContext(), plans, steps, args.operations))
+    indexed = asyncio.run(
+        _run(LocalMemoryContext("bench", "bench", store=InMemoryLocalStore()), plans, steps, args.operations)
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteLocalStore(os.path.join(directory, "bench.db"))
+        sqlite = asyncio.run(_run(LocalMemoryContext("bench", "bench", store=store), plans, steps, args.operations))
+        store.close()
+
+    print(f"{'operation':>20} {'lists':>12} {'indexed':>12} {'sqlite':>12} {'speedup':>10}")
+    for name in lists:
+        unit = "s" if name.startswith("add") else "us"
+        scale = 1 if unit == "s" else 1e6
+        print(
+            f"{name:>20} {lists[name] * scale:10.1f}{unit:>2} {indexed[name] * scale:10.1f}{unit:>2}"
+            f" {sqlite[name] * scale:10.1f}{unit:>2} {lists[name] / indexed[name]:9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
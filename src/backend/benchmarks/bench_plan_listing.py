@@ -0,0 +1,83 @@
+"""
+Benchmark: GET /api/plans step loading, one query per plan vs one batched query.
+
+The per-plan variant reproduces the previous listing: get_steps_by_plan for every plan
+on the page, run concurrently, each a cross-partition query. The batched variant is
+get_steps_by_plans, one query scoped to the plans' session partitions. "statuses" is
+get_step_statuses_by_plans, the same query projected to plan_id and status, as used by
+GET /api/plans?include_steps=false. Steps carry agent replies of --reply-chars characters.
+
+Run from src/backend:
+    python -m benchmarks.bench_plan_listing --sessions 200 --page-size 5 --data-plane-ms 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.cosmos_standin import StandInContainer, StandInLatency  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from models.messages_kernel import Plan, Step  # noqa: E402
+
+
+async def _seed(memory, sessions, steps_per_plan, reply_chars):
+    for i in range(sessions):
+        plan = Plan(session_id=f"session-{i}", user_id="bench", initial_goal=f"goal {i}")
+        steps = [
+            Step(
+                plan_id=plan.id, session_id=plan.session_id, user_id="bench", action=f"step {n}",
+                agent="Hr_Agent", agent_reply="r" * reply_chars,
+            )
+            for n in range(steps_per_plan)
+        ]
+        await memory.add_plan_with_steps(plan, steps)
+
+
+async def _run(args):
+    container = StandInContainer("memory")
+    memory = CosmosMemoryContext("bench", "bench", cosmos_endpoint="https://standin")
+    memory._container = container
+    await _seed(memory, args.sessions, args.steps, args.reply_chars)
+    container._latency = StandInLatency(data_plane=args.data_plane_ms / 1000)
+
+    variants = {
+        "per plan": lambda plans: asyncio.gather(*[memory.get_steps_by_plan(p.id) for p in plans]),
+        "batched": memory.get_steps_by_plans,
+        "statuses": memory.get_step_statuses_by_plans,
+    }
+    print(f"{args.sessions} sessions, {args.steps} steps per plan, page of {args.page_size} plans")
+    print(f"{'steps query':>12} {'ms/page':>10} {'queries':>8} {'RU/page':>10} {'KB/page':>10}")
+    for name, fetch in variants.items():
+        container.queries_executed = 0
+        container.total_request_charge = 0.0
+        container.bytes_returned = 0
+        start = time.perf_counter()
+        for _ in range(args.pages):
+            plans, _ = await memory.get_plans_page(args.page_size)
+            await fetch(plans)
+        elapsed_ms = (time.perf_counter() - start) / args.pages * 1000
+        print(
+            f"{name:>12} {elapsed_ms:10.1f} {container.queries_executed / args.pages:8.0f} "
+            f"{container.total_request_charge / args.pages:10.1f} "
+            f"{container.bytes_returned / args.pages / 1024:10.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--reply-chars", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--data-plane-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: plan and step lookups by ID, cross-partition queries vs point reads.
+
+"fan-out" is the lookup without a known session: a query across every session
+partition. "partition" is the same lookup once the session is known, either passed in
+or found in the partition key cache: a point read for plans and steps, and a single
+partition query for the steps of a plan.
+
+Run from src/backend:
+    python -m benchmarks.bench_point_reads --sessions 500 --lookups 50 --data-plane-ms 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.cosmos_standin import StandInContainer, StandInLatency  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from context.partition_cache import partition_key_cache  # noqa: E402
+from models.messages_kernel import Plan, Step  # noqa: E402
+
+
+async def _measure(container, lookups, call):
+    container.total_request_charge = 0.0
+    start = time.perf_counter()
+    for item in lookups:
+        await call(item)
+    elapsed = time.perf_counter() - start
+    return elapsed / len(lookups) * 1000, container.total_request_charge / len(lookups)
+
+
+async def _run(args):
+    container = StandInContainer("memory")
+    memory = CosmosMemoryContext("", "bench", cosmos_endpoint="https://standin")
+    memory._container = container
+    plans = []
+    for i in range(args.sessions):
+        plan = Plan(session_id=f"session-{i}", user_id="bench", initial_goal=f"goal {i}")
+        step = Step(plan_id=plan.id, session_id=plan.session_id, user_id="bench", action="act", agent="Hr_Agent")
+        await memory.add_plan_with_steps(plan, [step])
+        plans.append((plan, step))
+    container._latency = StandInLatency(data_plane=args.data_plane_ms / 1000)
+    lookups = plans[:: max(len(plans) // args.lookups, 1)][: args.lookups]
+
+    variants = {
+        "get_plan": lambda pair: memory.get_plan(pair[0].id),
+        "get_step": lambda pair: memory.get_step(pair[1].id),
+        "get_steps_by_plan": lambda pair: memory.get_steps_by_plan(pair[0].id),
+    }
+    print(f"{args.sessions} session partitions, {len(lookups)} lookups")
+    print(f"{'lookup':>18} {'variant':>10} {'ms/call':>8} {'RU/call':>8}")
+    for name, call in variants.items():
+        partition_key_cache.clear()
+        for label in ("fan-out", "partition"):
+            # The first pass fills the cache, so the second one reads by partition
+            ms, charge = await _measure(container, lookups, call)
+            print(f"{name:>18} {label:>10} {ms:8.1f} {charge:8.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--lookups", type=int, default=50)
+    parser.add_argument("--data-plane-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
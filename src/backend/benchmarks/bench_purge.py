@@ -0,0 +1,84 @@
+"""
+Benchmark: clearing a user's documents, per data type vs a background purge.
+
+"per type" is the former DELETE /api/messages: delete_all_items for plan, session, step
+and agent_message one after another, each collecting its matches before deleting them.
+"purge" is the PurgeJobManager: one streamed query for all four data types, each page
+deleted in batches per partition with bounded concurrency. "soft purge" sets a time to
+live on the documents instead, so Cosmos DB deletes them with spare throughput.
+
+Run from src/backend:
+    python -m benchmarks.bench_purge --sessions 200 --messages 20 --data-plane-ms 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.cosmos_standin import StandInContainer, StandInLatency  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from context.purge import PURGE_DATA_TYPES, PurgeJobManager  # noqa: E402
+from models.messages_kernel import AgentMessage, Plan, Step  # noqa: E402
+
+
+async def _seed(args):
+    container = StandInContainer("memory", default_ttl=-1)
+    memory = CosmosMemoryContext("", "bench", cosmos_endpoint="https://standin")
+    memory._container = container
+    for i in range(args.sessions):
+        plan = Plan(session_id=f"session-{i}", user_id="bench", initial_goal="goal")
+        steps = [Step(plan_id=plan.id, session_id=plan.session_id, user_id="bench", action="act", agent="Hr_Agent")
+                 for _ in range(5)]
+        messages = [
+            AgentMessage(session_id=plan.session_id, user_id="bench", plan_id=plan.id, content="m", source="Hr_Agent")
+            for _ in range(args.messages)
+        ]
+        await memory.add_items([plan, *steps, *messages])
+    container._latency = StandInLatency(data_plane=args.data_plane_ms / 1000)
+    return memory, container
+
+
+async def _per_type(memory):
+    for data_type in PURGE_DATA_TYPES:
+        await memory.delete_all_items(data_type)
+
+
+async def _purge(memory, soft_delete):
+    manager = PurgeJobManager()
+    job = manager.start(memory, "bench", soft_delete=soft_delete)
+    await manager.wait(job.id)
+
+
+async def _run(args):
+    variants = {
+        "per type": _per_type,
+        "purge": lambda memory: _purge(memory, False),
+        "soft purge": lambda memory: _purge(memory, True),
+    }
+    print(f"{args.sessions} sessions, {args.sessions * (6 + args.messages)} documents")
+    print(f"{'variant':>12} {'seconds':>8} {'requests':>9} {'RU':>9}")
+    for label, clear in variants.items():
+        memory, container = await _seed(args)
+        container.round_trips = 0
+        container.total_request_charge = 0.0
+        start = time.perf_counter()
+        await clear(memory)
+        elapsed = time.perf_counter() - start
+        print(f"{label:>12} {elapsed:8.2f} {container.round_trips:9d} {container.total_request_charge:9.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--data-plane-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: per-document cost of encoding data models for Cosmos DB and decoding them back.
+
+"dump+loop" is the former encoder: model_dump() followed by a pass converting top-level
+datetimes to strings by hand. "dump json" is model_dump(mode="json"), which the memory
+context uses now. On the read side, "validate" is model_validate on the stored document
+and "construct" is model_construct, i.e. building the model without validation.
+
+Run from src/backend:
+    python -m benchmarks.bench_serialization --documents 2000
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from models.messages_kernel import AgentMessage, Plan, Step  # noqa: E402
+
+
+def _dump_and_loop(item):
+    document = item.model_dump()
+    for key, value in list(document.items()):
+        if isinstance(value, datetime.datetime):
+            document[key] = value.isoformat()
+    return document
+
+
+def _per_document_us(call, items):
+    start = time.perf_counter()
+    for item in items:
+        call(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def _models(kind, count):
+    if kind == "plan":
+        return [Plan(session_id=f"s{i}", user_id="bench", initial_goal="goal " * 20) for i in range(count)]
+    if kind == "step":
+        return [
+            Step(plan_id="p", session_id=f"s{i}", user_id="bench", action="act " * 50, agent="Hr_Agent",
+                 agent_reply="reply " * 200)
+            for i in range(count)
+        ]
+    return [
+        AgentMessage(session_id=f"s{i}", user_id="bench", plan_id="p", content="content " * 100, source="Hr_Agent")
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{args.documents} documents per model, microseconds per document")
+    print(f"{'model':>14} {'dump+loop':>10} {'dump json':>10} {'validate':>10} {'construct':>10}")
+    for kind, model_class in (("plan", Plan), ("step", Step), ("agent_message", AgentMessage)):
+        items = _models(kind, args.documents)
+        # Documents as the SDK hands them back: parsed JSON with system properties
+        documents = [
+            dict(json.loads(json.dumps(CosmosMemoryContext._serialize_item(item))), _ts=0, _etag='"e"')
+            for item in items
+        ]
+        encode_loop = _per_document_us(_dump_and_loop, items)
+        encode_json = _per_document_us(CosmosMemoryContext._serialize_item, items)
+        validate = _per_document_us(model_class.model_validate, documents)
+        construct = _per_document_us(lambda document: model_class.model_construct(**document), documents)
+        print(f"{kind:>14} {encode_loop:>10.1f} {encode_json:>10.1f} {validate:>10.1f} {construct:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
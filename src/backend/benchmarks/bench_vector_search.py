@@ -0,0 +1,116 @@
+"""
+Benchmark: get_nearest_matches scoring, per-record Python loop vs paged float32 matmul.
+
+``legacy_nearest_matches`` reproduces the previous implementation: it scores the first
+100 documents (the old query limit) one at a time. The full-scan variant of the same
+loop is timed too so latency can be compared on equal work. Recall is measured against
+the exact top-k over the whole collection. "vectorized (stacked)" scores pages that are
+already float32 matrices, separating the scoring cost from the JSON list conversion.
+
+Run from src/backend:
+    python -m benchmarks.bench_vector_search --sizes 10000 100000 --dim 384 --queries 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from context.vector_search import SCAN_PAGE_SIZE, StreamingTopK, stack_embeddings  # noqa: E402
+
+LEGACY_LIMIT = 100
+
+
+def legacy_nearest_matches(query, documents, limit):
+    """The per-record cosine loop previously used by get_nearest_matches."""
+    results = []
+    for document in documents:
+        embedding = np.array(document["embedding"])
+        similarity = np.dot(query, embedding) / (np.linalg.norm(query) * np.linalg.norm(embedding))
+        results.append((document, float(similarity)))
+    results.sort(key=lambda x: x[1], reverse=True)
+    return results[:limit]
+
+
+def vectorized_nearest_matches(query, documents, limit):
+    """The paged scan used by get_nearest_matches now."""
+    top = StreamingTopK(query, limit)
+    for start in range(0, len(documents), SCAN_PAGE_SIZE):
+        page = documents[start : start + SCAN_PAGE_SIZE]
+        top.add(page, [document["embedding"] for document in page])
+    return top.results()
+
+
+def _recall(found, exact):
+    return len({d["id"] for d, _ in found} & {d["id"] for d, _ in exact}) / len(exact)
+
+
+def run(size: int, dim: int, queries: int, limit: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    # Documents carry embeddings as lists, as they come back from Cosmos DB
+    documents = [
+        {"id": f"record-{index}", "embedding": vector.tolist()}
+        for index, vector in enumerate(rng.normal(size=(size, dim)))
+    ]
+    query_vectors = rng.normal(size=(queries, dim))
+    pages = [
+        (documents[start : start + SCAN_PAGE_SIZE],)
+        + stack_embeddings([d["embedding"] for d in documents[start : start + SCAN_PAGE_SIZE]])
+        for start in range(0, size, SCAN_PAGE_SIZE)
+    ]
+
+    timings = {
+        "legacy (first 100)": 0.0,
+        "legacy (full scan)": 0.0,
+        "vectorized": 0.0,
+        "vectorized (stacked)": 0.0,
+    }
+    recall = {"legacy (first 100)": 0.0, "vectorized": 0.0}
+    for query in query_vectors:
+        start = time.perf_counter()
+        truncated = legacy_nearest_matches(query, documents[:LEGACY_LIMIT], limit)
+        timings["legacy (first 100)"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        exact = legacy_nearest_matches(query, documents, limit)
+        timings["legacy (full scan)"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized = vectorized_nearest_matches(query, documents, limit)
+        timings["vectorized"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        top = StreamingTopK(query, limit)
+        for page, matrix, norms in pages:
+            top.add(page, matrix=matrix, norms=norms)
+        timings["vectorized (stacked)"] += time.perf_counter() - start
+
+        recall["legacy (first 100)"] += _recall(truncated, exact)
+        recall["vectorized"] += _recall(vectorized, exact)
+
+    print(f"\n{size} records, dim {dim}, top {limit}, {queries} queries")
+    print(f"{'variant':>20} {'ms/query':>10} {'recall@k':>10}")
+    for name, elapsed in timings.items():
+        score = recall.get(name)
+        shown = f"{score / queries:10.3f}" if score is not None else f"{'1.000':>10}"
+        print(f"{name:>20} {elapsed / queries * 1000:10.2f} {shown}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.dim, args.queries, args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,706 @@
+# cosmos_standin.py
+"""
+In-process stand-in for the azure.cosmos.aio surface used by the memory contexts.
+
+Implements enough of CosmosClient / DatabaseProxy / ContainerProxy (point operations,
+the SQL subset issued by CosmosMemoryContext, continuation tokens, transactional
+batches, ETag preconditions and VectorDistance on containers created with a vector
+embedding policy) to run benchmarks and tests without the emulator.
+Optional per-call latencies approximate network and control-plane round trips.
+"""
+
+import asyncio
+import base64
+import copy
+import json
+import re
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from azure.core import MatchConditions
+from azure.cosmos.exceptions import (CosmosAccessConditionFailedError,
+                                     CosmosBatchOperationError,
+                                     CosmosHttpResponseError,
+                                     CosmosResourceExistsError,
+                                     CosmosResourceNotFoundError)
+
+MAX_BATCH_OPERATIONS = 100
+
+_SELECT_RE = re.compile(
+    r"^\s*SELECT\s+(?P<distinct>DISTINCT\s+)?(?P<value>VALUE\s+)?(?:TOP\s+(?P<top>@?\w+)\s+)?"
+    r"(?P<projection>.+?)\s+FROM\s+c\b"
+    r"(?:\s+WHERE\s+(?P<where>.+?))?"
+    r"(?:\s+ORDER\s+BY\s+(?P<order>.+?)(?:\s+(?P<direction>ASC|DESC))?)?"
+    r"(?:\s+OFFSET\s+(?P<offset>@?\w+)\s+LIMIT\s+(?P<limit>@?\w+))?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_AND_RE = re.compile(r"\s+AND\s+", re.IGNORECASE)
+_COMPARISON_RE = re.compile(
+    r"^c\.(?P<field>\w+)\s*(?P<op>=|!=|<>|<=|>=|<|>)\s*(?P<operand>@\w+|'[^']*'|-?\d+(?:\.\d+)?|true|false|null)$",
+    re.IGNORECASE,
+)
+_IN_RE = re.compile(r"^c\.(?P<field>\w+)\s+IN\s*\((?P<operands>[^)]*)\)$", re.IGNORECASE)
+_ARRAY_CONTAINS_RE = re.compile(
+    r"^ARRAY_CONTAINS\(\s*(?P<param>@\w+)\s*,\s*c\.(?P<field>\w+)\s*\)$", re.IGNORECASE
+)
+_IS_DEFINED_RE = re.compile(
+    r"^(?P<negate>NOT\s+)?IS_DEFINED\(\s*c\.(?P<field>\w+)\s*\)$", re.IGNORECASE
+)
+_PROJECTION_RE = re.compile(r"^c\.(?P<field>\w+)(?:\s+AS\s+(?P<alias>\w+))?$", re.IGNORECASE)
+_VECTOR_DISTANCE_RE = re.compile(
+    r"^VectorDistance\(\s*c\.(?P<field>\w+)\s*,\s*(?P<param>@\w+)\s*\)(?:\s+AS\s+(?P<alias>\w+))?$",
+    re.IGNORECASE,
+)
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split a projection on the commas that are not inside parentheses."""
+    parts, depth, current = [], 0, ""
+    for char in text:
+        if char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        current += char
+    parts.append(current)
+    return [part.strip() for part in parts]
+
+
+def _partition_key_of(document: Dict[str, Any]) -> Any:
+    return document.get("session_id")
+
+
+def _patched(document: Dict[str, Any], operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply set/add/replace/remove patch operations on top-level paths.
+
+    "add" to "/field/-" appends to the array in field, which must exist.
+    """
+    patched = copy.deepcopy(document)
+    for operation in operations:
+        field = operation["path"].lstrip("/")
+        if operation["op"] == "add" and field.endswith("/-"):
+            array = patched.get(field[:-2])
+            if not isinstance(array, list):
+                raise CosmosHttpResponseError(
+                    status_code=400, message=f"Cannot append to {operation['path']}: not an array"
+                )
+            array.append(operation["value"])
+        elif operation["op"] == "remove":
+            patched.pop(field, None)
+        else:
+            patched[field] = operation["value"]
+    return patched
+
+
+def _request_charge(base: float, document_count: int = 0, payload_bytes: int = 0) -> float:
+    return round(base + 0.1 * document_count + payload_bytes / 1024.0, 2)
+
+
+class StandInLatency:
+    """Simulated round-trip costs, in seconds."""
+
+    def __init__(
+        self,
+        data_plane: float = 0.0,
+        control_plane: float = 0.0,
+        connect: float = 0.0,
+    ) -> None:
+        self.data_plane = data_plane
+        self.control_plane = control_plane
+        self.connect = connect
+
+
+class _StandInQuery:
+    """Parsed form of the SQL subset understood by the stand-in."""
+
+    def __init__(self, query: str, parameters: Optional[List[Dict[str, Any]]]) -> None:
+        match = _SELECT_RE.match(" ".join(query.split()))
+        if not match:
+            raise CosmosHttpResponseError(status_code=400, message=f"Unsupported query: {query}")
+        self._params = {p["name"]: p["value"] for p in parameters or []}
+        self.distinct = bool(match.group("distinct"))
+        self.value = bool(match.group("value"))
+        self.top = self._int_operand(match.group("top"))
+        self.offset = self._int_operand(match.group("offset"))
+        self.limit = self._int_operand(match.group("limit"))
+        self.order = match.group("order")
+        self.descending = (match.group("direction") or "ASC").upper() == "DESC"
+        self.projection = match.group("projection").strip()
+        self._where = match.group("where") or ""
+        self.conditions = [self._parse_condition(c) for c in _AND_RE.split(self._where) if c]
+        self.uses_vector_distance = "vectordistance" in query.lower()
+
+    def _vector_score(self, document: Dict[str, Any], match: "re.Match") -> Optional[float]:
+        """Cosine similarity, as VectorDistance returns for a cosine vector policy."""
+        embedding = document.get(match.group("field"))
+        if not embedding:
+            return None
+        left = np.asarray(embedding, dtype=np.float32)
+        right = np.asarray(self._params[match.group("param")], dtype=np.float32)
+        denominator = float(np.linalg.norm(left) * np.linalg.norm(right))
+        return float(left @ right) / denominator if denominator else 0.0
+
+    def _int_operand(self, token: Optional[str]) -> Optional[int]:
+        if token is None:
+            return None
+        return int(self._params[token]) if token.startswith("@") else int(token)
+
+    def _literal(self, token: str) -> Any:
+        if token.startswith("@"):
+            return self._params[token]
+        if token.startswith("'"):
+            return token[1:-1]
+        lowered = token.lower()
+        if lowered in ("true", "false"):
+            return lowered == "true"
+        if lowered == "null":
+            return None
+        return float(token) if "." in token else int(token)
+
+    def _parse_condition(self, text: str):
+        text = text.strip()
+        if text.startswith("(") and text.endswith(")"):
+            text = text[1:-1].strip()
+        match = _COMPARISON_RE.match(text)
+        if match:
+            field, op = match.group("field"), match.group("op")
+            operand = self._literal(match.group("operand"))
+            return lambda doc: _compare(doc.get(field), op, operand)
+        match = _IN_RE.match(text)
+        if match:
+            field = match.group("field")
+            values = [self._literal(token.strip()) for token in match.group("operands").split(",")]
+            return lambda doc: doc.get(field) in values
+        match = _ARRAY_CONTAINS_RE.match(text)
+        if match:
+            values = self._params[match.group("param")]
+            field = match.group("field")
+            return lambda doc: doc.get(field) in values
+        match = _IS_DEFINED_RE.match(text)
+        if match:
+            field, negate = match.group("field"), bool(match.group("negate"))
+            return lambda doc: (field in doc) != negate
+        raise CosmosHttpResponseError(status_code=400, message=f"Unsupported condition: {text}")
+
+    def partition_hint(self) -> Optional[List[Any]]:
+        """Return the session_id values the filter pins the query to, if any.
+
+        Like the Cosmos DB query plan, an equality or IN filter on the partition key
+        limits the query to those partitions.
+        """
+        for text in _AND_RE.split(self._where):
+            text = text.strip()
+            match = _COMPARISON_RE.match(text)
+            if match and match.group("field") == "session_id" and match.group("op") == "=":
+                return [self._literal(match.group("operand"))]
+            match = _IN_RE.match(text)
+            if match and match.group("field") == "session_id":
+                return [self._literal(token.strip()) for token in match.group("operands").split(",")]
+        return None
+
+    def evaluate(self, documents: List[Dict[str, Any]]) -> List[Any]:
+        rows = [d for d in documents if all(cond(d) for cond in self.conditions)]
+        vector_order = _VECTOR_DISTANCE_RE.match(self.order.strip()) if self.order else None
+        if vector_order:
+            # Most similar first; documents without an embedding are not returned
+            scored = [(self._vector_score(d, vector_order), d) for d in rows]
+            scored = [(score, d) for score, d in scored if score is not None]
+            scored.sort(key=lambda pair: pair[0], reverse=True)
+            rows = [d for _, d in scored]
+        elif self.order:
+            field = self.order.strip()
+            if not field.startswith("c."):
+                raise CosmosHttpResponseError(
+                    status_code=400, message=f"Unsupported ORDER BY: {self.order}"
+                )
+            key = field[2:]
+            # Documents arrive in write order, which breaks ties between equal _ts seconds
+            positions = {id(d): i for i, d in enumerate(rows)}
+            rows.sort(
+                key=lambda d: (d.get(key) is None, d.get(key), positions[id(d)]),
+                reverse=self.descending,
+            )
+        if self.offset is not None:
+            rows = rows[self.offset:]
+        if self.limit is not None:
+            rows = rows[: self.limit]
+        if self.top is not None:
+            rows = rows[: self.top]
+        projected = self._project(rows)
+        if self.distinct:
+            unique, seen = [], set()
+            for row in projected:
+                marker = json.dumps(row, sort_keys=True, default=str)
+                if marker not in seen:
+                    seen.add(marker)
+                    unique.append(row)
+            projected = unique
+        return projected
+
+    def _project(self, rows: List[Dict[str, Any]]) -> List[Any]:
+        if self.projection == "*":
+            return [copy.deepcopy(r) for r in rows]
+        if self.value and self.projection.upper() == "COUNT(1)":
+            return [len(rows)]
+        columns, vector_columns = [], []
+        for part in _split_top_level(self.projection):
+            match = _PROJECTION_RE.match(part)
+            if match:
+                columns.append((match.group("field"), match.group("alias") or match.group("field")))
+                continue
+            match = _VECTOR_DISTANCE_RE.match(part)
+            if match:
+                vector_columns.append((match, match.group("alias") or "$1"))
+                continue
+            raise CosmosHttpResponseError(
+                status_code=400, message=f"Unsupported projection: {part}"
+            )
+        if self.value:
+            field = columns[0][0]
+            return [copy.deepcopy(r.get(field)) for r in rows]
+        projected = []
+        for r in rows:
+            row = {alias: copy.deepcopy(r[field]) for field, alias in columns if field in r}
+            for match, alias in vector_columns:
+                row[alias] = self._vector_score(r, match)
+            projected.append(row)
+        return projected
+
+
+def _compare(left: Any, op: str, right: Any) -> bool:
+    if op == "=":
+        return left == right
+    if op in ("!=", "<>"):
+        return left != right
+    if left is None or right is None:
+        return False
+    return {
+        "<": left < right,
+        ">": left > right,
+        "<=": left <= right,
+        ">=": left >= right,
+    }[op]
+
+
+class _StandInPage:
+    def __init__(self, items: List[Any]) -> None:
+        self._items = iter(items)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._items)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _StandInPager:
+    """Mirrors the AsyncIterator returned by AsyncItemPaged.by_page()."""
+
+    def __init__(self, paged: "StandInItemPaged", continuation_token: Optional[str]) -> None:
+        self._paged = paged
+        self._offset = _decode_token(continuation_token)
+        self.continuation_token: Optional[str] = None
+        self._done = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> _StandInPage:
+        if self._done:
+            raise StopAsyncIteration
+        rows = await self._paged._results()
+        await self._paged._container._round_trip()
+        size = self._paged._max_item_count or len(rows) or 1
+        page = rows[self._offset: self._offset + size]
+        self._offset += len(page)
+        self.continuation_token = _encode_token(self._offset) if self._offset < len(rows) else None
+        self._done = self.continuation_token is None
+        self._paged._container._charge(
+            _request_charge(2.5, len(page)) + self._paged._fan_out_charge
+        )
+        self._paged._container.bytes_returned += len(json.dumps(page, default=str))
+        return _StandInPage(page)
+
+
+def _encode_token(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode()
+
+
+def _decode_token(token: Optional[str]) -> int:
+    if not token:
+        return 0
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(token.encode()))["offset"])
+    except Exception as exc:
+        raise CosmosHttpResponseError(status_code=400, message="Invalid continuation token") from exc
+
+
+class StandInItemPaged:
+    """Mirrors azure.core AsyncItemPaged for query results."""
+
+    def __init__(
+        self,
+        container: "StandInContainer",
+        query: _StandInQuery,
+        partition_key: Any,
+        max_item_count: Optional[int],
+    ) -> None:
+        self._container = container
+        self._query = query
+        self._partition_key = partition_key
+        self._max_item_count = max_item_count
+        self._rows: Optional[List[Any]] = None
+        self._iterator = None
+        self._fan_out_charge = 0.0
+
+    async def _results(self) -> List[Any]:
+        if self._rows is None:
+            if self._query.uses_vector_distance and not self._container.vector_search:
+                raise CosmosHttpResponseError(
+                    status_code=400,
+                    message="The vector path /embedding is not defined in the container's vector embedding policy.",
+                )
+            self._container.queries_executed += 1
+            documents, partitions = self._container._scan(self._partition_key, self._query)
+            self._fan_out_charge = 1.0 * max(partitions - 1, 0)
+            self._rows = self._query.evaluate(documents)
+        return self._rows
+
+    def by_page(self, continuation_token: Optional[str] = None) -> _StandInPager:
+        return _StandInPager(self, continuation_token)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._iterator is None:
+            self._iterator = self._iterate()
+        return await self._iterator.__anext__()
+
+    async def _iterate(self):
+        async for page in self.by_page():
+            async for item in page:
+                yield item
+
+
+class StandInContainer:
+    """In-memory container partitioned by /session_id."""
+
+    def __init__(
+        self,
+        container_id: str,
+        latency: Optional[StandInLatency] = None,
+        vector_search: bool = False,
+        default_ttl: Optional[int] = None,
+    ) -> None:
+        self.id = container_id
+        # Set when the container was created with a vector embedding policy
+        self.vector_search = vector_search
+        # Container-level time to live; -1 lets documents set their own "ttl"
+        self.default_ttl = default_ttl
+        self._latency = latency or StandInLatency()
+        self._documents: Dict[Tuple[Any, str], Dict[str, Any]] = {}
+        self.client_connection = SimpleNamespace(last_response_headers={})
+        self.total_request_charge = 0.0
+        self.round_trips = 0
+        self.queries_executed = 0
+        # Serialized size of the query pages sent back to the client
+        self.bytes_returned = 0
+        self._connected = False
+
+    async def _round_trip(self) -> None:
+        self.round_trips += 1
+        if not self._connected:
+            self._connected = True
+            if self._latency.connect:
+                await asyncio.sleep(self._latency.connect)
+        if self._latency.data_plane:
+            await asyncio.sleep(self._latency.data_plane)
+        else:
+            await asyncio.sleep(0)
+
+    def _charge(self, request_charge: float) -> None:
+        self.total_request_charge += request_charge
+        self.client_connection.last_response_headers = {
+            "x-ms-request-charge": str(request_charge),
+            "x-ms-activity-id": str(uuid.uuid4()),
+        }
+
+    def _scan(self, partition_key: Any, query: _StandInQuery) -> Tuple[List[Dict[str, Any]], int]:
+        if partition_key is not None:
+            docs = [d for (pk, _), d in self._documents.items() if pk == partition_key]
+            return docs, 1
+        pinned = query.partition_hint()
+        if pinned is not None:
+            docs = [d for (pk, _), d in self._documents.items() if pk in pinned]
+            return docs, max(len(set(pinned)), 1)
+        partitions = {pk for pk, _ in self._documents}
+        return list(self._documents.values()), max(len(partitions), 1)
+
+    def _stamp(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        document = copy.deepcopy(body)
+        document["_ts"] = int(time.time())
+        document["_etag"] = f'"{uuid.uuid4()}"'
+        return document
+
+    def _write(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        key = (_partition_key_of(document), document["id"])
+        self._documents.pop(key, None)
+        self._documents[key] = document
+        return copy.deepcopy(document)
+
+    def _check_etag(
+        self, existing: Dict[str, Any], etag: Optional[str], match_condition: Optional[MatchConditions]
+    ) -> None:
+        if etag and match_condition == MatchConditions.IfNotModified and existing["_etag"] != etag:
+            raise CosmosAccessConditionFailedError(
+                status_code=412, message="Precondition failed: the ETag did not match."
+            )
+
+    async def read(self, **kwargs) -> Dict[str, Any]:
+        """Return the container properties."""
+        await self._round_trip()
+        properties = {"id": self.id, "partitionKey": {"paths": ["/session_id"], "kind": "Hash"}}
+        if self.default_ttl is not None:
+            properties["defaultTtl"] = self.default_ttl
+        return properties
+
+    # Point operations -----------------------------------------------------------------
+
+    async def create_item(self, body: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        await self._round_trip()
+        if (_partition_key_of(body), body["id"]) in self._documents:
+            raise CosmosResourceExistsError(status_code=409, message="Entity already exists")
+        self._charge(_request_charge(5.0, payload_bytes=len(json.dumps(body, default=str))))
+        return self._write(self._stamp(body))
+
+    async def upsert_item(self, body: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        await self._round_trip()
+        existing = self._documents.get((_partition_key_of(body), body["id"]))
+        if existing is not None:
+            self._check_etag(existing, kwargs.get("etag"), kwargs.get("match_condition"))
+        self._charge(_request_charge(5.0, payload_bytes=len(json.dumps(body, default=str))))
+        return self._write(self._stamp(body))
+
+    async def replace_item(self, item: Any, body: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        await self._round_trip()
+        item_id = item["id"] if isinstance(item, dict) else item
+        existing = self._documents.get((_partition_key_of(body), item_id))
+        if existing is None:
+            raise CosmosResourceNotFoundError(status_code=404, message="Entity not found")
+        self._check_etag(existing, kwargs.get("etag"), kwargs.get("match_condition"))
+        self._charge(_request_charge(5.0, payload_bytes=len(json.dumps(body, default=str))))
+        return self._write(self._stamp(body))
+
+    async def read_item(self, item: Any, partition_key: Any, **kwargs) -> Dict[str, Any]:
+        await self._round_trip()
+        item_id = item["id"] if isinstance(item, dict) else item
+        document = self._documents.get((partition_key, item_id))
+        if document is None:
+            self._charge(1.0)
+            raise CosmosResourceNotFoundError(status_code=404, message="Entity not found")
+        etag = kwargs.get("etag")
+        if etag and kwargs.get("match_condition") == MatchConditions.IfModified:
+            if document["_etag"] == etag:
+                self._charge(1.0)
+                raise CosmosHttpResponseError(status_code=304, message="Not modified")
+        self._charge(1.0)
+        return copy.deepcopy(document)
+
+    async def patch_item(
+        self, item: Any, partition_key: Any, patch_operations: List[Dict[str, Any]], **kwargs
+    ) -> Dict[str, Any]:
+        await self._round_trip()
+        item_id = item["id"] if isinstance(item, dict) else item
+        existing = self._documents.get((partition_key, item_id))
+        if existing is None:
+            raise CosmosResourceNotFoundError(status_code=404, message="Entity not found")
+        self._charge(_request_charge(5.0))
+        return self._write(self._stamp(_patched(existing, patch_operations)))
+
+    async def delete_item(self, item: Any, partition_key: Any, **kwargs) -> None:
+        await self._round_trip()
+        item_id = item["id"] if isinstance(item, dict) else item
+        if self._documents.pop((partition_key, item_id), None) is None:
+            raise CosmosResourceNotFoundError(status_code=404, message="Entity not found")
+        self._charge(5.0)
+
+    def query_items(
+        self,
+        query: str,
+        parameters: Optional[List[Dict[str, Any]]] = None,
+        partition_key: Any = None,
+        max_item_count: Optional[int] = None,
+        **kwargs,
+    ) -> StandInItemPaged:
+        return StandInItemPaged(self, _StandInQuery(query, parameters), partition_key, max_item_count)
+
+    # Transactional batch ---------------------------------------------------------------
+
+    async def execute_item_batch(
+        self, batch_operations: List[Tuple], partition_key: Any, **kwargs
+    ) -> List[Dict[str, Any]]:
+        await self._round_trip()
+        if len(batch_operations) > MAX_BATCH_OPERATIONS:
+            raise CosmosHttpResponseError(
+                status_code=400,
+                message=f"Batch request has more operations than what is supported ({MAX_BATCH_OPERATIONS}).",
+            )
+        staged = dict(self._documents)
+        results: List[Dict[str, Any]] = []
+        for index, operation in enumerate(batch_operations):
+            name, args = operation[0], operation[1]
+            options = operation[2] if len(operation) > 2 else {}
+            try:
+                results.append(self._apply(staged, partition_key, name.lower(), args, options))
+            except CosmosHttpResponseError as exc:
+                responses = [{"statusCode": 424} for _ in batch_operations]
+                responses[index] = {"statusCode": exc.status_code}
+                raise CosmosBatchOperationError(
+                    error_index=index,
+                    headers={},
+                    status_code=exc.status_code,
+                    message=f"There was an error in the transactional batch on index {index}.",
+                    operation_responses=responses,
+                )
+        self._documents = staged
+        self._charge(sum(r["requestCharge"] for r in results))
+        return results
+
+    def _apply(self, staged, partition_key, name, args, options) -> Dict[str, Any]:
+        if name in ("create", "upsert"):
+            body = args[0]
+            key = (partition_key, body["id"])
+            if name == "create" and key in staged:
+                raise CosmosResourceExistsError(status_code=409, message="Entity already exists")
+            document = self._stamp(body)
+            staged.pop(key, None)
+            staged[key] = document
+            return {"statusCode": 201 if name == "create" else 200,
+                    "requestCharge": _request_charge(5.0), "eTag": document["_etag"],
+                    "resourceBody": copy.deepcopy(document)}
+        if name == "replace":
+            item_id, body = args[0], args[1]
+            key = (partition_key, item_id)
+            if key not in staged:
+                raise CosmosResourceNotFoundError(status_code=404, message="Entity not found")
+            if options.get("if_match_etag") and staged[key]["_etag"] != options["if_match_etag"]:
+                raise CosmosAccessConditionFailedError(status_code=412, message="Precondition failed")
+            document = self._stamp(body)
+            staged.pop(key)
+            staged[key] = document
+            return {"statusCode": 200, "requestCharge": _request_charge(5.0),
+                    "eTag": document["_etag"], "resourceBody": copy.deepcopy(document)}
+        if name == "read":
+            key = (partition_key, args[0])
+            if key not in staged:
+                raise CosmosResourceNotFoundError(status_code=404, message="Entity not found")
+            return {"statusCode": 200, "requestCharge": 1.0,
+                    "resourceBody": copy.deepcopy(staged[key])}
+        if name == "patch":
+            key = (partition_key, args[0])
+            if key not in staged:
+                raise CosmosResourceNotFoundError(status_code=404, message="Entity not found")
+            document = self._stamp(_patched(staged[key], args[1]))
+            staged.pop(key)
+            staged[key] = document
+            return {"statusCode": 200, "requestCharge": _request_charge(5.0),
+                    "eTag": document["_etag"], "resourceBody": copy.deepcopy(document)}
+        if name == "delete":
+            key = (partition_key, args[0])
+            if staged.pop(key, None) is None:
+                raise CosmosResourceNotFoundError(status_code=404, message="Entity not found")
+            return {"statusCode": 204, "requestCharge": _request_charge(5.0)}
+        raise CosmosHttpResponseError(status_code=400, message=f"Unsupported batch operation: {name}")
+
+    # Introspection helpers for tests and benchmarks -------------------------------------
+
+    def documents(self) -> List[Dict[str, Any]]:
+        return [copy.deepcopy(d) for d in self._documents.values()]
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+
+class StandInDatabase:
+    def __init__(self, database_id: str, client: "StandInCosmosClient") -> None:
+        self.id = database_id
+        self._client = client
+        self._containers: Dict[str, StandInContainer] = {}
+        self.control_plane_calls = 0
+
+    async def create_container_if_not_exists(self, id: str, partition_key=None, **kwargs) -> StandInContainer:
+        self.control_plane_calls += 1
+        await self._client._connect()
+        if self._client.latency.control_plane:
+            await asyncio.sleep(self._client.latency.control_plane)
+        container = self._containers.get(id)
+        if container is None:
+            container = StandInContainer(
+                id,
+                self._client.latency,
+                vector_search="vector_embedding_policy" in kwargs,
+                default_ttl=kwargs.get("default_ttl"),
+            )
+            container._connected = True
+            self._containers[id] = container
+        return container
+
+    async def replace_container(self, container, partition_key=None, **kwargs) -> StandInContainer:
+        self.control_plane_calls += 1
+        container = self._containers[getattr(container, "id", container)]
+        container.default_ttl = kwargs.get("default_ttl")
+        return container
+
+    def get_container_client(self, container: str) -> StandInContainer:
+        return self._containers.setdefault(container, StandInContainer(container, self._client.latency))
+
+
+class StandInCosmosClient:
+    """Drop-in for azure.cosmos.aio.CosmosClient backed by shared in-memory databases.
+
+    Databases are shared across client instances (like a real account) so benchmarks can
+    compare per-request clients against a pooled one.
+    """
+
+    _accounts: Dict[str, Dict[str, StandInDatabase]] = {}
+    instances_created = 0
+    latency = StandInLatency()
+
+    def __init__(self, url: str = "https://standin.documents.azure.com", credential: Any = None, **kwargs) -> None:
+        type(self).instances_created += 1
+        self.url = url
+        self.credential = credential
+        self.closed = False
+        self._connected = False
+
+    async def _connect(self) -> None:
+        if not self._connected:
+            self._connected = True
+            if self.latency.connect:
+                await asyncio.sleep(self.latency.connect)
+
+    def get_database_client(self, database: str) -> StandInDatabase:
+        databases = type(self)._accounts.setdefault(self.url, {})
+        existing = databases.get(database)
+        if existing is None:
+            existing = databases[database] = StandInDatabase(database, self)
+        existing._client = self
+        return existing
+
+    async def close(self) -> None:
+        self.closed = True
+
+    @classmethod
+    def reset(cls, latency: Optional[StandInLatency] = None) -> None:
+        """Drop all stand-in accounts and counters."""
+        cls._accounts = {}
+        cls.instances_created = 0
+        cls.latency = latency or StandInLatency()
@@ -0,0 +1,496 @@
+"""Approximate nearest neighbour index for semantic memory collections."""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from context.vector_search import top_k_indices
+
+try:
+    from app_config import config
+except ImportError as e:
+    logging.warning(f"Failed to import app_config: {e}")
+    config = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NPROBE = 8
+# Indexes kept in memory by the registry before the least recently used is evicted
+DEFAULT_MAX_INDEXES = 64
+# Seconds an index may go unused before the registry evicts it
+DEFAULT_INDEX_IDLE_TTL_SECONDS = 3600
+# Below this many live vectors the index is searched exhaustively
+MIN_TRAIN_SIZE = 1024
+# Vectors sampled per list when training the k-means centroids
+TRAIN_SAMPLES_PER_LIST = 64
+KMEANS_ITERATIONS = 10
+# Retrain once the live count doubles or a quarter of the rows are tombstones
+REBUILD_GROWTH = 2.0
+REBUILD_DELETED_FRACTION = 0.25
+ASSIGN_CHUNK_ROWS = 16384
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+class IVFIndex:
+    """Inverted-file (IVF) index over unit-normalized float32 vectors.
+
+    k-means centroids split the vectors into about sqrt(n) lists. A search scores the
+    query against the centroids and then only the vectors in the ``nprobe`` closest
+    lists, so nprobe trades recall for latency (nprobe equal to the number of lists is
+    an exact search).
+
+    Adds are assigned to their closest list right away and removes leave a tombstone.
+    The centroids are retrained lazily on the next search once the index has grown or
+    collected enough tombstones. With a path, ``save`` writes the arrays as .npy files
+    and ``load`` memory-maps the vectors, copying them into memory on the first write.
+    A loaded index is not ready: other processes may have written to the collection
+    since ``saved_at``, so it has to be checked against the collection first.
+    """
+
+    def __init__(self, nprobe: int = DEFAULT_NPROBE, path: Optional[str] = None) -> None:
+        self.nprobe = nprobe
+        self.path = path
+        # False while the index is being backfilled from the collection
+        self.ready = False
+        # Wall-clock time of the save a loaded index was read from, None otherwise
+        self.saved_at: Optional[float] = None
+        self._lock = threading.RLock()
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._live = np.empty(0, dtype=bool)
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._size = 0
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._trained_size = 0
+        self._deleted = 0
+        self._removed_while_building: set = set()
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    @property
+    def nlist(self) -> int:
+        """Number of inverted lists, 0 while the index is untrained."""
+        return 0 if self._centroids is None else len(self._centroids)
+
+    def add(self, keys: Sequence[str], vectors: Any, replace: bool = True) -> None:
+        """Add vectors under their record keys.
+
+        Args:
+            keys: Record keys, one per vector
+            vectors: A (len(keys), dim) array-like
+            replace: Replace keys that are already indexed. The backfill passes False so it
+                cannot overwrite newer vectors added (or removed) while it was running.
+        """
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(keys), -1))
+        with self._lock:
+            rows = []
+            for key, vector in zip(keys, matrix):
+                if key in self._rows:
+                    if not replace:
+                        continue
+                    self._tombstone(key)
+                elif not replace and key in self._removed_while_building:
+                    continue
+                rows.append(self._append(key, vector))
+            if rows and self._centroids is not None:
+                rows = np.asarray(rows)
+                assignments = np.argmax(self._vectors[rows] @ self._centroids.T, axis=1)
+                self._assignments[rows] = assignments
+                for row, assignment in zip(rows.tolist(), assignments.tolist()):
+                    self._lists[assignment].append(row)
+            self._dirty = True
+
+    def remove(self, keys: Sequence[str]) -> None:
+        """Remove vectors by record key; unknown keys are ignored."""
+        with self._lock:
+            for key in keys:
+                if not self.ready:
+                    self._removed_while_building.add(key)
+                if key in self._rows:
+                    self._tombstone(key)
+            self._dirty = True
+
+    def mark_ready(self) -> None:
+        """Finish the backfill; searches use the index from now on."""
+        with self._lock:
+            self.ready = True
+            self._removed_while_building.clear()
+
+    def search(
+        self, query: Any, k: int, nprobe: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """Return up to k (key, cosine similarity) pairs, best first."""
+        with self._lock:
+            self._maybe_rebuild()
+            if not self._rows or k <= 0:
+                return []
+            query = _normalize(np.asarray(query, dtype=np.float32).ravel())
+            if self._centroids is None:
+                candidates = np.flatnonzero(self._live[: self._size])
+            else:
+                probe = top_k_indices(self._centroids @ query, min(nprobe or self.nprobe, self.nlist))
+                candidates = np.fromiter(
+                    (row for list_id in probe.tolist() for row in self._lists[list_id]),
+                    dtype=np.intp,
+                )
+                candidates = candidates[self._live[candidates]]
+            scores = self._vectors[candidates] @ query
+            best = top_k_indices(scores, k)
+            return [(self._keys[candidates[i]], float(scores[i])) for i in best.tolist()]
+
+    def rebuild(self) -> None:
+        """Drop tombstones and retrain the centroids (or untrain below MIN_TRAIN_SIZE)."""
+        with self._lock:
+            self._compact()
+            if self._size < MIN_TRAIN_SIZE:
+                self._centroids, self._lists = None, []
+                self._assignments[: self._size] = -1
+            else:
+                self._train()
+            self._trained_size = self._size
+            self._dirty = True
+        if self.path:
+            self.save()
+
+    def save(self) -> None:
+        """Write the index to its path, if it has one and changed since the last save."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            arrays = {
+                "vectors": self._vectors[: self._size],
+                "live": self._live[: self._size],
+                "assignments": self._assignments[: self._size],
+            }
+            if self._centroids is not None:
+                arrays["centroids"] = self._centroids
+            for name, array in arrays.items():
+                temporary = os.path.join(self.path, f"{name}.tmp.npy")
+                np.save(temporary, array)
+                os.replace(temporary, os.path.join(self.path, f"{name}.npy"))
+            if self._centroids is None and os.path.exists(os.path.join(self.path, "centroids.npy")):
+                os.remove(os.path.join(self.path, "centroids.npy"))
+            meta = {
+                "keys": self._keys,
+                "trained_size": self._trained_size,
+                "deleted": self._deleted,
+                "saved_at": time.time(),
+            }
+            temporary = os.path.join(self.path, "meta.tmp.json")
+            with open(temporary, "w") as f:
+                json.dump(meta, f)
+            os.replace(temporary, os.path.join(self.path, "meta.json"))
+            self._dirty = False
+
+    @classmethod
+    def load(cls, path: str, nprobe: int = DEFAULT_NPROBE) -> Optional["IVFIndex"]:
+        """Open an index saved at path with its vectors memory-mapped, or None if there is none.
+
+        The index is returned not ready; call ``mark_ready`` once it has been checked
+        against the collection.
+        """
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            return None
+        index = cls(nprobe=nprobe, path=path)
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        index._vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        index._live = np.load(os.path.join(path, "live.npy"))
+        index._assignments = np.load(os.path.join(path, "assignments.npy"))
+        index._size = len(meta["keys"])
+        index._keys = meta["keys"]
+        index._rows = {key: row for row, key in enumerate(index._keys) if index._live[row]}
+        index._trained_size = meta["trained_size"]
+        index._deleted = meta["deleted"]
+        # Indexes saved before the watermark was recorded always fail the check
+        index.saved_at = meta.get("saved_at", 0.0)
+        centroids = os.path.join(path, "centroids.npy")
+        if os.path.exists(centroids):
+            index._centroids = np.load(centroids)
+            index._lists = index._build_lists(index._assignments[: index._size], len(index._centroids))
+        return index
+
+    def _append(self, key: str, vector: np.ndarray) -> int:
+        if self._vectors.shape[1] == 0:
+            self._vectors = np.empty((0, vector.shape[0]), dtype=np.float32)
+        elif vector.shape[0] != self._vectors.shape[1]:
+            raise ValueError(
+                f"Embedding has {vector.shape[0]} dimensions, the index has {self._vectors.shape[1]}"
+            )
+        self._reserve(self._size + 1)
+        row = self._size
+        self._vectors[row] = vector
+        self._live[row] = True
+        self._assignments[row] = -1
+        self._size += 1
+        self._keys.append(key)
+        self._rows[key] = row
+        return row
+
+    def _reserve(self, rows: int) -> None:
+        # Memory-mapped arrays are read-only, so the first write copies them into memory
+        if rows <= len(self._vectors) and self._vectors.flags.writeable:
+            return
+        capacity = max(rows, 2 * len(self._vectors), 64)
+        vectors = np.empty((capacity, self._vectors.shape[1]), dtype=np.float32)
+        vectors[: self._size] = self._vectors[: self._size]
+        live = np.zeros(capacity, dtype=bool)
+        live[: self._size] = self._live[: self._size]
+        assignments = np.full(capacity, -1, dtype=np.int32)
+        assignments[: self._size] = self._assignments[: self._size]
+        self._vectors, self._live, self._assignments = vectors, live, assignments
+
+    def _tombstone(self, key: str) -> None:
+        self._live[self._rows.pop(key)] = False
+        self._deleted += 1
+
+    def _maybe_rebuild(self) -> None:
+        live = len(self._rows)
+        if self._centroids is None:
+            needed = live >= MIN_TRAIN_SIZE
+        else:
+            needed = (
+                live >= REBUILD_GROWTH * self._trained_size
+                or self._deleted > REBUILD_DELETED_FRACTION * self._size
+            )
+        if needed:
+            self.rebuild()
+
+    def _compact(self) -> None:
+        if self._deleted == 0:
+            return
+        rows = np.flatnonzero(self._live[: self._size])
+        self._vectors = np.ascontiguousarray(self._vectors[rows])
+        self._live = np.ones(len(rows), dtype=bool)
+        self._assignments = self._assignments[rows]
+        self._keys = [self._keys[row] for row in rows.tolist()]
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        self._size = len(rows)
+        self._deleted = 0
+
+    def _train(self, seed: int = 0) -> None:
+        vectors = self._vectors[: self._size]
+        nlist = max(1, int(math.sqrt(self._size)))
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(self._size, min(self._size, nlist * TRAIN_SAMPLES_PER_LIST), replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=nlist)
+            empty = counts == 0
+            # Re-seed empty lists with random samples
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = _normalize(sums)
+
+        assignments = np.empty(self._size, dtype=np.int32)
+        for start in range(0, self._size, ASSIGN_CHUNK_ROWS):
+            chunk = vectors[start : start + ASSIGN_CHUNK_ROWS]
+            assignments[start : start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+        self._assignments[: self._size] = assignments
+        self._centroids = centroids
+        self._lists = self._build_lists(assignments, nlist)
+
+    @staticmethod
+    def _build_lists(assignments: np.ndarray, nlist: int) -> List[List[int]]:
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(nlist + 1))
+        return [order[bounds[i] : bounds[i + 1]].tolist() for i in range(nlist)]
+
+
+class AnnIndexRegistry:
+    """Process-wide IVF indexes, one per (session_id, collection).
+
+    Indexes are built lazily by CosmosMemoryContext.get_nearest_matches and kept up to
+    date by the memory record writes of this process. With a directory they are saved
+    there on rebuild and at shutdown, and opened memory-mapped on first use.
+
+    At most ``max_indexes`` are kept in memory, least recently used first out, and an
+    index unused for ``idle_ttl_seconds`` is evicted too. An evicted index is saved if
+    it has a path, so it is loaded again (and checked) on its next use; without a
+    directory the next query rebuilds it.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        nprobe: int = DEFAULT_NPROBE,
+        directory: Optional[str] = None,
+        max_indexes: int = DEFAULT_MAX_INDEXES,
+        idle_ttl_seconds: float = DEFAULT_INDEX_IDLE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            enabled: Whether semantic memory searches use the indexes
+            nprobe: Lists probed per search
+            directory: Where indexes are saved, or None to keep them in memory only
+            max_indexes: Indexes kept in memory (0 or less means unbounded)
+            idle_ttl_seconds: Evict indexes unused for this long (0 or less means never)
+            clock: Monotonic time source, replaceable in tests
+        """
+        self.enabled = enabled
+        self.nprobe = nprobe
+        self.directory = directory or None
+        self.max_indexes = max_indexes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._clock = clock
+        self._indexes: "OrderedDict[Tuple[str, str], IVFIndex]" = OrderedDict()
+        self._last_access: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self.evictions = {"capacity": 0, "idle": 0}
+
+    @classmethod
+    def from_config(cls, config: Any) -> "AnnIndexRegistry":
+        """Build a registry from AppConfig, falling back to environment variables and defaults."""
+
+        def setting(attr: str, default: str) -> str:
+            value = getattr(config, attr, None) if config is not None else None
+            return str(value if value is not None else os.environ.get(attr, default))
+
+        def number(attr: str, default: float, cast: Callable[[str], Any]) -> Any:
+            try:
+                return cast(setting(attr, str(default)))
+            except ValueError:
+                logger.warning(f"Invalid value for {attr}, using {default}")
+                return default
+
+        return cls(
+            enabled=setting("MEMORY_ANN_INDEX", "false").lower() == "true",
+            nprobe=number("MEMORY_ANN_NPROBE", DEFAULT_NPROBE, int),
+            directory=setting("MEMORY_ANN_INDEX_DIR", ""),
+            max_indexes=number("MEMORY_ANN_MAX_INDEXES", DEFAULT_MAX_INDEXES, int),
+            idle_ttl_seconds=number("MEMORY_ANN_INDEX_IDLE_TTL_SECONDS", DEFAULT_INDEX_IDLE_TTL_SECONDS, float),
+        )
+
+    def _path(self, session_id: str, collection: str) -> Optional[str]:
+        if not self.directory:
+            return None
+        digest = hashlib.sha256(f"{session_id}/{collection}".encode()).hexdigest()[:32]
+        return os.path.join(self.directory, digest)
+
+    def get(self, session_id: str, collection: str) -> Optional[IVFIndex]:
+        """Return the index for a collection from memory or disk, or None.
+
+        An index loaded from disk is not ready until the backfill has checked it.
+        """
+        key = (session_id, collection)
+        with self._lock:
+            evicted = self._evict_idle()
+            index = self._indexes.get(key)
+            if index is None and self.directory:
+                index = IVFIndex.load(self._path(session_id, collection), nprobe=self.nprobe)
+                if index is not None:
+                    self._indexes[key] = index
+            if index is not None:
+                self._touch(key)
+                evicted += self._enforce_limit(keep=key)
+        self._save_evicted(evicted)
+        return index
+
+    def create(self, session_id: str, collection: str) -> IVFIndex:
+        """Register an empty index for a collection, ready to be backfilled."""
+        key = (session_id, collection)
+        with self._lock:
+            evicted = self._evict_idle()
+            index = self._indexes.get(key)
+            if index is None:
+                index = IVFIndex(nprobe=self.nprobe, path=self._path(session_id, collection))
+                self._indexes[key] = index
+            self._touch(key)
+            evicted += self._enforce_limit(keep=key)
+        self._save_evicted(evicted)
+        return index
+
+    def discard(self, session_id: str, collection: str, index: IVFIndex) -> None:
+        """Forget an index that failed to backfill, leaving any saved files alone."""
+        with self._lock:
+            if self._indexes.get((session_id, collection)) is index:
+                del self._indexes[(session_id, collection)]
+                self._last_access.pop((session_id, collection), None)
+
+    def drop(self, session_id: str, collection: str) -> None:
+        """Forget a collection's index and delete its files."""
+        with self._lock:
+            self._indexes.pop((session_id, collection), None)
+            self._last_access.pop((session_id, collection), None)
+        path = self._path(session_id, collection)
+        if path and os.path.isdir(path):
+            for name in os.listdir(path):
+                os.remove(os.path.join(path, name))
+            os.rmdir(path)
+
+    def save_all(self) -> None:
+        """Save every index that changed since it was last saved."""
+        with self._lock:
+            indexes = list(self._indexes.values())
+        for index in indexes:
+            try:
+                index.save()
+            except Exception as e:
+                logger.warning(f"Failed to save ANN index at {index.path}: {e}")
+
+    def _touch(self, key: Tuple[str, str]) -> None:
+        self._indexes.move_to_end(key)
+        self._last_access[key] = self._clock()
+
+    def _evict_idle(self) -> List[IVFIndex]:
+        if self.idle_ttl_seconds <= 0:
+            return []
+        cutoff = self._clock() - self.idle_ttl_seconds
+        evicted = []
+        # Least recently used first, so stop at the first index used since the cutoff
+        for key in list(self._indexes):
+            if self._last_access.get(key, cutoff) > cutoff:
+                break
+            evicted.append(self._indexes.pop(key))
+            self._last_access.pop(key, None)
+            self.evictions["idle"] += 1
+        return evicted
+
+    def _enforce_limit(self, keep: Tuple[str, str]) -> List[IVFIndex]:
+        evicted = []
+        while 0 < self.max_indexes < len(self._indexes):
+            key = next(iter(self._indexes))
+            if key == keep:
+                break
+            evicted.append(self._indexes.pop(key))
+            self._last_access.pop(key, None)
+            self.evictions["capacity"] += 1
+        return evicted
+
+    def _save_evicted(self, indexes: List[IVFIndex]) -> None:
+        # Saved outside the registry lock; only a ready index is worth loading again
+        for index in indexes:
+            if not index.ready:
+                continue
+            try:
+                index.save()
+            except Exception as e:
+                logger.warning(f"Failed to save evicted ANN index at {index.path}: {e}")
+
+
+ann_index_registry = AnnIndexRegistry.from_config(config)
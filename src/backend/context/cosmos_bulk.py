@@ -0,0 +1,224 @@
+"""Batched writes against a Cosmos DB container partitioned by /session_id."""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from azure.cosmos.exceptions import CosmosBatchOperationError, CosmosHttpResponseError
+from pydantic import BaseModel, Field
+
+# Cosmos DB accepts at most 100 operations in one transactional batch
+MAX_BATCH_OPERATIONS = 100
+
+# Concurrent requests when writes are spread over several partitions
+MAX_CONCURRENT_WRITES = 10
+
+# Status reported for operations that were rolled back because another one failed
+FAILED_DEPENDENCY = 424
+
+
+class BulkOperation(BaseModel):
+    """One write in a bulk request."""
+
+    operation: str  # create, upsert, replace, patch or delete
+    partition_key: Any = None
+    id: str
+    body: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def create(cls, document: Dict[str, Any]) -> "BulkOperation":
+        return cls(operation="create", partition_key=document.get("session_id"), id=document["id"], body=document)
+
+    @classmethod
+    def upsert(cls, document: Dict[str, Any]) -> "BulkOperation":
+        return cls(operation="upsert", partition_key=document.get("session_id"), id=document["id"], body=document)
+
+    @classmethod
+    def delete(cls, item_id: str, partition_key: Any) -> "BulkOperation":
+        return cls(operation="delete", partition_key=partition_key, id=item_id)
+
+    @classmethod
+    def patch(cls, item_id: str, partition_key: Any, operations: List[Dict[str, Any]]) -> "BulkOperation":
+        """Partially update a document, e.g. [{"op": "set", "path": "/ttl", "value": 1}]."""
+        return cls(operation="patch", partition_key=partition_key, id=item_id, body={"operations": operations})
+
+    def as_batch_operation(self) -> Tuple:
+        """Return the tuple form accepted by ContainerProxy.execute_item_batch."""
+        if self.operation == "delete":
+            return ("delete", (self.id,))
+        if self.operation == "replace":
+            return ("replace", (self.id, self.body))
+        if self.operation == "patch":
+            return ("patch", (self.id, self.body["operations"]))
+        return (self.operation, (self.body,))
+
+
+class BulkItemResult(BaseModel):
+    """Outcome of one operation in a bulk request."""
+
+    id: str
+    partition_key: Any = None
+    operation: str
+    status_code: int
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return 200 <= self.status_code < 300
+
+
+class BulkResult(BaseModel):
+    """Per-item outcomes of a bulk request."""
+
+    items: List[BulkItemResult] = Field(default_factory=list)
+    round_trips: int = 0
+
+    @property
+    def succeeded(self) -> List[BulkItemResult]:
+        return [item for item in self.items if item.succeeded]
+
+    @property
+    def failed(self) -> List[BulkItemResult]:
+        return [item for item in self.items if not item.succeeded]
+
+    @property
+    def ok(self) -> bool:
+        return all(item.succeeded for item in self.items)
+
+
+_SUCCESS_STATUS = {"create": 201, "upsert": 200, "replace": 200, "patch": 200, "delete": 204}
+
+
+class CosmosBulkExecutor:
+    """Runs bulk writes as transactional batches per partition.
+
+    Operations are grouped by partition key and sent as batches of up to
+    MAX_BATCH_OPERATIONS, with at most ``max_concurrency`` requests in flight.
+
+    In transactional mode a failing batch raises and nothing in it is written. Otherwise
+    the failing operation is reported and the rest of its batch is resubmitted, so each
+    item succeeds or fails on its own.
+    """
+
+    def __init__(
+        self,
+        container: Any,
+        max_concurrency: int = MAX_CONCURRENT_WRITES,
+        transactional: bool = False,
+    ):
+        self._container = container
+        self._max_concurrency = max(1, max_concurrency)
+        self._transactional = transactional
+
+    async def execute(self, operations: List[BulkOperation]) -> BulkResult:
+        """Run the operations and report the outcome of each one, in input order."""
+        result = BulkResult()
+        if not operations:
+            return result
+
+        outcomes: Dict[int, BulkItemResult] = {}
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+        partitions: Dict[Any, List[int]] = {}
+        for index, operation in enumerate(operations):
+            partitions.setdefault(operation.partition_key, []).append(index)
+
+        supports_batch = hasattr(self._container, "execute_item_batch")
+        tasks = []
+        for partition_key, indexes in partitions.items():
+            if partition_key is None or not supports_batch:
+                tasks.extend(
+                    self._run_point(operations[index], index, outcomes, result, semaphore)
+                    for index in indexes
+                )
+                continue
+            for start in range(0, len(indexes), MAX_BATCH_OPERATIONS):
+                chunk = indexes[start:start + MAX_BATCH_OPERATIONS]
+                tasks.append(
+                    self._run_batch(operations, partition_key, chunk, outcomes, result, semaphore)
+                )
+        await asyncio.gather(*tasks)
+
+        result.items = [outcomes[index] for index in range(len(operations))]
+        if result.failed:
+            logging.warning(
+                f"Bulk request finished with {len(result.failed)} of {len(operations)} operations failed"
+            )
+        return result
+
+    async def _run_batch(
+        self,
+        operations: List[BulkOperation],
+        partition_key: Any,
+        indexes: List[int],
+        outcomes: Dict[int, BulkItemResult],
+        result: BulkResult,
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        while indexes:
+            try:
+                async with semaphore:
+                    result.round_trips += 1
+                    await self._container.execute_item_batch(
+                        batch_operations=[operations[i].as_batch_operation() for i in indexes],
+                        partition_key=partition_key,
+                    )
+            except CosmosBatchOperationError as e:
+                if self._transactional:
+                    raise
+                failed = indexes[e.error_index]
+                outcomes[failed] = self._outcome(operations[failed], e.status_code, str(e.message))
+                # The batch was rolled back, so resubmit everything except the failed operation
+                indexes = indexes[:e.error_index] + indexes[e.error_index + 1:]
+                continue
+            except CosmosHttpResponseError as e:
+                if self._transactional:
+                    raise
+                for index in indexes:
+                    outcomes[index] = self._outcome(operations[index], e.status_code or 500, str(e.message))
+                return
+            for index in indexes:
+                operation = operations[index]
+                outcomes[index] = self._outcome(operation, _SUCCESS_STATUS[operation.operation])
+            return
+
+    async def _run_point(
+        self,
+        operation: BulkOperation,
+        index: int,
+        outcomes: Dict[int, BulkItemResult],
+        result: BulkResult,
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        try:
+            async with semaphore:
+                result.round_trips += 1
+                if operation.operation == "create":
+                    await self._container.create_item(body=operation.body)
+                elif operation.operation == "upsert":
+                    await self._container.upsert_item(body=operation.body)
+                elif operation.operation == "replace":
+                    await self._container.replace_item(item=operation.id, body=operation.body)
+                elif operation.operation == "patch":
+                    await self._container.patch_item(
+                        item=operation.id,
+                        partition_key=operation.partition_key,
+                        patch_operations=operation.body["operations"],
+                    )
+                else:
+                    await self._container.delete_item(item=operation.id, partition_key=operation.partition_key)
+        except CosmosHttpResponseError as e:
+            if self._transactional:
+                raise
+            outcomes[index] = self._outcome(operation, e.status_code or 500, str(e.message))
+            return
+        outcomes[index] = self._outcome(operation, _SUCCESS_STATUS[operation.operation])
+
+    @staticmethod
+    def _outcome(operation: BulkOperation, status_code: int, error: Optional[str] = None) -> BulkItemResult:
+        return BulkItemResult(
+            id=operation.id,
+            partition_key=operation.partition_key,
+            operation=operation.operation,
+            status_code=status_code,
+            error=error,
+        )
@@ -5,9 +5,16 @@ import logging
 import uuid
 import json
 import datetime
-from typing import Any, Dict, List, Optional, Type, Tuple
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Type, Tuple
 import numpy as np
 
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError,
+    CosmosHttpResponseError,
+    CosmosResourceNotFoundError,
+)
+from azure.core import MatchConditions
 from azure.cosmos.partition_key import PartitionKey
 from azure.cosmos.aio import CosmosClient
 from azure.identity import DefaultAzureCredential
@@ -17,7 +24,22 @@ from semantic_kernel.contents import ChatMessageContent, ChatHistory, AuthorRole
 
 # Import the AppConfig instance
 from app_config import config  # Thought into existence by Darbot
-from models.messages_kernel import BaseDataModel, Plan, Session, Step, AgentMessage  # Thought into existence by Darbot
+from context.ann_index import IVFIndex, ann_index_registry
+from context import cosmos_vector
+from context.cosmos_bulk import MAX_CONCURRENT_WRITES, BulkOperation, BulkResult, CosmosBulkExecutor
+from context.document_cache import HIT, MISS, REVALIDATED, document_cache
+from context.partition_cache import partition_key_cache
+from context.purge import PURGE_JOB_DATA_TYPE
+from context.retention import (
+    ARCHIVE_CHUNK_DATA_TYPE,
+    ARCHIVE_DATA_TYPE,
+    ARCHIVED_DATA_TYPES,
+    FINISHED_PLAN_STATUSES,
+    archive_id,
+    retention_policy,
+)
+from context.vector_search import SCAN_PAGE_SIZE, StreamingTopK
+from models.messages_kernel import BaseDataModel, Plan, Session, Step, StepHistoryEntry, StepStatus, AgentMessage  # Thought into existence by Darbot
 
 
 # Add custom JSON encoder class for datetime objects
@@ -30,9 +52,72 @@ class DateTimeEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+# Page sizes used when a caller does not ask for one
+DEFAULT_PLANS_PAGE_SIZE = 5
+# Documents fetched per round trip when a query is streamed
+DEFAULT_STREAM_PAGE_SIZE = 100
+
+# Plan fields read when listing plans; step_history holds every step reply and is only
+# read with the plan itself
+PLAN_LISTING_FIELDS = [name for name in Plan.model_fields if name != "step_history"]
+
+# Fields a MemoryRecord is built from; the embedding is only read when asked for
+MEMORY_RECORD_FIELDS = ["id", "key", "text", "description", "external_source_name", "additional_metadata"]
+
+# ANN index backfills running in the background, by (session_id, collection)
+_ann_backfills: Dict[Tuple[str, str], "asyncio.Task"] = {}
+# Backfills allowed to run at once; queries for other collections scan until one finishes
+MAX_ANN_BACKFILLS = 4
+
+
+def select_fields(fields: Sequence[str]) -> str:
+    """SELECT clause projecting the given top-level fields of c."""
+    return "SELECT " + ", ".join(f"c.{field}" for field in fields)
+
+
+def memory_record_fields(with_embeddings: bool) -> List[str]:
+    """The fields to project when reading memory records."""
+    return MEMORY_RECORD_FIELDS + ["embedding"] if with_embeddings else MEMORY_RECORD_FIELDS
+
+
+def _etag_of(document: Any) -> Optional[str]:
+    """The _etag of a document returned by a read or write, if any."""
+    return document.get("_etag") if isinstance(document, dict) else None
+
+
+def _track_stored(item: BaseDataModel, document: Any) -> None:
+    """Remember the stored document, and so the ETag, an item was read from or written as."""
+    stored = document if isinstance(document, dict) else None
+    item._stored = stored
+    item._etag = _etag_of(stored)
+
+
+def _merge_changes(
+    base: Dict[str, Any], changed: Dict[str, Any], current: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Apply the fields that differ between base and changed on top of current.
+
+    Fields the writer did not touch keep the value another writer stored since; fields
+    both changed take the writer's value.
+    """
+    merged = {key: value for key, value in current.items() if not key.startswith("_")}
+    for key, value in changed.items():
+        if key not in base or base[key] != value:
+            merged[key] = value
+    return merged
+
+
+def _data_type_of(model_class: Type[BaseDataModel]) -> Optional[str]:
+    field = model_class.model_fields.get("data_type")
+    return field.default if field is not None else None
+
+
 class CosmosMemoryContext(MemoryStoreBase):
     """A buffered chat completion context that saves messages and data models to Cosmos DB."""
 
+    # Conditional writes attempted by update_item before a conflict is raised
+    UPDATE_ATTEMPTS = 3
+
     MODEL_CLASS_MAPPING = {
         "session": Session,
         "plan": Plan,
@@ -70,21 +155,29 @@ class CosmosMemoryContext(MemoryStoreBase):
     async def initialize(self):
         """Initialize the memory context using CosmosDB."""
         try:
-            if not self._database:
-                # Create Cosmos client
-                cosmos_client = CosmosClient(
-                    self._cosmos_endpoint, credential=DefaultAzureCredential()
-                )
-                self._database = cosmos_client.get_database_client(
-                    self._cosmos_database
+            if self._uses_pooled_client():
+                # Reuse the process-wide client and container handle
+                self._container = await config.get_cosmos_container(
+                    self._cosmos_container
                 )
+            else:
+                if not self._database:
+                    # Create Cosmos client
+                    cosmos_client = CosmosClient(
+                        self._cosmos_endpoint, credential=DefaultAzureCredential()
+                    )
+                    self._database = cosmos_client.get_database_client(
+                        self._cosmos_database
+                    )
 
-            # Set up CosmosDB container
-            self._container = await self._database.create_container_if_not_exists(
-                id=self._cosmos_container,
-                partition_key=PartitionKey(path="/session_id"),
-            )
-            logging.info("Successfully connected to CosmosDB")
+                # Set up CosmosDB container
+                container = await self._database.create_container_if_not_exists(
+                    id=self._cosmos_container,
+                    partition_key=PartitionKey(path="/session_id"),
+                    **config.cosmos_container_options(),
+                )
+                self._container = await config.check_container_ttl(self._database, container)
+                logging.info("Successfully connected to CosmosDB")
         except Exception as e:
             logging.error(
                 f"Failed to initialize CosmosDB container: {e}. Continuing without CosmosDB for testing."
@@ -94,6 +187,13 @@ class CosmosMemoryContext(MemoryStoreBase):
 
         self._initialized.set()
 
+    def _uses_pooled_client(self) -> bool:
+        """Whether this context targets the account configured in AppConfig."""
+        return (
+            self._cosmos_endpoint == config.COSMOSDB_ENDPOINT
+            and self._cosmos_database == config.COSMOSDB_DATABASE
+        )
+
     # Helper method for awaiting initialization
     async def ensure_initialized(self):
         """Ensure that the container is initialized."""
@@ -115,56 +215,234 @@ class CosmosMemoryContext(MemoryStoreBase):
                     "CosmosDB container is not available. Initialization failed."
                 )
 
+    def last_request_charge(self) -> float:
+        """Request units charged for the container's most recent Cosmos DB operation."""
+        connection = getattr(self._container, "client_connection", None)
+        headers = getattr(connection, "last_response_headers", None) or {}
+        try:
+            return float(headers.get("x-ms-request-charge", 0.0))
+        except (TypeError, ValueError):
+            return 0.0
+
+    @staticmethod
+    def _serialize_item(item: BaseDataModel) -> Dict[str, Any]:
+        """Convert a data model into a Cosmos DB document.
+
+        Pydantic's JSON mode encodes datetimes (nested ones included) and enums in one
+        pass, so the document is ready for the SDK's json.dumps as is. The time to live
+        of the item's data type, if any, is set on the document.
+        """
+        return retention_policy.apply_ttl(item.model_dump(mode="json"))
+
+    @staticmethod
+    def _deserialize_item(document: Dict[str, Any], model_class: Type[BaseDataModel]) -> BaseDataModel:
+        """Build a data model from a Cosmos DB document and remember where it is stored."""
+        result = model_class.model_validate(document)
+        _track_stored(result, document)
+        partition_key_cache.remember(result)
+        document_cache.put(result, result._etag)
+        return result
+
     async def add_item(self, item: BaseDataModel) -> None:
         """Add a data model item to Cosmos DB."""
         await self.ensure_initialized()
 
         try:
-            # Convert the model to a dict
-            document = item.model_dump()
-
-            # Handle datetime objects by converting them to ISO format strings
-            for key, value in list(document.items()):
-                if isinstance(value, datetime.datetime):
-                    document[key] = value.isoformat()
+            document = self._serialize_item(item)
 
             # Now create the item with the serialized datetime values
-            await self._container.create_item(body=document)
+            created = await self._container.create_item(body=document)
+            _track_stored(item, created)
+            partition_key_cache.remember(item)
+            document_cache.put(item, item._etag)
+            if getattr(item, "data_type", None) == "step":
+                document_cache.discard_plan_steps([item.plan_id])
             logging.info(f"Item added to Cosmos DB - {document['id']}")
         except Exception as e:
             logging.exception(f"Failed to add item to Cosmos DB: {e}")
             raise  # Propagate the error instead of silently failing
 
-    async def update_item(self, item: BaseDataModel) -> None:
-        """Update an existing item in Cosmos DB."""
+    async def add_items(self, items: List[BaseDataModel]) -> None:
+        """Add several data model items to Cosmos DB in as few round trips as possible.
+
+        Items are grouped by session_id (the partition key) and written as transactional
+        batches, so a plan and its steps are stored in one request and either all of them
+        are written or none are.
+        """
+        if not items:
+            return
         await self.ensure_initialized()
 
         try:
-            # Convert the model to a dict
-            document = item.model_dump()
+            operations = [BulkOperation.create(self._serialize_item(item)) for item in items]
+            result = await CosmosBulkExecutor(self._container, transactional=True).execute(operations)
+            self._forget_written(operations)
+            for item in items:
+                partition_key_cache.remember(item)
+            logging.info(f"Added {len(items)} items to Cosmos DB in {result.round_trips} requests")
+        except Exception as e:
+            logging.exception(f"Failed to add items to Cosmos DB: {e}")
+            raise  # Propagate the error instead of silently failing
 
-            # Handle datetime objects by converting them to ISO format strings
-            for key, value in list(document.items()):
-                if isinstance(value, datetime.datetime):
-                    document[key] = value.isoformat()
+    async def bulk_write(
+        self,
+        operations: List[BulkOperation],
+        transactional: bool = False,
+        max_concurrency: int = MAX_CONCURRENT_WRITES,
+    ) -> BulkResult:
+        """Run create/upsert/replace/patch/delete operations as batches per partition.
 
-            # Now upsert the item with the serialized datetime values
-            await self._container.upsert_item(body=document)
+        Args:
+            operations: The operations to run
+            transactional: If True, a failing batch raises and none of its operations
+                are applied; otherwise every operation succeeds or fails on its own
+            max_concurrency: Requests in flight when operations span several partitions
+
+        Returns:
+            A BulkResult with the outcome of every operation, in input order
+        """
+        await self.ensure_initialized()
+        try:
+            return await CosmosBulkExecutor(
+                self._container, max_concurrency=max_concurrency, transactional=transactional
+            ).execute(operations)
+        finally:
+            self._forget_written(operations)
+
+    @staticmethod
+    def _forget_written(operations: List[BulkOperation]) -> None:
+        """Evict documents written in bulk from the document cache; no ETags come back."""
+        for operation in operations:
+            document_cache.discard(operation.id)
+        document_cache.discard_plan_steps(
+            operation.body["plan_id"]
+            for operation in operations
+            if operation.body and operation.body.get("data_type") == "step"
+        )
+
+    async def update_item(self, item: BaseDataModel) -> None:
+        """Update an existing item in Cosmos DB.
+
+        An item read from or written to Cosmos DB is replaced only if the stored document
+        still has the ETag it was read at. If another writer changed it in the meantime,
+        the fields this item changed since it was read are applied to the current document
+        and the replace is retried, up to UPDATE_ATTEMPTS times; the item is refreshed
+        with the merged result. Items without an ETag, e.g. built in memory, are upserted.
+
+        A document deleted since it was read, e.g. by a purge or an archive, is not written
+        back: the update is dropped and the item is forgotten by the caches.
+
+        Raises:
+            CosmosAccessConditionFailedError: If the document kept changing on every attempt
+        """
+        await self.ensure_initialized()
+
+        try:
+            document = self._serialize_item(item)
+            etag = item._etag
+            merged = False
+            written = None
+            for attempt in range(1, self.UPDATE_ATTEMPTS + 1):
+                if etag is None:
+                    written = await self._container.upsert_item(body=document)
+                    break
+                try:
+                    written = await self._container.replace_item(
+                        item=document["id"],
+                        body=document,
+                        etag=etag,
+                        match_condition=MatchConditions.IfNotModified,
+                    )
+                    break
+                except CosmosResourceNotFoundError:
+                    self._forget_deleted(item)
+                    return
+                except CosmosAccessConditionFailedError:
+                    if attempt == self.UPDATE_ATTEMPTS:
+                        raise
+                    try:
+                        current = await self._container.read_item(
+                            item=document["id"], partition_key=document["session_id"]
+                        )
+                    except CosmosResourceNotFoundError:
+                        self._forget_deleted(item)
+                        return
+                    logging.info(
+                        f"Item {document['id']} changed since it was read, merging (attempt {attempt})"
+                    )
+                    document = _merge_changes(item._stored or {}, document, current)
+                    etag = _etag_of(current)
+                    merged = True
+
+            if merged:
+                current_item = type(item).model_validate(document)
+                for name in type(item).model_fields:
+                    setattr(item, name, getattr(current_item, name))
+            _track_stored(item, written)
+            partition_key_cache.remember(item)
+            document_cache.put(item, item._etag)
         except Exception as e:
             logging.exception(f"Failed to update item in Cosmos DB: {e}")
             raise  # Propagate the error instead of silently failing
 
+    @staticmethod
+    def _forget_deleted(item: BaseDataModel) -> None:
+        """Drop an item whose document was deleted while it was being updated."""
+        logging.info(f"Item {item.id} was deleted since it was read, the update is dropped")
+        partition_key_cache.discard(item.id)
+        document_cache.discard(item.id)
+        if getattr(item, "data_type", None) == "step":
+            document_cache.discard_plan_steps([item.plan_id])
+
     async def get_item_by_id(
         self, item_id: str, partition_key: str, model_class: Type[BaseDataModel]
     ) -> Optional[BaseDataModel]:
-        """Retrieve an item by its ID and partition key."""
+        """Retrieve an item by its ID and partition key with a point read.
+
+        Plans and steps are read through the document cache: a cached copy is served
+        while it is fresh, and otherwise revalidated with a read conditional on its ETag,
+        which transfers the document only if it changed.
+        """
         await self.ensure_initialized()
 
+        cached = None
+        options = {}
+        if document_cache.caches(_data_type_of(model_class)):
+            cached = document_cache.get(item_id, partition_key)
+            if cached is None:
+                document_cache.record(MISS)
+            elif cached[2]:
+                document_cache.record(HIT)
+                return cached[0]
+            else:
+                options = {"etag": cached[1], "match_condition": MatchConditions.IfModified}
+
         try:
             item = await self._container.read_item(
-                item=item_id, partition_key=partition_key
+                item=item_id, partition_key=partition_key, **options
             )
-            return model_class.model_validate(item)
+        except CosmosResourceNotFoundError:
+            document_cache.discard(item_id)
+            logging.debug(f"Item {item_id} not found in partition {partition_key}")
+            return None
+        except CosmosHttpResponseError as e:
+            if cached is None or e.status_code != 304:
+                logging.exception(f"Failed to retrieve item from Cosmos DB: {e}")
+                return None
+            item = None
+        except Exception as e:
+            logging.exception(f"Failed to retrieve item from Cosmos DB: {e}")
+            return None
+
+        if cached is not None:
+            if not item:
+                # 304 Not Modified: the cached copy is current
+                document_cache.confirm(item_id)
+                document_cache.record(REVALIDATED)
+                return cached[0]
+            document_cache.record(MISS)
+        try:
+            return self._deserialize_item(item, model_class)
         except Exception as e:
             logging.exception(f"Failed to retrieve item from Cosmos DB: {e}")
             return None
@@ -173,22 +451,129 @@ class CosmosMemoryContext(MemoryStoreBase):
         self,
         query: str,
         parameters: List[Dict[str, Any]],
-        model_class: Type[BaseDataModel],
-    ) -> List[BaseDataModel]:
-        """Query items from Cosmos DB and return a list of model instances."""
+        model_class: Optional[Type[BaseDataModel]],
+        partition_key: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Any]:
+        """Query items from Cosmos DB and return a list of model instances.
+
+        Pass partition_key when the session is known, so the query is served by a
+        single partition instead of fanning out across the container.
+
+        Args:
+            fields: Only read these fields: the query's SELECT * is replaced with a
+                projection, and the partial documents are returned as dicts unless
+                model_class is given
+        """
         await self.ensure_initialized()
 
         try:
-            items = self._container.query_items(query=query, parameters=parameters)
-            result_list = []
-            async for item in items:
-                item["ts"] = item["_ts"]
-                result_list.append(model_class.model_validate(item))
-            return result_list
+            if fields:
+                query = query.replace("SELECT *", select_fields(fields), 1)
+            options = {"partition_key": partition_key} if partition_key is not None else {}
+            items = self._container.query_items(query=query, parameters=parameters, **options)
+            if model_class is None:
+                return [item async for item in items]
+            return [self._deserialize_item(item, model_class) async for item in items]
         except Exception as e:
             logging.exception(f"Failed to query items from Cosmos DB: {e}")
             return []
 
+    async def query_page(
+        self,
+        query: str,
+        parameters: List[Dict[str, Any]],
+        model_class: Optional[Type[BaseDataModel]],
+        limit: int,
+        cursor: Optional[str] = None,
+        partition_key: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """Return one page of query results and the cursor for the next page.
+
+        The cursor is the Cosmos DB continuation token, so a page costs the same however
+        deep it is; OFFSET would scan and bill every skipped row.
+
+        Args:
+            model_class: Model to validate the documents into, or None for raw documents
+            limit: Maximum number of items in the page
+            cursor: Cursor returned with the previous page, None for the first page
+            partition_key: Pins the query to one partition
+            fields: Only read these fields: the query's SELECT * is replaced with a
+                projection. The partial models are not cached or tracked for updates.
+
+        Returns:
+            The page and the next cursor, which is None on the last page
+
+        Raises:
+            ValueError: If the cursor is not a valid continuation token
+        """
+        await self.ensure_initialized()
+        if self._container is None:
+            return [], None
+
+        if fields:
+            query = query.replace("SELECT *", select_fields(fields), 1)
+        options = {"partition_key": partition_key} if partition_key is not None else {}
+        items = self._container.query_items(
+            query=query, parameters=parameters, max_item_count=limit, **options
+        )
+        try:
+            pages = items.by_page(cursor)
+            page = await pages.__anext__()
+            documents = [item async for item in page]
+        except StopAsyncIteration:
+            return [], None
+        except CosmosHttpResponseError as e:
+            if cursor and e.status_code == 400:
+                raise ValueError("Invalid cursor") from e
+            raise
+        if model_class is None:
+            return documents, pages.continuation_token
+        if fields:
+            return [model_class.model_validate(document) for document in documents], pages.continuation_token
+        results = [self._deserialize_item(document, model_class) for document in documents]
+        return results, pages.continuation_token
+
+    async def iter_query(
+        self,
+        query: str,
+        parameters: List[Dict[str, Any]],
+        model_class: Optional[Type[BaseDataModel]],
+        partition_key: Optional[str] = None,
+        page_size: int = DEFAULT_STREAM_PAGE_SIZE,
+    ) -> AsyncIterator[List[Any]]:
+        """Yield the results of a query one page at a time.
+
+        Unlike query_items only the current page is held, however many documents match.
+        Streamed documents are not added to the document cache, so a long scan does not
+        evict the plans and steps that are read again.
+
+        Args:
+            model_class: Model to validate the documents into, or None for raw documents
+            partition_key: Pins the query to one partition
+            page_size: Documents fetched per round trip
+        """
+        await self.ensure_initialized()
+        if self._container is None:
+            return
+
+        options = {"partition_key": partition_key} if partition_key is not None else {}
+        items = self._container.query_items(
+            query=query, parameters=parameters, max_item_count=page_size, **options
+        )
+        async for page in items.by_page():
+            documents = [item async for item in page]
+            if model_class is None:
+                yield documents
+                continue
+            results = []
+            for document in documents:
+                result = model_class.model_validate(document)
+                _track_stored(result, document)
+                results.append(result)
+            yield results
+
     async def add_session(self, session: Session) -> None:
         """Add a session to Cosmos DB."""
         await self.add_item(session)
@@ -220,6 +605,34 @@ class CosmosMemoryContext(MemoryStoreBase):
         """Update an existing plan in Cosmos DB."""
         await self.update_item(plan)
 
+    async def append_step_history(self, plan_id: str, session_id: str, entry: StepHistoryEntry) -> None:
+        """Append a completed step to the plan's step_history.
+
+        The entry is added with a patch, so steps completing at the same time do not
+        overwrite each other's entries, and the plan is not read first.
+        """
+        await self.ensure_initialized()
+        value = entry.model_dump(mode="json")
+        try:
+            document = await self._container.patch_item(
+                item=plan_id,
+                partition_key=session_id,
+                patch_operations=[{"op": "add", "path": "/step_history/-", "value": value}],
+            )
+        except CosmosResourceNotFoundError:
+            logging.warning(f"Plan {plan_id} not found, step {entry.step_id} is not added to its history")
+            return
+        except CosmosHttpResponseError as e:
+            if e.status_code != 400:
+                raise
+            # Plans written before step_history existed have no array to append to
+            document = await self._container.patch_item(
+                item=plan_id,
+                partition_key=session_id,
+                patch_operations=[{"op": "set", "path": "/step_history", "value": [value]}],
+            )
+        self._deserialize_item(document, Plan)
+
     async def get_plan_by_session(self, session_id: str) -> Optional[Plan]:
         """Retrieve a plan associated with a session."""
         query = "SELECT * FROM c WHERE c.session_id=@session_id AND c.user_id=@user_id AND c.data_type=@data_type"
@@ -242,49 +655,171 @@ class CosmosMemoryContext(MemoryStoreBase):
         threads = await self.query_items(query, parameters, Plan)
         return threads[0] if threads else None
 
-    async def get_plan(self, plan_id: str) -> Optional[Plan]:
+    async def get_plan(self, plan_id: str, session_id: Optional[str] = None) -> Optional[Plan]:
         """Retrieve a plan by its ID.
 
+        The plan is fetched with a point read in its session's partition: the given
+        session, the one remembered for this ID, or this context's session. Only when
+        none of these is given or known is a cross-partition query run.
+
         Args:
             plan_id: The ID of the plan to retrieve
+            session_id: The session the plan belongs to, if known
 
         Returns:
             The Plan object or None if not found
         """
-        # Use the session_id as the partition key since that's how we're partitioning our data
-        return await self.get_item_by_id(
-            plan_id, partition_key=self.session_id, model_class=Plan
-        )
+        return await self._get_by_id(plan_id, session_id, Plan)
+
+    async def _get_by_id(
+        self, item_id: str, session_id: Optional[str], model_class: Type[BaseDataModel]
+    ) -> Optional[BaseDataModel]:
+        """Point read a plan or step, falling back to a query when its session is unknown."""
+        if session_id:
+            return await self.get_item_by_id(item_id, partition_key=session_id, model_class=model_class)
+        cached = partition_key_cache.get(item_id)
+        partition = cached or self.session_id
+        if partition:
+            item = await self.get_item_by_id(item_id, partition_key=partition, model_class=model_class)
+            if item is not None or cached:
+                return item
+        query = "SELECT * FROM c WHERE c.id=@id AND c.data_type=@data_type"
+        parameters = [
+            {"name": "@id", "value": item_id},
+            {"name": "@data_type", "value": model_class.model_fields["data_type"].default},
+        ]
+        items = await self.query_items(query, parameters, model_class)
+        return items[0] if items else None
 
     async def get_all_plans(self) -> List[Plan]:
-        """Retrieve all plans."""
-        query = "SELECT * FROM c WHERE c.user_id=@user_id AND c.data_type=@data_type ORDER BY c._ts DESC OFFSET 0 LIMIT 5"
+        """Retrieve the user's most recent plans."""
+        plans, _ = await self.get_plans_page(DEFAULT_PLANS_PAGE_SIZE)
+        return plans
+
+    async def get_plans_page(
+        self, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[Plan], Optional[str]]:
+        """Retrieve a page of the user's plans, newest first, and the next cursor.
+
+        The plans are read without their step_history, so they are for listing only:
+        read a plan with get_plan to update it.
+        """
+        query = "SELECT * FROM c WHERE c.user_id=@user_id AND c.data_type=@data_type ORDER BY c._ts DESC"
         parameters = [
             {"name": "@data_type", "value": "plan"},
             {"name": "@user_id", "value": self.user_id},
         ]
-        plans = await self.query_items(query, parameters, Plan)
-        return plans
+        try:
+            return await self.query_page(query, parameters, Plan, limit, cursor, fields=PLAN_LISTING_FIELDS)
+        except ValueError:
+            raise
+        except Exception as e:
+            logging.exception(f"Failed to query plans from Cosmos DB: {e}")
+            return [], None
 
     async def add_step(self, step: Step) -> None:
         """Add a step to Cosmos DB."""
         await self.add_item(step)
 
+    async def add_plan_with_steps(self, plan: Plan, steps: List[Step]) -> None:
+        """Add a plan and its steps to Cosmos DB in a single transactional batch."""
+        await self.add_items([plan, *steps])
+
     async def update_step(self, step: Step) -> None:
         """Update an existing step in Cosmos DB."""
         await self.update_item(step)
 
-    async def get_steps_by_plan(self, plan_id: str) -> List[Step]:
-        """Retrieve all steps associated with a plan."""
+    async def get_steps_by_plan(self, plan_id: str, session_id: Optional[str] = None) -> List[Step]:
+        """Retrieve all steps associated with a plan.
+
+        The query is scoped to the plan's partition when its session is given or has
+        been seen before; otherwise it fans out across partitions once.
+
+        The steps are read through the document cache. Stale cached steps are
+        revalidated with a projection of the plan's step IDs and ETags, and only read
+        again in full when a step was added, removed or changed.
+        """
         query = "SELECT * FROM c WHERE c.plan_id=@plan_id AND c.user_id=@user_id AND c.data_type=@data_type"
         parameters = [
             {"name": "@plan_id", "value": plan_id},
             {"name": "@data_type", "value": "step"},
             {"name": "@user_id", "value": self.user_id},
         ]
-        steps = await self.query_items(query, parameters, Step)
+        cached = document_cache.get_plan_steps(plan_id, self.user_id) if document_cache.enabled else None
+        if cached is not None:
+            cached_session, cached_steps, fresh = cached
+            if fresh:
+                document_cache.record(HIT)
+                return [step for step, _ in cached_steps]
+            current = await self.query_items(
+                query, parameters, None, partition_key=cached_session, fields=["id", "_etag"]
+            )
+            if {item["id"]: item.get("_etag") for item in current} == {step.id: etag for step, etag in cached_steps}:
+                document_cache.confirm_plan_steps(plan_id, self.user_id)
+                document_cache.record(REVALIDATED)
+                return [step for step, _ in cached_steps]
+        if document_cache.enabled:
+            document_cache.record(MISS)
+
+        partition = session_id or partition_key_cache.get(plan_id)
+        steps = await self.query_items(query, parameters, Step, partition_key=partition)
+        if steps:
+            document_cache.put_plan_steps(plan_id, self.user_id, steps[0].session_id, steps)
         return steps
 
+    async def get_steps_by_plans(self, plans: List[Plan]) -> Dict[str, List[Step]]:
+        """Retrieve the steps of several plans with a single query.
+
+        The query filters on the plans' sessions with IN, so Cosmos DB only visits the
+        partitions those plans live in instead of fanning out once per plan.
+
+        Args:
+            plans: The plans to retrieve steps for
+
+        Returns:
+            The steps of each plan, keyed by plan ID, in the order they were stored
+        """
+        steps_by_plan: Dict[str, List[Step]] = {plan.id: [] for plan in plans}
+        if not plans:
+            return steps_by_plan
+        query, parameters = self._steps_by_plans_query(plans)
+        for step in await self.query_items(query, parameters, Step):
+            steps_by_plan[step.plan_id].append(step)
+        return steps_by_plan
+
+    async def get_step_statuses_by_plans(self, plans: List[Plan]) -> Dict[str, List[StepStatus]]:
+        """Retrieve only the status of each step of several plans, with a single query.
+
+        This is the step summary plan listings need for their counts; the step bodies,
+        with their agent replies and feedback, are not read.
+
+        Returns:
+            The statuses of each plan's steps, keyed by plan ID
+        """
+        statuses: Dict[str, List[StepStatus]] = {plan.id: [] for plan in plans}
+        if not plans:
+            return statuses
+        query, parameters = self._steps_by_plans_query(plans)
+        for item in await self.query_items(query, parameters, None, fields=["plan_id", "status"]):
+            statuses[item["plan_id"]].append(StepStatus(item["status"]))
+        return statuses
+
+    def _steps_by_plans_query(self, plans: List[Plan]) -> Tuple[str, List[Dict[str, Any]]]:
+        """Query for the steps of several plans, scoped to the plans' session partitions."""
+        session_ids = list(dict.fromkeys(plan.session_id for plan in plans))
+        session_params = [f"@session_id_{i}" for i in range(len(session_ids))]
+        query = (
+            "SELECT * FROM c WHERE c.data_type=@data_type AND c.user_id=@user_id "
+            f"AND c.session_id IN ({', '.join(session_params)}) "
+            "AND ARRAY_CONTAINS(@plan_ids, c.plan_id)"
+        )
+        parameters = [
+            {"name": "@data_type", "value": "step"},
+            {"name": "@user_id", "value": self.user_id},
+            {"name": "@plan_ids", "value": list(dict.fromkeys(plan.id for plan in plans))},
+        ] + [{"name": name, "value": value} for name, value in zip(session_params, session_ids)]
+        return query, parameters
+
     async def get_steps_for_plan(
         self, plan_id: str, session_id: Optional[str] = None
     ) -> List[Step]:
@@ -297,12 +832,11 @@ class CosmosMemoryContext(MemoryStoreBase):
         Returns:
             List of Step objects
         """
-        return await self.get_steps_by_plan(plan_id)
+        return await self.get_steps_by_plan(plan_id, session_id=session_id)
 
-    async def get_step(self, step_id: str, session_id: str) -> Optional[Step]:
-        return await self.get_item_by_id(
-            step_id, partition_key=session_id, model_class=Step
-        )
+    async def get_step(self, step_id: str, session_id: Optional[str] = None) -> Optional[Step]:
+        """Retrieve a step by its ID with a point read, see get_plan."""
+        return await self._get_by_id(step_id, session_id, Step)
 
     async def add_agent_message(self, message: AgentMessage) -> None:
         """Add an agent message to Cosmos DB.
@@ -331,6 +865,60 @@ class CosmosMemoryContext(MemoryStoreBase):
         messages = await self.query_items(query, parameters, AgentMessage)
         return messages
 
+    async def get_agent_messages_page(
+        self, session_id: str, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[AgentMessage], Optional[str]]:
+        """Retrieve a page of the user's agent messages for a session, oldest first."""
+        query = "SELECT * FROM c WHERE c.session_id=@session_id AND c.user_id=@user_id AND c.data_type=@data_type ORDER BY c._ts ASC"
+        parameters = [
+            {"name": "@session_id", "value": session_id},
+            {"name": "@user_id", "value": self.user_id},
+            {"name": "@data_type", "value": "agent_message"},
+        ]
+        try:
+            return await self.query_page(
+                query, parameters, AgentMessage, limit, cursor, partition_key=session_id
+            )
+        except ValueError:
+            raise
+        except Exception as e:
+            logging.exception(f"Failed to query agent messages from Cosmos DB: {e}")
+            return [], None
+
+    def _message_document(self, message: ChatMessageContent) -> Dict[str, Any]:
+        """Convert a chat message into a Cosmos DB document."""
+        return retention_policy.apply_ttl({
+            "id": str(uuid.uuid4()),
+            "session_id": self.session_id,
+            "user_id": self.user_id,
+            "data_type": "message",
+            "content": {
+                "role": message.role.value,
+                "content": message.content,
+                "metadata": message.metadata,
+            },
+            "source": message.metadata.get("source", ""),
+        })
+
+    @staticmethod
+    def _to_chat_message(item: Dict[str, Any]) -> ChatMessageContent:
+        """Convert a Cosmos DB document into a chat message."""
+        content = item.get("content", {})
+        role = content.get("role", "user")
+        chat_role = AuthorRole.ASSISTANT
+        if role == "user":
+            chat_role = AuthorRole.USER
+        elif role == "system":
+            chat_role = AuthorRole.SYSTEM
+        elif role == "tool":  # Equivalent to FunctionExecutionResultMessage
+            chat_role = AuthorRole.TOOL
+
+        return ChatMessageContent(
+            role=chat_role,
+            content=content.get("content", ""),
+            metadata=content.get("metadata", {}),
+        )
+
     async def add_message(self, message: ChatMessageContent) -> None:
         """Add a message to the memory and save to Cosmos DB."""
         await self.ensure_initialized()
@@ -341,19 +929,7 @@ class CosmosMemoryContext(MemoryStoreBase):
             while len(self._messages) > self._buffer_size:
                 self._messages.pop(0)
 
-            message_dict = {
-                "id": str(uuid.uuid4()),
-                "session_id": self.session_id,
-                "user_id": self.user_id,
-                "data_type": "message",
-                "content": {
-                    "role": message.role.value,
-                    "content": message.content,
-                    "metadata": message.metadata,
-                },
-                "source": message.metadata.get("source", ""),
-            }
-            await self._container.create_item(body=message_dict)
+            await self._container.create_item(body=self._message_document(message))
         except Exception as e:
             logging.exception(f"Failed to add message to Cosmos DB: {e}")
             raise  # Propagate the error instead of silently failing
@@ -380,22 +956,7 @@ class CosmosMemoryContext(MemoryStoreBase):
             )
             messages = []
             async for item in items:
-                content = item.get("content", {})
-                role = content.get("role", "user")
-                chat_role = AuthorRole.ASSISTANT
-                if role == "user":
-                    chat_role = AuthorRole.USER
-                elif role == "system":
-                    chat_role = AuthorRole.SYSTEM
-                elif role == "tool":  # Equivalent to FunctionExecutionResultMessage
-                    chat_role = AuthorRole.TOOL
-
-                message = ChatMessageContent(
-                    role=chat_role,
-                    content=content.get("content", ""),
-                    metadata=content.get("metadata", {}),
-                )
-                messages.append(message)
+                messages.append(self._to_chat_message(item))
             return messages
         except Exception as e:
             logging.exception(f"Failed to load messages from Cosmos DB: {e}")
@@ -432,29 +993,50 @@ class CosmosMemoryContext(MemoryStoreBase):
             logging.exception(f"Failed to query data by type from Cosmos DB: {e}")
             return []
 
+    async def iter_data_by_type(
+        self, data_type: str, page_size: int = DEFAULT_STREAM_PAGE_SIZE
+    ) -> AsyncIterator[List[BaseDataModel]]:
+        """Yield this session's documents of a data type as models, oldest first, a page at a time."""
+        query = "SELECT * FROM c WHERE c.session_id=@session_id AND c.user_id=@user_id AND c.data_type=@data_type ORDER BY c._ts ASC"
+        parameters = [
+            {"name": "@session_id", "value": self.session_id},
+            {"name": "@data_type", "value": data_type},
+            {"name": "@user_id", "value": self.user_id},
+        ]
+        model_class = self.MODEL_CLASS_MAPPING.get(data_type, BaseDataModel)
+        async for page in self.iter_query(
+            query, parameters, model_class, partition_key=self.session_id, page_size=page_size
+        ):
+            yield page
+
     async def delete_item(self, item_id: str, partition_key: str) -> None:
         """Delete an item from Cosmos DB."""
         await self.ensure_initialized()
         try:
             await self._container.delete_item(item=item_id, partition_key=partition_key)
+            partition_key_cache.discard(item_id)
+            document_cache.discard(item_id)
         except Exception as e:
             logging.exception(f"Failed to delete item from Cosmos DB: {e}")
 
     async def delete_items_by_query(
         self, query: str, parameters: List[Dict[str, Any]]
-    ) -> None:
-        """Delete items matching the query."""
+    ) -> BulkResult:
+        """Delete items matching the query.
+
+        The query must project c.id and c.session_id. Matches are deleted in batches
+        per partition.
+        """
         await self.ensure_initialized()
         try:
             items = self._container.query_items(query=query, parameters=parameters)
+            operations = []
             async for item in items:
-                item_id = item["id"]
-                partition_key = item.get("session_id", None)
-                await self._container.delete_item(
-                    item=item_id, partition_key=partition_key
-                )
+                operations.append(BulkOperation.delete(item["id"], item.get("session_id", None)))
+            return await self.bulk_write(operations)
         except Exception as e:
             logging.exception(f"Failed to delete items from Cosmos DB: {e}")
+            return BulkResult()
 
     async def delete_all_messages(self, data_type) -> None:
         """Delete all messages of a specific type from Cosmos DB."""
@@ -469,26 +1051,218 @@ class CosmosMemoryContext(MemoryStoreBase):
         """Delete all items of a specific type from Cosmos DB."""
         await self.delete_all_messages(data_type)
 
-    async def get_all_messages(self) -> List[Dict[str, Any]]:
-        """Retrieve all messages from Cosmos DB."""
+    async def purge_items(
+        self,
+        data_types: Sequence[str],
+        page_size: int = DEFAULT_STREAM_PAGE_SIZE,
+        max_concurrency: int = MAX_CONCURRENT_WRITES,
+        soft_delete_ttl: Optional[int] = None,
+    ) -> AsyncIterator[BulkResult]:
+        """Remove all of the user's documents of the given data types, a page at a time.
+
+        The matches are read with one streamed query for every data type, and each page
+        is deleted in batches per partition before the next one is read. The BulkResult
+        of every page is yielded so the caller can report progress.
+
+        Args:
+            soft_delete_ttl: Instead of deleting the documents, set this time to live
+                (seconds) on them and let Cosmos DB remove them in the background with
+                spare throughput. Needs time to live enabled on the container; without
+                it the documents are deleted.
+        """
+        if soft_delete_ttl is not None and not await self._ttl_enabled():
+            logging.warning("Time to live is not enabled on the container, deleting instead")
+            soft_delete_ttl = None
+
+        query = "SELECT c.id, c.session_id FROM c WHERE c.user_id=@user_id AND ARRAY_CONTAINS(@data_types, c.data_type)"
+        parameters = [
+            {"name": "@user_id", "value": self.user_id},
+            {"name": "@data_types", "value": list(data_types)},
+        ]
+        async for page in self.iter_query(query, parameters, None, page_size=page_size):
+            if soft_delete_ttl is None:
+                operations = [BulkOperation.delete(item["id"], item.get("session_id")) for item in page]
+            else:
+                expire = [{"op": "set", "path": "/ttl", "value": soft_delete_ttl}]
+                operations = [BulkOperation.patch(item["id"], item.get("session_id"), expire) for item in page]
+            yield await self.bulk_write(operations, max_concurrency=max_concurrency)
+
+    async def _ttl_enabled(self) -> bool:
+        """Whether documents can set their own time to live in this container."""
         await self.ensure_initialized()
-        if self._container is None:
+        try:
+            properties = await self._container.read()
+        except Exception as e:
+            logging.warning(f"Failed to read the container properties: {e}")
+            return False
+        return properties.get("defaultTtl") is not None
+
+    async def save_purge_job(self, document: Dict[str, Any]) -> None:
+        """Write the progress document of a purge, so any worker can report it.
+
+        The document is stored in the user's partition and carries its own time to live.
+        """
+        await self.ensure_initialized()
+        await self._container.upsert_item(body=document)
+
+    async def get_purge_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return this user's progress document of a purge, or None."""
+        await self.ensure_initialized()
+        try:
+            document = await self._container.read_item(item=job_id, partition_key=self.user_id)
+        except CosmosResourceNotFoundError:
+            return None
+        if document.get("user_id") != self.user_id or document.get("data_type") != PURGE_JOB_DATA_TYPE:
+            return None
+        return document
+
+    async def archive_finished_sessions(
+        self, limit: int = 50, min_age_seconds: Optional[float] = None
+    ) -> List[str]:
+        """Archive the user's sessions whose plan finished a while ago.
+
+        Args:
+            limit: Most sessions archived in one call
+            min_age_seconds: Seconds since the finished plan was last written, the
+                retention policy's archive_min_age_seconds by default
+
+        Returns:
+            The session IDs that were archived
+        """
+        if min_age_seconds is None:
+            min_age_seconds = retention_policy.archive_min_age_seconds
+        query = (
+            "SELECT c.session_id FROM c WHERE c.user_id=@user_id AND c.data_type=@data_type"
+            " AND ARRAY_CONTAINS(@statuses, c.overall_status) AND c._ts <= @cutoff"
+        )
+        parameters = [
+            {"name": "@user_id", "value": self.user_id},
+            {"name": "@data_type", "value": "plan"},
+            {"name": "@statuses", "value": FINISHED_PLAN_STATUSES},
+            {"name": "@cutoff", "value": int(time.time() - min_age_seconds)},
+        ]
+        session_ids = []
+        for item in await self.query_items(query, parameters, None):
+            if item["session_id"] not in session_ids:
+                session_ids.append(item["session_id"])
+
+        archived = []
+        for session_id in session_ids[:limit]:
+            try:
+                if await self.archive_session(session_id) is not None:
+                    archived.append(session_id)
+            except Exception as e:
+                logging.exception(f"Failed to archive session {session_id}: {e}")
+        return archived
+
+    async def archive_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Compact the plan, steps and messages of a session into archive chunks.
+
+        The chunks and then the archive document listing them are written before the
+        originals are deleted. Documents added to the session after an earlier archive
+        go into new chunks, so an archive never has to be read back and rewritten, and
+        documents it already holds are deleted without being archived again.
+
+        Returns:
+            The archive document, or None if the session had nothing to archive
+        """
+        await self.ensure_initialized()
+        query = "SELECT * FROM c WHERE c.session_id=@session_id AND c.user_id=@user_id AND ARRAY_CONTAINS(@data_types, c.data_type)"
+        parameters = [
+            {"name": "@session_id", "value": session_id},
+            {"name": "@user_id", "value": self.user_id},
+            {"name": "@data_types", "value": ARCHIVED_DATA_TYPES},
+        ]
+        documents = await self.query_items(query, parameters, None, partition_key=session_id)
+        if not documents:
+            return None
+
+        previous = await self._read_archive(session_id)
+        archived_ids = set((previous or {}).get("document_ids", []))
+        new_documents = [document for document in documents if document["id"] not in archived_ids]
+        archive, chunks = previous, []
+        if new_documents:
+            archive, chunks = retention_policy.build_archive(session_id, self.user_id, new_documents, previous)
+            # One at a time: each chunk may be close to the 2 MB a batch can hold
+            for chunk in chunks:
+                await self._container.upsert_item(body=chunk)
+            await self._container.upsert_item(body=archive)
+        # Documents already archived, whose delete failed last time, are only deleted
+        result = await self.bulk_write(
+            [BulkOperation.delete(document["id"], session_id) for document in documents]
+        )
+        document_cache.discard_plan_steps(archive["plan_ids"])
+        logging.info(
+            f"Archived {len(result.succeeded)} documents of session {session_id} into {len(chunks)} chunks "
+            f"({len(result.failed)} could not be deleted)"
+        )
+        return archive
+
+    async def _read_archive(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return this user's archive document of a session, or None."""
+        try:
+            archive = await self._container.read_item(item=archive_id(session_id), partition_key=session_id)
+        except CosmosResourceNotFoundError:
+            return None
+        if archive.get("user_id") != self.user_id or archive.get("data_type") != ARCHIVE_DATA_TYPE:
+            return None
+        return archive
+
+    async def get_archived_session(self, session_id: str) -> List[Dict[str, Any]]:
+        """Return the documents archived for a session, or an empty list.
+
+        Raises:
+            ArchiveUnavailableError: If the archive was exported on another instance
+        """
+        await self.ensure_initialized()
+        archive = await self._read_archive(session_id)
+        if archive is None:
             return []
+        query = "SELECT * FROM c WHERE c.session_id=@session_id AND c.user_id=@user_id AND c.data_type=@data_type"
+        parameters = [
+            {"name": "@session_id", "value": session_id},
+            {"name": "@user_id", "value": self.user_id},
+            {"name": "@data_type", "value": ARCHIVE_CHUNK_DATA_TYPE},
+        ]
+        chunks = await self.query_items(query, parameters, None, partition_key=session_id)
+        # Chunks past chunk_count are left over from an archive that failed before it was listed
+        return retention_policy.load_archive(
+            [chunk for chunk in chunks if chunk["chunk"] < archive["chunk_count"]]
+        )
 
+    async def get_all_messages(self) -> List[Dict[str, Any]]:
+        """Retrieve all of the user's documents from Cosmos DB."""
+        messages = []
         try:
-            messages_list = []
-            query = "SELECT * FROM c WHERE c.user_id=@user_id OFFSET 0 LIMIT @limit"
-            parameters = [
-                {"name": "@user_id", "value": self.user_id},
-                {"name": "@limit", "value": 100},
-            ]
-            items = self._container.query_items(query=query, parameters=parameters)
-            async for item in items:
-                messages_list.append(item)
-            return messages_list
+            async for page in self.iter_messages():
+                messages.extend(page)
         except Exception as e:
             logging.exception(f"Failed to get messages from Cosmos DB: {e}")
             return []
+        return messages
+
+    async def get_messages_page(
+        self, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Retrieve a page of the user's documents and the next cursor."""
+        query = "SELECT * FROM c WHERE c.user_id=@user_id"
+        parameters = [{"name": "@user_id", "value": self.user_id}]
+        try:
+            return await self.query_page(query, parameters, None, limit, cursor)
+        except ValueError:
+            raise
+        except Exception as e:
+            logging.exception(f"Failed to get messages from Cosmos DB: {e}")
+            return [], None
+
+    async def iter_messages(
+        self, page_size: int = DEFAULT_STREAM_PAGE_SIZE
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield all of the user's documents, a page at a time."""
+        query = "SELECT * FROM c WHERE c.user_id=@user_id"
+        parameters = [{"name": "@user_id", "value": self.user_id}]
+        async for page in self.iter_query(query, parameters, None, page_size=page_size):
+            yield page
 
     async def get_all_items(self) -> List[Dict[str, Any]]:
         """Retrieve all items from Cosmos DB."""
@@ -531,7 +1305,9 @@ class CosmosMemoryContext(MemoryStoreBase):
             """
             parameters = [{"name": "@session_id", "value": self.session_id}]
 
-            items = self._container.query_items(query=query, parameters=parameters)
+            items = self._container.query_items(
+                query=query, parameters=parameters, partition_key=self.session_id
+            )
             collections = []
             async for item in items:
                 if "collection" in item and item["collection"] not in collections:
@@ -561,17 +1337,15 @@ class CosmosMemoryContext(MemoryStoreBase):
                 {"name": "@session_id", "value": self.session_id},
             ]
 
-            items = self._container.query_items(query=query, parameters=parameters)
-            async for item in items:
-                await self._container.delete_item(
-                    item=item["id"], partition_key=item["session_id"]
-                )
+            await self.delete_items_by_query(query, parameters)
+            if ann_index_registry.enabled:
+                ann_index_registry.drop(self.session_id, collection_name)
         except Exception as e:
             logging.exception(f"Failed to delete collection from Cosmos DB: {e}")
 
-    async def upsert_memory_record(self, collection: str, record: MemoryRecord) -> str:
-        """Store a memory record."""
-        memory_dict = {
+    def _memory_record_document(self, collection: str, record: MemoryRecord) -> Dict[str, Any]:
+        """Convert a memory record into a Cosmos DB document."""
+        return retention_policy.apply_ttl({
             "id": record.id or str(uuid.uuid4()),
             "session_id": self.session_id,
             "user_id": self.user_id,
@@ -579,23 +1353,44 @@ class CosmosMemoryContext(MemoryStoreBase):
             "collection": collection,
             "text": record.text,
             "description": record.description,
-            "external_source_name": record.external_source_name,
+            "external_source_name": record._external_source_name,
             "additional_metadata": record.additional_metadata,
             "embedding": (
                 record.embedding.tolist() if record.embedding is not None else None
             ),
-            "key": record.key,
-        }
+            # Semantic Kernel looks records up by key, which defaults to the record id
+            "key": record._key or record.id,
+        })
+
+    @staticmethod
+    def _to_memory_record(item: Dict[str, Any], with_embedding: bool) -> MemoryRecord:
+        """Convert a Cosmos DB document into a memory record."""
+        embedding = item.get("embedding")
+        return MemoryRecord(
+            is_reference=False,
+            id=item["id"],
+            text=item.get("text", ""),
+            description=item.get("description", ""),
+            external_source_name=item.get("external_source_name", ""),
+            additional_metadata=item.get("additional_metadata", ""),
+            embedding=np.array(embedding) if with_embedding and embedding else None,
+            key=item.get("key", ""),
+        )
+
+    async def upsert_memory_record(self, collection: str, record: MemoryRecord) -> str:
+        """Store a memory record."""
+        memory_dict = self._memory_record_document(collection, record)
 
         await self._container.upsert_item(body=memory_dict)
+        self._index_memory_documents(collection, [memory_dict])
         return memory_dict["id"]
 
     async def get_memory_record(
         self, collection: str, key: str, with_embedding: bool = False
     ) -> Optional[MemoryRecord]:
         """Retrieve a memory record."""
-        query = """
-            SELECT * FROM c
+        query = f"""
+            {select_fields(memory_record_fields(with_embedding))} FROM c
             WHERE c.collection=@collection AND c.key=@key AND c.session_id=@session_id AND c.data_type=@data_type
         """
         parameters = [
@@ -605,21 +1400,11 @@ class CosmosMemoryContext(MemoryStoreBase):
             {"name": "@data_type", "value": "memory"},
         ]
 
-        items = self._container.query_items(query=query, parameters=parameters)
+        items = self._container.query_items(
+            query=query, parameters=parameters, partition_key=self.session_id
+        )
         async for item in items:
-            return MemoryRecord(
-                id=item["id"],
-                text=item["text"],
-                description=item["description"],
-                external_source_name=item["external_source_name"],
-                additional_metadata=item["additional_metadata"],
-                embedding=(
-                    np.array(item["embedding"])
-                    if with_embedding and "embedding" in item
-                    else None
-                ),
-                key=item["key"],
-            )
+            return self._to_memory_record(item, with_embedding)
         return None
 
     async def remove_memory_record(self, collection: str, key: str) -> None:
@@ -640,6 +1425,7 @@ class CosmosMemoryContext(MemoryStoreBase):
             await self._container.delete_item(
                 item=item["id"], partition_key=self.session_id
             )
+        self._unindex_memory_keys(collection, [key])
 
     async def upsert_async(self, collection_name: str, record: Dict[str, Any]) -> str:
         """Helper method to insert documents directly."""
@@ -665,8 +1451,8 @@ class CosmosMemoryContext(MemoryStoreBase):
         await self.ensure_initialized()
 
         try:
-            query = """
-                SELECT *
+            query = f"""
+                {select_fields(memory_record_fields(with_embeddings))}
                 FROM c
                 WHERE c.collection = @collection
                 AND c.data_type = 'memory'
@@ -680,23 +1466,12 @@ class CosmosMemoryContext(MemoryStoreBase):
                 {"name": "@limit", "value": limit},
             ]
 
-            items = self._container.query_items(query=query, parameters=parameters)
+            items = self._container.query_items(
+                query=query, parameters=parameters, partition_key=self.session_id
+            )
             records = []
             async for item in items:
-                embedding = None
-                if with_embeddings and "embedding" in item and item["embedding"]:
-                    embedding = np.array(item["embedding"])
-
-                record = MemoryRecord(
-                    id=item["id"],
-                    key=item.get("key", ""),
-                    text=item.get("text", ""),
-                    embedding=embedding,
-                    description=item.get("description", ""),
-                    additional_metadata=item.get("additional_metadata", ""),
-                    external_source_name=item.get("external_source_name", ""),
-                )
-                records.append(record)
+                records.append(self._to_memory_record(item, with_embeddings))
             return records
         except Exception as e:
             logging.exception(f"Failed to get memory records from Cosmos DB: {e}")
@@ -709,12 +1484,24 @@ class CosmosMemoryContext(MemoryStoreBase):
     async def upsert_batch(
         self, collection_name: str, records: List[MemoryRecord]
     ) -> List[str]:
-        """Upsert a batch of memory records into the store."""
-        result_ids = []
-        for record in records:
-            record_id = await self.upsert_memory_record(collection_name, record)
-            result_ids.append(record_id)
-        return result_ids
+        """Upsert a batch of memory records into the store.
+
+        Records share the session partition, so they are written as batches of up to
+        100 operations. Ids of records that failed are logged and left out.
+        """
+        await self.ensure_initialized()
+        documents = [self._memory_record_document(collection_name, record) for record in records]
+        result = await self.bulk_write([BulkOperation.upsert(document) for document in documents])
+        for failure in result.failed:
+            logging.error(
+                f"Failed to upsert memory record {failure.id}: {failure.status_code} {failure.error}"
+            )
+        succeeded = [item.id for item in result.succeeded]
+        written = set(succeeded)
+        self._index_memory_documents(
+            collection_name, [document for document in documents if document["id"] in written]
+        )
+        return succeeded
 
     async def get(
         self, collection_name: str, key: str, with_embedding: bool = False
@@ -725,13 +1512,32 @@ class CosmosMemoryContext(MemoryStoreBase):
     async def get_batch(
         self, collection_name: str, keys: List[str], with_embeddings: bool = False
     ) -> List[MemoryRecord]:
-        """Get a batch of memory records from the store."""
-        results = []
-        for key in keys:
-            record = await self.get_memory_record(collection_name, key, with_embeddings)
-            if record:
-                results.append(record)
-        return results
+        """Get a batch of memory records from the store with a single query."""
+        await self.ensure_initialized()
+        if not keys:
+            return []
+
+        try:
+            query = f"""
+                {select_fields(memory_record_fields(with_embeddings))} FROM c
+                WHERE c.collection=@collection AND ARRAY_CONTAINS(@keys, c.key) AND c.session_id=@session_id AND c.data_type=@data_type
+            """
+            parameters = [
+                {"name": "@collection", "value": collection_name},
+                {"name": "@keys", "value": list(keys)},
+                {"name": "@session_id", "value": self.session_id},
+                {"name": "@data_type", "value": "memory"},
+            ]
+            records_by_key = {}
+            items = self._container.query_items(
+                query=query, parameters=parameters, partition_key=self.session_id
+            )
+            async for item in items:
+                records_by_key.setdefault(item["key"], self._to_memory_record(item, with_embeddings))
+            return [records_by_key[key] for key in keys if key in records_by_key]
+        except Exception as e:
+            logging.exception(f"Failed to get memory records from Cosmos DB: {e}")
+            return []
 
     async def remove(self, collection_name: str, key: str) -> None:
         """Remove a memory record from the store."""
@@ -739,8 +1545,20 @@ class CosmosMemoryContext(MemoryStoreBase):
 
     async def remove_batch(self, collection_name: str, keys: List[str]) -> None:
         """Remove a batch of memory records from the store."""
-        for key in keys:
-            await self.remove_memory_record(collection_name, key)
+        if not keys:
+            return
+        query = """
+            SELECT c.id, c.session_id FROM c
+            WHERE c.collection=@collection AND ARRAY_CONTAINS(@keys, c.key) AND c.session_id=@session_id AND c.data_type=@data_type
+        """
+        parameters = [
+            {"name": "@collection", "value": collection_name},
+            {"name": "@keys", "value": list(keys)},
+            {"name": "@session_id", "value": self.session_id},
+            {"name": "@data_type", "value": "memory"},
+        ]
+        await self.delete_items_by_query(query, parameters)
+        self._unindex_memory_keys(collection_name, keys)
 
     async def get_nearest_match(
         self,
@@ -756,6 +1574,174 @@ class CosmosMemoryContext(MemoryStoreBase):
         )
         return matches[0] if matches else (None, 0.0)
 
+    async def _iter_memory_documents(
+        self, collection: str, page_size: int = SCAN_PAGE_SIZE
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield a collection's memory documents that have embeddings, one query page at a time."""
+        query = f"""
+            {select_fields(memory_record_fields(True))} FROM c
+            WHERE c.collection=@collection AND c.session_id=@session_id AND c.data_type=@data_type
+        """
+        parameters = [
+            {"name": "@collection", "value": collection},
+            {"name": "@session_id", "value": self.session_id},
+            {"name": "@data_type", "value": "memory"},
+        ]
+        items = self._container.query_items(
+            query=query,
+            parameters=parameters,
+            partition_key=self.session_id,
+            max_item_count=page_size,
+        )
+        async for page in items.by_page():
+            yield [item async for item in page if item.get("embedding")]
+
+    def _index_memory_documents(self, collection: str, documents: List[Dict[str, Any]]) -> None:
+        """Add written memory documents to the collection's ANN index, if it has one."""
+        index = ann_index_registry.get(self.session_id, collection) if ann_index_registry.enabled else None
+        documents = [document for document in documents if document.get("embedding")]
+        if index is not None and documents:
+            index.add(
+                [document["key"] for document in documents],
+                [document["embedding"] for document in documents],
+            )
+
+    def _unindex_memory_keys(self, collection: str, keys: List[str]) -> None:
+        """Remove memory record keys from the collection's ANN index, if it has one."""
+        index = ann_index_registry.get(self.session_id, collection) if ann_index_registry.enabled else None
+        if index is not None:
+            index.remove(keys)
+
+    async def _count_memory_documents(self, collection: str, since: Optional[int] = None) -> int:
+        """Count a collection's memory documents with embeddings, optionally only those written since a _ts."""
+        query = """
+            SELECT VALUE COUNT(1) FROM c
+            WHERE c.collection=@collection AND c.session_id=@session_id AND c.data_type=@data_type
+            AND IS_DEFINED(c.embedding)
+        """
+        parameters = [
+            {"name": "@collection", "value": collection},
+            {"name": "@session_id", "value": self.session_id},
+            {"name": "@data_type", "value": "memory"},
+        ]
+        if since is not None:
+            query += " AND c._ts >= @since"
+            parameters.append({"name": "@since", "value": since})
+        items = self._container.query_items(query=query, parameters=parameters, partition_key=self.session_id)
+        return sum([count async for count in items])
+
+    async def _is_current(self, collection: str, index: IVFIndex) -> bool:
+        """Whether an index loaded from disk still matches the collection.
+
+        Nothing may have been written since the index was saved (_ts is in whole seconds,
+        so a write in the same second fails the check) and the record counts must agree,
+        which catches removals.
+        """
+        if await self._count_memory_documents(collection, since=int(index.saved_at)):
+            return False
+        return await self._count_memory_documents(collection) == len(index)
+
+    def _start_ann_backfill(self, collection: str) -> None:
+        """Build the collection's ANN index in the background, once per collection.
+
+        At most MAX_ANN_BACKFILLS run at once; beyond that the query just scans and a
+        later query starts the backfill.
+        """
+        key = (self.session_id, collection)
+        if key in _ann_backfills:
+            return
+        if len(_ann_backfills) >= MAX_ANN_BACKFILLS:
+            logging.debug(f"{len(_ann_backfills)} ANN backfills running, not indexing collection {collection} yet")
+            return
+        task = asyncio.create_task(self._build_ann_index(collection))
+        _ann_backfills[key] = task
+        task.add_done_callback(lambda _: _ann_backfills.pop(key, None))
+
+    async def _build_ann_index(self, collection: str) -> Optional[IVFIndex]:
+        """Create the collection's ANN index and backfill it from a scan of the collection.
+
+        The index is registered before the scan so records written meanwhile are added to
+        it, and searches skip it until it is ready. Normalizing, training and saving run
+        in a worker thread. If the backfill fails the index is discarded, so a later query
+        starts over. An index loaded from disk is used as is if it still matches the
+        collection, and is otherwise replaced by a fresh one.
+        """
+        index = ann_index_registry.create(self.session_id, collection)
+        if index.saved_at is not None and not index.ready:
+            try:
+                current = await self._is_current(collection, index)
+            except Exception as e:
+                logging.warning(f"Failed to check the saved ANN index of collection {collection}: {e}")
+                current = False
+            if current:
+                index.mark_ready()
+                return index
+            ann_index_registry.discard(self.session_id, collection, index)
+            index = ann_index_registry.create(self.session_id, collection)
+        try:
+            async for documents in self._iter_memory_documents(collection):
+                # Records written or removed during the scan are already reflected in the index
+                await asyncio.to_thread(
+                    index.add,
+                    [document["key"] for document in documents],
+                    [document["embedding"] for document in documents],
+                    replace=False,
+                )
+            await asyncio.to_thread(index.rebuild)
+        except Exception as e:
+            logging.exception(f"Failed to build the ANN index of collection {collection}: {e}")
+            ann_index_registry.discard(self.session_id, collection, index)
+            return None
+        index.mark_ready()
+        return index
+
+    async def _ann_nearest_matches(
+        self,
+        index: IVFIndex,
+        collection_name: str,
+        embedding: np.ndarray,
+        limit: int,
+        min_relevance_score: float,
+        with_embeddings: bool,
+    ) -> List[Tuple[MemoryRecord, float]]:
+        """Rank with the ANN index, then read only the winning records."""
+        # A search may retrain the index first, so it runs in a worker thread
+        hits = [
+            (key, score)
+            for key, score in await asyncio.to_thread(index.search, embedding, limit)
+            if score >= min_relevance_score
+        ]
+        records = await self.get_batch(collection_name, [key for key, _ in hits], with_embeddings)
+        records_by_key = {record._key: record for record in records}
+        return [(records_by_key[key], score) for key, score in hits if key in records_by_key]
+
+    def _uses_server_vector_search(self) -> bool:
+        return bool(getattr(config, "COSMOSDB_VECTOR_SEARCH", False)) and cosmos_vector.is_supported(
+            self._cosmos_container
+        )
+
+    async def _server_nearest_matches(
+        self,
+        collection_name: str,
+        embedding: np.ndarray,
+        limit: int,
+        min_relevance_score: float,
+        with_embeddings: bool,
+    ) -> List[Tuple[MemoryRecord, float]]:
+        """Rank in Cosmos DB with VectorDistance; only the top records and scores come back."""
+        items = self._container.query_items(
+            query=cosmos_vector.vector_search_query(with_embeddings),
+            parameters=cosmos_vector.vector_search_parameters(
+                collection_name, self.session_id, embedding, limit
+            ),
+            partition_key=self.session_id,
+        )
+        matches = []
+        async for item in items:
+            if item["score"] >= min_relevance_score:
+                matches.append((self._to_memory_record(item, with_embeddings), float(item["score"])))
+        return matches
+
     async def get_nearest_matches(
         self,
         collection_name: str,
@@ -764,28 +1750,47 @@ class CosmosMemoryContext(MemoryStoreBase):
         min_relevance_score: float = 0.0,
         with_embeddings: bool = False,
     ) -> List[Tuple[MemoryRecord, float]]:
-        """Get the nearest matches to the given embedding."""
+        """Get the nearest matches to the given embedding.
+
+        With COSMOSDB_VECTOR_SEARCH the ranking runs in Cosmos DB, falling back below for
+        the query if it fails, and for good if the container has no vector search. With
+        MEMORY_ANN_INDEX the local IVF index ranks once it has been built in the
+        background. Otherwise the whole collection is streamed page by page; each page is
+        scored with a single float32 matrix-vector product and only the running top
+        matches are kept.
+        """
         await self.ensure_initialized()
 
-        try:
-            records = await self.get_memory_records(
-                collection_name, limit=100, with_embeddings=True
-            )
-
-            results = []
-            for record in records:
-                if record.embedding is not None:
-                    similarity = np.dot(embedding, record.embedding) / (
-                        np.linalg.norm(embedding) * np.linalg.norm(record.embedding)
+        if self._uses_server_vector_search():
+            try:
+                return await self._server_nearest_matches(
+                    collection_name, embedding, limit, min_relevance_score, with_embeddings
+                )
+            except Exception as e:
+                if not cosmos_vector.mark_unsupported(self._cosmos_container, e):
+                    logging.warning(f"Vector search failed, ranking this query client-side: {e}")
+
+        if ann_index_registry.enabled:
+            index = ann_index_registry.get(self.session_id, collection_name)
+            if index is None or not index.ready:
+                self._start_ann_backfill(collection_name)
+            else:
+                try:
+                    return await self._ann_nearest_matches(
+                        index, collection_name, embedding, limit, min_relevance_score, with_embeddings
                     )
+                except Exception as e:
+                    logging.exception(f"Failed to search the ANN index, scanning instead: {e}")
+            # Until the index is ready the collection is scanned
 
-                    if similarity >= min_relevance_score:
-                        if not with_embeddings:
-                            record.embedding = None
-                        results.append((record, float(similarity)))
-
-            results.sort(key=lambda x: x[1], reverse=True)
-            return results[:limit]
+        try:
+            top = StreamingTopK(embedding, limit, min_relevance_score)
+            async for documents in self._iter_memory_documents(collection_name):
+                top.add(documents, [document["embedding"] for document in documents])
+            return [
+                (self._to_memory_record(document, with_embeddings), score)
+                for document, score in top.results()
+            ]
         except Exception as e:
             logging.exception(f"Failed to get nearest matches from Cosmos DB: {e}")
             return []
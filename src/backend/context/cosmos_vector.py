@@ -0,0 +1,79 @@
+"""Server-side vector search with Cosmos DB vector indexing."""
+
+import logging
+from typing import Any, Dict, List, Set
+
+from azure.cosmos.exceptions import CosmosHttpResponseError
+
+# Containers whose account or policy rejected a VectorDistance query in this process
+_unsupported_containers: Set[str] = set()
+
+# Phrases of the errors Cosmos DB returns when an account or container has no vector
+# search, as opposed to a query that failed for another reason
+_NOT_ENABLED_MARKERS = (
+    "embedding policy",
+    "vector index",
+    "not enabled",
+    "not supported",
+    "enablenosqlvectorsearch",
+)
+
+
+def vector_search_query(with_embeddings: bool) -> str:
+    """Top-k memory records of a collection ranked by cosine similarity to @embedding.
+
+    Only the fields needed to build a MemoryRecord are projected, plus the score.
+    """
+    fields = "c.id, c.key, c.text, c.description, c.external_source_name, c.additional_metadata"
+    if with_embeddings:
+        fields += ", c.embedding"
+    return (
+        f"SELECT TOP @limit {fields}, VectorDistance(c.embedding, @embedding) AS score "
+        "FROM c WHERE c.collection=@collection AND c.session_id=@session_id AND c.data_type=@data_type "
+        "ORDER BY VectorDistance(c.embedding, @embedding)"
+    )
+
+
+def vector_search_parameters(
+    collection: str, session_id: str, embedding: Any, limit: int
+) -> List[Dict[str, Any]]:
+    """Parameters for vector_search_query."""
+    return [
+        {"name": "@limit", "value": limit},
+        {"name": "@embedding", "value": [float(value) for value in embedding]},
+        {"name": "@collection", "value": collection},
+        {"name": "@session_id", "value": session_id},
+        {"name": "@data_type", "value": "memory"},
+    ]
+
+
+def is_supported(container_name: str) -> bool:
+    """Whether server-side vector search has not failed for this container yet."""
+    return container_name not in _unsupported_containers
+
+
+def is_not_enabled_error(error: Exception) -> bool:
+    """Whether the error says vector search is not enabled or indexed for the container."""
+    if not isinstance(error, CosmosHttpResponseError) or error.status_code != 400:
+        return False
+    message = str(error).lower()
+    return "vector" in message and any(marker in message for marker in _NOT_ENABLED_MARKERS)
+
+
+def mark_unsupported(container_name: str, error: Exception) -> bool:
+    """Remember that a container cannot serve vector queries, if the error says so.
+
+    Other errors, e.g. throttling or a timeout, leave the container as it was.
+
+    Returns:
+        True if the container is now marked as unsupported
+    """
+    if not is_not_enabled_error(error):
+        return False
+    if container_name not in _unsupported_containers:
+        _unsupported_containers.add(container_name)
+        logging.warning(
+            f"Vector search is not available on container {container_name}, "
+            f"ranking memory records client-side: {error}"
+        )
+    return True
@@ -0,0 +1,218 @@
+"""Read-through cache of plan and step documents, validated with ETags."""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from app_config import config
+except ImportError as e:
+    logging.warning(f"Failed to import app_config: {e}")
+    config = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_MAX_AGE_SECONDS = 0.0
+CACHED_DATA_TYPES = frozenset({"plan", "step"})
+
+# Outcomes of a lookup, for the hit-rate counters
+HIT = "hit"
+REVALIDATED = "revalidated"
+MISS = "miss"
+
+
+class DocumentCache:
+    """Bounded LRU cache of plans and steps keyed by ID, with the ETag each was read at.
+
+    An entry younger than max_age_seconds is served as is. Older entries are served only
+    after Cosmos DB confirms the ETag is unchanged: a conditional point read (304, no
+    body) for a single document, or an id/_etag projection for the steps of a plan. With
+    the default max age of 0 every hit is confirmed, so writes made by other instances
+    are never missed; the cache then saves the document transfer and deserialization
+    rather than the round trip.
+
+    Writes through CosmosMemoryContext store the written document with its new ETag, and
+    deletes and bulk writes evict the documents they touch.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Documents kept (0 disables the cache)
+            max_age_seconds: Seconds an entry is served without revalidation
+            clock: Monotonic clock, injectable for tests
+        """
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self._clock = clock
+        # id -> (model, etag, session_id, stored_at)
+        self._documents: "OrderedDict[str, Tuple[Any, str, str, float]]" = OrderedDict()
+        # (plan_id, user_id) -> (session_id, step ids, stored_at)
+        self._plan_steps: "OrderedDict[Tuple[str, str], Tuple[str, List[str], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config: Any) -> "DocumentCache":
+        """Build a cache from AppConfig, falling back to environment variables and defaults."""
+
+        def setting(attr: str, default: Any) -> Any:
+            value = getattr(config, attr, None) if config is not None else None
+            return value if value is not None else os.environ.get(attr, default)
+
+        try:
+            max_entries = int(setting("COSMOSDB_DOCUMENT_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+            max_age_seconds = float(
+                setting("COSMOSDB_DOCUMENT_CACHE_MAX_AGE_SECONDS", DEFAULT_MAX_AGE_SECONDS)
+            )
+        except (TypeError, ValueError):
+            logger.warning("Invalid document cache settings, using the defaults")
+            return cls()
+        return cls(max_entries=max_entries, max_age_seconds=max_age_seconds)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def caches(self, data_type: Optional[str]) -> bool:
+        """Whether documents of this data type go through the cache."""
+        return self.enabled and data_type in CACHED_DATA_TYPES
+
+    def _fresh(self, stored_at: float) -> bool:
+        return self._clock() - stored_at < self.max_age_seconds
+
+    def get(self, item_id: str, session_id: str) -> Optional[Tuple[Any, str, bool]]:
+        """Look up a document in the given partition.
+
+        Returns:
+            A copy of the cached model, its ETag and whether it can be served without
+            revalidation, or None if it is not cached
+        """
+        with self._lock:
+            entry = self._documents.get(item_id)
+            if entry is None or entry[2] != session_id:
+                return None
+            self._documents.move_to_end(item_id)
+            model, etag, _, stored_at = entry
+            return model.model_copy(deep=True), etag, self._fresh(stored_at)
+
+    def put(self, item: Any, etag: Optional[str]) -> None:
+        """Store a plan or step read or written at the given ETag."""
+        if not self.caches(getattr(item, "data_type", None)):
+            return
+        if not etag:
+            self.discard(item.id)
+            return
+        with self._lock:
+            self._documents[item.id] = (item.model_copy(deep=True), etag, item.session_id, self._clock())
+            self._documents.move_to_end(item.id)
+            while len(self._documents) > self.max_entries:
+                self._documents.popitem(last=False)
+
+    def confirm(self, item_id: str) -> None:
+        """Mark a document as revalidated now."""
+        with self._lock:
+            entry = self._documents.get(item_id)
+            if entry is not None:
+                self._documents[item_id] = entry[:3] + (self._clock(),)
+
+    def discard(self, item_id: str) -> None:
+        """Evict a document, e.g. after it was deleted."""
+        with self._lock:
+            self._documents.pop(item_id, None)
+
+    def get_plan_steps(
+        self, plan_id: str, user_id: str
+    ) -> Optional[Tuple[str, List[Tuple[Any, str]], bool]]:
+        """Look up the steps of a plan.
+
+        Returns:
+            The plan's session_id, copies of its steps with their ETags, and whether they
+            can be served without revalidation; None if the list or any step is not cached
+        """
+        with self._lock:
+            entry = self._plan_steps.get((plan_id, user_id))
+            if entry is None:
+                return None
+            session_id, step_ids, stored_at = entry
+            steps = []
+            for step_id in step_ids:
+                document = self._documents.get(step_id)
+                if document is None:
+                    return None
+                steps.append((document[0].model_copy(deep=True), document[1]))
+            self._plan_steps.move_to_end((plan_id, user_id))
+            return session_id, steps, self._fresh(stored_at)
+
+    def put_plan_steps(self, plan_id: str, user_id: str, session_id: str, steps: List[Any]) -> None:
+        """Remember which steps a plan has; the steps themselves are stored with put."""
+        if not self.enabled or not session_id:
+            return
+        with self._lock:
+            self._plan_steps[(plan_id, user_id)] = (session_id, [step.id for step in steps], self._clock())
+            self._plan_steps.move_to_end((plan_id, user_id))
+            while len(self._plan_steps) > self.max_entries:
+                self._plan_steps.popitem(last=False)
+
+    def confirm_plan_steps(self, plan_id: str, user_id: str) -> None:
+        """Mark the steps of a plan as revalidated now."""
+        with self._lock:
+            entry = self._plan_steps.get((plan_id, user_id))
+            if entry is not None:
+                self._plan_steps[(plan_id, user_id)] = entry[:2] + (self._clock(),)
+
+    def discard_plan_steps(self, plan_ids: Iterable[str]) -> None:
+        """Forget the step lists of plans that gained or lost steps."""
+        plan_ids = set(plan_ids)
+        if not plan_ids:
+            return
+        with self._lock:
+            for key in [key for key in self._plan_steps if key[0] in plan_ids]:
+                del self._plan_steps[key]
+
+    def record(self, outcome: str) -> None:
+        """Count a lookup as HIT, REVALIDATED (a hit confirmed by its ETag) or MISS."""
+        with self._lock:
+            if outcome == MISS:
+                self.misses += 1
+                return
+            self.hits += 1
+            if outcome == REVALIDATED:
+                self.revalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._documents.clear()
+            self._plan_steps.clear()
+            self.hits = self.revalidations = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters and current size for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "documents": len(self._documents),
+                "plan_step_lists": len(self._plan_steps),
+                "hits": self.hits,
+                "revalidations": self.revalidations,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "max_entries": self.max_entries,
+                "max_age_seconds": self.max_age_seconds,
+            }
+
+
+document_cache = DocumentCache.from_config(config)
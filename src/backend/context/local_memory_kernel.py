@@ -5,36 +5,62 @@ Local memory context for testing without CosmosDB
 import asyncio
 import logging
 import os
-from typing import Dict, List, Optional, Type, TypeVar
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type, TypeVar
 
-from models.messages_kernel import AgentMessage, ChatMessage
-from models.messages_kernel import Plan, Step
-from .cosmos_memory_kernel import CosmosMemoryContext
+from semantic_kernel.contents import ChatMessageContent
+from semantic_kernel.memory.memory_record import MemoryRecord
+
+from models.messages_kernel import AgentMessage
+from models.messages_kernel import Plan, Session, Step, StepHistoryEntry, StepStatus
+from .cosmos_bulk import MAX_CONCURRENT_WRITES, BulkItemResult, BulkOperation, BulkResult
+from .cosmos_memory_kernel import DEFAULT_STREAM_PAGE_SIZE, CosmosMemoryContext
+from .ann_index import ann_index_registry
+from .purge import PURGE_JOB_DATA_TYPE
+from .local_store import (
+    DATA_TYPE_MODELS,
+    MODEL_DATA_TYPES,
+    AsyncLocalStore,
+    data_type_of,
+    field_of,
+    get_shared_local_store,
+    page_of,
+)
+from .vector_search import SCAN_PAGE_SIZE
 
 T = TypeVar("T")
 
+
 class LocalMemoryContext(CosmosMemoryContext):
     """
-    Local memory context for use without CosmosDB - stores items in memory for testing
+    Local memory context for use without CosmosDB.
+
+    Items live in the process-wide local store (in memory, or SQLite when
+    LOCAL_STORAGE_ENGINE=sqlite), so every context sees what the others wrote.
+    The store is used through an AsyncLocalStore, which runs SQLite calls in a
+    worker thread.
     """
-    def __init__(self, session_id: str, user_id: Optional[str] = None):
+    def __init__(
+        self,
+        session_id: str,
+        user_id: Optional[str] = None,
+        store: Optional[Any] = None,
+    ):
         # Initialize without calling super() to avoid CosmosDB connection
         # We'll set all the necessary attributes manually
         self.session_id = session_id
         self.user_id = user_id or "local_user"
         self._initialized = asyncio.Event()
         self._container = None  # Not used in local implementation
-        
-        # Initialize storage collections
-        self._local_storage = {
-            'plans': [],
-            'steps': [],
-            'agent_messages': [],
-            'chat_messages': []
-        }
-        
+        self._messages = []
+        self._buffer_size = 100
+
+        # Indexed storage; _local_storage['plans'] etc. still return list snapshots
+        self._local_storage = store if store is not None else get_shared_local_store()
+        self._store = AsyncLocalStore(self._local_storage)
+
         logging.info(f"LocalMemoryContext initialized for session {session_id} and user {self.user_id}")
-        
+
     async def initialize(self):
         """Initialize the local memory store"""
         try:
@@ -52,109 +78,456 @@ class LocalMemoryContext(CosmosMemoryContext):
 
     async def add_item(self, item: T) -> None:
         """Add an item to local storage"""
-        if isinstance(item, Plan):
-            self._local_storage['plans'].append(item)
-        elif isinstance(item, Step):
-            self._local_storage['steps'].append(item)
-        elif isinstance(item, AgentMessage):
-            self._local_storage['agent_messages'].append(item)
-        elif isinstance(item, ChatMessage):
-            self._local_storage['chat_messages'].append(item)
-        else:
+        if data_type_of(item) is None:
             logging.warning(f"Unsupported item type: {type(item)}")
+            return
+        await self._store.put(item)
 
-    async def query_items(self, query: str, parameters: Dict, item_class: Type[T]) -> List[T]:
-        """Query items from local storage"""
-        if item_class == Plan:
-            return self._local_storage['plans']
-        elif item_class == Step:
-            # Filter steps by plan_id if parameter exists
-            if parameters and 'plan_id' in parameters:
-                return [s for s in self._local_storage['steps'] if s.plan_id == parameters['plan_id']]
-            return self._local_storage['steps']
-        elif item_class == AgentMessage:
-            # Filter messages by session_id if parameter exists
-            if parameters and 'session_id' in parameters:
-                return [m for m in self._local_storage['agent_messages'] if m.session_id == parameters['session_id']]
-            return self._local_storage['agent_messages']
-        elif item_class == ChatMessage:
-            return self._local_storage['chat_messages']
-        return []
+    async def add_items(self, items: List[T]) -> None:
+        """Add several items to local storage"""
+        supported = [item for item in items if data_type_of(item) is not None]
+        if len(supported) < len(items):
+            logging.warning("Skipping items of unsupported types")
+        await self._store.put_many(supported)
+
+    async def update_item(self, item: T) -> None:
+        """Update an item in local storage, adding it if it does not exist"""
+        if data_type_of(item) is None:
+            logging.warning(f"Unsupported item type for update: {type(item)}")
+            return
+        await self._store.put(item)
 
-    async def get_all_plans(self) -> List[Plan]:
-        """Get all plans from local storage"""
-        return self._local_storage['plans']
+    async def get_item_by_id(
+        self, item_id: str, partition_key: str, model_class: Type[T]
+    ) -> Optional[T]:
+        """Get an item by id; the partition key is not needed locally"""
+        data_type = MODEL_DATA_TYPES.get(model_class)
+        if data_type is None:
+            return await self._store.find_by_id(item_id)
+        return await self._store.get(data_type, item_id)
+
+    async def query_items(
+        self,
+        query: str,
+        parameters: Any,
+        item_class: Type[T],
+        partition_key: Optional[str] = None,
+        fields: Optional[Any] = None,
+    ) -> List[T]:
+        """Query items from local storage.
+
+        Only equality parameters are honoured: @session_id and @plan_id go through the
+        indexes and any other parameter that names a field (e.g. @user_id) filters them.
+        """
+        data_type = MODEL_DATA_TYPES.get(item_class)
+        if data_type is None:
+            return []
+
+        # Accept both the Cosmos parameter list and a plain dict
+        if isinstance(parameters, list):
+            filters = {p["name"].lstrip("@"): p["value"] for p in parameters}
+        else:
+            filters = dict(parameters or {})
+        if filters.pop("data_type", data_type) != data_type:
+            return []
+        filters.pop("limit", None)
+        if "id" in filters:
+            item = await self._store.get(data_type, filters.pop("id"))
+            return [item] if item is not None else []
+        return await self._store.find(data_type, **filters)
+
+    async def get_plans_page(
+        self, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[Plan], Optional[str]]:
+        """Get a page of this user's plans, newest first"""
+        plans = await self._store.find("plan", user_id=self.user_id)
+        return page_of(plans[::-1], limit, cursor)
+
+    def _owned(self, item: Optional[T]) -> Optional[T]:
+        """Return the item if it belongs to this user"""
+        return item if item is not None and field_of(item, "user_id") == self.user_id else None
+
+    async def get_plan(self, plan_id: str, session_id: Optional[str] = None) -> Optional[Plan]:
+        """Get a specific plan of this user by ID"""
+        return self._owned(await self._store.get("plan", plan_id))
+
+    async def append_step_history(self, plan_id: str, session_id: str, entry: StepHistoryEntry) -> None:
+        """Append a completed step to the plan's step_history"""
+        plan = await self._store.get("plan", plan_id)
+        if plan is None:
+            logging.warning(f"Plan {plan_id} not found, step {entry.step_id} is not added to its history")
+            return
+        plan.step_history.append(entry)
+        await self._store.put(plan)
 
-    async def get_plan(self, plan_id: str) -> Optional[Plan]:
-        """Get a specific plan by ID"""
-        for plan in self._local_storage['plans']:
-            if plan.id == plan_id:
-                return plan
-        return None
-        
     async def get_plan_by_session(self, session_id: str) -> Optional[Plan]:
         """Get a plan by session ID - needed for fallback"""
-        for plan in self._local_storage['plans']:
-            if plan.session_id == session_id:
-                return plan
-        return None
+        plans = await self._store.find("plan", session_id=session_id, user_id=self.user_id)
+        return plans[0] if plans else None
 
-    async def get_step(self, step_id: str) -> Optional[Step]:
-        """Get a specific step by ID"""
-        for step in self._local_storage['steps']:
-            if step.id == step_id:
-                return step
-        return None
+    async def get_step(self, step_id: str, session_id: Optional[str] = None) -> Optional[Step]:
+        """Get a specific step of this user by ID"""
+        return self._owned(await self._store.get("step", step_id))
 
-    async def update_item(self, item: T) -> None:
-        """Update an item in local storage"""
-        if isinstance(item, Plan):
-            # Replace plan with updated version
-            for i, plan in enumerate(self._local_storage['plans']):
-                if plan.id == item.id:
-                    self._local_storage['plans'][i] = item
-                    return
-            # If not found, add it
-            self._local_storage['plans'].append(item)
-        
-        elif isinstance(item, Step):
-            # Replace step with updated version
-            for i, step in enumerate(self._local_storage['steps']):
-                if step.id == item.id:
-                    self._local_storage['steps'][i] = item
-                    return
-            # If not found, add it
-            self._local_storage['steps'].append(item)
-            
-        elif isinstance(item, AgentMessage):
-            # Replace message with updated version
-            for i, message in enumerate(self._local_storage['agent_messages']):
-                if message.id == item.id:
-                    self._local_storage['agent_messages'][i] = item
-                    return
-            # If not found, add it
-            self._local_storage['agent_messages'].append(item)
-            
-        elif isinstance(item, ChatMessage):
-            # Replace message with updated version
-            for i, message in enumerate(self._local_storage['chat_messages']):
-                if message.id == item.id:
-                    self._local_storage['chat_messages'][i] = item
-                    return
-            # If not found, add it
-            self._local_storage['chat_messages'].append(item)
-        else:
-            logging.warning(f"Unsupported item type for update: {type(item)}")
+    async def get_steps_by_plan(self, plan_id: str, session_id: Optional[str] = None) -> List[Step]:
+        """Get this user's steps of a plan"""
+        return await self._store.find("step", plan_id=plan_id, user_id=self.user_id)
 
-    async def delete_item(self, item_id: str, item_class: Type[T]) -> None:
-        """Delete an item from local storage"""
-        if item_class == Plan:
-            self._local_storage['plans'] = [p for p in self._local_storage['plans'] if p.id != item_id]
-        elif item_class == Step:
-            self._local_storage['steps'] = [s for s in self._local_storage['steps'] if s.id != item_id]
-        elif item_class == AgentMessage:
-            self._local_storage['agent_messages'] = [m for m in self._local_storage['agent_messages'] if m.id != item_id]
-        elif item_class == ChatMessage:
-            self._local_storage['chat_messages'] = [m for m in self._local_storage['chat_messages'] if m.id != item_id]
-        else:
+    async def get_steps_by_plans(self, plans: List[Plan]) -> Dict[str, List[Step]]:
+        """Get this user's steps of several plans, keyed by plan ID"""
+        return {
+            plan.id: await self._store.find("step", plan_id=plan.id, user_id=self.user_id)
+            for plan in plans
+        }
+
+    async def get_step_statuses_by_plans(self, plans: List[Plan]) -> Dict[str, List[StepStatus]]:
+        """Get the statuses of this user's steps of several plans, keyed by plan ID"""
+        return {
+            plan.id: [
+                step.status
+                for step in await self._store.find("step", plan_id=plan.id, user_id=self.user_id)
+            ]
+            for plan in plans
+        }
+
+    async def get_agent_messages_by_session(self, session_id: str) -> List[AgentMessage]:
+        """Get the agent messages of a session"""
+        return await self._store.find("agent_message", session_id=session_id)
+
+    async def get_agent_messages_page(
+        self, session_id: str, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[AgentMessage], Optional[str]]:
+        """Get a page of this user's agent messages for a session, oldest first"""
+        messages = await self._store.find(
+            "agent_message", session_id=session_id, user_id=self.user_id
+        )
+        return page_of(messages, limit, cursor)
+
+    async def get_session(self, session_id: str) -> Optional[Session]:
+        """Get a session by ID"""
+        return await self._store.get("session", session_id)
+
+    async def get_all_sessions(self) -> List[Session]:
+        """Get all sessions"""
+        return await self._store.all("session")
+
+    async def get_data_by_type(self, data_type: str) -> List[Any]:
+        """Get this session's items of a data type"""
+        return await self._store.find(
+            data_type, session_id=self.session_id, user_id=self.user_id
+        )
+
+    async def iter_query(
+        self,
+        query: str,
+        parameters: Any,
+        item_class: Type[T],
+        partition_key: Optional[str] = None,
+        page_size: int = DEFAULT_STREAM_PAGE_SIZE,
+    ) -> AsyncIterator[List[T]]:
+        """Yield query results a page at a time"""
+        items = await self.query_items(query, parameters, item_class, partition_key)
+        for start in range(0, len(items), page_size):
+            yield items[start : start + page_size]
+
+    async def iter_data_by_type(
+        self, data_type: str, page_size: int = DEFAULT_STREAM_PAGE_SIZE
+    ) -> AsyncIterator[List[Any]]:
+        """Yield this session's items of a data type a page at a time"""
+        items = await self.get_data_by_type(data_type)
+        for start in range(0, len(items), page_size):
+            yield items[start : start + page_size]
+
+    async def delete_item(self, item_id: str, item_class: Any) -> None:
+        """Delete an item from local storage.
+
+        Args:
+            item_id: The id of the item
+            item_class: The model class of the item, or a partition key as in
+                CosmosMemoryContext.delete_item (then every data type is checked)
+        """
+        data_type = MODEL_DATA_TYPES.get(item_class) if isinstance(item_class, type) else None
+        if data_type is not None:
+            await self._store.delete(data_type, item_id)
+            return
+        if isinstance(item_class, type):
             logging.warning(f"Unsupported item class for deletion: {item_class}")
+            return
+        for data_type in set(MODEL_DATA_TYPES.values()):
+            if await self._store.delete(data_type, item_id):
+                return
+
+    async def bulk_write(
+        self,
+        operations: List[BulkOperation],
+        transactional: bool = False,
+        max_concurrency: int = MAX_CONCURRENT_WRITES,
+    ) -> BulkResult:
+        """Apply create/upsert/replace/patch/delete operations to local storage.
+
+        Operations are applied one at a time and each succeeds or fails on its own;
+        transactional and max_concurrency are accepted for compatibility.
+        """
+        result = BulkResult(round_trips=1)
+        for operation in operations:
+            try:
+                status_code = await self._apply_operation(operation)
+                error = None
+            except ValueError as e:
+                status_code, error = 400, str(e)
+            result.items.append(
+                BulkItemResult(
+                    id=operation.id,
+                    partition_key=operation.partition_key,
+                    operation=operation.operation,
+                    status_code=status_code,
+                    error=error,
+                )
+            )
+        return result
+
+    async def _apply_operation(self, operation: BulkOperation) -> int:
+        """Apply one bulk operation and return the status code Cosmos DB would."""
+        existing = await self._store.find_by_id(operation.id)
+        if operation.operation == "delete":
+            if existing is None:
+                return 404
+            await self._store.delete(data_type_of(existing), operation.id)
+            return 204
+        if operation.operation == "create" and existing is not None:
+            return 409
+        if operation.operation in ("replace", "patch") and existing is None:
+            return 404
+
+        if operation.operation == "patch":
+            document = existing.model_dump(mode="json") if hasattr(existing, "model_dump") else dict(existing)
+            document = self._patched(document, operation.body["operations"])
+        else:
+            document = dict(operation.body)
+        model = DATA_TYPE_MODELS.get(document.get("data_type"))
+        await self._store.put(model.model_validate(document) if model is not None else document)
+        return 201 if operation.operation == "create" else 200
+
+    @staticmethod
+    def _patched(document: Dict[str, Any], operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply patch operations on top-level fields, and appends to them via /field/-."""
+        for patch in operations:
+            path = patch["path"].strip("/").split("/")
+            field = path[0]
+            if patch["op"] == "remove":
+                document.pop(field, None)
+            elif patch["op"] == "incr":
+                document[field] = document.get(field, 0) + patch["value"]
+            elif patch["op"] == "add" and path[1:] == ["-"]:
+                if not isinstance(document.get(field), list):
+                    raise ValueError(f"Cannot append to {field}: not an array")
+                document[field].append(patch["value"])
+            elif patch["op"] in ("set", "replace", "add") and len(path) == 1:
+                document[field] = patch["value"]
+            else:
+                raise ValueError(f"Unsupported patch operation {patch['op']} {patch['path']}")
+        return document
+
+    async def delete_items_by_query(
+        self, query: str, parameters: List[Dict[str, Any]]
+    ) -> BulkResult:
+        """Delete items matching the query's parameters.
+
+        The query text is not evaluated: as in query_items, each parameter that names a
+        field filters on equality, or on membership when its value is a list; without
+        @data_type every model data type is searched.
+        """
+        filters = {p["name"].lstrip("@"): p["value"] for p in parameters}
+        data_type = filters.pop("data_type", None)
+        data_types = [data_type] if data_type is not None else sorted(set(MODEL_DATA_TYPES.values()))
+        operations = []
+        for data_type in data_types:
+            for item in await self._store.find(data_type):
+                # Items without an id of their own, i.e. ChatMessage, cannot be named in a delete
+                if field_of(item, "id") is not None and all(
+                    field_of(item, name) in value if isinstance(value, list) else field_of(item, name) == value
+                    for name, value in filters.items()
+                ):
+                    operations.append(BulkOperation.delete(field_of(item, "id"), field_of(item, "session_id")))
+        return await self.bulk_write(operations)
+
+    async def delete_all_items(self, data_type) -> None:
+        """Delete all of this user's items of a data type"""
+        for item in await self._store.find(data_type, user_id=self.user_id):
+            await self._store.delete(data_type, item.id)
+
+    async def purge_items(
+        self,
+        data_types: Any,
+        page_size: int = DEFAULT_STREAM_PAGE_SIZE,
+        max_concurrency: int = MAX_CONCURRENT_WRITES,
+        soft_delete_ttl: Optional[int] = None,
+    ) -> AsyncIterator[BulkResult]:
+        """Delete all of this user's items of the given data types, a page at a time.
+
+        Local storage has no time to live, so a soft delete deletes as well.
+        """
+        for data_type in data_types:
+            items = await self._store.find(data_type, user_id=self.user_id)
+            for start in range(0, len(items), page_size):
+                result = BulkResult(round_trips=1)
+                for item in items[start : start + page_size]:
+                    deleted = await self._store.delete(data_type, item.id)
+                    result.items.append(
+                        BulkItemResult(
+                            id=item.id,
+                            partition_key=getattr(item, "session_id", None),
+                            operation="delete",
+                            status_code=204 if deleted else 404,
+                        )
+                    )
+                yield result
+
+    async def archive_finished_sessions(
+        self, limit: int = 50, min_age_seconds: Optional[float] = None
+    ) -> List[str]:
+        """Local storage is not archived; finished sessions stay where they are"""
+        return []
+
+    async def save_purge_job(self, document: Dict[str, Any]) -> None:
+        """Keep the progress document of a purge; local storage has no time to live"""
+        await self._store.put(document)
+
+    async def get_purge_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get this user's progress document of a purge"""
+        document = await self._store.get(PURGE_JOB_DATA_TYPE, job_id)
+        if document is None or document.get("user_id") != self.user_id:
+            return None
+        return document
+
+    async def archive_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Local storage is not archived; the session stays where it is"""
+        return None
+
+    async def get_archived_session(self, session_id: str) -> List[Dict[str, Any]]:
+        """Local storage has no archives"""
+        return []
+
+    async def delete_all_messages(self, data_type) -> None:
+        """Delete all of this user's messages of a data type"""
+        await self.delete_all_items(data_type)
+
+    async def get_all_items(self) -> List[Dict[str, Any]]:
+        """Get all of this user's items as documents"""
+        items = []
+        for data_type in ("session", "plan", "step", "agent_message"):
+            for item in await self._store.find(data_type, user_id=self.user_id):
+                items.append(item.model_dump(mode="json"))
+        return items
+
+    async def iter_messages(
+        self, page_size: int = DEFAULT_STREAM_PAGE_SIZE
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield all of this user's items as documents, only converting a page at a time"""
+        for data_type in ("session", "plan", "step", "agent_message"):
+            items = await self._store.find(data_type, user_id=self.user_id)
+            for start in range(0, len(items), page_size):
+                yield [item.model_dump(mode="json") for item in items[start : start + page_size]]
+
+    async def get_all_messages(self) -> List[Dict[str, Any]]:
+        """Get all of this user's items as documents"""
+        return await self.get_all_items()
+
+    async def get_messages_page(
+        self, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get a page of this user's items as documents"""
+        return page_of(await self.get_all_items(), limit, cursor)
+
+    async def add_message(self, message: ChatMessageContent) -> None:
+        """Add a chat message to the buffer and to local storage"""
+        self._messages.append(message)
+        while len(self._messages) > self._buffer_size:
+            self._messages.pop(0)
+        await self._store.put(self._message_document(message))
+
+    async def get_messages(self) -> List[ChatMessageContent]:
+        """Get the session's chat messages, oldest first"""
+        items = await self._store.find("message", session_id=self.session_id)
+        return [self._to_chat_message(item) for item in items[: self._buffer_size]]
+
+    def _memory_item_id(self, collection: str, key: str) -> str:
+        # Memory records are keyed per session and collection, as they are within a Cosmos partition
+        return f"{self.session_id}/{collection}/{key}"
+
+    async def get_collections(self) -> List[str]:
+        """Get the session's memory collections"""
+        items = await self._store.find("memory", session_id=self.session_id)
+        return list(dict.fromkeys(item["collection"] for item in items))
+
+    async def delete_collection(self, collection_name: str) -> None:
+        """Delete a memory collection"""
+        for item in await self._store.find(
+            "memory", session_id=self.session_id, collection=collection_name
+        ):
+            await self._store.delete("memory", self._memory_item_id(collection_name, item["key"]))
+        if ann_index_registry.enabled:
+            ann_index_registry.drop(self.session_id, collection_name)
+
+    async def upsert_memory_record(self, collection: str, record: MemoryRecord) -> str:
+        """Store a memory record"""
+        document = self._memory_record_document(collection, record)
+        await self._store.put(
+            document, item_id=self._memory_item_id(collection, document["key"])
+        )
+        self._index_memory_documents(collection, [document])
+        return document["id"]
+
+    async def get_memory_record(
+        self, collection: str, key: str, with_embedding: bool = False
+    ) -> Optional[MemoryRecord]:
+        """Retrieve a memory record"""
+        item = await self._store.get("memory", self._memory_item_id(collection, key))
+        return self._to_memory_record(item, with_embedding) if item is not None else None
+
+    async def remove_memory_record(self, collection: str, key: str) -> None:
+        """Remove a memory record"""
+        await self._store.delete("memory", self._memory_item_id(collection, key))
+        self._unindex_memory_keys(collection, [key])
+
+    async def upsert_async(self, collection_name: str, record: Dict[str, Any]) -> str:
+        """Insert a document directly"""
+        record.setdefault("session_id", self.session_id)
+        record.setdefault("id", str(uuid.uuid4()))
+        await self._store.put(record, data_type=record.get("data_type", collection_name))
+        return record["id"]
+
+    async def get_memory_records(
+        self, collection: str, limit: int = 1000, with_embeddings: bool = False
+    ) -> List[MemoryRecord]:
+        """Get a collection's memory records, newest first"""
+        items = await self._store.find("memory", session_id=self.session_id, collection=collection)
+        return [self._to_memory_record(item, with_embeddings) for item in reversed(items)][:limit]
+
+    def _uses_server_vector_search(self) -> bool:
+        return False
+
+    async def _iter_memory_documents(
+        self, collection: str, page_size: int = SCAN_PAGE_SIZE
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield a collection's memory documents that have embeddings, a page at a time"""
+        items = await self._store.find("memory", session_id=self.session_id, collection=collection)
+        items = [item for item in items if item.get("embedding")]
+        for start in range(0, len(items), page_size):
+            yield items[start : start + page_size]
+
+    async def upsert_batch(self, collection_name: str, records: List[MemoryRecord]) -> List[str]:
+        """Store several memory records"""
+        return [await self.upsert_memory_record(collection_name, record) for record in records]
+
+    async def get_batch(
+        self, collection_name: str, keys: List[str], with_embeddings: bool = False
+    ) -> List[MemoryRecord]:
+        """Retrieve several memory records, skipping missing keys"""
+        records = [await self.get_memory_record(collection_name, key, with_embeddings) for key in keys]
+        return [record for record in records if record is not None]
+
+    async def remove_batch(self, collection_name: str, keys: List[str]) -> None:
+        """Remove several memory records"""
+        for key in keys:
+            await self.remove_memory_record(collection_name, key)
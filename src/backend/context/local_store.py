@@ -0,0 +1,469 @@
+"""Storage engines for LocalMemoryContext.
+
+``InMemoryLocalStore`` keeps items in process memory; ``SQLiteLocalStore`` keeps them in a
+SQLite database in WAL mode so they survive restarts. Both expose the same methods, and
+``get_shared_local_store`` returns the one instance every LocalMemoryContext in the process
+shares, so items written by one request are visible to the next. ``AsyncLocalStore`` is
+the awaitable view LocalMemoryContext uses, so SQLite calls do not block the event loop.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from models.messages_kernel import AgentMessage, ChatMessage, Plan, Session, Step
+
+try:
+    from app_config import config
+except ImportError as e:
+    logging.warning(f"Failed to import app_config: {e}")
+    config = None
+
+# Collection names used by LocalMemoryContext._local_storage, by data_type
+LEGACY_COLLECTIONS = {
+    "plans": "plan",
+    "steps": "step",
+    "agent_messages": "agent_message",
+    "chat_messages": "chat_message",
+    "sessions": "session",
+}
+
+MODEL_DATA_TYPES = {
+    Plan: "plan",
+    Step: "step",
+    AgentMessage: "agent_message",
+    ChatMessage: "chat_message",
+    Session: "session",
+}
+
+DATA_TYPE_MODELS = {data_type: model for model, data_type in MODEL_DATA_TYPES.items()}
+
+
+def field_of(item: Any, name: str) -> Any:
+    """Read a field from a model instance or a plain document."""
+    if isinstance(item, dict):
+        return item.get(name)
+    return getattr(item, name, None)
+
+
+def data_type_of(item: Any) -> Optional[str]:
+    """Return the data_type an item is stored under."""
+    data_type = field_of(item, "data_type")
+    if data_type is not None:
+        return data_type
+    # ChatMessage carries no data_type field
+    return MODEL_DATA_TYPES.get(type(item))
+
+
+def page_of(items: List[Any], limit: int, cursor: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+    """Slice one page out of items, with an opaque cursor like a continuation token.
+
+    Returns:
+        The page and the cursor for the next one, which is None on the last page
+
+    Raises:
+        ValueError: If the cursor was not produced by page_of
+    """
+    offset = 0
+    if cursor:
+        try:
+            offset = int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["offset"])
+        except Exception as e:
+            raise ValueError("Invalid cursor") from e
+    end = offset + limit
+    next_cursor = None
+    if end < len(items):
+        next_cursor = base64.urlsafe_b64encode(json.dumps({"offset": end}).encode()).decode()
+    return items[offset:end], next_cursor
+
+
+class InMemoryLocalStore:
+    """Items grouped by data_type with hash indexes on id, session_id and plan_id.
+
+    Each data_type keeps an insertion-ordered ``{id: item}`` dict, so lookups, updates and
+    deletes by id are O(1) and updates keep an item's position. The session and plan
+    indexes map a key to an insertion-ordered set of ids, so scoped reads are O(k) in
+    the number of matches.
+    """
+
+    # Calls only touch process memory, so they are cheap enough to make on the event loop
+    blocking = False
+
+    def __init__(self) -> None:
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._by_session: Dict[str, Dict[Any, Dict[str, None]]] = {}
+        self._by_plan: Dict[str, Dict[Any, Dict[str, None]]] = {}
+        # Index keys each item was filed under, so in-place edits cannot orphan entries
+        self._keys: Dict[str, Dict[str, tuple]] = {}
+
+    def put(self, item: Any, data_type: Optional[str] = None, item_id: Optional[str] = None) -> str:
+        """Insert or replace an item and keep the indexes consistent.
+
+        Args:
+            item: A model instance or a plain document
+            data_type: Overrides the item's own data_type
+            item_id: Overrides the item's own id as the storage key
+
+        Returns:
+            The id the item is stored under
+        """
+        data_type = data_type or data_type_of(item)
+        item_id = item_id or field_of(item, "id")
+        if item_id is None:
+            # ChatMessage has no id of its own
+            item_id = str(uuid.uuid4())
+
+        items = self._items.setdefault(data_type, {})
+        keys = (field_of(item, "session_id"), field_of(item, "plan_id"))
+        if item_id in items:
+            if self._keys[data_type][item_id] == keys:
+                # Same index keys: replace in place so scoped reads keep their order
+                items[item_id] = item
+                return item_id
+            self._unindex(data_type, item_id)
+        items[item_id] = item
+        self._index(data_type, item_id, keys)
+        return item_id
+
+    def put_many(self, items: Iterable[Any]) -> List[str]:
+        """Insert or replace several items."""
+        return [self.put(item) for item in items]
+
+    def get(self, data_type: str, item_id: str) -> Optional[Any]:
+        """Return the item with this id, or None."""
+        return self._items.get(data_type, {}).get(item_id)
+
+    def find_by_id(self, item_id: str) -> Optional[Any]:
+        """Return the item with this id from any data_type, or None."""
+        for items in self._items.values():
+            if item_id in items:
+                return items[item_id]
+        return None
+
+    def delete(self, data_type: str, item_id: str) -> bool:
+        """Remove an item. Returns True if it existed."""
+        if self._items.get(data_type, {}).pop(item_id, None) is None:
+            return False
+        self._unindex(data_type, item_id)
+        return True
+
+    def find(
+        self,
+        data_type: str,
+        session_id: Optional[str] = None,
+        plan_id: Optional[str] = None,
+        **filters: Any,
+    ) -> List[Any]:
+        """Return items of a data_type, narrowed by the indexes and equality filters."""
+        items = self._items.get(data_type, {})
+        if plan_id is not None:
+            ids: Iterable[str] = self._by_plan.get(data_type, {}).get(plan_id, {})
+        elif session_id is not None:
+            ids = self._by_session.get(data_type, {}).get(session_id, {})
+        else:
+            ids = items.keys()
+
+        results = []
+        for item_id in ids:
+            item = items[item_id]
+            if session_id is not None and field_of(item, "session_id") != session_id:
+                continue
+            if any(field_of(item, name) != value for name, value in filters.items()):
+                continue
+            results.append(item)
+        return results
+
+    def all(self, data_type: str) -> List[Any]:
+        """Return every item of a data_type in insertion order."""
+        return list(self._items.get(data_type, {}).values())
+
+    def count(self, data_type: Optional[str] = None) -> int:
+        """Return the number of stored items, optionally for one data_type."""
+        if data_type is not None:
+            return len(self._items.get(data_type, {}))
+        return sum(len(items) for items in self._items.values())
+
+    def clear(self) -> None:
+        """Remove every item."""
+        self._items.clear()
+        self._by_session.clear()
+        self._by_plan.clear()
+        self._keys.clear()
+
+    def close(self) -> None:
+        """Nothing to release for the in-memory engine."""
+        return
+
+    def __getitem__(self, collection: str) -> List[Any]:
+        """Snapshot of a collection by its legacy name (``plans``, ``steps``, ...)."""
+        return self.all(LEGACY_COLLECTIONS.get(collection, collection))
+
+    def _index(self, data_type: str, item_id: str, keys: tuple) -> None:
+        session_id, plan_id = keys
+        self._keys.setdefault(data_type, {})[item_id] = (session_id, plan_id)
+        if session_id is not None:
+            self._by_session.setdefault(data_type, {}).setdefault(session_id, {})[item_id] = None
+        if plan_id is not None:
+            self._by_plan.setdefault(data_type, {}).setdefault(plan_id, {})[item_id] = None
+
+    def _unindex(self, data_type: str, item_id: str) -> None:
+        session_id, plan_id = self._keys[data_type].pop(item_id)
+        for index, key in ((self._by_session, session_id), (self._by_plan, plan_id)):
+            if key is None:
+                continue
+            bucket = index.get(data_type, {}).get(key)
+            if bucket is not None:
+                bucket.pop(item_id, None)
+                if not bucket:
+                    del index[data_type][key]
+
+
+class SQLiteLocalStore:
+    """The InMemoryLocalStore interface on top of a SQLite database in WAL mode.
+
+    Items are stored as JSON documents in one table keyed by (data_type, id), with
+    indexes on session_id and plan_id. Reads return fresh model instances, so changes
+    must be written back with ``put`` as they would be with Cosmos DB. WAL mode lets
+    readers in other connections proceed while a write is in progress, and
+    ``synchronous=NORMAL`` skips the fsync on every commit.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS items (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_type TEXT NOT NULL,
+            id TEXT NOT NULL,
+            session_id TEXT,
+            plan_id TEXT,
+            user_id TEXT,
+            body TEXT NOT NULL,
+            UNIQUE (data_type, id)
+        );
+        CREATE INDEX IF NOT EXISTS items_by_id ON items (id);
+        CREATE INDEX IF NOT EXISTS items_by_session ON items (data_type, session_id);
+        CREATE INDEX IF NOT EXISTS items_by_plan ON items (data_type, plan_id);
+    """
+
+    # Calls wait on disk I/O and the connection lock
+    blocking = True
+
+    # Updates keep seq, so an item keeps its position in scoped reads
+    _UPSERT = """
+        INSERT INTO items (data_type, id, session_id, plan_id, user_id, body)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (data_type, id) DO UPDATE SET
+            session_id = excluded.session_id,
+            plan_id = excluded.plan_id,
+            user_id = excluded.user_id,
+            body = excluded.body
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        # Autocommit; put_many opens its own transaction
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(self._SCHEMA)
+
+    def put(self, item: Any, data_type: Optional[str] = None, item_id: Optional[str] = None) -> str:
+        """Insert or replace an item.
+
+        Returns:
+            The id the item is stored under
+        """
+        row = self._row(item, data_type, item_id)
+        with self._lock:
+            self._connection.execute(self._UPSERT, row)
+        return row[1]
+
+    def put_many(self, items: Iterable[Any]) -> List[str]:
+        """Insert or replace several items in one transaction."""
+        rows = [self._row(item) for item in items]
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.executemany(self._UPSERT, rows)
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+        return [row[1] for row in rows]
+
+    def get(self, data_type: str, item_id: str) -> Optional[Any]:
+        """Return the item with this id, or None."""
+        rows = self._select("data_type = ? AND id = ?", (data_type, item_id))
+        return rows[0] if rows else None
+
+    def find_by_id(self, item_id: str) -> Optional[Any]:
+        """Return the item with this id from any data_type, or None."""
+        rows = self._select("id = ?", (item_id,), limit=1)
+        return rows[0] if rows else None
+
+    def delete(self, data_type: str, item_id: str) -> bool:
+        """Remove an item. Returns True if it existed."""
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM items WHERE data_type = ? AND id = ?", (data_type, item_id)
+            )
+        return cursor.rowcount > 0
+
+    def find(
+        self,
+        data_type: str,
+        session_id: Optional[str] = None,
+        plan_id: Optional[str] = None,
+        **filters: Any,
+    ) -> List[Any]:
+        """Return items of a data_type, narrowed by the indexed columns and equality filters."""
+        where, parameters = ["data_type = ?"], [data_type]
+        for column, value in (
+            ("session_id", session_id),
+            ("plan_id", plan_id),
+            ("user_id", filters.pop("user_id", None)),
+        ):
+            if value is not None:
+                where.append(f"{column} = ?")
+                parameters.append(value)
+
+        results = self._select(" AND ".join(where), parameters)
+        if filters:
+            results = [
+                item
+                for item in results
+                if all(field_of(item, name) == value for name, value in filters.items())
+            ]
+        return results
+
+    def all(self, data_type: str) -> List[Any]:
+        """Return every item of a data_type in insertion order."""
+        return self._select("data_type = ?", (data_type,))
+
+    def count(self, data_type: Optional[str] = None) -> int:
+        """Return the number of stored items, optionally for one data_type."""
+        with self._lock:
+            if data_type is None:
+                row = self._connection.execute("SELECT COUNT(*) FROM items").fetchone()
+            else:
+                row = self._connection.execute(
+                    "SELECT COUNT(*) FROM items WHERE data_type = ?", (data_type,)
+                ).fetchone()
+        return row[0]
+
+    def clear(self) -> None:
+        """Remove every item."""
+        with self._lock:
+            self._connection.execute("DELETE FROM items")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def __getitem__(self, collection: str) -> List[Any]:
+        """Snapshot of a collection by its legacy name (``plans``, ``steps``, ...)."""
+        return self.all(LEGACY_COLLECTIONS.get(collection, collection))
+
+    @staticmethod
+    def _row(item: Any, data_type: Optional[str] = None, item_id: Optional[str] = None) -> tuple:
+        data_type = data_type or data_type_of(item)
+        item_id = item_id or field_of(item, "id") or str(uuid.uuid4())
+        if isinstance(item, dict):
+            body = json.dumps(item, default=str)
+        else:
+            body = item.model_dump_json()
+        return (
+            data_type,
+            item_id,
+            field_of(item, "session_id"),
+            field_of(item, "plan_id"),
+            field_of(item, "user_id"),
+            body,
+        )
+
+    def _select(self, where: str, parameters: Iterable[Any], limit: Optional[int] = None) -> List[Any]:
+        query = f"SELECT data_type, body FROM items WHERE {where} ORDER BY seq"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._connection.execute(query, tuple(parameters)).fetchall()
+        results = []
+        for data_type, body in rows:
+            model = DATA_TYPE_MODELS.get(data_type)
+            results.append(model.model_validate_json(body) if model else json.loads(body))
+        return results
+
+
+class AsyncLocalStore:
+    """Awaitable view of a local store, for use on the event loop.
+
+    Each store method becomes a coroutine function. Calls to a blocking store (SQLite) run
+    in a worker thread; the in-memory store is called inline, since a thread hop would
+    cost more than the call.
+    """
+
+    def __init__(self, store: Any) -> None:
+        self.store = store
+        self._blocking = getattr(store, "blocking", False)
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        method = getattr(self.store, name)
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            if self._blocking:
+                return await asyncio.to_thread(method, *args, **kwargs)
+            return method(*args, **kwargs)
+
+        return call
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def _setting(attr: str, default: str) -> str:
+    value = getattr(config, attr, None) if config is not None else None
+    return str(value if value is not None else os.environ.get(attr, default))
+
+
+def create_local_store(engine: Optional[str] = None, path: Optional[str] = None):
+    """Create a local store.
+
+    Args:
+        engine: "memory" or "sqlite"; defaults to the LOCAL_STORAGE_ENGINE setting
+        path: Database file for the sqlite engine; defaults to LOCAL_STORAGE_PATH
+    """
+    engine = (engine or _setting("LOCAL_STORAGE_ENGINE", "memory")).lower()
+    if engine == "sqlite":
+        path = path or _setting("LOCAL_STORAGE_PATH", "local_memory.db")
+        logging.info(f"Using SQLite local store at {path}")
+        return SQLiteLocalStore(path)
+    if engine != "memory":
+        logging.warning(f"Unknown LOCAL_STORAGE_ENGINE {engine!r}, using the in-memory store")
+    return InMemoryLocalStore()
+
+
+def get_shared_local_store():
+    """Return the local store shared by every LocalMemoryContext in the process."""
+    global _shared_store
+    if _shared_store is None:
+        with _shared_store_lock:
+            if _shared_store is None:
+                _shared_store = create_local_store()
+    return _shared_store
+
+
+def close_shared_local_store() -> None:
+    """Close the shared local store; the next get_shared_local_store call opens a new one."""
+    global _shared_store
+    with _shared_store_lock:
+        store, _shared_store = _shared_store, None
+    if store is not None:
+        store.close()
@@ -0,0 +1,87 @@
+"""Lookup of the session_id partition that plans and steps are stored in."""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+try:
+    from app_config import config
+except ImportError as e:
+    logging.warning(f"Failed to import app_config: {e}")
+    config = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 10000
+# Documents whose IDs are looked up without their session
+CACHED_DATA_TYPES = frozenset({"plan", "step"})
+
+
+class PartitionKeyCache:
+    """Bounded LRU map from plan and step IDs to their session_id.
+
+    Cosmos DB can only serve a point read, or a query scoped to one partition, when the
+    partition key is known. Endpoints such as /api/steps/{plan_id} only have the ID, so
+    the session of every plan and step written or read is remembered here. Entries never
+    go stale: a document cannot move between partitions.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Any) -> "PartitionKeyCache":
+        """Build a cache from AppConfig, falling back to environment variables and defaults."""
+        value = getattr(config, "COSMOSDB_PARTITION_CACHE_SIZE", None) if config is not None else None
+        if value is None:
+            value = os.environ.get("COSMOSDB_PARTITION_CACHE_SIZE", DEFAULT_MAX_ENTRIES)
+        try:
+            return cls(max_entries=int(value))
+        except ValueError:
+            logger.warning(f"Invalid value for COSMOSDB_PARTITION_CACHE_SIZE, using {DEFAULT_MAX_ENTRIES}")
+            return cls()
+
+    def get(self, item_id: str) -> Optional[str]:
+        """The session_id of a plan or step, if it has been seen."""
+        with self._lock:
+            session_id = self._entries.get(item_id)
+            if session_id is not None:
+                self._entries.move_to_end(item_id)
+            return session_id
+
+    def put(self, item_id: str, session_id: str) -> None:
+        """Remember the session_id of a plan or step."""
+        if self.max_entries <= 0 or not item_id or not session_id:
+            return
+        with self._lock:
+            self._entries[item_id] = session_id
+            self._entries.move_to_end(item_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def remember(self, item: Any) -> None:
+        """Remember where a plan or step lives; a step also locates its plan."""
+        if getattr(item, "data_type", None) not in CACHED_DATA_TYPES:
+            return
+        self.put(item.id, item.session_id)
+        if item.data_type == "step":
+            self.put(item.plan_id, item.session_id)
+
+    def discard(self, item_id: str) -> None:
+        """Forget an ID, e.g. after its document was deleted."""
+        with self._lock:
+            self._entries.pop(item_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+partition_key_cache = PartitionKeyCache.from_config(config)
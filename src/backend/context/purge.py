@@ -0,0 +1,233 @@
+"""Background purge of a user's documents, with progress that can be polled."""
+
+import asyncio
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from context.cosmos_bulk import MAX_CONCURRENT_WRITES
+
+try:
+    from app_config import config
+except ImportError as e:
+    logging.warning(f"Failed to import app_config: {e}")
+    config = None
+
+logger = logging.getLogger(__name__)
+
+# Data types removed when a user's messages are cleared
+PURGE_DATA_TYPES = ["plan", "session", "step", "agent_message"]
+# Documents read per query page; each page is deleted before the next is read
+DEFAULT_PAGE_SIZE = 1000
+# Time to live set on soft-deleted documents, in seconds
+DEFAULT_SOFT_DELETE_TTL_SECONDS = 1
+# Finished jobs kept for status lookups
+MAX_TRACKED_JOBS = 100
+# Data type of the documents the progress of purges is stored in
+PURGE_JOB_DATA_TYPE = "purge_job"
+# Time to live of those documents, in seconds
+DEFAULT_JOB_TTL_SECONDS = 7 * 24 * 3600
+
+
+class PurgeStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class PurgeJob(BaseModel):
+    """Progress of one purge."""
+
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str
+    data_types: List[str]
+    # Whether documents are expired with a TTL instead of deleted
+    soft_delete: bool = False
+    status: PurgeStatus = PurgeStatus.pending
+    found: int = 0
+    deleted: int = 0
+    failed: int = 0
+    started_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (PurgeStatus.completed, PurgeStatus.failed)
+
+    def to_document(self, ttl: Optional[int] = None) -> Dict[str, Any]:
+        """The document the job's progress is stored in.
+
+        Jobs are not tied to a session, so each user's jobs share a partition keyed by the
+        user ID. With a ttl the document expires that many seconds after its last write,
+        if time to live is enabled on the container.
+        """
+        document = {**self.model_dump(mode="json"), "session_id": self.user_id, "data_type": PURGE_JOB_DATA_TYPE}
+        if ttl is not None and ttl > 0:
+            document["ttl"] = ttl
+        return document
+
+
+class PurgeJobManager:
+    """Runs purges as background tasks and keeps their progress.
+
+    A purge streams the user's matching documents a page at a time and deletes each page
+    in batches per partition, with at most max_concurrency requests in flight, so neither
+    the request that started it nor the process memory grows with the amount of data.
+    A user has at most one purge running in this process; starting another returns it.
+
+    The progress of every job is also written to the memory store as it goes, so a
+    worker other than the one running a purge can report it through load.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENT_WRITES,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        soft_delete_ttl_seconds: int = DEFAULT_SOFT_DELETE_TTL_SECONDS,
+        job_ttl_seconds: int = DEFAULT_JOB_TTL_SECONDS,
+    ) -> None:
+        """Initialize the manager.
+
+        Args:
+            max_concurrency: Delete requests in flight per purge
+            page_size: Documents read per query page
+            soft_delete_ttl_seconds: Time to live set on documents by a soft delete
+            job_ttl_seconds: Time to live of the stored progress of a job (0 or less
+                means it never expires)
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.page_size = max(1, page_size)
+        self.soft_delete_ttl_seconds = soft_delete_ttl_seconds
+        self.job_ttl_seconds = job_ttl_seconds
+        self._jobs: "OrderedDict[str, PurgeJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_config(cls, config: Any) -> "PurgeJobManager":
+        """Build a manager from AppConfig, falling back to environment variables and defaults."""
+
+        def setting(attr: str, default: Any) -> Any:
+            value = getattr(config, attr, None) if config is not None else None
+            return value if value is not None else os.environ.get(attr, default)
+
+        try:
+            return cls(
+                max_concurrency=int(setting("PURGE_MAX_CONCURRENCY", MAX_CONCURRENT_WRITES)),
+                page_size=int(setting("PURGE_PAGE_SIZE", DEFAULT_PAGE_SIZE)),
+                soft_delete_ttl_seconds=int(
+                    setting("PURGE_SOFT_DELETE_TTL_SECONDS", DEFAULT_SOFT_DELETE_TTL_SECONDS)
+                ),
+                job_ttl_seconds=int(setting("PURGE_JOB_TTL_SECONDS", DEFAULT_JOB_TTL_SECONDS)),
+            )
+        except (TypeError, ValueError):
+            logger.warning("Invalid purge settings, using the defaults")
+            return cls()
+
+    def start(
+        self,
+        memory_store: Any,
+        user_id: str,
+        data_types: Optional[List[str]] = None,
+        soft_delete: bool = False,
+        on_finished: Optional[Callable[[PurgeJob], None]] = None,
+    ) -> PurgeJob:
+        """Start purging a user's documents in the background.
+
+        Args:
+            memory_store: The user's memory context, which must support purge_items
+            data_types: Data types to remove, PURGE_DATA_TYPES by default
+            soft_delete: Expire the documents with a time to live instead of deleting them
+            on_finished: Called with the job once it completed or failed
+
+        Returns:
+            The new job, or the user's purge that is still running
+        """
+        for job in self._jobs.values():
+            if job.user_id == user_id and not job.done:
+                return job
+
+        job = PurgeJob(user_id=user_id, data_types=data_types or PURGE_DATA_TYPES, soft_delete=soft_delete)
+        self._jobs[job.id] = job
+        while len(self._jobs) > MAX_TRACKED_JOBS:
+            oldest = next((key for key, value in self._jobs.items() if value.done), None)
+            if oldest is None:
+                break
+            del self._jobs[oldest]
+        self._tasks[job.id] = asyncio.create_task(self._run(job, memory_store, on_finished))
+        return job
+
+    def get(self, job_id: str, user_id: Optional[str] = None) -> Optional[PurgeJob]:
+        """Look up a job, only if it belongs to user_id when one is given."""
+        job = self._jobs.get(job_id)
+        if job is None or (user_id is not None and job.user_id != user_id):
+            return None
+        return job
+
+    async def load(self, memory_store: Any, job_id: str, user_id: str) -> Optional[PurgeJob]:
+        """Look up a user's job here, or in the memory store if another worker runs it."""
+        job = self.get(job_id, user_id)
+        if job is not None:
+            return job
+        document = await memory_store.get_purge_job(job_id)
+        if document is None or document.get("user_id") != user_id:
+            return None
+        return PurgeJob.model_validate(document)
+
+    async def wait(self, job_id: str) -> Optional[PurgeJob]:
+        """Wait for a job to finish and return it."""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.shield(task)
+        return self._jobs.get(job_id)
+
+    async def _run(
+        self, job: PurgeJob, memory_store: Any, on_finished: Optional[Callable[[PurgeJob], None]]
+    ) -> None:
+        job.status = PurgeStatus.running
+        try:
+            await self._save(job, memory_store)
+            async for result in memory_store.purge_items(
+                job.data_types,
+                page_size=self.page_size,
+                max_concurrency=self.max_concurrency,
+                soft_delete_ttl=self.soft_delete_ttl_seconds if job.soft_delete else None,
+            ):
+                if any(item.operation == "delete" for item in result.items):
+                    # Time to live is not enabled on the container, so documents are deleted
+                    job.soft_delete = False
+                job.found += len(result.items)
+                job.deleted += len(result.succeeded)
+                job.failed += len(result.failed)
+                await self._save(job, memory_store)
+            job.status = PurgeStatus.completed
+            logger.info(f"Purge {job.id} removed {job.deleted} of {job.found} documents")
+        except Exception as e:
+            job.status = PurgeStatus.failed
+            job.error = str(e)
+            logger.exception(f"Purge {job.id} failed: {e}")
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            self._tasks.pop(job.id, None)
+            await self._save(job, memory_store)
+            if on_finished is not None:
+                try:
+                    on_finished(job)
+                except Exception as e:
+                    logger.warning(f"Purge {job.id} completion callback failed: {e}")
+
+    async def _save(self, job: PurgeJob, memory_store: Any) -> None:
+        try:
+            await memory_store.save_purge_job(job.to_document(self.job_ttl_seconds))
+        except Exception as e:
+            logger.warning(f"Failed to store the progress of purge {job.id}: {e}")
+
+
+purge_jobs = PurgeJobManager.from_config(config)
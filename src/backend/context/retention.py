@@ -0,0 +1,252 @@
+"""Retention of session data: time to live per data type, and archives of finished sessions."""
+
+import base64
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from app_config import config
+except ImportError as e:
+    logging.warning(f"Failed to import app_config: {e}")
+    config = None
+
+logger = logging.getLogger(__name__)
+
+# Data type of the document listing what a finished session's archive holds
+ARCHIVE_DATA_TYPE = "session_archive"
+# Data type of the documents holding the archived documents themselves
+ARCHIVE_CHUNK_DATA_TYPE = "session_archive_chunk"
+# Data types moved into a session's archive
+ARCHIVED_DATA_TYPES = ["plan", "step", "agent_message", "message"]
+# Plans in these states have finished, so their sessions can be archived
+FINISHED_PLAN_STATUSES = ["completed", "failed"]
+DEFAULT_ARCHIVE_MIN_AGE_SECONDS = 7 * 24 * 3600
+# Largest encoded payload of an archive chunk; Cosmos DB items are limited to 2 MB
+MAX_INLINE_ARCHIVE_BYTES = 1_500_000
+# JSON bytes compressed into one chunk before it is checked against MAX_INLINE_ARCHIVE_BYTES
+ARCHIVE_CHUNK_SOURCE_BYTES = 8_000_000
+# How the documents of a session are stored in its archive
+ARCHIVE_ENCODING = "jsonl+gzip+base64"
+ARCHIVE_EXPORT_ENCODING = "jsonl+gzip"
+
+
+class ArchiveUnavailableError(Exception):
+    """An archive's export cannot be read here, e.g. it was written by another instance."""
+
+
+def parse_ttl_by_data_type(value: Optional[str]) -> Dict[str, int]:
+    """Parse "data_type=seconds" pairs separated by commas, e.g. "message=604800,step=2592000"."""
+    ttl_by_data_type = {}
+    for pair in (value or "").split(","):
+        if not pair.strip():
+            continue
+        data_type, _, seconds = pair.partition("=")
+        ttl_by_data_type[data_type.strip()] = int(seconds)
+    return ttl_by_data_type
+
+
+def archive_id(session_id: str) -> str:
+    """ID of the archive document of a session."""
+    return f"archive-{session_id}"
+
+
+def archive_chunk_id(session_id: str, number: int) -> str:
+    """ID of one of the chunks of a session's archive."""
+    return f"{archive_id(session_id)}-chunk-{number}"
+
+
+class RetentionPolicy:
+    """How long session data is kept, and how finished sessions are archived.
+
+    Documents of a data type with a time to live get a "ttl" field when they are written,
+    and Cosmos DB removes them that many seconds after their last write. This needs time
+    to live enabled on the container, which new containers are created with.
+
+    Archiving compacts the plan, steps and messages of a finished session into chunks
+    holding them as gzipped JSON lines, each small enough for a Cosmos DB item, or, with
+    an export directory, into a .jsonl.gz file with only its location in the chunk. The
+    archive document lists the session's plans and how many chunks it has; archiving the
+    session again adds chunks rather than rewriting the earlier ones. The originals are
+    then deleted, so queries on the hot path only touch sessions that are still active.
+    """
+
+    def __init__(
+        self,
+        ttl_by_data_type: Optional[Dict[str, int]] = None,
+        archive_min_age_seconds: float = DEFAULT_ARCHIVE_MIN_AGE_SECONDS,
+        archive_export_dir: Optional[str] = None,
+    ) -> None:
+        """Initialize the policy.
+
+        Args:
+            ttl_by_data_type: Seconds documents of each data type live after their last write
+            archive_min_age_seconds: Seconds since a finished plan was last written before
+                its session is archived
+            archive_export_dir: Directory archives are exported to instead of being stored
+                in Cosmos DB
+        """
+        self.ttl_by_data_type = {k: v for k, v in (ttl_by_data_type or {}).items() if v}
+        self.archive_min_age_seconds = archive_min_age_seconds
+        self.archive_export_dir = archive_export_dir or None
+
+    @classmethod
+    def from_config(cls, config: Any) -> "RetentionPolicy":
+        """Build a policy from AppConfig, falling back to environment variables and defaults."""
+
+        def setting(attr: str, default: Any) -> Any:
+            value = getattr(config, attr, None) if config is not None else None
+            return value if value is not None else os.environ.get(attr, default)
+
+        try:
+            return cls(
+                ttl_by_data_type=parse_ttl_by_data_type(setting("COSMOSDB_TTL_BY_DATA_TYPE", "")),
+                archive_min_age_seconds=float(
+                    setting("ARCHIVE_MIN_AGE_SECONDS", DEFAULT_ARCHIVE_MIN_AGE_SECONDS)
+                ),
+                archive_export_dir=setting("ARCHIVE_EXPORT_DIR", ""),
+            )
+        except (TypeError, ValueError):
+            logger.warning("Invalid retention settings, nothing expires")
+            return cls()
+
+    def ttl_for(self, data_type: Optional[str]) -> Optional[int]:
+        """Seconds documents of this data type live, or None if they are kept."""
+        return self.ttl_by_data_type.get(data_type)
+
+    def apply_ttl(self, document: Dict[str, Any], data_type: Optional[str] = None) -> Dict[str, Any]:
+        """Set the time to live of the document's data type, or the given one, on it."""
+        ttl = self.ttl_for(data_type or document.get("data_type"))
+        if ttl is not None:
+            document["ttl"] = ttl
+        return document
+
+    def build_archive(
+        self,
+        session_id: str,
+        user_id: str,
+        documents: List[Dict[str, Any]],
+        previous: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Compact the documents of a session into archive chunks.
+
+        Args:
+            session_id: The session archived
+            user_id: The user the session belongs to
+            documents: The documents to add to the archive
+            previous: The session's archive document from an earlier archive, if any
+
+        Returns:
+            The archive document, and the new chunks to write before it
+
+        Raises:
+            ValueError: If a single document is too large for a chunk and no export
+                directory is configured
+        """
+        lines = [
+            json.dumps({k: v for k, v in document.items() if not k.startswith("_") or k == "_ts"}, default=str)
+            for document in documents
+        ]
+        first = previous.get("chunk_count", 0) if previous else 0
+        if self.archive_export_dir:
+            directory = os.path.join(self.archive_export_dir, user_id.replace(os.sep, "_"))
+            os.makedirs(directory, exist_ok=True)
+            location = os.path.join(directory, f"{session_id.replace(os.sep, '_')}-{first}.jsonl.gz")
+            with open(location, "wb") as export:
+                export.write(gzip.compress("\n".join(lines).encode("utf-8")))
+            contents = [{"encoding": ARCHIVE_EXPORT_ENCODING, "location": location}]
+        else:
+            contents = [
+                {"encoding": ARCHIVE_ENCODING, "payload": payload}
+                for payload in self._payloads(session_id, lines)
+            ]
+
+        chunks = [
+            self.apply_ttl(
+                {
+                    "id": archive_chunk_id(session_id, number),
+                    "session_id": session_id,
+                    "user_id": user_id,
+                    "data_type": ARCHIVE_CHUNK_DATA_TYPE,
+                    "chunk": number,
+                    **content,
+                },
+                ARCHIVE_DATA_TYPE,
+            )
+            for number, content in enumerate(contents, start=first)
+        ]
+        plans = [document for document in documents if document.get("data_type") == "plan"]
+        archive = {
+            "id": archive_id(session_id),
+            "session_id": session_id,
+            "user_id": user_id,
+            "data_type": ARCHIVE_DATA_TYPE,
+            "plan_ids": (previous or {}).get("plan_ids", []) + [plan["id"] for plan in plans],
+            "initial_goals": (previous or {}).get("initial_goals", [])
+            + [plan.get("initial_goal") for plan in plans],
+            "document_count": (previous or {}).get("document_count", 0) + len(documents),
+            # So documents left behind by a failed delete are not archived twice
+            "document_ids": (previous or {}).get("document_ids", []) + [document["id"] for document in documents],
+            "chunk_count": first + len(chunks),
+            "archived_at": datetime.now(timezone.utc).isoformat(),
+        }
+        return self.apply_ttl(archive), chunks
+
+    @staticmethod
+    def _payloads(session_id: str, lines: List[str]) -> List[str]:
+        """Gzip and base64 the lines into payloads of at most MAX_INLINE_ARCHIVE_BYTES."""
+        groups: List[List[str]] = [[]]
+        size = 0
+        for line in lines:
+            if groups[-1] and size + len(line) > ARCHIVE_CHUNK_SOURCE_BYTES:
+                groups.append([])
+                size = 0
+            groups[-1].append(line)
+            size += len(line) + 1
+
+        payloads = []
+        while groups:
+            group = groups.pop(0)
+            payload = base64.b64encode(gzip.compress("\n".join(group).encode("utf-8"))).decode("ascii")
+            if len(payload) <= MAX_INLINE_ARCHIVE_BYTES:
+                payloads.append(payload)
+            elif len(group) > 1:
+                # Compressed less than expected: split the group and try the halves
+                half = len(group) // 2
+                groups[:0] = [group[:half], group[half:]]
+            else:
+                raise ValueError(
+                    f"A document of session {session_id} is {len(payload)} bytes compressed; "
+                    "set ARCHIVE_EXPORT_DIR to export sessions with documents this large"
+                )
+        return payloads
+
+    @staticmethod
+    def load_archive(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the documents stored in archive chunks or their exports, in chunk order.
+
+        Raises:
+            ArchiveUnavailableError: If an export is not in this instance's export directory
+        """
+        documents = []
+        for chunk in sorted(chunks, key=lambda chunk: chunk["chunk"]):
+            if chunk.get("encoding") == ARCHIVE_EXPORT_ENCODING:
+                try:
+                    with open(chunk["location"], "rb") as export:
+                        compressed = export.read()
+                except OSError as e:
+                    raise ArchiveUnavailableError(
+                        f"Archive export {chunk['location']} of session {chunk.get('session_id')} "
+                        f"cannot be read on this instance: {e}"
+                    ) from e
+            else:
+                compressed = base64.b64decode(chunk["payload"])
+            lines = gzip.decompress(compressed).decode("utf-8")
+            documents.extend(json.loads(line) for line in lines.splitlines() if line)
+        return documents
+
+
+retention_policy = RetentionPolicy.from_config(config)
@@ -0,0 +1,96 @@
+"""Vectorized cosine similarity search over memory record embeddings."""
+
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Documents scored per query page when scanning a collection
+SCAN_PAGE_SIZE = 1000
+
+
+def stack_embeddings(embeddings: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Stack embeddings into a contiguous float32 matrix with one row per embedding.
+
+    Returns:
+        The matrix and the L2 norm of each row
+    """
+    matrix = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32))
+    if matrix.ndim != 2:
+        matrix = matrix.reshape(len(embeddings), -1)
+    return matrix, np.linalg.norm(matrix, axis=1)
+
+
+def cosine_scores(query: np.ndarray, matrix: np.ndarray, norms: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every row of matrix to query, as one matrix-vector product.
+
+    Rows with a zero norm score 0.
+    """
+    query = np.asarray(query, dtype=np.float32).ravel()
+    query_norm = float(np.linalg.norm(query))
+    if query_norm == 0.0 or matrix.shape[0] == 0:
+        return np.zeros(matrix.shape[0], dtype=np.float32)
+    denominator = norms * query_norm
+    scores = matrix @ query
+    np.divide(scores, denominator, out=scores, where=denominator > 0)
+    scores[denominator == 0] = 0.0
+    return scores
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, using argpartition."""
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < scores.size:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.size)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class StreamingTopK:
+    """Keeps the k best matches seen so far while a collection is scanned page by page.
+
+    Each page is scored with one matrix-vector product; only the current winners are
+    carried between pages, so memory stays bounded by the page size and k.
+    """
+
+    def __init__(self, query: np.ndarray, limit: int, min_relevance_score: float = 0.0) -> None:
+        self._query = np.asarray(query, dtype=np.float32).ravel()
+        self._limit = limit
+        self._min_relevance_score = min_relevance_score
+        self._items: List[Any] = []
+        self._scores = np.empty(0, dtype=np.float32)
+        self.scanned = 0
+
+    def add(
+        self,
+        items: Sequence[Any],
+        embeddings: Optional[Sequence[Any]] = None,
+        matrix: Optional[np.ndarray] = None,
+        norms: Optional[np.ndarray] = None,
+    ) -> None:
+        """Score a page of items.
+
+        Args:
+            items: The items, in the same order as their embeddings
+            embeddings: The raw embeddings, or
+            matrix, norms: An already stacked page from stack_embeddings
+        """
+        if not items:
+            return
+        if matrix is None:
+            matrix, norms = stack_embeddings(embeddings)
+        self.scanned += len(items)
+        scores = cosine_scores(self._query, matrix, norms)
+        keep = top_k_indices(scores, self._limit)
+        keep = keep[scores[keep] >= self._min_relevance_score]
+
+        merged_items = self._items + [items[i] for i in keep]
+        merged_scores = np.concatenate([self._scores, scores[keep]])
+        best = top_k_indices(merged_scores, self._limit)
+        self._items = [merged_items[i] for i in best]
+        self._scores = merged_scores[best]
+
+    def results(self) -> List[Tuple[Any, float]]:
+        """The best matches so far as (item, score) pairs, best first."""
+        return [(item, float(score)) for item, score in zip(self._items, self._scores)]
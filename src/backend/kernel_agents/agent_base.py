@@ -6,10 +6,27 @@ from typing import (Any, List, Mapping, Optional)
 from app_config import config  # Thought into existence by Darbot
 from context.cosmos_memory_kernel import CosmosMemoryContext
 from event_utils import track_event_if_configured  # Thought into existence by Darbot
+from kernel_agents.agent_definition_cache import agent_definition_cache
+from kernel_agents.chat_history_window import ChatHistoryWindow
 from models.messages_kernel import (ActionRequest, ActionResponse,
                                     AgentMessage, Step, StepStatus)
 from semantic_kernel.agents.azure_ai.azure_ai_agent import AzureAIAgent
+from semantic_kernel.contents import AuthorRole, ChatMessageContent
 from semantic_kernel.functions import KernelFunction
+from utils.token_budget import count_tokens
+
+# Closing message of every action request, after the chat history
+PERFORM_ACTION_PROMPT = "Please perform this action"
+
+
+def _prompt_tokens_used(chunk: Any) -> Optional[int]:
+    """Prompt tokens of the run that produced a response, if the service reported them."""
+    message = getattr(chunk, "message", chunk)
+    usage = (getattr(message, "metadata", None) or {}).get("usage")
+    if isinstance(usage, dict):
+        return usage.get("prompt_tokens")
+    return getattr(usage, "prompt_tokens", None)
+
 
 # Default formatting instructions used across agents
 DEFAULT_FORMATTING_INSTRUCTIONS = "Instructions: returning the output of this function call verbatim to the user in markdown. Then write AGENT SUMMARY: and then include a summary of what you did."
@@ -78,7 +95,9 @@ class BaseAgent(AzureAIAgent):
         self._memory_store = memory_store
         self._tools = tools
         self._system_message = system_message
-        self._chat_history = [{"role": "system", "content": self._system_message}]
+        # Earlier actions of this agent, within AGENT_CHAT_HISTORY_MAX_TOKENS; the system
+        # message is the agent's instructions, so it is not part of the history
+        self._chat_history = ChatHistoryWindow.from_config(config)
         # self._agent = None  # Will be initialized in async_init
 
         # Required properties for AgentGroupChat compatibility
@@ -123,15 +142,22 @@ class BaseAgent(AzureAIAgent):
 
         # Add messages to chat history for context
         # This gives the agent visibility of the conversation history
-        self._chat_history.extend(
+        self._chat_history.add_turn(
             [
-                {"role": "assistant", "content": action_request.action},
-                {
-                    "role": "user",
-                    "content": f"{step.human_feedback}. Now make the function call",
-                },
+                ChatMessageContent(role=AuthorRole.ASSISTANT, content=action_request.action),
+                ChatMessageContent(
+                    role=AuthorRole.USER,
+                    content=f"{step.human_feedback}. Now make the function call",
+                ),
             ]
         )
+        messages = self._chat_history.messages()
+        messages.append(ChatMessageContent(role=AuthorRole.USER, content=PERFORM_ACTION_PROMPT))
+        estimated_prompt_tokens = (
+            count_tokens(self._system_message)
+            + self._chat_history.tokens
+            + count_tokens(PERFORM_ACTION_PROMPT)
+        )
 
         try:
             # Use the agent to process the action
@@ -142,18 +168,33 @@ class BaseAgent(AzureAIAgent):
             # thread = self.client.agents.get_thread(
             #     thread=step.session_id
             # )  # AzureAIAgentThread(thread_id=step.session_id)
-            async_generator = self.invoke(
-                messages=f"{str(self._chat_history)}\n\nPlease perform this action",
-                thread=thread,
-            )
+            async_generator = self.invoke(messages=messages, thread=thread)
 
             response_content = ""
+            prompt_tokens = None
 
             # Collect the response from the async generator
             async for chunk in async_generator:
                 if chunk is not None:
                     response_content += str(chunk)
+                    prompt_tokens = _prompt_tokens_used(chunk) or prompt_tokens
 
+            logging.info(
+                f"{self._agent_name} prompt: {len(messages)} messages, ~{estimated_prompt_tokens} tokens "
+                f"estimated, {prompt_tokens} reported by the service"
+            )
+            track_event_if_configured(
+                "Base agent - Prompt tokens",
+                {
+                    "session_id": action_request.session_id,
+                    "user_id": self._user_id,
+                    "step_id": action_request.step_id,
+                    "source": self._agent_name,
+                    "messages": len(messages),
+                    "estimated_prompt_tokens": estimated_prompt_tokens,
+                    "prompt_tokens": prompt_tokens,
+                },
+            )
             logging.info(f"Response content length: {len(response_content)}")
             logging.info(f"Response content: {response_content}")
 
@@ -265,6 +306,7 @@ class BaseAgent(AzureAIAgent):
         """
         Creates a new Azure AI Agent with the specified name and instructions using AIProjectClient.
         If an agent with the given name (assistant_id) already exists, it tries to retrieve it first.
+        Definitions are served from the process-wide agent_definition_cache.
 
         Args:
             kernel: The Semantic Kernel instance
@@ -289,40 +331,13 @@ class BaseAgent(AzureAIAgent):
                 logging.info(f"No Azure AI Project Client available for agent {agent_name}, skipping Azure AI agent definition creation")
                 return None
 
-            # # First try to get an existing agent with this name as assistant_id
-            try:
-                agent_id = None
-                agent_list = await client.agents.list_agents()
-                for agent in agent_list.data:
-                    if agent.name == agent_name:
-                        agent_id = agent.id
-                        break
-                # If the agent already exists, we can use it directly
-                # Get the existing agent definition
-                if agent_id is not None:
-                    logging.info(f"Agent with ID {agent_id} exists.")
-
-                    existing_definition = await client.agents.get_agent(agent_id)
-
-                    return existing_definition
-            except Exception as e:
-                # The Azure AI Projects SDK throws an exception when the agent doesn't exist
-                # (not returning None), so we catch it and proceed to create a new agent
-                if "ResourceNotFound" in str(e) or "404" in str(e):
-                    logging.info(
-                        f"Agent with ID {agent_name} not found. Will create a new one."
-                    )
-                else:
-                    # Log unexpected errors but still try to create a new agent
-                    logging.warning(
-                        f"Unexpected error while retrieving agent {agent_name}: {str(e)}. Attempting to create new agent."
-                    )
-
-            # Create the agent using the project client with the agent_name as both name and assistantId
-            agent_definition = await client.agents.create_agent(
-                model=config.AZURE_OPENAI_DEPLOYMENT_NAME,
-                name=agent_name,
+            # Reuse the process-wide definition; only the first lookup per deployment
+            # lists (or creates) agents on the AI project
+            agent_definition = await agent_definition_cache.get_or_create(
+                client,
+                agent_name=agent_name,
                 instructions=instructions,
+                model=config.AZURE_OPENAI_DEPLOYMENT_NAME,
                 temperature=temperature,
                 response_format=response_format,
             )
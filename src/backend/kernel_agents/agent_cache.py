@@ -0,0 +1,261 @@
+"""Bounded per-session cache for agent instances."""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil is optional
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+# Defaults used when neither AppConfig nor the environment provides a value
+DEFAULT_MAX_SESSIONS = 256
+DEFAULT_IDLE_TTL_SECONDS = 3600
+DEFAULT_MAX_MEMORY_MB = 0  # 0 disables memory-aware eviction
+
+# Fraction of the cached sessions dropped per pass while over the memory limit
+MEMORY_EVICTION_FRACTION = 0.1
+
+
+def get_process_rss_mb() -> Optional[float]:
+    """Return the resident set size of this process in MB, or None if unavailable."""
+    if psutil is not None:
+        try:
+            return psutil.Process().memory_info().rss / (1024 * 1024)
+        except Exception as e:
+            logger.debug(f"psutil could not read process memory: {e}")
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except Exception:
+        return None
+
+
+class SessionAgentCache:
+    """LRU cache of agent instances grouped by session.
+
+    Each session maps to a dict of ``{agent_type: agent}``. Whole sessions are evicted when:
+
+    * more than ``max_sessions`` sessions are cached (least recently used first),
+    * a session has not been touched for ``idle_ttl_seconds``, or
+    * the process RSS exceeds ``max_memory_mb`` (least recently used first).
+
+    The mapping methods (``in``, ``[]``, ``get``, ``del``, ``clear``) keep the behaviour of
+    the plain dict this replaces; ``lookup`` and ``store`` are the counted fast path.
+    """
+
+    def __init__(
+        self,
+        name: str = "agents",
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        idle_ttl_seconds: float = DEFAULT_IDLE_TTL_SECONDS,
+        max_memory_mb: float = DEFAULT_MAX_MEMORY_MB,
+        clock: Callable[[], float] = time.monotonic,
+        memory_probe: Callable[[], Optional[float]] = get_process_rss_mb,
+    ):
+        """Initialize the cache.
+
+        Args:
+            name: Label used in logs and stats
+            max_sessions: Maximum number of sessions kept (0 or less means unbounded)
+            idle_ttl_seconds: Seconds a session may stay untouched (0 or less disables the TTL)
+            max_memory_mb: Process RSS above which sessions are evicted (0 or less disables it)
+            clock: Monotonic clock, injectable for tests
+            memory_probe: Callable returning the current RSS in MB, injectable for tests
+        """
+        self.name = name
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_memory_mb = max_memory_mb
+        self._clock = clock
+        self._memory_probe = memory_probe
+        self._sessions: "OrderedDict[str, Dict[Hashable, Any]]" = OrderedDict()
+        self._last_access: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"capacity": 0, "idle": 0, "memory": 0}
+
+    @classmethod
+    def from_config(cls, config: Any, name: str = "agents") -> "SessionAgentCache":
+        """Build a cache from AppConfig, falling back to environment variables and defaults.
+
+        Args:
+            config: The AppConfig instance, or None if it could not be imported
+            name: Label used in logs and stats
+
+        Returns:
+            A configured SessionAgentCache
+        """
+
+        def setting(attr: str, default: float) -> float:
+            value = getattr(config, attr, None) if config is not None else None
+            if value is None:
+                value = os.environ.get(attr, default)
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                logger.warning(f"Invalid value for {attr}: {value!r}, using {default}")
+                return default
+
+        return cls(
+            name=name,
+            max_sessions=int(setting("AGENT_CACHE_MAX_SESSIONS", DEFAULT_MAX_SESSIONS)),
+            idle_ttl_seconds=setting("AGENT_CACHE_IDLE_TTL_SECONDS", DEFAULT_IDLE_TTL_SECONDS),
+            max_memory_mb=setting("AGENT_CACHE_MAX_MEMORY_MB", DEFAULT_MAX_MEMORY_MB),
+        )
+
+    # Counted fast path
+
+    def lookup(self, session_id: str, key: Hashable) -> Optional[Any]:
+        """Return the cached value for (session_id, key) and refresh the session, or None."""
+        with self._lock:
+            self._evict_idle()
+            agents = self._sessions.get(session_id)
+            if agents is not None and key in agents:
+                self._touch(session_id)
+                self.hits += 1
+                return agents[key]
+            self.misses += 1
+            return None
+
+    def store(self, session_id: str, key: Hashable, value: Any) -> None:
+        """Cache a value for (session_id, key) and enforce the configured bounds."""
+        with self._lock:
+            self._session(session_id)[key] = value
+            self._enforce_limits(keep=session_id)
+
+    def session(self, session_id: str) -> Dict[Hashable, Any]:
+        """Return the (possibly new) dict of cached values for a session."""
+        with self._lock:
+            agents = self._session(session_id)
+            self._enforce_limits(keep=session_id)
+            return agents
+
+    def evict_expired(self) -> int:
+        """Drop every session idle for longer than the TTL.
+
+        Returns:
+            The number of sessions evicted
+        """
+        with self._lock:
+            return self._evict_idle()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters and current size for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "sessions": len(self._sessions),
+                "entries": sum(len(agents) for agents in self._sessions.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": dict(self.evictions),
+                "max_sessions": self.max_sessions,
+                "idle_ttl_seconds": self.idle_ttl_seconds,
+                "max_memory_mb": self.max_memory_mb,
+            }
+
+    # Mapping interface kept for existing callers
+
+    def __contains__(self, session_id: object) -> bool:
+        with self._lock:
+            self._evict_idle()
+            return session_id in self._sessions
+
+    def __getitem__(self, session_id: str) -> Dict[Hashable, Any]:
+        with self._lock:
+            agents = self._sessions[session_id]
+            self._touch(session_id)
+            return agents
+
+    def __setitem__(self, session_id: str, agents: Dict[Hashable, Any]) -> None:
+        with self._lock:
+            self._sessions[session_id] = agents
+            self._touch(session_id)
+            self._enforce_limits(keep=session_id)
+
+    def __delitem__(self, session_id: str) -> None:
+        with self._lock:
+            del self._sessions[session_id]
+            self._last_access.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str, default: Any = None) -> Any:
+        with self._lock:
+            if session_id not in self._sessions:
+                return default
+            return self[session_id]
+
+    def pop(self, session_id: str, default: Any = None) -> Any:
+        with self._lock:
+            self._last_access.pop(session_id, None)
+            return self._sessions.pop(session_id, default)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            self._last_access.clear()
+
+    # Internals (callers hold the lock)
+
+    def _session(self, session_id: str) -> Dict[Hashable, Any]:
+        agents = self._sessions.get(session_id)
+        if agents is None:
+            agents = self._sessions[session_id] = {}
+        self._touch(session_id)
+        return agents
+
+    def _touch(self, session_id: str) -> None:
+        self._sessions.move_to_end(session_id)
+        self._last_access[session_id] = self._clock()
+
+    def _evict(self, session_id: str, reason: str) -> None:
+        self._sessions.pop(session_id, None)
+        self._last_access.pop(session_id, None)
+        self.evictions[reason] += 1
+        logger.info(f"Evicted session {session_id} from {self.name} cache ({reason})")
+
+    def _evict_idle(self) -> int:
+        if self.idle_ttl_seconds <= 0 or not self._sessions:
+            return 0
+        cutoff = self._clock() - self.idle_ttl_seconds
+        evicted = 0
+        # Sessions are in LRU order, so stop at the first one that is still fresh
+        for session_id in list(self._sessions):
+            if self._last_access.get(session_id, cutoff) > cutoff:
+                break
+            self._evict(session_id, "idle")
+            evicted += 1
+        return evicted
+
+    def _enforce_limits(self, keep: Optional[str] = None) -> None:
+        self._evict_idle()
+
+        if self.max_sessions > 0:
+            while len(self._sessions) > self.max_sessions:
+                oldest = next(iter(self._sessions))
+                if oldest == keep:
+                    break
+                self._evict(oldest, "capacity")
+
+        if self.max_memory_mb > 0:
+            rss = self._memory_probe()
+            if rss is not None and rss > self.max_memory_mb:
+                # Freed memory is not visible until the GC runs, so drop a batch per pass
+                candidates = [sid for sid in self._sessions if sid != keep]
+                batch = max(1, int(len(self._sessions) * MEMORY_EVICTION_FRACTION))
+                for session_id in candidates[:batch]:
+                    self._evict(session_id, "memory")
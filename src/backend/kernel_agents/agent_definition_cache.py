@@ -0,0 +1,280 @@
+"""Process-wide cache of Azure AI agent definitions."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    from app_config import config
+except ImportError as e:
+    logging.warning(f"Failed to import app_config: {e}")
+    config = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 3600
+
+DefinitionKey = Tuple[str, str, str, str]
+
+
+def _fingerprint(value: Any) -> str:
+    """Return a stable hash for instructions or a response format object."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        payload = value
+    else:
+        if hasattr(value, "model_dump"):
+            value = value.model_dump()
+        elif hasattr(value, "as_dict"):
+            value = value.as_dict()
+        try:
+            payload = json.dumps(value, sort_keys=True, default=str)
+        except (TypeError, ValueError):
+            payload = repr(value)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AgentDefinitionCache:
+    """Cache of agent definitions keyed by (name, instructions hash, model, response format hash).
+
+    Agent definitions are static per deployment, so after one ``list_agents`` call (made by
+    ``warm`` at startup, or by the first miss) creating agents for a new session needs no
+    control-plane calls until the TTL expires or ``invalidate`` is called.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the cache.
+
+        Args:
+            ttl_seconds: Seconds a definition stays valid (0 or less disables expiry)
+            clock: Monotonic clock, injectable for tests
+        """
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._definitions: Dict[DefinitionKey, Tuple[float, Any]] = {}
+        # Remote agents by name from the last list_agents call
+        self._listing: Dict[str, Any] = {}
+        self._listing_loaded_at: Optional[float] = None
+        self._locks: Dict[Any, asyncio.Lock] = {}
+        self._locks_loop = None
+
+        self.hits = 0
+        self.misses = 0
+        self.control_plane_calls = 0
+
+    @classmethod
+    def from_config(cls, config: Any) -> "AgentDefinitionCache":
+        """Build a cache using AGENT_DEFINITION_CACHE_TTL_SECONDS from AppConfig or the environment."""
+        value = getattr(config, "AGENT_DEFINITION_CACHE_TTL_SECONDS", None) if config else None
+        if value is None:
+            value = os.environ.get("AGENT_DEFINITION_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)
+        try:
+            ttl_seconds = float(value)
+        except (TypeError, ValueError):
+            logger.warning(
+                f"Invalid AGENT_DEFINITION_CACHE_TTL_SECONDS: {value!r}, using {DEFAULT_TTL_SECONDS}"
+            )
+            ttl_seconds = DEFAULT_TTL_SECONDS
+        return cls(ttl_seconds=ttl_seconds)
+
+    @staticmethod
+    def make_key(
+        agent_name: str, instructions: str, model: str, response_format: Any = None
+    ) -> DefinitionKey:
+        """Build the cache key for an agent definition."""
+        return (agent_name, _fingerprint(instructions), model or "", _fingerprint(response_format))
+
+    async def get_or_create(
+        self,
+        client: Any,
+        agent_name: str,
+        instructions: str,
+        model: str,
+        temperature: float = 0.0,
+        response_format: Any = None,
+    ) -> Any:
+        """Return the cached definition, reusing an existing remote agent or creating one.
+
+        An existing agent whose instructions, model or response format differ from the
+        requested ones is updated to match, or replaced if the update fails.
+
+        Args:
+            client: The AIProjectClient
+            agent_name: The name of the agent
+            instructions: The system message / instructions for the agent
+            model: The model deployment name
+            temperature: The temperature used if the agent has to be created
+            response_format: Optional response format used if the agent has to be created
+
+        Returns:
+            The agent definition
+        """
+        key = self.make_key(agent_name, instructions, model, response_format)
+        definition = self._get(key)
+        if definition is not None:
+            self.hits += 1
+            return definition
+
+        async with self._lock(key):
+            definition = self._get(key)
+            if definition is not None:
+                self.hits += 1
+                return definition
+
+            self.misses += 1
+            definition = await self._find_existing(client, agent_name)
+            if definition is not None and not self._matches(definition, instructions, model, response_format):
+                # Deployed with an older prompt, model or response format
+                definition = await self._update(
+                    client, definition, instructions, model, temperature, response_format
+                )
+            if definition is None:
+                self.control_plane_calls += 1
+                definition = await client.agents.create_agent(
+                    model=model,
+                    name=agent_name,
+                    instructions=instructions,
+                    temperature=temperature,
+                    response_format=response_format,
+                )
+                self._listing[agent_name] = definition
+            self._definitions[key] = (self._clock(), definition)
+            return definition
+
+    async def warm(self, client: Any) -> int:
+        """Load every existing agent definition with a single list_agents call.
+
+        Args:
+            client: The AIProjectClient
+
+        Returns:
+            The number of agent definitions loaded
+        """
+        async with self._lock("listing"):
+            await self._load_listing(client)
+        logger.info(f"Warmed agent definition cache with {len(self._listing)} agents")
+        return len(self._listing)
+
+    def invalidate(self, agent_name: Optional[str] = None) -> None:
+        """Forget cached definitions.
+
+        Args:
+            agent_name: If provided, forget only this agent's definitions
+        """
+        if agent_name is None:
+            self._definitions.clear()
+            self._listing.clear()
+            self._listing_loaded_at = None
+            logger.info("Cleared agent definition cache")
+            return
+        for key in [key for key in self._definitions if key[0] == agent_name]:
+            del self._definitions[key]
+        self._listing.pop(agent_name, None)
+        logger.info(f"Cleared agent definition cache for {agent_name}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters and current size for monitoring."""
+        return {
+            "definitions": len(self._definitions),
+            "listed_agents": len(self._listing),
+            "hits": self.hits,
+            "misses": self.misses,
+            "control_plane_calls": self.control_plane_calls,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+    def _lock(self, key: Any) -> asyncio.Lock:
+        # asyncio locks are bound to one event loop
+        loop = asyncio.get_running_loop()
+        if loop is not self._locks_loop:
+            self._locks = {}
+            self._locks_loop = loop
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def _expired(self, loaded_at: Optional[float]) -> bool:
+        if loaded_at is None:
+            return True
+        return self.ttl_seconds > 0 and self._clock() - loaded_at > self.ttl_seconds
+
+    def _get(self, key: DefinitionKey) -> Optional[Any]:
+        entry = self._definitions.get(key)
+        if entry is None:
+            return None
+        loaded_at, definition = entry
+        if self._expired(loaded_at):
+            del self._definitions[key]
+            return None
+        return definition
+
+    async def _find_existing(self, client: Any, agent_name: str) -> Optional[Any]:
+        async with self._lock("listing"):
+            if self._expired(self._listing_loaded_at):
+                try:
+                    await self._load_listing(client)
+                except Exception as e:
+                    # Creating a new agent is still possible, as in the uncached path
+                    logger.warning(
+                        f"Unexpected error while listing agents for {agent_name}: {e}. Attempting to create new agent."
+                    )
+        return self._listing.get(agent_name)
+
+    @staticmethod
+    def _matches(definition: Any, instructions: str, model: str, response_format: Any) -> bool:
+        """Whether a remote agent was deployed with this definition."""
+        remote_format = getattr(definition, "response_format", None)
+        if remote_format == "auto":
+            # What the service reports for agents created without a response format
+            remote_format = None
+        return (
+            getattr(definition, "instructions", None) == instructions
+            and getattr(definition, "model", None) == model
+            and _fingerprint(remote_format) == _fingerprint(response_format)
+        )
+
+    async def _update(
+        self,
+        client: Any,
+        definition: Any,
+        instructions: str,
+        model: str,
+        temperature: float,
+        response_format: Any,
+    ) -> Optional[Any]:
+        """Update a remote agent to the definition, or return None so a new one is created."""
+        self.control_plane_calls += 1
+        try:
+            definition = await client.agents.update_agent(
+                agent_id=definition.id,
+                model=model,
+                instructions=instructions,
+                temperature=temperature,
+                response_format=response_format,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to update agent {definition.name}: {e}. Creating a new agent.")
+            return None
+        logger.info(f"Updated agent {definition.name} to its current definition")
+        self._listing[definition.name] = definition
+        return definition
+
+    async def _load_listing(self, client: Any) -> None:
+        self.control_plane_calls += 1
+        agent_list = await client.agents.list_agents()
+        self._listing = {agent.name: agent for agent in agent_list.data}
+        self._listing_loaded_at = self._clock()
+
+
+# Create a global instance shared by every agent
+agent_definition_cache = AgentDefinitionCache.from_config(config)
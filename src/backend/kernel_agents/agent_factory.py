@@ -1,7 +1,9 @@
 """Factory for creating agents in the Multi-Agent Custom Automation Engine."""
 
+import asyncio
 import inspect
 import logging
+import os
 from typing import Any, Dict, Optional, Type
 
 # Import with error handling for missing dependencies
@@ -31,6 +33,15 @@ except ImportError as e:
         TECH_SUPPORT = MockAgentValue("Tech_Support_Agent")
         PLANNER = MockAgentValue("Planner_Agent")
 
+try:
+    from context.cosmos_memory_kernel import CosmosMemoryContext
+except ImportError as e:
+    logging.warning(f"Failed to import CosmosMemoryContext: {e}")
+    CosmosMemoryContext = Any
+
+from kernel_agents.agent_cache import SessionAgentCache
+from kernel_agents.agent_definition_cache import agent_definition_cache
+
 # Mock classes for missing dependencies
 class BaseAgent:
     def __init__(self, *args, **kwargs):
@@ -76,6 +87,10 @@ GroupChatManager = BaseAgent
 logger = logging.getLogger(__name__)
 
 
+class _BuildAbandoned(Exception):
+    """Set on an in-flight build whose caller was cancelled before it finished."""
+
+
 class AgentFactory:
     """Factory for creating agents in the Multi-Agent Custom Automation Engine."""
 
@@ -136,11 +151,28 @@ class AgentFactory:
             logging.warning(f"Error creating default system messages: {e}")
             return {}
 
-    # Cache of agent instances by session_id and agent_type
-    _agent_cache = {}
+    # Cache of agent instances by session_id and agent_type, bounded by
+    # AGENT_CACHE_MAX_SESSIONS / AGENT_CACHE_IDLE_TTL_SECONDS / AGENT_CACHE_MAX_MEMORY_MB
+    _agent_cache = SessionAgentCache.from_config(config, name="agents")
+
+    # Cache of Azure AI Agent instances
+    _azure_ai_agent_cache = SessionAgentCache.from_config(config, name="azure_ai_agents")
 
-    # Cache of Azure AI Agent instances  
-    _azure_ai_agent_cache = {}
+    # Agent builds in progress by (session_id, agent_type), awaited by concurrent callers
+    _inflight_builds: Dict[Any, "asyncio.Future"] = {}
+    _single_flight_joins = 0
+
+    @classmethod
+    def _get_creation_concurrency(cls) -> int:
+        """Get the maximum number of agents built concurrently in create_all_agents."""
+        value = getattr(config, "AGENT_CREATION_CONCURRENCY", None) if config else None
+        if value is None:
+            value = os.environ.get("AGENT_CREATION_CONCURRENCY", 8)
+        try:
+            return max(1, int(value))
+        except (TypeError, ValueError):
+            logging.warning(f"Invalid AGENT_CREATION_CONCURRENCY: {value!r}, using 8")
+            return 8
 
     @classmethod
     async def create_agent(
@@ -157,15 +189,76 @@ class AgentFactory:
     ):
         """Create an agent of the specified type."""
         # Check if we already have an agent in the cache
-        if (
-            session_id in cls._agent_cache
-            and agent_type in cls._agent_cache[session_id]
-        ):
+        cached_agent = cls._agent_cache.lookup(session_id, agent_type)
+        if cached_agent is not None:
             logger.info(
                 f"Returning cached agent instance for session {session_id} and agent type {agent_type}"
             )
-            return cls._agent_cache[session_id][agent_type]
+            return cached_agent
+
+        # Join a build of the same agent that another request already started, so
+        # racing requests for one session share a single set of agents
+        key = (session_id, agent_type)
+        inflight = cls._inflight_builds.get(key)
+        while inflight is not None:
+            cls._single_flight_joins += 1
+            logger.info(
+                f"Waiting for in-flight creation of agent type {agent_type} for session {session_id}"
+            )
+            try:
+                return await asyncio.shield(inflight)
+            except _BuildAbandoned:
+                # The caller that started the build was cancelled; build it here instead
+                logger.info(
+                    f"In-flight creation of agent type {agent_type} for session {session_id} was abandoned"
+                )
+            cached_agent = cls._agent_cache.lookup(session_id, agent_type)
+            if cached_agent is not None:
+                return cached_agent
+            inflight = cls._inflight_builds.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark the exception as retrieved when nobody joined the build
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        cls._inflight_builds[key] = future
+        try:
+            agent = await cls._build_agent(
+                agent_type=agent_type,
+                session_id=session_id,
+                user_id=user_id,
+                memory_store=memory_store,
+                system_message=system_message,
+                client=client,
+                **kwargs,
+            )
+            # Cache the agent before releasing waiters so late callers hit the cache
+            cls._agent_cache.store(session_id, agent_type, agent)
+            future.set_result(agent)
+        except asyncio.CancelledError:
+            # Release the waiters without cancelling them, so one of them takes over the build
+            future.set_exception(_BuildAbandoned())
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            cls._inflight_builds.pop(key, None)
 
+        logger.info(f"Created agent of type {agent_type} for session {session_id}")
+        return agent
+
+    @classmethod
+    async def _build_agent(
+        cls,
+        agent_type: AgentType,
+        session_id: str,
+        user_id: str,
+        memory_store=None,
+        system_message: Optional[str] = None,
+        client: Optional[Any] = None,
+        **kwargs,
+    ):
+        """Instantiate an agent without consulting the cache."""
         # Get the agent class
         agent_classes = cls._get_agent_classes()
         agent_class = agent_classes.get(agent_type)
@@ -200,19 +293,6 @@ class AgentFactory:
             agent.session_id = session_id
             agent.user_id = user_id
 
-        # Cache the agent
-        if session_id not in cls._agent_cache:
-            cls._agent_cache[session_id] = {}
-        cls._agent_cache[session_id][agent_type] = agent
-
-        logger.info(f"Created agent of type {agent_type} for session {session_id}")
-        return agent
-
-        # Cache the agent instance
-        if session_id not in cls._agent_cache:
-            cls._agent_cache[session_id] = {}
-        cls._agent_cache[session_id][agent_type] = agent
-
         return agent
 
     @classmethod
@@ -227,7 +307,8 @@ class AgentFactory:
         """Create all agent types for a session in a specific order.
 
         This method creates all agent instances for a session in a multi-phase approach:
-        1. First, it creates all basic agent types except for the Planner and GroupChatManager
+        1. First, it concurrently creates all basic agent types except for the Planner and
+           GroupChatManager (at most AGENT_CREATION_CONCURRENCY at a time)
         2. Then it creates the Planner agent, providing it with references to all other agents
         3. Finally, it creates the GroupChatManager with references to all agents including the Planner
 
@@ -257,32 +338,41 @@ class AgentFactory:
         except Exception as client_exc:
             logger.error(f"Error creating AIProjectClient: {client_exc}")
         # Initialize cache for this session if it doesn't exist
-        if session_id not in cls._agent_cache:
-            cls._agent_cache[session_id] = {}
+        cls._agent_cache.session(session_id)
 
-        # Phase 1: Create all agents except planner and group chat manager
+        # Phase 1: Create all agents except planner and group chat manager.
+        # These are independent, so build them concurrently (bounded to avoid a burst
+        # of control-plane calls against the AI project).
         agent_classes = cls._get_agent_classes()
-        
-        for agent_type in [
+        specialist_types = [
             at
             for at in agent_classes.keys()
             if at != planner_agent_type and at != group_chat_manager_type
-        ]:
-            try:
-                agents[agent_type] = await cls.create_agent(
-                    agent_type=agent_type,
-                    session_id=session_id,
-                    user_id=user_id,
-                    temperature=temperature,
-                    client=client,
-                    memory_store=memory_store,
-                )
-            except Exception as e:
-                logging.warning(f"Failed to create agent {agent_type}: {e}")
-                # Create a basic mock agent
-                mock_agent = BaseAgent()
-                mock_agent.agent_type = agent_type
-                agents[agent_type] = mock_agent
+        ]
+        semaphore = asyncio.Semaphore(cls._get_creation_concurrency())
+
+        async def create_specialist(agent_type):
+            async with semaphore:
+                try:
+                    return await cls.create_agent(
+                        agent_type=agent_type,
+                        session_id=session_id,
+                        user_id=user_id,
+                        temperature=temperature,
+                        client=client,
+                        memory_store=memory_store,
+                    )
+                except Exception as e:
+                    logging.warning(f"Failed to create agent {agent_type}: {e}")
+                    # Create a basic mock agent
+                    mock_agent = BaseAgent()
+                    mock_agent.agent_type = agent_type
+                    return mock_agent
+
+        specialists = await asyncio.gather(
+            *(create_specialist(agent_type) for agent_type in specialist_types)
+        )
+        agents.update(zip(specialist_types, specialists))
 
         # Create agent name to instance mapping for the planner
         agent_instances = {}
@@ -355,6 +445,21 @@ class AgentFactory:
             raise ValueError(f"Unknown agent type: {agent_type}")
         return agent_class
 
+    @classmethod
+    def cache_stats(cls) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters for the agent caches.
+
+        Returns:
+            Dictionary with the stats of each cache
+        """
+        return {
+            "agents": cls._agent_cache.stats(),
+            "azure_ai_agents": cls._azure_ai_agent_cache.stats(),
+            "inflight_builds": len(cls._inflight_builds),
+            "single_flight_joins": cls._single_flight_joins,
+            "agent_definitions": agent_definition_cache.stats(),
+        }
+
     @classmethod
     def clear_cache(cls, session_id: Optional[str] = None) -> None:
         """Clear the agent cache.
@@ -363,11 +468,9 @@ class AgentFactory:
             session_id: If provided, clear only this session's cache
         """
         if session_id:
-            if session_id in cls._agent_cache:
-                del cls._agent_cache[session_id]
+            if cls._agent_cache.pop(session_id) is not None:
                 logger.info(f"Cleared agent cache for session {session_id}")
-            if session_id in cls._azure_ai_agent_cache:
-                del cls._azure_ai_agent_cache[session_id]
+            if cls._azure_ai_agent_cache.pop(session_id) is not None:
                 logger.info(f"Cleared Azure AI agent cache for session {session_id}")
         else:
             cls._agent_cache.clear()
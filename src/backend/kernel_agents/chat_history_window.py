@@ -0,0 +1,101 @@
+"""The chat history an agent sends with each action, kept within a token budget."""
+
+import logging
+import os
+from collections import deque
+from typing import Any, Deque, List, Tuple
+
+from semantic_kernel.contents import AuthorRole, ChatMessageContent
+
+from utils.token_budget import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_TOKENS = 16000
+# Tokens each message dropped from the window takes in the rolling summary
+SUMMARY_LINE_TOKENS = 60
+SUMMARY_PREFIX = "Summary of the earlier conversation, which is no longer shown in full:\n"
+
+
+class ChatHistoryWindow:
+    """Sliding window over the turns of an agent's conversation.
+
+    Messages are added a turn at a time and the oldest turns are dropped once the window
+    is over max_tokens; the latest turn is always kept, even if it alone is over. With
+    summary_max_tokens set, each dropped message leaves a shortened line in a rolling
+    summary sent ahead of the window, whose oldest lines go once it is over its own budget.
+    """
+
+    def __init__(self, max_tokens: int = DEFAULT_MAX_TOKENS, summary_max_tokens: int = 0) -> None:
+        """Initialize the window.
+
+        Args:
+            max_tokens: Tokens the messages and the summary may take
+            summary_max_tokens: Tokens of the rolling summary of dropped turns, none if 0
+        """
+        self.max_tokens = max(1, max_tokens)
+        self.summary_max_tokens = max(0, summary_max_tokens)
+        self._turns: Deque[Tuple[List[ChatMessageContent], int]] = deque()
+        self._summary: Deque[Tuple[str, int]] = deque()
+        self._turn_tokens = 0
+        self._summary_tokens = 0
+
+    @classmethod
+    def from_config(cls, config: Any) -> "ChatHistoryWindow":
+        """Build a window from AppConfig, falling back to environment variables and defaults."""
+
+        def setting(attr: str, default: Any) -> Any:
+            value = getattr(config, attr, None) if config is not None else None
+            return value if value is not None else os.environ.get(attr, default)
+
+        try:
+            return cls(
+                max_tokens=int(setting("AGENT_CHAT_HISTORY_MAX_TOKENS", DEFAULT_MAX_TOKENS)),
+                summary_max_tokens=int(setting("AGENT_CHAT_HISTORY_SUMMARY_TOKENS", 0)),
+            )
+        except (TypeError, ValueError):
+            logger.warning("Invalid chat history settings, using the defaults")
+            return cls()
+
+    @property
+    def tokens(self) -> int:
+        """Tokens of the messages in the window, the summary included."""
+        return self._turn_tokens + self._summary_tokens
+
+    def add_turn(self, messages: List[ChatMessageContent]) -> None:
+        """Add the messages of one turn, dropping the oldest turns if over the budget."""
+        tokens = sum(count_tokens(message.content) for message in messages)
+        self._turns.append((list(messages), tokens))
+        self._turn_tokens += tokens
+        while len(self._turns) > 1 and self.tokens > self.max_tokens:
+            dropped, dropped_tokens = self._turns.popleft()
+            self._turn_tokens -= dropped_tokens
+            if self.summary_max_tokens:
+                self._summarize(dropped)
+
+    def _summarize(self, messages: List[ChatMessageContent]) -> None:
+        for message in messages:
+            line = truncate_to_tokens(f"{message.role.value}: {message.content}", SUMMARY_LINE_TOKENS) + "\n"
+            tokens = count_tokens(line)
+            self._summary.append((line, tokens))
+            self._summary_tokens += tokens
+        while self._summary and self._summary_tokens > self.summary_max_tokens:
+            _, tokens = self._summary.popleft()
+            self._summary_tokens -= tokens
+
+    def messages(self) -> List[ChatMessageContent]:
+        """The summary, if any, followed by the messages in the window, oldest first."""
+        messages = []
+        if self._summary:
+            summary = SUMMARY_PREFIX + "".join(line for line, _ in self._summary)
+            messages.append(ChatMessageContent(role=AuthorRole.USER, content=summary))
+        for turn, _ in self._turns:
+            messages.extend(turn)
+        return messages
+
+    def clear(self) -> None:
+        """Forget every message and the summary."""
+        self._turns.clear()
+        self._summary.clear()
+        self._turn_tokens = 0
+        self._summary_tokens = 0
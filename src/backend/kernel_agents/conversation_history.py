@@ -0,0 +1,140 @@
+"""The conversation history of a plan, as it is passed to the agent executing a step."""
+
+import logging
+import os
+from typing import Any, List, Optional, Set
+
+from models.messages_kernel import AgentType, Plan, StepHistoryEntry
+from utils.token_budget import count_tokens, truncate_to_tokens
+
+try:
+    from app_config import config
+except ImportError as e:
+    logging.warning(f"Failed to import app_config: {e}")
+    config = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_TOKENS = 8000
+# Tokens kept for the note listing the steps left out of a history over its budget
+OMISSION_NOTE_TOKENS = 200
+
+HISTORY_FOOTER = "<conversation_history \\>"
+
+
+class ConversationHistoryBuilder:
+    """Renders the steps a plan completed so far into the history given to the next step.
+
+    The completed steps come from the plan's step_history, which is appended to as each
+    step finishes, so building the history needs neither the plan's steps nor a pass over
+    all of them per step. Steps are listed and numbered by their position in the plan,
+    which differs from the order they completed in when steps run in parallel. When the
+    history is over max_tokens, the latest steps are kept in full and the earlier ones are
+    listed by their action only.
+    """
+
+    def __init__(self, max_tokens: int = DEFAULT_MAX_TOKENS) -> None:
+        """Initialize the builder.
+
+        Args:
+            max_tokens: Tokens the rendered history may take, unlimited if 0
+        """
+        self.max_tokens = max(0, max_tokens)
+
+    @classmethod
+    def from_config(cls, config: Any) -> "ConversationHistoryBuilder":
+        """Build a builder from AppConfig, falling back to environment variables and defaults."""
+
+        def setting(attr: str, default: Any) -> Any:
+            value = getattr(config, attr, None) if config is not None else None
+            return value if value is not None else os.environ.get(attr, default)
+
+        try:
+            return cls(max_tokens=int(setting("CONVERSATION_HISTORY_MAX_TOKENS", DEFAULT_MAX_TOKENS)))
+        except (TypeError, ValueError):
+            logger.warning("Invalid conversation history settings, using the defaults")
+            return cls()
+
+    @staticmethod
+    def entry(step: Any, position: Optional[int] = None) -> StepHistoryEntry:
+        """The history entry of a completed step.
+
+        Args:
+            step: The completed step
+            position: Index of the step in the plan's steps
+        """
+        return StepHistoryEntry(
+            step_id=step.id, agent=step.agent, action=step.action, reply=step.agent_reply, position=position
+        )
+
+    @staticmethod
+    def _header(plan: Plan) -> str:
+        return "".join(
+            [
+                "<conversation_history>Here is the conversation history so far for the current plan. "
+                "This information may or may not be relevant to the step you have been asked to execute.",
+                f"The user's task was:\n{plan.summary}\n\n",
+                f" human_clarification_request:\n{plan.human_clarification_request}\n\n",
+                f" human_clarification_response:\n{plan.human_clarification_response}\n\n",
+                "The conversation between the previous agents so far is below:\n",
+            ]
+        )
+
+    @staticmethod
+    def _render_entry(number: int, entry: StepHistoryEntry) -> str:
+        return (
+            f"Step {number}\n"
+            f"{AgentType.GROUP_CHAT_MANAGER.value}: {entry.action}\n"
+            f"{entry.agent.value}: {entry.reply or ''}\n"
+        )
+
+    def render(self, plan: Plan, step_ids: Optional[Set[str]] = None) -> str:
+        """Render the plan's history for the step about to be executed.
+
+        Args:
+            plan: The plan, with the steps completed so far in its step_history
+            step_ids: Only include these steps, e.g. the ones the step depends on
+        """
+        header = self._header(plan)
+        # Entries recorded without a position keep their completion order
+        numbered = [
+            (index if entry.position is None else entry.position, entry)
+            for index, entry in enumerate(plan.step_history)
+        ]
+        numbered.sort(key=lambda pair: pair[0])
+        entries = [
+            (number, entry) for number, entry in numbered if step_ids is None or entry.step_id in step_ids
+        ]
+        rendered = [self._render_entry(number, entry) for number, entry in entries]
+
+        kept: List[str] = rendered
+        if self.max_tokens:
+            budget = self.max_tokens - count_tokens(header) - count_tokens(HISTORY_FOOTER)
+            costs = [count_tokens(text) for text in rendered]
+            if sum(costs) > budget:
+                budget -= OMISSION_NOTE_TOKENS
+                kept = []
+                # Newest first; the most recent step is kept, cut if need be
+                for text, cost in zip(reversed(rendered), reversed(costs)):
+                    if cost > budget:
+                        if not kept and budget > 0:
+                            kept.append(truncate_to_tokens(text, budget))
+                        break
+                    kept.append(text)
+                    budget -= cost
+                kept.reverse()
+
+        parts = [header]
+        omitted = entries[: len(entries) - len(kept)]
+        if omitted:
+            note = (
+                f"{len(omitted)} earlier steps are left out to keep the history short. Their actions were: "
+                + "; ".join(f"Step {number}: {entry.action}" for number, entry in omitted)
+            )
+            parts.append(truncate_to_tokens(note, OMISSION_NOTE_TOKENS) + "\n")
+        parts.extend(kept)
+        parts.append(HISTORY_FOOTER)
+        return "".join(parts)
+
+
+conversation_history = ConversationHistoryBuilder.from_config(config)
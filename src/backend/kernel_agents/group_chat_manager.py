@@ -1,12 +1,15 @@
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 
 # Thought into existence by Darbot - Fix relative imports
+from app_config import config
 from context.cosmos_memory_kernel import CosmosMemoryContext  # Thought into existence by Darbot
 from event_utils import track_event_if_configured  # Thought into existence by Darbot
 from kernel_agents.agent_base import BaseAgent  # Thought into existence by Darbot
-from models.messages_kernel import (AgentMessage, AgentType, HumanFeedbackStatus, Plan, PlannerResponsePlan, Step, StepStatus, InputTask, HumanFeedback, ActionRequest)  # Thought into existence by Darbot
+from kernel_agents.conversation_history import conversation_history
+from kernel_agents.step_scheduler import StepScheduler
+from models.messages_kernel import (AgentMessage, AgentType, HumanFeedbackStatus, Plan, PlannerResponsePlan, Step, StepStatus, InputTask, HumanFeedback, ActionRequest, ActionResponse)  # Thought into existence by Darbot
 # pylint: disable=E0611
 from semantic_kernel.functions import KernelFunction  # Thought into existence by Darbot
 
@@ -74,6 +77,8 @@ class GroupChatManager(BaseAgent):
         ]
         self._agent_tools_list = agent_tools_list or []
         self._agent_instances = agent_instances or {}
+        # Runs approved steps of this session, concurrently when PARALLEL_STEP_EXECUTION is set
+        self._step_scheduler = StepScheduler.from_config(config)
 
         # Create the Azure AI Agent for group chat operations
         # This will be initialized in async_init
@@ -205,7 +210,9 @@ class GroupChatManager(BaseAgent):
         # Need to retrieve all the steps for the plan
         logging.info(f"GroupChatManager Received human feedback: {message}")
 
-        steps: List[Step] = await self._memory_store.get_steps_by_plan(message.plan_id)
+        steps: List[Step] = await self._memory_store.get_steps_by_plan(
+            message.plan_id, session_id=message.session_id
+        )
         # Filter for steps that are planned or awaiting feedback
 
         # Get the first step assigned to HumanAgent for feedback
@@ -251,13 +258,13 @@ class GroupChatManager(BaseAgent):
                     step, message.approved, received_human_feedback
                 )
                 if message.approved:
-                    await self._execute_step(message.session_id, step)
+                    await self._execute_step(message.session_id, step, position=steps.index(step))
                 else:
                     # Notify the GroupChatManager that the step has been rejected
                     # TODO: Implement this logic later
                     step.status = StepStatus.rejected
                     step.human_approval_status = HumanFeedbackStatus.rejected
-                    self._memory_store.update_step(step)
+                    await self._memory_store.update_step(step)
                     track_event_if_configured(
                         "Group Chat Manager - Steps has been rejected and updated into the cosmos",
                         {
@@ -268,20 +275,29 @@ class GroupChatManager(BaseAgent):
                             "source": step.agent,
                         },
                     )
+        elif message.approved and self._step_scheduler.enabled:
+            # Execute all steps, each as soon as the steps it depends on are done
+            positions = {step.id: position for position, step in enumerate(steps)}
+
+            async def approve_and_execute(step: Step, history_step_ids: Set[str]) -> None:
+                await self._update_step_status(step, True, received_human_feedback)
+                await self._execute_step(message.session_id, step, history_step_ids, positions[step.id])
+
+            await self._step_scheduler.run(steps, approve_and_execute)
         else:
             # Update and execute all steps if no specific step_id is provided
-            for step in steps:
+            for position, step in enumerate(steps):
                 await self._update_step_status(
                     step, message.approved, received_human_feedback
                 )
                 if message.approved:
-                    await self._execute_step(message.session_id, step)
+                    await self._execute_step(message.session_id, step, position=position)
                 else:
                     # Notify the GroupChatManager that the step has been rejected
                     # TODO: Implement this logic later
                     step.status = StepStatus.rejected
                     step.human_approval_status = HumanFeedbackStatus.rejected
-                    self._memory_store.update_step(step)
+                    await self._memory_store.update_step(step)
                     track_event_if_configured(
                         f"{AgentType.GROUP_CHAT_MANAGER.value} - Step has been rejected and updated into the cosmos",
                         {
@@ -318,9 +334,20 @@ class GroupChatManager(BaseAgent):
             },
         )
 
-    async def _execute_step(self, session_id: str, step: Step):
+    async def _execute_step(
+        self,
+        session_id: str,
+        step: Step,
+        history_step_ids: Optional[Set[str]] = None,
+        position: Optional[int] = None,
+    ):
         """
         Executes the given step by sending an ActionRequest to the appropriate agent.
+
+        Only the completed steps in history_step_ids are included in the conversation
+        history passed to the agent; all completed steps are included by default. Once the
+        step is completed it is appended to the plan's history under its position in the
+        plan's steps.
         """
         # Update step status to 'action_requested'
         step.status = StepStatus.action_requested
@@ -335,33 +362,9 @@ class GroupChatManager(BaseAgent):
             },
         )
 
-        # generate conversation history for the invoked agent
-        plan = await self._memory_store.get_plan_by_session(session_id=session_id)
-        steps: List[Step] = await self._memory_store.get_steps_by_plan(plan.id)
-
-        current_step_id = step.id
-        # Initialize the formatted string
-        formatted_string = ""
-        formatted_string += "<conversation_history>Here is the conversation history so far for the current plan. This information may or may not be relevant to the step you have been asked to execute."
-        formatted_string += f"The user's task was:\n{plan.summary}\n\n"
-        formatted_string += (
-            f" human_clarification_request:\n{plan.human_clarification_request}\n\n"
-        )
-        formatted_string += (
-            f" human_clarification_response:\n{plan.human_clarification_response}\n\n"
-        )
-        formatted_string += (
-            "The conversation between the previous agents so far is below:\n"
-        )
-
-        # Iterate over the steps until the current_step_id
-        for i, step in enumerate(steps):
-            if step.id == current_step_id:
-                break
-            formatted_string += f"Step {i}\n"
-            formatted_string += f"{AgentType.GROUP_CHAT_MANAGER.value}: {step.action}\n"
-            formatted_string += f"{step.agent.value}: {step.agent_reply}\n"
-        formatted_string += "<conversation_history \\>"
+        # generate conversation history for the invoked agent from the steps completed so far
+        plan = await self._memory_store.get_plan(step.plan_id, session_id)
+        formatted_string = conversation_history.render(plan, history_step_ids)
 
         logging.info(f"Formatted string: {formatted_string}")
 
@@ -411,6 +414,9 @@ class GroupChatManager(BaseAgent):
             # Update step status to 'completed'
             step.status = StepStatus.completed
             await self._memory_store.update_step(step)
+            await self._memory_store.append_step_history(
+                step.plan_id, session_id, conversation_history.entry(step, position)
+            )
             logging.info(
                 "Marking the step as complete - Since we have received the human feedback"
             )
@@ -428,7 +434,12 @@ class GroupChatManager(BaseAgent):
         else:
             # Use the agent from the step to determine which agent to send to
             agent = self._agent_instances[step.agent.value]
-            await agent.handle_action_request(
-                action_request
+            response = ActionResponse.model_validate_json(
+                await agent.handle_action_request(action_request)
             )  # this function is in base_agent.py
             logging.info(f"Sent ActionRequest to {step.agent.value}")
+            if response.status == StepStatus.completed:
+                step.agent_reply = response.result
+                await self._memory_store.append_step_history(
+                    step.plan_id, session_id, conversation_history.entry(step, position)
+                )
@@ -380,9 +380,6 @@ class PlannerAgent(BaseAgent):
                 human_clarification_request=human_clarification_request,
             )
 
-            # Store the plan
-            await self._memory_store.add_plan(plan)
-
             # Create steps from the parsed data
             steps = []
             for step_data in steps_data:
@@ -407,18 +404,27 @@ class PlannerAgent(BaseAgent):
                     status=StepStatus.planned,
                     human_approval_status=HumanFeedbackStatus.requested,
                 )
+                if step_data.depends_on is not None:
+                    # Positions become step IDs; only earlier steps can be depended on
+                    step.depends_on = [
+                        steps[position].id
+                        for position in step_data.depends_on
+                        if 0 <= position < len(steps)
+                    ]
 
-                # Store the step
-                await self._memory_store.add_step(step)
                 steps.append(step)
 
+            # Store the plan and all of its steps in one round trip
+            await self._memory_store.add_plan_with_steps(plan, steps)
+
+            for step in steps:
                 try:
                     track_event_if_configured(
                         "Planner - Added planned individual step into the cosmos",
                         {
                             "plan_id": plan.id,
-                            "action": action,
-                            "agent": agent_name,
+                            "action": step.action,
+                            "agent": step.agent,
                             "status": StepStatus.planned,
                             "session_id": input_task.session_id,
                             "user_id": self._user_id,
@@ -449,9 +455,6 @@ class PlannerAgent(BaseAgent):
                 timestamp=datetime.datetime.utcnow().isoformat(),
             )
 
-            # Store the dummy plan
-            await self._memory_store.add_plan(dummy_plan)
-
             # Create a dummy step for analyzing the task
             dummy_step = Step(
                 id=str(uuid.uuid4()),
@@ -465,9 +468,6 @@ class PlannerAgent(BaseAgent):
                 timestamp=datetime.datetime.utcnow().isoformat(),
             )
 
-            # Store the dummy step
-            await self._memory_store.add_step(dummy_step)
-
             # Add a second step to request human clarification
             clarification_step = Step(
                 id=str(uuid.uuid4()),
@@ -481,8 +481,10 @@ class PlannerAgent(BaseAgent):
                 timestamp=datetime.datetime.utcnow().isoformat(),
             )
 
-            # Store the clarification step
-            await self._memory_store.add_step(clarification_step)
+            # Store the dummy plan and both steps in one round trip
+            await self._memory_store.add_plan_with_steps(
+                dummy_plan, [dummy_step, clarification_step]
+            )
 
             # Log the event
             try:
@@ -584,6 +586,8 @@ class PlannerAgent(BaseAgent):
             Alternatively, if a general Large Language Model CAN NOT handle the step/required action, add a step to the plan with the action you believe would be needed, and add "EXCEPTION: Human support required to do this step, no suitable function found." to the end of the action. Assign these steps to the HumanAgent. For example, if the task is to find the best way to get from A to B, and there is no function to calculate the best route, write a step with the action "Calculate the best route from A to B. EXCEPTION: Human support required, no suitable function found." and assign it to the HumanAgent.
 
 
+            For each step, set depends_on to the zero-based positions of the earlier steps whose results it needs, or to an empty list if it needs none. Steps that do not depend on each other may be executed at the same time.
+
             Limit the plan to 6 steps or less.
 
             Choose from {{$agents_str}} ONLY for planning your steps.
@@ -0,0 +1,124 @@
+"""Run the steps of a plan as a dependency graph instead of one after another."""
+
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Set
+
+from models.messages_kernel import Step
+
+logger = logging.getLogger(__name__)
+
+# Steps of one session executed at the same time
+DEFAULT_MAX_PARALLEL_STEPS = 3
+
+
+def resolve_dependencies(steps: List[Step]) -> Dict[str, List[str]]:
+    """Map each step ID to the IDs of the earlier steps it waits for.
+
+    A step without depends_on waits for every step before it, which is how plans without
+    dependencies have always run. References to unknown or later steps are dropped, so
+    the graph never has a cycle.
+    """
+    dependencies = {}
+    earlier: List[str] = []
+    for step in steps:
+        if step.depends_on is None:
+            dependencies[step.id] = list(earlier)
+        else:
+            dependencies[step.id] = [step_id for step_id in step.depends_on if step_id in earlier]
+        earlier.append(step.id)
+    return dependencies
+
+
+def resolve_ancestors(steps: List[Step], dependencies: Dict[str, List[str]]) -> Dict[str, Set[str]]:
+    """Map each step ID to every step it depends on, directly or through other steps."""
+    ancestors: Dict[str, Set[str]] = {}
+    for step in steps:
+        ancestors[step.id] = set(dependencies[step.id])
+        for step_id in dependencies[step.id]:
+            ancestors[step.id] |= ancestors[step_id]
+    return ancestors
+
+
+class StepScheduler:
+    """Executes the steps of a plan as soon as the steps they depend on are done.
+
+    Ready steps run concurrently, at most max_concurrency at a time for the session, and
+    steps assigned to the same agent never overlap because an agent keeps one chat history.
+    A step whose dependency failed is not executed. With parallel execution disabled the
+    steps run one after another in plan order.
+    """
+
+    def __init__(self, enabled: bool = False, max_concurrency: int = DEFAULT_MAX_PARALLEL_STEPS) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            enabled: Run independent steps concurrently
+            max_concurrency: Steps of the session executed at the same time
+        """
+        self.enabled = enabled
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._agent_locks: Dict[str, asyncio.Lock] = {}
+
+    @classmethod
+    def from_config(cls, config: Any) -> "StepScheduler":
+        """Build a scheduler from AppConfig, falling back to environment variables and defaults."""
+
+        def setting(attr: str, default: Any) -> Any:
+            value = getattr(config, attr, None) if config is not None else None
+            return value if value is not None else os.environ.get(attr, default)
+
+        try:
+            enabled = setting("PARALLEL_STEP_EXECUTION", False)
+            if isinstance(enabled, str):
+                enabled = enabled.lower() == "true"
+            return cls(
+                enabled=bool(enabled),
+                max_concurrency=int(setting("MAX_PARALLEL_STEPS", DEFAULT_MAX_PARALLEL_STEPS)),
+            )
+        except (TypeError, ValueError):
+            logger.warning("Invalid step scheduling settings, steps run one after another")
+            return cls()
+
+    async def run(
+        self,
+        steps: List[Step],
+        execute: Callable[[Step, Set[str]], Awaitable[None]],
+    ) -> None:
+        """Execute the steps in dependency order.
+
+        Args:
+            steps: The steps of the plan, in plan order
+            execute: Called with a step and the IDs of the earlier steps whose replies
+                belong in its conversation history: those it depends on, directly or not,
+                or every earlier step when steps run one after another
+
+        Raises:
+            The first exception raised by a step, once every step that could run has run
+        """
+        dependencies = resolve_dependencies(steps)
+        ancestors = resolve_ancestors(steps, dependencies)
+        if not self.enabled:
+            for index, step in enumerate(steps):
+                await execute(step, {earlier.id for earlier in steps[:index]})
+            return
+
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_step(step: Step) -> None:
+            # Raises if a dependency failed, so the step is skipped
+            await asyncio.gather(*(tasks[step_id] for step_id in dependencies[step.id]))
+            lock = self._agent_locks.setdefault(str(step.agent), asyncio.Lock())
+            # Wait for the agent before taking a slot, so a slot is never held idle
+            async with lock, self._semaphore:
+                await execute(step, ancestors[step.id])
+
+        for step in steps:
+            tasks[step.id] = asyncio.create_task(run_step(step))
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            logger.error(f"{len(errors)} of {len(steps)} steps failed or were skipped")
+            raise errors[0]
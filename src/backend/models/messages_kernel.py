@@ -1,8 +1,9 @@
 import uuid
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, Iterable, List, Literal, Optional
 
+from pydantic import PrivateAttr
 from semantic_kernel.kernel_pydantic import Field, KernelBaseModel
 
 
@@ -95,6 +96,12 @@ class BaseDataModel(KernelBaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     timestamp: Optional[datetime] = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+    # The stored document this instance was read from or last written as, and its ETag.
+    # Set by CosmosMemoryContext to make updates conditional on the document being
+    # unchanged, and to tell which fields an update changed when it was not.
+    _etag: Optional[str] = PrivateAttr(default=None)
+    _stored: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+
 
 # Basic message class for Semantic Kernel compatibility
 class ChatMessage(KernelBaseModel):
@@ -164,6 +171,17 @@ class Session(BaseDataModel):
     message_to_user: Optional[str] = None
 
 
+class StepHistoryEntry(KernelBaseModel):
+    """A completed step of a plan, as it is shown to the agents of later steps."""
+
+    step_id: str
+    agent: AgentType
+    action: str
+    reply: Optional[str] = None
+    # Index of the step in the plan, None for entries recorded before it was stored
+    position: Optional[int] = None
+
+
 class Plan(BaseDataModel):
     """Represents a plan containing multiple steps."""
 
@@ -176,6 +194,8 @@ class Plan(BaseDataModel):
     summary: Optional[str] = None
     human_clarification_request: Optional[str] = None
     human_clarification_response: Optional[str] = None
+    # Completed steps in the order they completed, appended as each one finishes
+    step_history: List[StepHistoryEntry] = Field(default_factory=list)
 
 
 class Step(BaseDataModel):
@@ -192,6 +212,8 @@ class Step(BaseDataModel):
     human_feedback: Optional[str] = None
     human_approval_status: Optional[HumanFeedbackStatus] = HumanFeedbackStatus.requested
     updated_action: Optional[str] = None
+    # IDs of earlier steps whose results this step needs; None means every earlier step
+    depends_on: Optional[List[str]] = None
 
 
 class ThreadIdAgent(BaseDataModel):
@@ -217,6 +239,8 @@ class AzureIdAgent(BaseDataModel):
 class PlanWithSteps(Plan):
     """Plan model that includes the associated steps."""
 
+    # Only read when executing a step, so it is left out of API responses
+    step_history: List[StepHistoryEntry] = Field(default_factory=list, exclude=True)
     steps: List[Step] = Field(default_factory=list)
     total_steps: int = 0
     planned: int = 0
@@ -227,8 +251,17 @@ class PlanWithSteps(Plan):
     completed: int = 0
     failed: int = 0
 
-    def update_step_counts(self):
-        """Update the counts of steps by their status."""
+    def update_step_counts(self, statuses: Optional[Iterable[StepStatus]] = None):
+        """Update the counts of steps by their status.
+
+        Args:
+            statuses: The step statuses to count instead of those of self.steps, e.g.
+                from a step status summary when the steps themselves were not loaded
+        """
+        if statuses is None:
+            statuses = [step.status for step in self.steps]
+        else:
+            statuses = list(statuses)
         status_counts = {
             StepStatus.planned: 0,
             StepStatus.awaiting_feedback: 0,
@@ -239,10 +272,10 @@ class PlanWithSteps(Plan):
             StepStatus.failed: 0,
         }
 
-        for step in self.steps:
-            status_counts[step.status] += 1
+        for status in statuses:
+            status_counts[status] += 1
 
-        self.total_steps = len(self.steps)
+        self.total_steps = len(statuses)
         self.planned = status_counts[StepStatus.planned]
         self.awaiting_feedback = status_counts[StepStatus.awaiting_feedback]
         self.approved = status_counts[StepStatus.approved]
@@ -425,6 +458,8 @@ class SKChatHistory:
 class PlannerResponseStep(KernelBaseModel):
     action: str
     agent: AgentType
+    # Zero-based positions of the earlier steps whose results this step needs
+    depends_on: Optional[List[int]] = None
 
 
 class PlannerResponsePlan(KernelBaseModel):
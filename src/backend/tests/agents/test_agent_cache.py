@@ -0,0 +1,85 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kernel_agents.agent_cache import SessionAgentCache  # noqa: E402
+from kernel_agents.agent_factory import AgentFactory, AgentType  # noqa: E402
+
+
+def test_lru_eviction_by_session_count():
+    """The least recently used session is dropped once max_sessions is exceeded."""
+    cache = SessionAgentCache(max_sessions=2, idle_ttl_seconds=0)
+    cache.store("s1", "hr", "agent-1")
+    cache.store("s2", "hr", "agent-2")
+    assert cache.lookup("s1", "hr") == "agent-1"
+
+    cache.store("s3", "hr", "agent-3")
+
+    assert "s1" in cache and "s3" in cache
+    assert "s2" not in cache
+    assert cache.evictions["capacity"] == 1
+
+
+def test_idle_sessions_expire(clock):
+    """Sessions untouched for longer than the idle TTL are evicted on the next access."""
+    cache = SessionAgentCache(max_sessions=0, idle_ttl_seconds=60, clock=clock)
+    cache.store("old", "hr", "agent-1")
+    clock.now = 30
+    cache.store("fresh", "hr", "agent-2")
+
+    clock.now = 75
+    assert cache.lookup("old", "hr") is None
+    assert cache.lookup("fresh", "hr") == "agent-2"
+    assert cache.evictions["idle"] == 1
+
+
+def test_memory_pressure_evicts_oldest_sessions():
+    """Exceeding the memory limit evicts the oldest sessions but keeps the one being stored."""
+    rss = {"mb": 100.0}
+    cache = SessionAgentCache(
+        max_sessions=0, idle_ttl_seconds=0, max_memory_mb=500, memory_probe=lambda: rss["mb"]
+    )
+    for index in range(5):
+        cache.store(f"s{index}", "hr", index)
+    assert len(cache) == 5
+
+    rss["mb"] = 900.0
+    cache.store("s5", "hr", 5)
+
+    assert "s0" not in cache
+    assert "s5" in cache
+    assert cache.evictions["memory"] == 1
+
+
+def test_hit_miss_counters_and_stats():
+    """lookup counts hits and misses and stats reports them."""
+    cache = SessionAgentCache(name="test")
+    assert cache.lookup("s1", "hr") is None
+    cache.store("s1", "hr", "agent")
+    assert cache.lookup("s1", "hr") == "agent"
+
+    stats = cache.stats()
+    assert stats["name"] == "test"
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["sessions"] == 1 and stats["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_factory_uses_bounded_cache_and_clear_cache():
+    """AgentFactory reuses cached agents, reports hits and still honours clear_cache."""
+    AgentFactory.clear_cache()
+    before = AgentFactory.cache_stats()["agents"]
+
+    first = await AgentFactory.create_agent(AgentType.HR, "cache-session", "user")
+    second = await AgentFactory.create_agent(AgentType.HR, "cache-session", "user")
+
+    stats = AgentFactory.cache_stats()["agents"]
+    assert first is second
+    assert stats["hits"] == before["hits"] + 1
+    assert stats["misses"] == before["misses"] + 1
+
+    AgentFactory.clear_cache("cache-session")
+    assert "cache-session" not in AgentFactory._agent_cache
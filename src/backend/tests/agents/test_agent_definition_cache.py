@@ -0,0 +1,133 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kernel_agents.agent_definition_cache import AgentDefinitionCache  # noqa: E402
+
+AGENT_NAMES = ["Hr_Agent", "Marketing_Agent", "Product_Agent", "Planner_Agent"]
+
+
+class FakeAgentsOperations:
+    """Counts control-plane calls made against client.agents."""
+
+    def __init__(self, existing):
+        self.existing = {
+            name: SimpleNamespace(
+                id=f"asst_{name}", name=name, instructions=f"{name} instructions", model="gpt-4o",
+                response_format="auto",
+            )
+            for name in existing
+        }
+        self.list_calls = 0
+        self.create_calls = 0
+        self.update_calls = 0
+
+    async def list_agents(self):
+        self.list_calls += 1
+        await asyncio.sleep(0)
+        return SimpleNamespace(data=list(self.existing.values()))
+
+    async def create_agent(self, model, name, instructions, temperature, response_format):
+        self.create_calls += 1
+        definition = SimpleNamespace(
+            id=f"asst_new_{name}", name=name, instructions=instructions, model=model, response_format=response_format
+        )
+        self.existing[name] = definition
+        return definition
+
+    async def update_agent(self, agent_id, model, instructions, temperature, response_format):
+        self.update_calls += 1
+        [definition] = [agent for agent in self.existing.values() if agent.id == agent_id]
+        definition.instructions, definition.model, definition.response_format = instructions, model, response_format
+        return definition
+
+
+@pytest.fixture
+def client():
+    return SimpleNamespace(agents=FakeAgentsOperations(AGENT_NAMES))
+
+
+@pytest.mark.asyncio
+async def test_warm_cache_serves_sessions_without_control_plane_calls(client):
+    """After warm(), creating every agent for many sessions makes no further calls."""
+    cache = AgentDefinitionCache()
+    assert await cache.warm(client) == len(AGENT_NAMES)
+
+    for _ in range(10):
+        for name in AGENT_NAMES:
+            definition = await cache.get_or_create(client, name, f"{name} instructions", "gpt-4o")
+            assert definition.id == f"asst_{name}"
+
+    assert client.agents.list_calls == 1
+    assert client.agents.create_calls == client.agents.update_calls == 0
+    assert cache.stats()["control_plane_calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_deployed_agent_with_an_old_definition_is_updated(client):
+    """A changed prompt or model reaches the deployed agent instead of reusing it as is."""
+    cache = AgentDefinitionCache()
+
+    definition = await cache.get_or_create(client, "Planner_Agent", "new prompt", "gpt-4o-mini")
+
+    assert definition.id == "asst_Planner_Agent"
+    assert (definition.instructions, definition.model) == ("new prompt", "gpt-4o-mini")
+    assert client.agents.update_calls == 1 and client.agents.create_calls == 0
+    # The updated agent is served from the cache afterwards
+    await cache.get_or_create(client, "Planner_Agent", "new prompt", "gpt-4o-mini")
+    assert client.agents.update_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cold_misses_share_one_listing(client):
+    """Concurrent misses for different agents trigger a single list_agents call."""
+    cache = AgentDefinitionCache()
+    await asyncio.gather(
+        *(cache.get_or_create(client, name, "instructions", "gpt-4o") for name in AGENT_NAMES)
+    )
+    assert client.agents.list_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_missing_agent_is_created_once(client):
+    """An agent that does not exist remotely is created once and then served from cache."""
+    cache = AgentDefinitionCache()
+    first = await cache.get_or_create(client, "Tech_Support_Agent", "help", "gpt-4o")
+    second = await cache.get_or_create(client, "Tech_Support_Agent", "help", "gpt-4o")
+
+    assert first is second
+    assert client.agents.create_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_key_includes_instructions_model_and_response_format(client):
+    """Changing any part of the key is a separate cache entry."""
+    cache = AgentDefinitionCache()
+    await cache.get_or_create(client, "Hr_Agent", "v1", "gpt-4o")
+    await cache.get_or_create(client, "Hr_Agent", "v2", "gpt-4o")
+    await cache.get_or_create(client, "Hr_Agent", "v1", "gpt-4o-mini")
+    await cache.get_or_create(client, "Hr_Agent", "v1", "gpt-4o", response_format={"type": "json_object"})
+    await cache.get_or_create(client, "Hr_Agent", "v1", "gpt-4o")
+
+    assert cache.stats()["definitions"] == 4
+    assert cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_invalidate_force_a_new_lookup(client, clock):
+    """Expired or invalidated definitions are looked up again."""
+    cache = AgentDefinitionCache(ttl_seconds=60, clock=clock)
+    await cache.get_or_create(client, "Hr_Agent", "v1", "gpt-4o")
+
+    clock.now = 120
+    await cache.get_or_create(client, "Hr_Agent", "v1", "gpt-4o")
+    assert client.agents.list_calls == 2
+
+    cache.invalidate("Hr_Agent")
+    await cache.get_or_create(client, "Hr_Agent", "v1", "gpt-4o")
+    assert client.agents.create_calls == 1
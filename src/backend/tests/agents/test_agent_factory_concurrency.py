@@ -0,0 +1,70 @@
+import asyncio
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kernel_agents.agent_factory import AgentFactory, AgentType  # noqa: E402
+
+
+class RecordingAgent:
+    """Agent stand-in that records how many create() calls overlap."""
+
+    active = 0
+    peak = 0
+    order = []
+
+    @classmethod
+    async def create(cls, **kwargs):
+        RecordingAgent.active += 1
+        RecordingAgent.peak = max(RecordingAgent.peak, RecordingAgent.active)
+        await asyncio.sleep(0.01)
+        RecordingAgent.active -= 1
+        RecordingAgent.order.append(kwargs["agent_name"])
+        agent = cls()
+        for key, value in kwargs.items():
+            setattr(agent, key, value)
+        return agent
+
+    @classmethod
+    def reset(cls):
+        cls.active = 0
+        cls.peak = 0
+        cls.order = []
+
+
+@pytest.fixture
+def recording_factory():
+    RecordingAgent.reset()
+    AgentFactory.clear_cache()
+    agent_classes = {agent_type: RecordingAgent for agent_type in AgentFactory._get_agent_classes()}
+    with patch.object(AgentFactory, "_get_agent_classes", return_value=agent_classes):
+        yield
+    AgentFactory.clear_cache()
+
+
+@pytest.mark.asyncio
+async def test_phase_one_runs_concurrently_and_planner_waits(recording_factory):
+    """Specialists are built together; planner and group chat manager follow in order."""
+    agents = await AgentFactory.create_all_agents("concurrent-session", "user", client=object())
+
+    assert len(agents) == 9
+    assert RecordingAgent.peak == 7
+    assert RecordingAgent.order[-2:] == [
+        AgentType.PLANNER.value,
+        AgentType.GROUP_CHAT_MANAGER.value,
+    ]
+    planner = agents[AgentType.PLANNER]
+    assert len(planner.agent_instances) == 8
+
+
+@pytest.mark.asyncio
+async def test_phase_one_respects_concurrency_limit(recording_factory):
+    """No more than AGENT_CREATION_CONCURRENCY specialists are built at once."""
+    with patch.object(AgentFactory, "_get_creation_concurrency", return_value=2):
+        await AgentFactory.create_all_agents("bounded-session", "user", client=object())
+
+    assert RecordingAgent.peak == 2
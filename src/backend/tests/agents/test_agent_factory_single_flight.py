@@ -0,0 +1,101 @@
+import asyncio
+import os
+import sys
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kernel_agents.agent_factory import AgentFactory, AgentType  # noqa: E402
+
+
+class CountingAgent:
+    """Agent stand-in that counts builds per (session, agent name)."""
+
+    builds = Counter()
+    fail = False
+
+    @classmethod
+    async def create(cls, **kwargs):
+        CountingAgent.builds[(kwargs["session_id"], kwargs["agent_name"])] += 1
+        await asyncio.sleep(0.01)
+        if CountingAgent.fail:
+            raise RuntimeError("agent definition unavailable")
+        agent = cls()
+        for key, value in kwargs.items():
+            setattr(agent, key, value)
+        return agent
+
+
+@pytest.fixture
+def counting_factory():
+    CountingAgent.builds = Counter()
+    CountingAgent.fail = False
+    AgentFactory.clear_cache()
+    agent_classes = {agent_type: CountingAgent for agent_type in AgentFactory._get_agent_classes()}
+    with patch.object(AgentFactory, "_get_agent_classes", return_value=agent_classes):
+        yield
+    AgentFactory.clear_cache()
+
+
+@pytest.mark.asyncio
+async def test_racing_requests_build_each_agent_once(counting_factory):
+    """Concurrent create_all_agents calls for the same sessions share one build per key."""
+    sessions = [f"race-{index}" for index in range(5)]
+    results = await asyncio.gather(
+        *(
+            AgentFactory.create_all_agents(session_id, "user", client=object())
+            for session_id in sessions
+            for _ in range(10)
+        )
+    )
+
+    assert len(CountingAgent.builds) == 5 * 9
+    assert set(CountingAgent.builds.values()) == {1}
+    for session_index, session_id in enumerate(sessions):
+        session_results = results[session_index * 10:(session_index + 1) * 10]
+        planners = {id(agents[AgentType.PLANNER]) for agents in session_results}
+        assert len(planners) == 1
+    assert AgentFactory.cache_stats()["inflight_builds"] == 0
+
+
+@pytest.mark.asyncio
+async def test_waiters_share_the_builder_result(counting_factory):
+    """Callers that join an in-flight build receive the same agent instance."""
+    agents = await asyncio.gather(
+        *(AgentFactory.create_agent(AgentType.HR, "shared", "user") for _ in range(20))
+    )
+
+    assert CountingAgent.builds[("shared", AgentType.HR.value)] == 1
+    assert len({id(agent) for agent in agents}) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_build_shares_one_fallback(counting_factory):
+    """A failed build is attempted once and every waiter gets the same fallback agent."""
+    CountingAgent.fail = True
+    agents = await asyncio.gather(
+        *(AgentFactory.create_agent(AgentType.HR, "flaky", "user") for _ in range(3))
+    )
+    assert len({id(agent) for agent in agents}) == 1
+    assert CountingAgent.builds[("flaky", AgentType.HR.value)] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_builder_hands_the_build_to_a_waiter(counting_factory):
+    """Cancelling the caller that started a build does not cancel the callers waiting on it."""
+    leader = asyncio.create_task(AgentFactory.create_agent(AgentType.HR, "cancelled", "user"))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(AgentFactory.create_agent(AgentType.HR, "cancelled", "user")) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    agents = await asyncio.gather(*waiters)
+
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert len({id(agent) for agent in agents}) == 1
+    assert CountingAgent.builds[("cancelled", AgentType.HR.value)] == 2
+    assert AgentFactory.cache_stats()["inflight_builds"] == 0
@@ -0,0 +1,95 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from semantic_kernel.contents import AuthorRole, ChatMessageContent  # noqa: E402
+
+from context.local_memory_kernel import LocalMemoryContext  # noqa: E402
+from context.local_store import InMemoryLocalStore  # noqa: E402
+from kernel_agents.agent_base import PERFORM_ACTION_PROMPT, BaseAgent  # noqa: E402
+from kernel_agents.chat_history_window import SUMMARY_PREFIX, ChatHistoryWindow  # noqa: E402
+from models.messages_kernel import ActionRequest, AgentType, Step, StepStatus  # noqa: E402
+from utils.token_budget import count_tokens  # noqa: E402
+
+
+def turn(index, words=100):
+    return [
+        ChatMessageContent(role=AuthorRole.ASSISTANT, content=f"action {index} " + "word " * words),
+        ChatMessageContent(role=AuthorRole.USER, content=f"feedback {index}. Now make the function call"),
+    ]
+
+
+def test_oldest_turns_are_dropped_over_the_budget():
+    window = ChatHistoryWindow(max_tokens=400)
+    for index in range(10):
+        window.add_turn(turn(index))
+
+    messages = window.messages()
+    assert window.tokens <= 400
+    assert messages[-2].content.startswith("action 9 ")
+    assert not any(m.content.startswith("action 0 ") for m in messages)
+    assert window.tokens == sum(count_tokens(m.content) for m in messages)
+
+
+def test_latest_turn_is_kept_even_over_the_budget():
+    window = ChatHistoryWindow(max_tokens=50)
+    window.add_turn(turn(0))
+    window.add_turn(turn(1, words=500))
+
+    assert [m.content.split(" ")[1] for m in window.messages()] == ["1", "1."]
+
+
+def test_dropped_turns_are_summarized_within_their_budget():
+    window = ChatHistoryWindow(max_tokens=600, summary_max_tokens=150)
+    for index in range(10):
+        window.add_turn(turn(index))
+
+    summary = window.messages()[0]
+    assert summary.role == AuthorRole.USER and summary.content.startswith(SUMMARY_PREFIX)
+    assert window._summary_tokens <= 150
+    # The most recently dropped turn is in the summary, the oldest ones have rolled off
+    kept = len(window.messages()) - 1
+    assert f"action {9 - kept // 2}" in summary.content
+    assert "action 0 " not in summary.content
+    assert window.tokens <= 600
+
+
+@pytest.mark.asyncio
+async def test_action_requests_send_the_window_as_messages():
+    memory = LocalMemoryContext("session-1", "user-1", store=InMemoryLocalStore())
+    steps = [
+        Step(plan_id="plan", session_id="session-1", user_id="user-1", action=f"a{i}", agent=AgentType.HR,
+             human_feedback="ok")
+        for i in range(3)
+    ]
+    for step in steps:
+        await memory.add_step(step)
+    calls = []
+
+    async def invoke(messages, thread):
+        calls.append(messages)
+        yield "done"
+
+    agent = SimpleNamespace(
+        _memory_store=memory,
+        _chat_history=ChatHistoryWindow(max_tokens=40),
+        _system_message="You are the HR agent.",
+        _agent_name=AgentType.HR.value,
+        _user_id="user-1",
+        invoke=invoke,
+    )
+    for step in steps:
+        request = ActionRequest(step_id=step.id, plan_id="plan", session_id="session-1",
+                                action=f"{step.action} " + "word " * 20, agent=AgentType.HR)
+        await BaseAgent.handle_action_request(agent, request)
+
+    assert all(isinstance(m, ChatMessageContent) for m in calls[-1])
+    assert calls[-1][-1].content == PERFORM_ACTION_PROMPT
+    # Only the latest action fits the budget
+    assert [m.role for m in calls[-1]] == [AuthorRole.ASSISTANT, AuthorRole.USER, AuthorRole.USER]
+    assert calls[-1][0].content.startswith("a2 ")
+    assert (await memory.get_step(steps[2].id)).status == StepStatus.completed
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from benchmarks.cosmos_standin import StandInContainer  # noqa: E402
+from context import cosmos_memory_kernel  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from context.document_cache import DocumentCache  # noqa: E402
+from context.local_memory_kernel import LocalMemoryContext  # noqa: E402
+from context.local_store import InMemoryLocalStore  # noqa: E402
+from context.partition_cache import partition_key_cache  # noqa: E402
+from kernel_agents.conversation_history import HISTORY_FOOTER, ConversationHistoryBuilder  # noqa: E402
+from models.messages_kernel import AgentType, Plan, PlanWithSteps, Step, StepHistoryEntry  # noqa: E402
+from utils.token_budget import count_tokens  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    monkeypatch.setattr(cosmos_memory_kernel, "document_cache", DocumentCache(max_entries=100))
+    partition_key_cache.clear()
+    yield
+    partition_key_cache.clear()
+
+
+def entry(index, reply="done"):
+    return StepHistoryEntry(step_id=f"step-{index}", agent=AgentType.HR, action=f"action {index}", reply=reply)
+
+
+def make_plan(entries=0, reply="done"):
+    plan = Plan(session_id="session-1", user_id="user-1", initial_goal="goal", summary="Onboard Jessica")
+    plan.step_history = [entry(i, reply) for i in range(entries)]
+    return plan
+
+
+def test_history_lists_completed_steps_in_order():
+    history = ConversationHistoryBuilder(max_tokens=0).render(make_plan(2))
+
+    assert "The user's task was:\nOnboard Jessica" in history
+    assert history.endswith(
+        "Step 0\nGroup_Chat_Manager: action 0\nHr_Agent: done\n"
+        "Step 1\nGroup_Chat_Manager: action 1\nHr_Agent: done\n" + HISTORY_FOOTER
+    )
+
+
+def test_history_is_limited_to_the_given_steps():
+    history = ConversationHistoryBuilder().render(make_plan(3), step_ids={"step-2"})
+
+    assert "Step 2\n" in history
+    assert "action 0" not in history and "action 1" not in history
+
+
+def test_long_history_keeps_the_latest_steps_within_the_budget():
+    plan = make_plan(30, reply="reply " * 200)
+    builder = ConversationHistoryBuilder(max_tokens=1500)
+
+    history = builder.render(plan)
+
+    assert count_tokens(history) <= 1500
+    assert "Step 29\nGroup_Chat_Manager: action 29" in history
+    assert "Step 0\n" not in history
+    # The steps left out are still named
+    assert "earlier steps are left out" in history and "Step 0: action 0" in history
+
+
+def test_oversized_latest_step_is_cut_to_fit():
+    plan = make_plan(1, reply="reply " * 5000)
+
+    history = ConversationHistoryBuilder(max_tokens=1000).render(plan)
+
+    assert count_tokens(history) <= 1000
+    assert "Step 0\nGroup_Chat_Manager: action 0" in history
+
+
+@pytest.mark.asyncio
+async def test_concurrent_appends_keep_every_entry():
+    memory = CosmosMemoryContext("session-1", "user-1", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory")
+    plan = make_plan()
+    await memory.add_plan(plan)
+
+    await asyncio.gather(*(memory.append_step_history(plan.id, "session-1", entry(i)) for i in range(5)))
+
+    stored = await memory.get_plan(plan.id, "session-1")
+    assert sorted(e.step_id for e in stored.step_history) == [f"step-{i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_append_to_a_plan_written_without_history():
+    memory = CosmosMemoryContext("session-1", "user-1", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory")
+    plan = make_plan()
+    document = memory._serialize_item(plan)
+    del document["step_history"]
+    await memory._container.create_item(body=document)
+
+    await memory.append_step_history(plan.id, "session-1", entry(0))
+
+    assert [e.step_id for e in (await memory.get_plan(plan.id, "session-1")).step_history] == ["step-0"]
+
+
+@pytest.mark.asyncio
+async def test_local_append():
+    memory = LocalMemoryContext("session-1", "user-1", store=InMemoryLocalStore())
+    plan = make_plan()
+    await memory.add_plan(plan)
+    step = Step(plan_id=plan.id, session_id="session-1", user_id="user-1", action="a", agent=AgentType.HR,
+                agent_reply="r")
+
+    await memory.append_step_history(plan.id, "session-1", ConversationHistoryBuilder.entry(step))
+
+    stored = await memory.get_plan(plan.id)
+    assert [(e.step_id, e.reply) for e in stored.step_history] == [(step.id, "r")]
+
+
+def test_steps_are_numbered_by_plan_position():
+    """Steps that completed out of order are listed and numbered as they are in the plan."""
+    plan = make_plan()
+    plan.step_history = [
+        StepHistoryEntry(step_id="step-2", agent=AgentType.HR, action="action 2", reply="done", position=2),
+        StepHistoryEntry(step_id="step-0", agent=AgentType.HR, action="action 0", reply="done", position=0),
+    ]
+
+    history = ConversationHistoryBuilder(max_tokens=0).render(plan)
+
+    assert history.endswith(
+        "Step 0\nGroup_Chat_Manager: action 0\nHr_Agent: done\n"
+        "Step 2\nGroup_Chat_Manager: action 2\nHr_Agent: done\n" + HISTORY_FOOTER
+    )
+
+
+@pytest.mark.asyncio
+async def test_plan_listings_leave_out_the_history():
+    memory = CosmosMemoryContext("session-1", "user-1", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory")
+    plan = make_plan(3)
+    await memory.add_plan(plan)
+
+    (listed,), _ = await memory.get_plans_page(5)
+    assert listed.id == plan.id and listed.step_history == []
+    assert "step_history" not in PlanWithSteps(**listed.model_dump()).model_dump()
+    # The listing does not replace the full plan in the document cache
+    assert len((await memory.get_plan(plan.id, "session-1")).step_history) == 3
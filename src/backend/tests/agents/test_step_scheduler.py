@@ -0,0 +1,130 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kernel_agents.step_scheduler import StepScheduler, resolve_ancestors, resolve_dependencies  # noqa: E402
+from models.messages_kernel import AgentType, Step  # noqa: E402
+
+AGENTS = [AgentType.HR, AgentType.MARKETING, AgentType.PRODUCT, AgentType.PROCUREMENT,
+          AgentType.TECH_SUPPORT, AgentType.GENERIC]
+
+
+def make_plan(depends_on, agents=None):
+    """Steps whose depends_on are given as positions, like the planner emits them."""
+    steps = []
+    for index, positions in enumerate(depends_on):
+        agent = (agents or AGENTS)[index]
+        step = Step(plan_id="plan", session_id="session", user_id="user", action=f"action {index}", agent=agent)
+        if positions is not None:
+            step.depends_on = [steps[position].id for position in positions]
+        steps.append(step)
+    return steps
+
+
+class RecordingExecutor:
+    """Stand-in for an agent call that records overlaps and the history it was given."""
+
+    def __init__(self, seconds=0.05, fail=()):
+        self.seconds = seconds
+        self.fail = set(fail)
+        self.active = 0
+        self.peak = 0
+        self.order = []
+        self.history = {}
+
+    async def __call__(self, step, history_step_ids):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.seconds)
+            if step.action in self.fail:
+                raise RuntimeError(f"{step.action} failed")
+            self.order.append(step.action)
+            self.history[step.action] = history_step_ids
+        finally:
+            self.active -= 1
+
+
+def test_dependencies_default_to_every_earlier_step():
+    steps = make_plan([None, [], [0], None])
+    steps[2].depends_on.append(steps[3].id)
+    dependencies = resolve_dependencies(steps)
+
+    assert dependencies[steps[0].id] == []
+    assert dependencies[steps[1].id] == []
+    # Later steps cannot be depended on
+    assert dependencies[steps[2].id] == [steps[0].id]
+    assert dependencies[steps[3].id] == [steps[0].id, steps[1].id, steps[2].id]
+
+
+def test_ancestors_follow_dependencies_transitively():
+    steps = make_plan([[], [0], [1], []])
+    ancestors = resolve_ancestors(steps, resolve_dependencies(steps))
+
+    assert ancestors[steps[2].id] == {steps[0].id, steps[1].id}
+    assert ancestors[steps[3].id] == set()
+
+
+@pytest.mark.asyncio
+async def test_six_step_plan_takes_the_critical_path():
+    # Two chains of three steps: 0 -> 2 -> 4 and 1 -> 3 -> 5
+    steps = make_plan([[], [], [0], [1], [2], [3]])
+    executor = RecordingExecutor(seconds=0.05)
+
+    start = time.perf_counter()
+    await StepScheduler(enabled=True, max_concurrency=3).run(steps, executor)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.25  # 3 steps deep, not 6
+    assert executor.peak == 2
+    assert executor.order.index("action 0") < executor.order.index("action 2") < executor.order.index("action 4")
+    assert executor.history["action 4"] == {steps[0].id, steps[2].id}
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_limited_per_session():
+    steps = make_plan([[]] * 6)
+    executor = RecordingExecutor(seconds=0.02)
+
+    await StepScheduler(enabled=True, max_concurrency=2).run(steps, executor)
+
+    assert executor.peak == 2
+    assert len(executor.order) == 6
+
+
+@pytest.mark.asyncio
+async def test_steps_of_one_agent_do_not_overlap():
+    steps = make_plan([[]] * 3, agents=[AgentType.HR] * 3)
+    executor = RecordingExecutor(seconds=0.01)
+
+    await StepScheduler(enabled=True, max_concurrency=3).run(steps, executor)
+
+    assert executor.peak == 1
+
+
+@pytest.mark.asyncio
+async def test_steps_after_a_failure_are_skipped():
+    steps = make_plan([[], [0], []])
+    executor = RecordingExecutor(seconds=0.01, fail={"action 0"})
+
+    with pytest.raises(RuntimeError, match="action 0 failed"):
+        await StepScheduler(enabled=True).run(steps, executor)
+
+    assert executor.order == ["action 2"]
+
+
+@pytest.mark.asyncio
+async def test_disabled_scheduler_runs_steps_in_order_with_full_history():
+    steps = make_plan([[], [], []])
+    executor = RecordingExecutor(seconds=0.01)
+
+    await StepScheduler(enabled=False).run(steps, executor)
+
+    assert executor.peak == 1
+    assert executor.order == ["action 0", "action 1", "action 2"]
+    assert executor.history["action 2"] == {steps[0].id, steps[1].id}
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tests.helpers import FakeClock  # noqa: E402
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,251 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from benchmarks.cosmos_standin import StandInContainer  # noqa: E402
+from context.ann_index import AnnIndexRegistry, IVFIndex, ann_index_registry  # noqa: E402
+from context import cosmos_memory_kernel  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from semantic_kernel.memory.memory_record import MemoryRecord  # noqa: E402
+
+
+def clustered(count, dim=16, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return centers[rng.integers(clusters, size=count)] + 0.1 * rng.normal(size=(count, dim))
+
+
+def exact_top(vectors, query, k):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return set(np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:k].tolist())
+
+
+def test_nprobe_trades_recall_for_scanned_lists():
+    """Probing every list is exact; a few lists still find most true neighbours."""
+    vectors = clustered(4000)
+    index = IVFIndex(nprobe=4)
+    index.add([str(i) for i in range(len(vectors))], vectors)
+    index.mark_ready()
+    queries = clustered(20, seed=1)
+
+    recall = {}
+    for nprobe in (4, None):
+        found = 0
+        for query in queries:
+            hits = index.search(query, 10, nprobe=nprobe or index.nlist + 1)
+            found += len({int(key) for key, _ in hits} & exact_top(vectors, query, 10))
+        recall[nprobe] = found / (10 * len(queries))
+
+    assert index.nlist == int(np.sqrt(4000))
+    assert recall[None] == 1.0
+    assert recall[4] >= 0.8
+
+
+def test_incremental_updates_and_lazy_rebuild():
+    """Removed keys are never returned and enough tombstones trigger a rebuild."""
+    vectors = clustered(2000)
+    index = IVFIndex()
+    index.add([str(i) for i in range(2000)], vectors)
+    index.search(vectors[0], 1)
+    assert index.nlist > 0
+
+    index.remove([str(i) for i in range(0, 2000, 2)])
+    index.add(["new"], vectors[1:2] * 3)
+    hits = index.search(vectors[1], 2, nprobe=index.nlist)
+
+    assert {key for key, _ in hits} == {"1", "new"}
+    # The search compacted the tombstones away
+    assert index._size == len(index) == 1001
+
+
+def test_saved_index_is_memory_mapped(tmp_path):
+    """A loaded index serves searches from the mapped file and copies it on the first write."""
+    vectors = clustered(1500)
+    index = IVFIndex(path=str(tmp_path / "index"))
+    index.add([str(i) for i in range(1500)], vectors)
+    index.mark_ready()
+    expected = index.search(vectors[7], 5)
+    index.save()
+
+    loaded = IVFIndex.load(str(tmp_path / "index"))
+    assert isinstance(loaded._vectors, np.memmap)
+    # Not trusted until it has been checked against the collection
+    assert not loaded.ready and loaded.saved_at > 0
+    assert loaded.search(vectors[7], 5) == expected
+
+    loaded.add(["extra"], vectors[7:8])
+    assert not isinstance(loaded._vectors, np.memmap)
+    assert "extra" in {key for key, _ in loaded.search(vectors[7], 5)}
+
+
+@pytest.mark.asyncio
+async def test_context_builds_and_maintains_the_index(monkeypatch):
+    """get_nearest_matches builds the index once; record writes keep it current."""
+    monkeypatch.setattr(ann_index_registry, "enabled", True)
+    memory = CosmosMemoryContext("ann-session", "user-1", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory")
+    vectors = clustered(300, dim=4)
+    records = [
+        MemoryRecord.local_record(
+            id=f"record-{i}", text=f"memory {i}", description=None, additional_metadata=None, embedding=v
+        )
+        for i, v in enumerate(vectors)
+    ]
+    await memory.upsert_batch("docs", records)
+
+    # The first query scans while the index is built in the background
+    matches = await memory.get_nearest_matches("docs", vectors[42], limit=1)
+    assert matches[0][0].id == "record-42"
+    await cosmos_memory_kernel._ann_backfills[("ann-session", "docs")]
+    assert len(ann_index_registry.get("ann-session", "docs")) == 300
+
+    await memory.upsert_memory_record(
+        "docs",
+        MemoryRecord.local_record(
+            id="fresh", text="fresh", description=None, additional_metadata=None, embedding=-vectors[0]
+        ),
+    )
+    await memory.remove_memory_record("docs", "record-42")
+    queries_before = memory._container.queries_executed
+
+    assert (await memory.get_nearest_match("docs", -vectors[0]))[0].id == "fresh"
+    assert (await memory.get_nearest_match("docs", vectors[42]))[0].id != "record-42"
+    # Ranked by the index; only the winning records are read
+    assert memory._container.queries_executed - queries_before == 2
+
+    await memory.delete_collection("docs")
+    assert ann_index_registry.get("ann-session", "docs") is None
+
+
+@pytest.mark.asyncio
+async def test_failed_backfill_is_discarded_and_queries_keep_scanning(monkeypatch):
+    monkeypatch.setattr(ann_index_registry, "enabled", True)
+
+    def broken_rebuild(self):
+        raise RuntimeError("training failed")
+
+    monkeypatch.setattr(IVFIndex, "rebuild", broken_rebuild)
+    memory = CosmosMemoryContext("broken-session", "user-1", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory")
+    vectors = clustered(50, dim=4)
+    await memory.upsert_batch(
+        "docs",
+        [
+            MemoryRecord.local_record(
+                id=f"record-{i}", text=f"memory {i}", description=None, additional_metadata=None, embedding=v
+            )
+            for i, v in enumerate(vectors)
+        ],
+    )
+
+    matches = await memory.get_nearest_matches("docs", vectors[7], limit=1)
+    await cosmos_memory_kernel._ann_backfills[("broken-session", "docs")]
+
+    assert matches[0][0].id == "record-7"
+    assert ann_index_registry.get("broken-session", "docs") is None
+    # The next query scans again and starts a new backfill
+    assert (await memory.get_nearest_matches("docs", vectors[7], limit=1))[0][0].id == "record-7"
+    await cosmos_memory_kernel._ann_backfills[("broken-session", "docs")]
+
+
+def test_registry_evicts_least_recently_used_and_idle_indexes(tmp_path, clock):
+    """Evicted indexes are saved, so the next use loads them instead of rebuilding."""
+    registry = AnnIndexRegistry(
+        enabled=True, directory=str(tmp_path), max_indexes=2, idle_ttl_seconds=60, clock=clock
+    )
+    for collection in ("a", "b"):
+        index = registry.create("session", collection)
+        index.add([f"{collection}-1"], [[1.0, 0.0]])
+        index.mark_ready()
+
+    registry.get("session", "a")
+    registry.create("session", "c")
+    # "b" was the least recently used
+    assert list(registry._indexes) == [("session", "a"), ("session", "c")]
+    assert registry.evictions == {"capacity": 1, "idle": 0}
+
+    clock.now = 61
+    reloaded = registry.get("session", "b")
+    assert list(registry._indexes) == [("session", "b")]
+    assert registry.evictions == {"capacity": 1, "idle": 2}
+    assert "b-1" in reloaded and not reloaded.ready
+
+
+def memory_records(vectors, prefix="record"):
+    return [
+        MemoryRecord.local_record(
+            id=f"{prefix}-{i}", text=f"memory {i}", description=None, additional_metadata=None, embedding=v
+        )
+        for i, v in enumerate(vectors)
+    ]
+
+
+async def saved_index_context(monkeypatch, tmp_path, session_id):
+    """A context whose collection index was built and saved by a registry that has since restarted."""
+    monkeypatch.setattr(
+        cosmos_memory_kernel, "ann_index_registry", AnnIndexRegistry(enabled=True, directory=str(tmp_path))
+    )
+    memory = CosmosMemoryContext(session_id, "user-1", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory")
+    vectors = clustered(60, dim=4)
+    await memory.upsert_batch("docs", memory_records(vectors))
+    await memory.get_nearest_matches("docs", vectors[0], limit=1)
+    await cosmos_memory_kernel._ann_backfills[(session_id, "docs")]
+    return memory, vectors
+
+
+@pytest.mark.asyncio
+async def test_saved_index_is_rebuilt_when_the_collection_changed(monkeypatch, tmp_path):
+    memory, vectors = await saved_index_context(monkeypatch, tmp_path, "stale-session")
+    # Another worker writes a record the saved index has never seen
+    monkeypatch.setattr(cosmos_memory_kernel, "ann_index_registry", AnnIndexRegistry(enabled=False))
+    await memory.upsert_memory_record("docs", memory_records([-vectors[0]], prefix="other")[0])
+
+    restarted = AnnIndexRegistry(enabled=True, directory=str(tmp_path))
+    monkeypatch.setattr(cosmos_memory_kernel, "ann_index_registry", restarted)
+    # The loaded index is not trusted, so this query scans
+    assert (await memory.get_nearest_match("docs", -vectors[0]))[0].id == "other-0"
+    await cosmos_memory_kernel._ann_backfills[("stale-session", "docs")]
+
+    index = restarted.get("stale-session", "docs")
+    assert index.ready and len(index) == 61
+    assert not isinstance(index._vectors, np.memmap)
+
+
+@pytest.mark.asyncio
+async def test_saved_index_is_reused_when_the_collection_is_unchanged(monkeypatch, tmp_path):
+    memory, vectors = await saved_index_context(monkeypatch, tmp_path, "current-session")
+    # Move the watermark past the records' _ts, which only has whole seconds
+    (meta_path,) = tmp_path.glob("*/meta.json")
+    meta = json.loads(meta_path.read_text())
+    meta["saved_at"] += 2
+    meta_path.write_text(json.dumps(meta))
+
+    restarted = AnnIndexRegistry(enabled=True, directory=str(tmp_path))
+    monkeypatch.setattr(cosmos_memory_kernel, "ann_index_registry", restarted)
+    await memory.get_nearest_matches("docs", vectors[0], limit=1)
+    await cosmos_memory_kernel._ann_backfills[("current-session", "docs")]
+
+    index = restarted.get("current-session", "docs")
+    assert index.ready and len(index) == 60
+    # Checked with two counts instead of a rescan
+    assert isinstance(index._vectors, np.memmap)
+
+
+@pytest.mark.asyncio
+async def test_backfills_are_bounded(monkeypatch):
+    monkeypatch.setattr(ann_index_registry, "enabled", True)
+    monkeypatch.setattr(cosmos_memory_kernel, "MAX_ANN_BACKFILLS", 0)
+    memory = CosmosMemoryContext("bounded-session", "user-1", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory")
+    vectors = clustered(20, dim=4)
+    await memory.upsert_batch("docs", memory_records(vectors))
+
+    assert (await memory.get_nearest_matches("docs", vectors[3], limit=1))[0][0].id == "record-3"
+    assert ("bounded-session", "docs") not in cosmos_memory_kernel._ann_backfills
+    assert ann_index_registry.get("bounded-session", "docs") is None
@@ -0,0 +1,112 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from benchmarks.cosmos_standin import StandInContainer  # noqa: E402
+from context.cosmos_bulk import BulkOperation, CosmosBulkExecutor  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from semantic_kernel.memory.memory_record import MemoryRecord  # noqa: E402
+
+
+def make_record(index):
+    return MemoryRecord.local_record(
+        id=f"record-{index}",
+        text=f"memory {index}",
+        description=None,
+        additional_metadata=None,
+        embedding=np.array([float(index), 1.0]),
+    )
+
+
+def make_document(item_id, session_id="session-1"):
+    return {"id": item_id, "session_id": session_id, "data_type": "test"}
+
+
+@pytest.fixture
+def memory():
+    context = CosmosMemoryContext("session-1", "user-1", cosmos_endpoint="https://standin")
+    context._container = StandInContainer("memory")
+    return context
+
+
+@pytest.mark.asyncio
+async def test_non_transactional_batch_reports_each_item(memory):
+    """A conflicting item fails on its own while the rest of its batch is written."""
+    await memory._container.create_item(body=make_document("item-2"))
+    operations = [BulkOperation.create(make_document(f"item-{index}")) for index in range(5)]
+
+    result = await memory.bulk_write(operations)
+
+    assert [item.status_code for item in result.items] == [201, 201, 409, 201, 201]
+    assert [item.id for item in result.failed] == ["item-2"]
+    assert len(memory._container) == 5
+    # One rolled-back batch plus the resubmitted remainder
+    assert result.round_trips == 2
+
+
+@pytest.mark.asyncio
+async def test_partitions_fan_out_with_bounded_concurrency():
+    """Each partition gets its own batch and concurrency stays within the limit."""
+    container = StandInContainer("memory")
+    in_flight = {"now": 0, "peak": 0}
+    execute = container.execute_item_batch
+
+    async def tracking_execute(*args, **kwargs):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        try:
+            return await execute(*args, **kwargs)
+        finally:
+            in_flight["now"] -= 1
+
+    container.execute_item_batch = tracking_execute
+    operations = [
+        BulkOperation.upsert(make_document(f"item-{index}", f"session-{index % 8}"))
+        for index in range(80)
+    ]
+
+    result = await CosmosBulkExecutor(container, max_concurrency=3).execute(operations)
+
+    assert result.ok
+    assert result.round_trips == 8
+    assert in_flight["peak"] <= 3
+    assert len(container) == 80
+
+
+@pytest.mark.asyncio
+async def test_memory_record_batch_round_trip(memory):
+    """upsert_batch, get_batch and remove_batch each use a handful of requests."""
+    records = [make_record(index) for index in range(250)]
+
+    ids = await memory.upsert_batch("docs", records)
+    assert len(ids) == 250
+    assert memory._container.round_trips == 3
+
+    keys = ["record-7", "record-3", "missing", "record-200"]
+    fetched = await memory.get_batch("docs", keys, with_embeddings=True)
+    assert [record.id for record in fetched] == ["record-7", "record-3", "record-200"]
+    assert fetched[0].embedding.tolist() == [7.0, 1.0]
+    assert memory._container.queries_executed == 1
+
+    await memory.remove_batch("docs", [f"record-{index}" for index in range(200)])
+    assert len(memory._container) == 50
+
+
+@pytest.mark.asyncio
+async def test_delete_items_by_query_reports_results(memory):
+    """delete_items_by_query returns the per-item outcome of the batched deletes."""
+    for index in range(120):
+        await memory._container.create_item(body=make_document(f"item-{index}"))
+
+    result = await memory.delete_items_by_query(
+        "SELECT c.id, c.session_id FROM c WHERE c.data_type=@data_type",
+        [{"name": "@data_type", "value": "test"}],
+    )
+
+    assert result.ok and len(result.items) == 120
+    assert result.round_trips == 2
+    assert len(memory._container) == 0
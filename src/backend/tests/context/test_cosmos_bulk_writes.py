@@ -0,0 +1,65 @@
+import os
+import sys
+
+import pytest
+from azure.cosmos.exceptions import CosmosBatchOperationError
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from benchmarks.cosmos_standin import StandInContainer  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from context.local_memory_kernel import LocalMemoryContext  # noqa: E402
+from tests.helpers import make_plan, make_steps  # noqa: E402
+
+
+@pytest.fixture
+def memory():
+    context = CosmosMemoryContext("session-1", "user-1", cosmos_endpoint="https://standin")
+    context._container = StandInContainer("memory")
+    return context
+
+
+@pytest.mark.asyncio
+async def test_plan_and_steps_are_written_in_one_round_trip(memory):
+    """A plan with ten steps is one transactional batch instead of eleven writes."""
+    plan = make_plan()
+    await memory.add_plan_with_steps(plan, make_steps(plan, 10))
+
+    assert memory._container.round_trips == 1
+    assert len(memory._container) == 11
+    assert len(await memory.get_steps_by_plan(plan.id)) == 10
+
+
+@pytest.mark.asyncio
+async def test_large_partitions_are_split_into_batches(memory):
+    """Batches are capped at 100 operations and partitions are written separately."""
+    plan = make_plan()
+    other = make_plan("session-2")
+    await memory.add_items([plan, *make_steps(plan, 150), other, *make_steps(other, 5)])
+
+    assert memory._container.round_trips == 3
+    assert len(memory._container) == 157
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_writes_nothing(memory):
+    """A conflict inside the batch rolls back the whole partition write."""
+    plan = make_plan()
+    steps = make_steps(plan, 3)
+    await memory.add_item(steps[1])
+
+    with pytest.raises(CosmosBatchOperationError):
+        await memory.add_plan_with_steps(plan, steps)
+
+    assert len(memory._container) == 1
+
+
+@pytest.mark.asyncio
+async def test_local_memory_supports_add_items():
+    """LocalMemoryContext accepts the same bulk call."""
+    memory = LocalMemoryContext("session-1", "user-1")
+    plan = make_plan()
+    await memory.add_plan_with_steps(plan, make_steps(plan, 4))
+
+    assert await memory.get_plan(plan.id) is plan
+    assert len(memory._local_storage["steps"]) == 4
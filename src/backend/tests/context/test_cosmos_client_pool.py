@@ -0,0 +1,110 @@
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from app_config import config  # noqa: E402
+from benchmarks.cosmos_standin import StandInCosmosClient  # noqa: E402
+from context import cosmos_memory_kernel  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+
+ENDPOINT = "https://pool-test.documents.azure.com"
+
+
+@pytest.fixture
+def pooled_config():
+    """Point AppConfig at the in-memory stand-in and reset the pool around each test."""
+    StandInCosmosClient.reset()
+    with patch.object(config, "COSMOSDB_ENDPOINT", ENDPOINT), patch.object(
+        config, "COSMOSDB_DATABASE", "db"
+    ), patch.object(config, "COSMOSDB_CONTAINER", "memory"), patch(
+        "app_config.CosmosClient", StandInCosmosClient
+    ), patch("app_config.AsyncDefaultAzureCredential"), patch.object(
+        cosmos_memory_kernel, "CosmosClient", StandInCosmosClient
+    ), patch.object(cosmos_memory_kernel, "DefaultAzureCredential"):
+        config._cosmos_client = None
+        config._cosmos_database = None
+        config._cosmos_containers = {}
+        config._cosmos_lock = None
+        config._azure_async_credentials = None
+        yield config
+
+
+@pytest.mark.asyncio
+async def test_contexts_share_one_client_and_container(pooled_config):
+    """Every context for the configured account reuses the same container handle."""
+    first = CosmosMemoryContext("session-1", "user-1")
+    second = CosmosMemoryContext("session-2", "user-1")
+
+    await first.initialize()
+    await second.initialize()
+
+    assert first._container is second._container
+    assert StandInCosmosClient.instances_created == 1
+    database = pooled_config._cosmos_database
+    assert database.control_plane_calls == 1
+
+    await pooled_config.close_cosmos_client()
+
+
+@pytest.mark.asyncio
+async def test_close_releases_pool(pooled_config):
+    """Closing the pool closes the client so the next context reconnects."""
+    context = CosmosMemoryContext("session-1", "user-1")
+    await context.initialize()
+    client = pooled_config._cosmos_client
+
+    await pooled_config.close_cosmos_client()
+
+    assert client.closed
+    assert pooled_config._cosmos_containers == {}
+
+    await CosmosMemoryContext("session-2", "user-1").initialize()
+    assert StandInCosmosClient.instances_created == 2
+    await pooled_config.close_cosmos_client()
+
+
+@pytest.mark.asyncio
+async def test_other_accounts_bypass_pool(pooled_config):
+    """A context pointed at a different endpoint keeps its own client."""
+    context = CosmosMemoryContext(
+        "session-1", "user-1", cosmos_endpoint="https://other.documents.azure.com"
+    )
+    await context.initialize()
+
+    assert context._container is not None
+    assert pooled_config._cosmos_client is None
+
+
+@pytest.mark.asyncio
+async def test_existing_container_without_time_to_live_is_left_as_it_is(pooled_config, caplog):
+    """Without the opt-in, a container lacking time to live only gets a warning."""
+    database = pooled_config.get_cosmos_database_client()
+    await database.create_container_if_not_exists(id="memory")
+
+    context = CosmosMemoryContext("session-1", "user-1")
+    await context.initialize()
+
+    assert context._container.default_ttl is None
+    assert database.control_plane_calls == 2
+    assert "az cosmosdb sql container update --ttl -1" in caplog.text
+    await pooled_config.close_cosmos_client()
+
+
+@pytest.mark.asyncio
+async def test_time_to_live_is_enabled_on_an_existing_container_when_opted_in(pooled_config):
+    """With COSMOSDB_ENABLE_TTL_ON_OPEN a container created without time to live gets it."""
+    database = pooled_config.get_cosmos_database_client()
+    existing = await database.create_container_if_not_exists(id="memory")
+    assert existing.default_ttl is None
+
+    with patch.object(pooled_config, "COSMOSDB_ENABLE_TTL_ON_OPEN", True):
+        context = CosmosMemoryContext("session-1", "user-1")
+        await context.initialize()
+
+    assert context._container.default_ttl == -1
+    assert database.control_plane_calls == 3
+    await pooled_config.close_cosmos_client()
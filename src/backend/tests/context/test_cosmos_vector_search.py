@@ -0,0 +1,101 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from azure.cosmos.exceptions import CosmosHttpResponseError  # noqa: E402
+from app_config import config  # noqa: E402
+from benchmarks.cosmos_standin import StandInContainer, StandInCosmosClient  # noqa: E402
+from context import cosmos_vector  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from semantic_kernel.memory.memory_record import MemoryRecord  # noqa: E402
+
+
+def make_records(count):
+    return [
+        MemoryRecord.local_record(
+            id=f"record-{index}",
+            text=f"memory {index}",
+            description=None,
+            additional_metadata=None,
+            embedding=np.array([float(index), 10.0]),
+        )
+        for index in range(count)
+    ]
+
+
+@pytest.fixture
+def vector_search(monkeypatch):
+    monkeypatch.setattr(config, "COSMOSDB_VECTOR_SEARCH", True)
+    monkeypatch.setattr(config, "COSMOSDB_VECTOR_DIMENSIONS", 2)
+    monkeypatch.setattr(cosmos_vector, "_unsupported_containers", set())
+
+
+async def make_memory(container):
+    memory = CosmosMemoryContext(
+        "session-1", "user-1", cosmos_container=container.id, cosmos_endpoint="https://standin"
+    )
+    memory._container = container
+    await memory.upsert_batch("docs", make_records(50))
+    return memory
+
+
+@pytest.mark.asyncio
+async def test_vector_policy_container_ranks_server_side(vector_search):
+    """With a vector policy only the top-k records and their scores come back."""
+    database = StandInCosmosClient("https://vector-account").get_database_client("db")
+    container = await database.create_container_if_not_exists(
+        id="vector-memory", **config.cosmos_container_options()
+    )
+    assert container.vector_search
+    memory = await make_memory(container)
+
+    matches = await memory.get_nearest_matches("docs", np.array([1.0, 0.0]), limit=3)
+
+    assert [record.id for record, _ in matches] == ["record-49", "record-48", "record-47"]
+    assert matches[0][0].embedding is None
+    assert matches[0][1] == pytest.approx(49 / np.hypot(49, 10), rel=1e-5)
+    assert container.queries_executed == 1
+
+
+@pytest.mark.asyncio
+async def test_container_without_policy_falls_back_once(vector_search):
+    """A rejected VectorDistance query switches the container to client-side ranking."""
+    container = StandInContainer("plain-memory")
+    memory = await make_memory(container)
+
+    first = await memory.get_nearest_matches("docs", np.array([1.0, 0.0]), limit=2)
+    assert not cosmos_vector.is_supported("plain-memory")
+    second = await memory.get_nearest_matches("docs", np.array([1.0, 0.0]), limit=2)
+
+    assert [r.id for r, _ in first] == [r.id for r, _ in second] == ["record-49", "record-48"]
+    # The rejected query is not retried
+    assert container.queries_executed == 2
+
+
+def test_container_options_define_the_vector_index(vector_search):
+    """The policy covers the embedding path with a cosine distance and a vector index."""
+    options = config.cosmos_container_options()
+    embedding = options["vector_embedding_policy"]["vectorEmbeddings"][0]
+    assert (embedding["path"], embedding["distanceFunction"], embedding["dimensions"]) == ("/embedding", "cosine", 2)
+    assert options["indexing_policy"]["vectorIndexes"][0]["path"] == "/embedding"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status_code, message", [(429, "Request rate is large"), (400, "Unsupported query")])
+async def test_other_errors_fall_back_for_the_query_only(vector_search, status_code, message):
+    """Throttling or an unrelated bad request ranks client-side without disabling vector search."""
+    container = StandInContainer("vector-memory", vector_search=True)
+    memory = await make_memory(container)
+
+    async def fail(*args, **kwargs):
+        raise CosmosHttpResponseError(status_code=status_code, message=message)
+
+    memory._server_nearest_matches = fail
+    matches = await memory.get_nearest_matches("docs", np.array([1.0, 0.0]), limit=2)
+
+    assert [r.id for r, _ in matches] == ["record-49", "record-48"]
+    assert cosmos_vector.is_supported("vector-memory")
@@ -0,0 +1,106 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from benchmarks.cosmos_standin import StandInContainer  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from context.local_memory_kernel import LocalMemoryContext  # noqa: E402
+from context.local_store import InMemoryLocalStore  # noqa: E402
+from models.messages_kernel import AgentMessage, Plan  # noqa: E402
+
+
+def cosmos_memory():
+    memory = CosmosMemoryContext("session-1", "user-1", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory")
+    return memory
+
+
+def local_memory():
+    return LocalMemoryContext("session-1", "user-1", store=InMemoryLocalStore())
+
+
+async def collect_pages(fetch, limit):
+    pages, cursor = [], None
+    while True:
+        page, cursor = await fetch(limit, cursor)
+        pages.append(page)
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make_memory", [cosmos_memory, local_memory])
+async def test_plans_page_through_every_plan(make_memory):
+    """Following the cursor reaches every plan, newest first, and ends with None."""
+    memory = make_memory()
+    plans = [Plan(session_id=f"session-{i}", user_id="user-1", initial_goal=f"goal {i}") for i in range(12)]
+    for plan in plans:
+        await memory.add_item(plan)
+
+    pages = await collect_pages(memory.get_plans_page, 5)
+
+    assert [len(page) for page in pages] == [5, 5, 2]
+    assert [p.initial_goal for page in pages for p in page] == [f"goal {i}" for i in reversed(range(12))]
+    assert [p.initial_goal for p in await memory.get_all_plans()] == [f"goal {i}" for i in range(11, 6, -1)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make_memory", [cosmos_memory, local_memory])
+async def test_agent_messages_page_in_order(make_memory):
+    """Agent messages of one session come back oldest first across pages."""
+    memory = make_memory()
+    for i in range(7):
+        await memory.add_item(
+            AgentMessage(session_id="session-1", user_id="user-1", plan_id="plan", content=f"m{i}", source="Hr_Agent")
+        )
+    await memory.add_item(
+        AgentMessage(session_id="session-2", user_id="user-1", plan_id="plan", content="other", source="Hr_Agent")
+    )
+
+    pages = await collect_pages(
+        lambda limit, cursor: memory.get_agent_messages_page("session-1", limit, cursor), 3
+    )
+
+    assert [m.content for page in pages for m in page] == [f"m{i}" for i in range(7)]
+
+
+@pytest.mark.asyncio
+async def test_page_cost_does_not_grow_with_depth():
+    """Each page is one request billed for its own rows only, unlike OFFSET."""
+    memory = cosmos_memory()
+    for i in range(40):
+        await memory._container.create_item(body={"id": f"doc-{i}", "session_id": "s", "user_id": "user-1"})
+
+    charges, cursor = [], None
+    for _ in range(4):
+        before = memory._container.total_request_charge
+        page, cursor = await memory.get_messages_page(10, cursor)
+        charges.append(round(memory._container.total_request_charge - before, 2))
+
+    assert len(set(charges)) == 1
+    assert cursor is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make_memory", [cosmos_memory, local_memory])
+async def test_invalid_cursor_is_rejected(make_memory):
+    """A cursor that was not issued by the store raises ValueError."""
+    with pytest.raises(ValueError):
+        await make_memory().get_plans_page(5, "not-a-cursor")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make_memory", [cosmos_memory, local_memory])
+async def test_all_messages_are_returned_without_a_limit(make_memory):
+    """get_all_messages and get_all_items collect every page, not just the first."""
+    memory = make_memory()
+    for i in range(150):
+        await memory.add_item(
+            AgentMessage(session_id="session-1", user_id="user-1", plan_id="plan", content=f"m{i}", source="Hr_Agent")
+        )
+
+    assert len(await memory.get_all_messages()) == 150
+    assert len(await memory.get_all_items()) == 150
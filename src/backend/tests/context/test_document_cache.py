@@ -0,0 +1,157 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from benchmarks.cosmos_standin import StandInContainer  # noqa: E402
+from context import cosmos_memory_kernel  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from context.document_cache import DocumentCache  # noqa: E402
+from context.partition_cache import partition_key_cache  # noqa: E402
+from models.messages_kernel import Plan, Step, StepStatus  # noqa: E402
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """A fresh always-revalidating document cache in place of the process-wide one."""
+    cache = DocumentCache(max_entries=100, max_age_seconds=0.0)
+    monkeypatch.setattr(cosmos_memory_kernel, "document_cache", cache)
+    partition_key_cache.clear()
+    yield cache
+    partition_key_cache.clear()
+
+
+async def seed():
+    memory = CosmosMemoryContext("session-1", "user-1", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory")
+    plan = Plan(session_id="session-1", user_id="user-1", initial_goal="goal")
+    steps = [
+        Step(plan_id=plan.id, session_id="session-1", user_id="user-1", action=f"a{n}", agent="Hr_Agent",
+             agent_reply="r" * 1000)
+        for n in range(4)
+    ]
+    await memory.add_plan_with_steps(plan, steps)
+    return memory, plan, steps
+
+
+@pytest.mark.asyncio
+async def test_repeated_reads_are_revalidated_not_transferred(cache):
+    """Re-reading an unchanged plan and its steps only transfers ETags."""
+    memory, plan, steps = await seed()
+    container = memory._container
+
+    container.bytes_returned = 0
+    first = await memory.get_steps_by_plan(plan.id, session_id=plan.session_id)
+    full_bytes = container.bytes_returned
+    container.bytes_returned = 0
+    again = await memory.get_steps_by_plan(plan.id, session_id=plan.session_id)
+
+    assert [s.id for s in again] == [s.id for s in first] == [s.id for s in steps]
+    assert container.bytes_returned * 10 < full_bytes
+
+    await memory.get_plan(plan.id)
+    await memory.get_plan(plan.id)
+    stats = cache.stats()
+    assert (stats["hits"], stats["revalidations"], stats["misses"]) == (2, 2, 2)
+    assert stats["hit_ratio"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_update_step_keeps_cache_current(cache):
+    """A step updated through the context is served with its new content."""
+    memory, plan, steps = await seed()
+    await memory.get_steps_by_plan(plan.id)
+    step = await memory.get_step(steps[0].id, plan.session_id)
+
+    step.status = StepStatus.completed
+    await memory.update_step(step)
+    misses = cache.misses
+
+    by_id = {s.id: s for s in await memory.get_steps_by_plan(plan.id)}
+    assert by_id[steps[0].id].status == StepStatus.completed
+    assert (await memory.get_step(steps[0].id, plan.session_id)).status == StepStatus.completed
+    assert cache.misses == misses
+
+
+@pytest.mark.asyncio
+async def test_writes_from_another_instance_are_detected(cache):
+    """Documents changed behind the cache's back fail ETag validation and are re-read."""
+    memory, plan, steps = await seed()
+    await memory.get_steps_by_plan(plan.id)
+    await memory.get_plan(plan.id)
+
+    # Another instance updates a step and the plan directly in Cosmos DB
+    container = memory._container
+    for document in container.documents():
+        if document["id"] in (steps[1].id, plan.id):
+            changed = dict(document, agent_reply="changed", initial_goal="changed")
+            await container.upsert_item(body=changed)
+
+    by_id = {s.id: s for s in await memory.get_steps_by_plan(plan.id)}
+    assert by_id[steps[1].id].agent_reply == "changed"
+    assert (await memory.get_plan(plan.id)).initial_goal == "changed"
+
+    # A step added elsewhere shows up too
+    await container.create_item(
+        body=Step(plan_id=plan.id, session_id="session-1", user_id="user-1", action="new", agent="Hr_Agent").model_dump()
+    )
+    assert "new" in [s.action for s in await memory.get_steps_by_plan(plan.id)]
+
+
+@pytest.mark.asyncio
+async def test_fresh_entries_are_served_without_round_trips(monkeypatch, clock):
+    cache = DocumentCache(max_entries=100, max_age_seconds=5.0, clock=clock)
+    monkeypatch.setattr(cosmos_memory_kernel, "document_cache", cache)
+    memory, plan, steps = await seed()
+    await memory.get_steps_by_plan(plan.id, session_id=plan.session_id)
+    await memory.get_plan(plan.id, session_id=plan.session_id)
+    container = memory._container
+
+    trips = container.round_trips
+    for _ in range(3):
+        await memory.get_steps_by_plan(plan.id, session_id=plan.session_id)
+        await memory.get_step(steps[2].id, plan.session_id)
+        await memory.get_plan(plan.id, session_id=plan.session_id)
+    assert container.round_trips == trips
+
+    clock.now = 10.0
+    await memory.get_plan(plan.id, session_id=plan.session_id)
+    assert container.round_trips == trips + 1
+    assert cache.stats()["revalidations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_added_and_deleted_steps_invalidate(cache):
+    memory, plan, steps = await seed()
+    await memory.get_steps_by_plan(plan.id)
+
+    await memory.add_step(Step(plan_id=plan.id, session_id="session-1", user_id="user-1", action="extra", agent="Hr_Agent"))
+    assert len(await memory.get_steps_by_plan(plan.id)) == 5
+
+    await memory.delete_item(steps[0].id, plan.session_id)
+    assert await memory.get_step(steps[0].id, plan.session_id) is None
+    assert len(await memory.get_steps_by_plan(plan.id)) == 4
+
+
+@pytest.mark.asyncio
+async def test_cached_copies_are_independent(cache):
+    """Mutating a returned model does not change what the cache serves."""
+    memory, plan, steps = await seed()
+    step = await memory.get_step(steps[3].id, plan.session_id)
+    step.action = "mutated"
+
+    assert (await memory.get_step(steps[3].id, plan.session_id)).action == "a3"
+
+
+def test_lru_bound_and_disabled_cache():
+    cache = DocumentCache(max_entries=2)
+    plans = [Plan(session_id="s", user_id="u", initial_goal=str(i)) for i in range(3)]
+    for plan in plans:
+        cache.put(plan, '"etag"')
+
+    assert cache.get(plans[0].id, "s") is None
+    assert cache.get(plans[2].id, "s")[0].initial_goal == "2"
+    assert cache.get(plans[2].id, "other-session") is None
+    assert not DocumentCache(max_entries=0).caches("plan")
@@ -0,0 +1,38 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from benchmarks.cosmos_standin import StandInContainer  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from models.messages_kernel import HumanFeedbackStatus, Plan, PlanWithSteps, Step, StepStatus  # noqa: E402
+
+
+def test_documents_are_plain_json():
+    """Datetimes at any depth and enums are encoded, so the document needs no custom encoder."""
+    plan = Plan(session_id="s", user_id="u", initial_goal="goal")
+    step = Step(plan_id=plan.id, session_id="s", user_id="u", action="a", agent="Hr_Agent",
+                status=StepStatus.completed, human_approval_status=HumanFeedbackStatus.accepted)
+    nested = PlanWithSteps(**plan.model_dump(), steps=[step])
+
+    document = CosmosMemoryContext._serialize_item(nested)
+
+    assert json.loads(json.dumps(document)) == document
+    assert document["steps"][0]["timestamp"] == step.model_dump(mode="json")["timestamp"]
+    assert document["steps"][0]["status"] == "completed"
+    assert PlanWithSteps.model_validate(document) == nested
+
+
+@pytest.mark.asyncio
+async def test_read_documents_round_trip():
+    memory = CosmosMemoryContext("s", "u", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory")
+    plan = Plan(session_id="s", user_id="u", initial_goal="goal")
+    await memory.add_plan(plan)
+
+    assert await memory.get_plan(plan.id, "s") == plan
+    # Listed plans are projections, not tracked for updates
+    assert [listed.model_dump() for listed in await memory.get_all_plans()] == [plan.model_dump()]
@@ -0,0 +1,152 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from context.cosmos_bulk import BulkOperation  # noqa: E402
+from context.local_memory_kernel import LocalMemoryContext  # noqa: E402
+from context.local_store import InMemoryLocalStore  # noqa: E402
+from models.messages_kernel import AgentMessage, Step, StepStatus  # noqa: E402
+from tests.helpers import make_plan, make_step, make_steps  # noqa: E402
+
+
+@pytest.fixture
+def memory():
+    return LocalMemoryContext("session-1", "user-1", store=InMemoryLocalStore())
+
+
+@pytest.mark.asyncio
+async def test_lookups_by_id_session_and_plan(memory):
+    """Plans, steps and messages are found through the id, session and plan indexes."""
+    plan, other_plan = make_plan(), make_plan("session-2")
+    steps = make_steps(plan, 3)
+    await memory.add_items([plan, other_plan, *steps, make_step(other_plan)])
+    await memory.add_item(
+        AgentMessage(session_id="session-1", user_id="user-1", plan_id=plan.id, content="hi", source="Hr_Agent")
+    )
+
+    assert await memory.get_plan(plan.id) is plan
+    assert await memory.get_plan_by_session("session-2") is other_plan
+    assert await memory.get_step(steps[1].id) is steps[1]
+    assert [s.action for s in await memory.get_steps_by_plan(plan.id)] == ["Step 0", "Step 1", "Step 2"]
+    assert len(await memory.get_agent_messages_by_session("session-1")) == 1
+
+
+@pytest.mark.asyncio
+async def test_lookups_by_id_are_scoped_to_the_user(memory):
+    plan = make_plan()
+    step = make_step(plan)
+    await memory.add_items([plan, step])
+
+    other_user = LocalMemoryContext("session-1", "user-2", store=memory._local_storage)
+    assert await other_user.get_plan(plan.id) is None
+    assert await other_user.get_step(step.id) is None
+    assert await other_user.get_steps_by_plan(plan.id) == []
+
+
+@pytest.mark.asyncio
+async def test_update_keeps_position_and_indexes(memory):
+    """update_item replaces in place and re-files the item if its keys change."""
+    plan, other_plan = make_plan(), make_plan()
+    steps = make_steps(plan, 3)
+    await memory.add_items([plan, other_plan, *steps])
+
+    updated = steps[1].model_copy(update={"status": StepStatus.completed})
+    await memory.update_item(updated)
+    assert [s.status for s in await memory.get_steps_by_plan(plan.id)] == [
+        StepStatus.planned,
+        StepStatus.completed,
+        StepStatus.planned,
+    ]
+
+    moved = steps[2].model_copy(update={"plan_id": other_plan.id})
+    await memory.update_item(moved)
+    assert len(await memory.get_steps_by_plan(plan.id)) == 2
+    assert await memory.get_steps_by_plan(other_plan.id) == [moved]
+
+
+@pytest.mark.asyncio
+async def test_delete_removes_item_from_every_index(memory):
+    """Deleted items disappear from id, session and plan lookups."""
+    plan = make_plan()
+    step = make_step(plan)
+    await memory.add_items([plan, step])
+
+    await memory.delete_item(step.id, Step)
+    await memory.delete_item(plan.id, "session-1")
+
+    assert await memory.get_step(step.id) is None
+    assert await memory.get_steps_by_plan(plan.id) == []
+    assert await memory.get_plan_by_session("session-1") is None
+    assert memory._local_storage.count() == 0
+
+
+@pytest.mark.asyncio
+async def test_query_items_accepts_cosmos_parameters(memory):
+    """The inherited Cosmos queries work against the local store."""
+    plan = make_plan()
+    await memory.add_items([plan, make_step(plan), make_step(plan)])
+
+    steps = await memory.query_items(
+        "SELECT * FROM c WHERE c.plan_id=@plan_id AND c.user_id=@user_id AND c.data_type=@data_type",
+        [
+            {"name": "@plan_id", "value": plan.id},
+            {"name": "@user_id", "value": "user-1"},
+            {"name": "@data_type", "value": "step"},
+        ],
+        Step,
+    )
+    assert len(steps) == 2
+    assert await memory.get_thread_by_session("session-1") is None
+
+
+def test_store_legacy_collection_view():
+    """_local_storage['plans'] style access still returns list snapshots."""
+    store = InMemoryLocalStore()
+    plan = make_plan()
+    store.put(plan)
+    assert store["plans"] == [plan]
+    assert store["steps"] == []
+
+
+@pytest.mark.asyncio
+async def test_steps_by_plans_are_limited_to_the_user(memory):
+    plan = make_plan()
+    own = make_step(plan)
+    other = Step(plan_id=plan.id, session_id=plan.session_id, user_id="user-2", action="x", agent="Hr_Agent")
+    await memory.add_items([plan, own, other])
+
+    assert await memory.get_steps_by_plans([plan]) == {plan.id: [own]}
+    assert await memory.get_step_statuses_by_plans([plan]) == {plan.id: [own.status]}
+
+
+@pytest.mark.asyncio
+async def test_bulk_write_and_delete_by_query(memory):
+    """The bulk and query deletes the endpoints use work without a Cosmos container."""
+    plan = make_plan()
+    step = make_step(plan)
+    await memory.add_item(plan)
+
+    result = await memory.bulk_write(
+        [
+            BulkOperation.create(memory._serialize_item(step)),
+            BulkOperation.create(memory._serialize_item(plan)),
+            BulkOperation.patch(step.id, plan.session_id, [{"op": "set", "path": "/status", "value": "completed"}]),
+            BulkOperation.delete("missing", plan.session_id),
+        ]
+    )
+
+    assert [item.status_code for item in result.items] == [201, 409, 200, 404]
+    assert (await memory.get_step(step.id)).status == StepStatus.completed
+
+    result = await memory.delete_items_by_query(
+        "SELECT c.id, c.session_id FROM c WHERE c.data_type=@data_type AND c.user_id=@user_id",
+        [{"name": "@data_type", "value": "step"}, {"name": "@user_id", "value": "user-1"}],
+    )
+
+    assert [item.id for item in result.succeeded] == [step.id]
+    assert await memory.get_step(step.id) is None
+    assert await memory.get_plan(plan.id) is plan
+    assert await memory.archive_session(plan.session_id) is None
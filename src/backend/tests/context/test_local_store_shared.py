@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from context import local_store  # noqa: E402
+from context.local_memory_kernel import LocalMemoryContext  # noqa: E402
+from context.local_store import (  # noqa: E402
+    SQLiteLocalStore,
+    close_shared_local_store,
+    get_shared_local_store,
+)
+from models.messages_kernel import Step, StepStatus  # noqa: E402
+from tests.helpers import make_plan, make_steps  # noqa: E402
+from semantic_kernel.contents import AuthorRole, ChatMessageContent  # noqa: E402
+from semantic_kernel.memory.memory_record import MemoryRecord  # noqa: E402
+
+
+@pytest.fixture
+def shared_sqlite(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        local_store,
+        "config",
+        SimpleNamespace(LOCAL_STORAGE_ENGINE="sqlite", LOCAL_STORAGE_PATH=str(tmp_path / "local.db")),
+    )
+    close_shared_local_store()
+    yield get_shared_local_store()
+    close_shared_local_store()
+
+
+@pytest.mark.asyncio
+async def test_contexts_share_the_process_store(shared_sqlite):
+    """A plan written by one request's context is visible to the next one."""
+    writer = LocalMemoryContext("session-1", "user-1")
+    plan = make_plan()
+    await writer.add_plan_with_steps(plan, make_steps(plan, 3))
+
+    reader = LocalMemoryContext("session-2", "user-1")
+    assert isinstance(reader._local_storage, SQLiteLocalStore)
+    assert [p.id for p in await reader.get_all_plans()] == [plan.id]
+    assert (await reader.get_plan_by_session("session-1")).initial_goal == "Onboard a new hire"
+    assert await LocalMemoryContext("session-3", "user-2").get_all_plans() == []
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_survives_reopen(tmp_path):
+    """Items, their order and in-place updates are read back after reopening the database."""
+    path = str(tmp_path / "local.db")
+    memory = LocalMemoryContext("session-1", "user-1", store=SQLiteLocalStore(path))
+    plan = make_plan()
+    steps = make_steps(plan, 3)
+    await memory.add_items([plan, *steps])
+    await memory.update_item(steps[1].model_copy(update={"status": StepStatus.completed}))
+    await memory.delete_item(steps[2].id, Step)
+    memory._local_storage.close()
+
+    reopened = LocalMemoryContext("session-1", "user-1", store=SQLiteLocalStore(path))
+    assert (await reopened.get_plan(plan.id)).id == plan.id
+    assert [(s.action, s.status) for s in await reopened.get_steps_by_plan(plan.id)] == [
+        ("Step 0", StepStatus.planned),
+        ("Step 1", StepStatus.completed),
+    ]
+    assert reopened._local_storage.count("step") == 2
+    reopened._local_storage.close()
+
+
+@pytest.mark.asyncio
+async def test_messages_and_memory_records(tmp_path):
+    """Chat messages and memory records are stored like they are in Cosmos DB."""
+    store = SQLiteLocalStore(str(tmp_path / "local.db"))
+    memory = LocalMemoryContext("session-1", "user-1", store=store)
+
+    await memory.add_message(ChatMessageContent(role=AuthorRole.USER, content="hello", metadata={}))
+    messages = await LocalMemoryContext("session-1", "user-1", store=store).get_messages()
+    assert [(m.role, m.content) for m in messages] == [(AuthorRole.USER, "hello")]
+
+    records = [
+        MemoryRecord.local_record(
+            id=f"record-{index}",
+            text=f"memory {index}",
+            description=None,
+            additional_metadata=None,
+            embedding=np.array([float(index), 1.0]),
+        )
+        for index in range(3)
+    ]
+    await memory.upsert_batch("docs", records)
+    assert await memory.get_collections() == ["docs"]
+    fetched = await memory.get_batch("docs", ["record-2", "missing", "record-0"], with_embeddings=True)
+    assert [r.id for r in fetched] == ["record-2", "record-0"]
+    assert fetched[0].embedding.tolist() == [2.0, 1.0]
+    match, _ = await memory.get_nearest_match("docs", np.array([2.0, 1.0]))
+    assert match.id == "record-2"
+
+    await memory.remove_batch("docs", ["record-0", "record-1"])
+    assert [r.id for r in await memory.get_memory_records("docs")] == ["record-2"]
+    await memory.delete_collection("docs")
+    assert await memory.get_collections() == []
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_calls_run_off_the_event_loop(tmp_path, monkeypatch):
+    store = SQLiteLocalStore(str(tmp_path / "local.db"))
+    threads = []
+    put = store.put
+
+    def recording_put(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return put(*args, **kwargs)
+
+    monkeypatch.setattr(store, "put", recording_put)
+    await LocalMemoryContext("session-1", "user-1", store=store).add_plan(make_plan())
+
+    assert threads and threads[0] is not threading.main_thread()
+    store.close()
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from azure.cosmos.exceptions import CosmosAccessConditionFailedError  # noqa: E402
+from benchmarks.cosmos_standin import StandInContainer  # noqa: E402
+from context import cosmos_memory_kernel  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from context.document_cache import DocumentCache  # noqa: E402
+from context.partition_cache import partition_key_cache  # noqa: E402
+from models.messages_kernel import HumanFeedbackStatus, Plan, PlanStatus, Step, StepStatus  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    cache = DocumentCache(max_entries=100)
+    monkeypatch.setattr(cosmos_memory_kernel, "document_cache", cache)
+    partition_key_cache.clear()
+    yield cache
+    partition_key_cache.clear()
+
+
+async def seed():
+    memory = CosmosMemoryContext("session-1", "user-1", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory")
+    plan = Plan(session_id="session-1", user_id="user-1", initial_goal="goal")
+    step = Step(plan_id=plan.id, session_id="session-1", user_id="user-1", action="a", agent="Hr_Agent")
+    await memory.add_plan(plan)
+    await memory.add_step(step)
+    return memory, plan, step
+
+
+def stored(memory, item_id):
+    return next(d for d in memory._container.documents() if d["id"] == item_id)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_step_updates_keep_both_changes():
+    """Two writers updating different fields of a step both keep their change."""
+    memory, plan, step = await seed()
+    feedback = await memory.get_step(step.id, plan.session_id)
+    execution = await memory.get_step(step.id, plan.session_id)
+
+    feedback.human_feedback = "looks good"
+    feedback.human_approval_status = HumanFeedbackStatus.accepted
+    execution.status = StepStatus.action_requested
+    await asyncio.gather(memory.update_step(feedback), memory.update_step(execution))
+
+    document = stored(memory, step.id)
+    assert document["human_feedback"] == "looks good"
+    assert document["human_approval_status"] == HumanFeedbackStatus.accepted
+    assert document["status"] == StepStatus.action_requested
+
+    # Either writer can keep updating the step it holds
+    execution.agent_reply = "done"
+    await memory.update_step(execution)
+    document = stored(memory, step.id)
+    assert (document["human_feedback"], document["agent_reply"]) == ("looks good", "done")
+
+
+@pytest.mark.asyncio
+async def test_conflict_is_retried_against_the_current_document():
+    memory, plan, _ = await seed()
+    stale = await memory.get_plan(plan.id, plan.session_id)
+
+    # Another instance completes the plan after it was read
+    container = memory._container
+    await container.upsert_item(body=dict(stored(memory, plan.id), overall_status=PlanStatus.completed))
+
+    stale.summary = "summary"
+    await memory.update_plan(stale)
+
+    document = stored(memory, plan.id)
+    assert (document["overall_status"], document["summary"]) == (PlanStatus.completed, "summary")
+    assert stale.overall_status == PlanStatus.completed
+    assert stale._etag == document["_etag"]
+
+
+@pytest.mark.asyncio
+async def test_sequential_updates_of_one_instance_do_not_conflict():
+    memory, plan, step = await seed()
+    writes = []
+    replace_item = memory._container.replace_item
+
+    async def counting_replace(*args, **kwargs):
+        writes.append(kwargs.get("etag"))
+        return await replace_item(*args, **kwargs)
+
+    memory._container.replace_item = counting_replace
+    for status in (StepStatus.approved, StepStatus.action_requested, StepStatus.completed):
+        step.status = status
+        await memory.update_step(step)
+
+    assert len(writes) == 3 and all(writes)
+    assert stored(memory, step.id)["status"] == StepStatus.completed
+
+
+@pytest.mark.asyncio
+async def test_conflict_is_raised_after_the_retries():
+    memory, plan, step = await seed()
+    container = memory._container
+    replace_item = container.replace_item
+
+    async def always_changed(*args, **kwargs):
+        # Someone else writes between every read and replace
+        await container.upsert_item(body=stored(memory, step.id))
+        return await replace_item(*args, **kwargs)
+
+    container.replace_item = always_changed
+    step.status = StepStatus.completed
+    with pytest.raises(CosmosAccessConditionFailedError):
+        await memory.update_step(step)
+
+
+@pytest.mark.asyncio
+async def test_items_without_an_etag_are_upserted():
+    memory, plan, _ = await seed()
+    rebuilt = Plan(**stored(memory, plan.id))
+    rebuilt.summary = "rebuilt"
+
+    await memory.update_plan(rebuilt)
+
+    assert stored(memory, plan.id)["summary"] == "rebuilt"
+
+
+@pytest.mark.asyncio
+async def test_update_of_a_deleted_item_does_not_recreate_it(cache):
+    memory, plan, step = await seed()
+    await memory._container.delete_item(step.id, partition_key="session-1")
+
+    step.status = StepStatus.completed
+    await memory.update_step(step)
+    await memory.update_step(step)
+
+    assert all(d["id"] != step.id for d in memory._container.documents())
+    assert cache.get(step.id, "session-1") is None
+
+
+@pytest.mark.asyncio
+async def test_item_deleted_after_a_conflict_is_not_recreated():
+    memory, plan, step = await seed()
+    container = memory._container
+    replace_item = container.replace_item
+
+    async def changed_then_deleted(*args, **kwargs):
+        await container.upsert_item(body=stored(memory, step.id))
+        try:
+            return await replace_item(*args, **kwargs)
+        finally:
+            await container.delete_item(step.id, partition_key="session-1")
+
+    container.replace_item = changed_then_deleted
+    step.status = StepStatus.completed
+    await memory.update_step(step)
+
+    assert all(d["id"] != step.id for d in container.documents())
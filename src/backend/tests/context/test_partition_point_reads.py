@@ -0,0 +1,130 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from benchmarks.cosmos_standin import StandInContainer  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from context.partition_cache import PartitionKeyCache, partition_key_cache  # noqa: E402
+from models.messages_kernel import Plan, Step  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def empty_partition_cache():
+    partition_key_cache.clear()
+    yield
+    partition_key_cache.clear()
+
+
+def memory_for(session_id, container):
+    memory = CosmosMemoryContext(session_id, "user-1", cosmos_endpoint="https://standin")
+    memory._container = container
+    return memory
+
+
+async def seed(container, sessions=4):
+    """Store a plan with two steps in each session, then forget where they live."""
+    writer = memory_for("writer", container)
+    plans = []
+    for i in range(sessions):
+        plan = Plan(session_id=f"session-{i}", user_id="user-1", initial_goal=f"goal {i}")
+        steps = [
+            Step(plan_id=plan.id, session_id=plan.session_id, user_id="user-1", action=f"a{n}", agent="Hr_Agent")
+            for n in range(2)
+        ]
+        await writer.add_plan_with_steps(plan, steps)
+        plans.append((plan, steps))
+    partition_key_cache.clear()
+    return plans
+
+
+async def measure(container, memory, call):
+    """Run one lookup and report its RU charge and round trips against the stand-in."""
+    charge, trips, queries = container.total_request_charge, container.round_trips, container.queries_executed
+    result = await call()
+    return result, {
+        "ru": round(container.total_request_charge - charge, 2),
+        "round_trips": container.round_trips - trips,
+        "queries": container.queries_executed - queries,
+        "last_ru": memory.last_request_charge(),
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_plan_point_reads_once_its_session_is_known():
+    """An unknown plan costs one fan-out query; after that it is a 1 RU point read."""
+    container = StandInContainer("memory")
+    plans = await seed(container)
+    plan = plans[2][0]
+    memory = memory_for("", container)
+
+    cold, cold_cost = await measure(container, memory, lambda: memory.get_plan(plan.id))
+    warm, warm_cost = await measure(container, memory, lambda: memory.get_plan(plan.id))
+    given, given_cost = await measure(container, memory, lambda: memory.get_plan(plan.id, session_id=plan.session_id))
+
+    assert cold.id == warm.id == given.id == plan.id
+    assert cold_cost["queries"] == 1
+    assert warm_cost == given_cost == {"ru": 1.0, "round_trips": 1, "queries": 0, "last_ru": 1.0}
+    assert warm_cost["ru"] < cold_cost["ru"]
+
+
+@pytest.mark.asyncio
+async def test_get_plan_in_own_session_needs_no_cache():
+    """A context reading a plan of its own session point reads without a lookup."""
+    container = StandInContainer("memory")
+    plans = await seed(container)
+    plan = plans[1][0]
+    memory = memory_for(plan.session_id, container)
+
+    found, cost = await measure(container, memory, lambda: memory.get_plan(plan.id))
+
+    assert found.id == plan.id
+    assert cost["queries"] == 0 and cost["round_trips"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_step_without_session_uses_cached_partition():
+    """Reading a plan's steps remembers where each step lives for later point reads."""
+    container = StandInContainer("memory")
+    plans = await seed(container)
+    plan, steps = plans[3]
+    memory = memory_for("", container)
+
+    listed, fan_out = await measure(container, memory, lambda: memory.get_steps_for_plan(plan.id))
+    again, scoped = await measure(container, memory, lambda: memory.get_steps_for_plan(plan.id))
+    step, point = await measure(container, memory, lambda: memory.get_step(steps[1].id))
+
+    assert [s.id for s in listed] == [s.id for s in again] == [s.id for s in steps]
+    # The second listing is served by the plan's partition alone
+    assert scoped["ru"] < fan_out["ru"]
+    assert step.id == steps[1].id
+    assert point == {"ru": 1.0, "round_trips": 1, "queries": 0, "last_ru": 1.0}
+
+
+@pytest.mark.asyncio
+async def test_unknown_ids_return_none():
+    container = StandInContainer("memory")
+    await seed(container)
+    memory = memory_for("session-0", container)
+
+    assert await memory.get_plan("missing") is None
+    assert await memory.get_step("missing") is None
+    assert await memory.get_steps_by_plan("missing") == []
+
+
+def test_partition_cache_is_bounded_lru():
+    cache = PartitionKeyCache(max_entries=2)
+    cache.put("a", "s1")
+    cache.put("b", "s2")
+    assert cache.get("a") == "s1"
+    cache.put("c", "s3")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("s1", "s3")
+    assert len(cache) == 2
+
+    disabled = PartitionKeyCache(max_entries=0)
+    disabled.put("a", "s1")
+    assert disabled.get("a") is None
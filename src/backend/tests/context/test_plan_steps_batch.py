@@ -0,0 +1,89 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from benchmarks.cosmos_standin import StandInContainer  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from context.local_memory_kernel import LocalMemoryContext  # noqa: E402
+from context.local_store import InMemoryLocalStore  # noqa: E402
+from models.messages_kernel import Plan, Step  # noqa: E402
+
+
+def cosmos_memory():
+    memory = CosmosMemoryContext("session-1", "user-1", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory")
+    return memory
+
+
+def local_memory():
+    return LocalMemoryContext("session-1", "user-1", store=InMemoryLocalStore())
+
+
+async def add_plans(memory, count, steps_per_plan=3):
+    plans = []
+    for i in range(count):
+        plan = Plan(session_id=f"session-{i}", user_id="user-1", initial_goal=f"goal {i}")
+        steps = [
+            Step(plan_id=plan.id, session_id=plan.session_id, user_id="user-1", action=f"step {i}.{n}", agent="Hr_Agent")
+            for n in range(steps_per_plan)
+        ]
+        await memory.add_plan_with_steps(plan, steps)
+        plans.append(plan)
+    return plans
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make_memory", [cosmos_memory, local_memory])
+async def test_steps_by_plans_match_per_plan_fetches(make_memory):
+    """Batched steps are grouped per plan exactly as get_steps_by_plan returns them."""
+    memory = make_memory()
+    plans = await add_plans(memory, 5)
+
+    steps_by_plan = await memory.get_steps_by_plans(plans)
+
+    assert list(steps_by_plan) == [plan.id for plan in plans]
+    for plan in plans:
+        expected = await memory.get_steps_by_plan(plan.id)
+        assert [s.id for s in steps_by_plan[plan.id]] == [s.id for s in expected]
+        assert len(expected) == 3
+
+
+@pytest.mark.asyncio
+async def test_steps_by_plans_is_one_partition_scoped_query():
+    """Listing the steps of a page of plans costs one query over the plans' partitions."""
+    memory = cosmos_memory()
+    plans = await add_plans(memory, 8)
+    container = memory._container
+    container.queries_executed = 0
+    container.total_request_charge = 0.0
+
+    steps_by_plan = await memory.get_steps_by_plans(plans[:5])
+
+    assert container.queries_executed == 1
+    assert sorted(len(steps) for steps in steps_by_plan.values()) == [3] * 5
+    batched_charge = container.total_request_charge
+
+    container.total_request_charge = 0.0
+    for plan in plans[:5]:
+        await memory.get_steps_by_plan(plan.id)
+    assert batched_charge < container.total_request_charge
+
+
+@pytest.mark.asyncio
+async def test_steps_by_plans_excludes_other_users_and_handles_empty():
+    """Steps of another user's plan with the same ID never leak into the listing."""
+    memory = cosmos_memory()
+    plans = await add_plans(memory, 2)
+    await memory.add_item(
+        Step(plan_id=plans[0].id, session_id=plans[0].session_id, user_id="user-2", action="foreign", agent="Hr_Agent")
+    )
+    empty_plan = Plan(session_id="session-9", user_id="user-1", initial_goal="no steps")
+
+    steps_by_plan = await memory.get_steps_by_plans(plans + [empty_plan])
+
+    assert "foreign" not in [s.action for s in steps_by_plan[plans[0].id]]
+    assert steps_by_plan[empty_plan.id] == []
+    assert await memory.get_steps_by_plans([]) == {}
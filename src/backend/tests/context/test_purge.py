@@ -0,0 +1,166 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from benchmarks.cosmos_standin import StandInContainer  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from context.local_memory_kernel import LocalMemoryContext  # noqa: E402
+from context.local_store import InMemoryLocalStore  # noqa: E402
+from context.purge import PURGE_JOB_DATA_TYPE, PurgeJob, PurgeJobManager, PurgeStatus  # noqa: E402
+from models.messages_kernel import AgentMessage, Plan, Session, Step  # noqa: E402
+
+
+def cosmos_memory(user_id="user-1", container=None):
+    memory = CosmosMemoryContext("", user_id, cosmos_endpoint="https://standin")
+    memory._container = container if container is not None else StandInContainer("memory")
+    return memory
+
+
+def local_memory():
+    return LocalMemoryContext("", "user-1", store=InMemoryLocalStore())
+
+
+def purged_types(container):
+    """The documents a purge removes, leaving out the progress documents of purges."""
+    return [d for d in container.documents() if d["data_type"] != PURGE_JOB_DATA_TYPE]
+
+
+async def seed(memory, sessions=5, user_id="user-1"):
+    """Add a session, a plan with 3 steps and 4 agent messages per session."""
+    for i in range(sessions):
+        session_id = f"{user_id}-session-{i}"
+        plan = Plan(session_id=session_id, user_id=user_id, initial_goal="goal")
+        steps = [Step(plan_id=plan.id, session_id=session_id, user_id=user_id, action="a", agent="Hr_Agent")
+                 for _ in range(3)]
+        await memory.add_plan_with_steps(plan, steps)
+        await memory.add_item(Session(id=session_id, user_id=user_id, current_status="active"))
+        for n in range(4):
+            await memory.add_item(AgentMessage(session_id=session_id, user_id=user_id, plan_id=plan.id,
+                                               content=f"m{n}", source="Hr_Agent"))
+    return sessions * 9
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make_memory", [cosmos_memory, local_memory])
+async def test_purge_removes_every_document_of_the_user(make_memory):
+    memory = make_memory()
+    count = await seed(memory)
+    manager = PurgeJobManager(max_concurrency=4, page_size=7)
+    finished = []
+
+    job = manager.start(memory, "user-1", on_finished=finished.append)
+    assert job.status == PurgeStatus.pending
+    job = await manager.wait(job.id)
+
+    assert job.status == PurgeStatus.completed
+    assert (job.found, job.deleted, job.failed) == (count, count, 0)
+    assert finished == [job]
+    # Only the progress of the purge is left
+    assert [d["data_type"] for d in await memory.get_all_items()] in ([], [PURGE_JOB_DATA_TYPE])
+
+
+@pytest.mark.asyncio
+async def test_purge_leaves_other_users_and_batches_per_partition():
+    container = StandInContainer("memory")
+    memory = cosmos_memory(container=container)
+    count = await seed(memory, sessions=10)
+    await seed(cosmos_memory("user-2", container), sessions=2, user_id="user-2")
+    manager = PurgeJobManager(page_size=1000)
+
+    trips = container.round_trips
+    job = await manager.wait(manager.start(memory, "user-1").id)
+
+    assert job.deleted == count
+    assert {d["user_id"] for d in purged_types(container)} == {"user-2"}
+    # One query page and one batch per session partition, plus a point delete for each
+    # session document (they have no session_id, so no partition to batch in), and the
+    # progress written when the purge starts, after the page and when it finishes
+    assert container.round_trips - trips == 1 + 10 + 10 + 3
+
+
+@pytest.mark.asyncio
+async def test_soft_delete_sets_a_time_to_live_when_the_container_allows_it():
+    container = StandInContainer("memory", default_ttl=-1)
+    memory = cosmos_memory(container=container)
+    count = await seed(memory, sessions=2)
+    manager = PurgeJobManager(soft_delete_ttl_seconds=5)
+
+    job = await manager.wait(manager.start(memory, "user-1", soft_delete=True).id)
+
+    assert job.soft_delete and job.deleted == count
+    assert all(d["ttl"] == 5 for d in purged_types(container))
+
+    # Without time to live on the container the documents are deleted instead
+    container = StandInContainer("memory")
+    memory = cosmos_memory(container=container)
+    await seed(memory, sessions=2)
+    job = await manager.wait(manager.start(memory, "user-1", soft_delete=True).id)
+    assert not job.soft_delete
+    assert purged_types(container) == []
+
+
+@pytest.mark.asyncio
+async def test_one_purge_per_user_and_status_is_private():
+    memory = cosmos_memory()
+    await seed(memory, sessions=1)
+    manager = PurgeJobManager()
+
+    first = manager.start(memory, "user-1")
+    assert manager.start(memory, "user-1") is first
+    assert manager.get(first.id, "user-2") is None
+    await manager.wait(first.id)
+    assert manager.get(first.id, "user-1").status == PurgeStatus.completed
+    second = manager.start(memory, "user-1")
+    assert second is not first
+    await manager.wait(second.id)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make_memory", [cosmos_memory, local_memory])
+async def test_status_is_readable_from_another_worker(make_memory):
+    memory = make_memory()
+    count = await seed(memory, sessions=2)
+    running = PurgeJobManager()
+    job = await running.wait(running.start(memory, "user-1").id)
+
+    other_worker = PurgeJobManager()
+    loaded = await other_worker.load(memory, job.id, "user-1")
+
+    assert (loaded.id, loaded.status, loaded.deleted) == (job.id, PurgeStatus.completed, count)
+    assert await other_worker.load(memory, job.id, "user-2") is None
+    assert await other_worker.load(memory, "missing", "user-1") is None
+
+
+@pytest.mark.asyncio
+async def test_failed_purge_reports_the_error():
+    class BrokenStore:
+        async def purge_items(self, data_types, **kwargs):
+            yield await asyncio.sleep(0, result=None) or _raise()
+
+    def _raise():
+        raise RuntimeError("boom")
+
+    manager = PurgeJobManager()
+    job = await manager.wait(manager.start(BrokenStore(), "user-1").id)
+
+    assert job.status == PurgeStatus.failed
+    assert job.error == "boom"
+    assert job.finished_at is not None
+
+
+@pytest.mark.asyncio
+async def test_progress_is_stored_in_the_users_partition_and_expires():
+    container = StandInContainer("memory")
+    memory = cosmos_memory(container=container)
+    await seed(memory, sessions=1)
+    manager = PurgeJobManager(job_ttl_seconds=60)
+
+    job = await manager.wait(manager.start(memory, "user-1").id)
+
+    document = await container.read_item(item=job.id, partition_key="user-1")
+    assert (document["data_type"], document["ttl"]) == (PURGE_JOB_DATA_TYPE, 60)
+    assert "ttl" not in PurgeJob(user_id="user-1", data_types=["plan"]).to_document(0)
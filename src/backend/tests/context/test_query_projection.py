@@ -0,0 +1,126 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from benchmarks.cosmos_standin import StandInContainer  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from context.local_memory_kernel import LocalMemoryContext  # noqa: E402
+from context.local_store import InMemoryLocalStore  # noqa: E402
+from models.messages_kernel import Plan, PlanStatus, PlanWithSteps, Step, StepStatus  # noqa: E402
+from semantic_kernel.memory.memory_record import MemoryRecord  # noqa: E402
+
+STATUSES = [StepStatus.completed, StepStatus.failed, StepStatus.planned]
+
+
+def cosmos_memory():
+    memory = CosmosMemoryContext("session-1", "user-1", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory")
+    return memory
+
+
+def local_memory():
+    return LocalMemoryContext("session-1", "user-1", store=InMemoryLocalStore())
+
+
+async def add_plans(memory, count):
+    plans = []
+    for i in range(count):
+        plan = Plan(session_id=f"session-{i}", user_id="user-1", initial_goal=f"goal {i}")
+        steps = [
+            Step(
+                plan_id=plan.id, session_id=plan.session_id, user_id="user-1", action=f"step {n}",
+                agent="Hr_Agent", status=status, agent_reply="x" * 2000, human_feedback="y" * 500,
+            )
+            for n, status in enumerate(STATUSES)
+        ]
+        await memory.add_plan_with_steps(plan, steps)
+        plans.append(plan)
+    return plans
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make_memory", [cosmos_memory, local_memory])
+async def test_step_statuses_match_full_steps(make_memory):
+    """The status summary counts the same as the loaded steps."""
+    memory = make_memory()
+    plans = await add_plans(memory, 3)
+
+    statuses = await memory.get_step_statuses_by_plans(plans)
+    steps = await memory.get_steps_by_plans(plans)
+
+    for plan in plans:
+        assert statuses[plan.id] == [step.status for step in steps[plan.id]] == STATUSES
+        summary = PlanWithSteps(**plan.model_dump())
+        summary.update_step_counts(statuses[plan.id])
+        full = PlanWithSteps(**plan.model_dump(), steps=steps[plan.id])
+        full.update_step_counts()
+        assert summary.steps == []
+        assert summary.model_dump(exclude={"steps"}) == full.model_dump(exclude={"steps"})
+    assert await memory.get_step_statuses_by_plans([]) == {}
+
+
+@pytest.mark.asyncio
+async def test_step_status_summary_transfers_a_fraction_of_the_steps():
+    memory = cosmos_memory()
+    plans = await add_plans(memory, 5)
+    container = memory._container
+
+    container.bytes_returned = 0
+    await memory.get_steps_by_plans(plans)
+    full_bytes = container.bytes_returned
+    container.bytes_returned = 0
+    await memory.get_step_statuses_by_plans(plans)
+
+    assert container.bytes_returned * 20 < full_bytes
+
+
+@pytest.mark.asyncio
+async def test_query_items_fields_returns_partial_documents():
+    memory = cosmos_memory()
+    plans = await add_plans(memory, 1)
+
+    items = await memory.query_items(
+        "SELECT * FROM c WHERE c.plan_id=@plan_id AND c.data_type=@data_type",
+        [{"name": "@plan_id", "value": plans[0].id}, {"name": "@data_type", "value": "step"}],
+        None,
+        partition_key=plans[0].session_id,
+        fields=["id", "status"],
+    )
+
+    assert len(items) == 3
+    assert all(set(item) == {"id", "status"} for item in items)
+
+
+@pytest.mark.asyncio
+async def test_memory_records_skip_embeddings_unless_asked():
+    memory = cosmos_memory()
+    record = MemoryRecord.local_record(
+        id="r1", text="hello", description="d", additional_metadata=None, embedding=np.ones(256)
+    )
+    await memory.upsert("docs", record)
+    container = memory._container
+
+    container.bytes_returned = 0
+    slim = await memory.get("docs", "r1")
+    slim_bytes = container.bytes_returned
+    container.bytes_returned = 0
+    full = await memory.get("docs", "r1", with_embedding=True)
+
+    assert slim.text == full.text == "hello"
+    assert slim.embedding is None
+    assert full.embedding.shape == (256,)
+    assert slim_bytes * 5 < container.bytes_returned
+    assert [r.id for r in await memory.get_batch("docs", ["r1"])] == ["r1"]
+    assert await memory.get_collections() == ["docs"]
+
+
+def test_update_step_counts_from_statuses():
+    plan = PlanWithSteps(session_id="s", user_id="u", initial_goal="goal")
+    plan.update_step_counts([StepStatus.completed, StepStatus.completed, StepStatus.failed])
+
+    assert (plan.total_steps, plan.completed, plan.failed) == (3, 2, 1)
+    assert plan.overall_status == PlanStatus.completed
@@ -0,0 +1,189 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from benchmarks.cosmos_standin import StandInContainer  # noqa: E402
+from context import cosmos_memory_kernel  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from context.partition_cache import partition_key_cache  # noqa: E402
+from context.retention import (  # noqa: E402
+    ARCHIVE_CHUNK_DATA_TYPE,
+    ARCHIVE_DATA_TYPE,
+    ARCHIVE_EXPORT_ENCODING,
+    ArchiveUnavailableError,
+    RetentionPolicy,
+    archive_chunk_id,
+    archive_id,
+    parse_ttl_by_data_type,
+)
+from models.messages_kernel import AgentMessage, Plan, PlanStatus, Step  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def policy(monkeypatch):
+    policy = RetentionPolicy(ttl_by_data_type={"agent_message": 3600}, archive_min_age_seconds=0)
+    monkeypatch.setattr(cosmos_memory_kernel, "retention_policy", policy)
+    partition_key_cache.clear()
+    yield policy
+    partition_key_cache.clear()
+
+
+def make_memory():
+    memory = CosmosMemoryContext("", "user-1", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory", default_ttl=-1)
+    return memory
+
+
+async def seed_session(memory, session_id, status=PlanStatus.completed, messages=3):
+    plan = Plan(session_id=session_id, user_id="user-1", initial_goal=f"goal of {session_id}", overall_status=status)
+    steps = [
+        Step(plan_id=plan.id, session_id=session_id, user_id="user-1", action=f"action {i}", agent="Hr_Agent")
+        for i in range(2)
+    ]
+    agent_messages = [
+        AgentMessage(session_id=session_id, user_id="user-1", plan_id=plan.id, content=f"m{i}", source="Hr_Agent")
+        for i in range(messages)
+    ]
+    await memory.add_items([plan, *steps, *agent_messages])
+    return plan
+
+
+def documents_of(memory, session_id):
+    return [d for d in memory._container.documents() if d.get("session_id") == session_id]
+
+
+def test_parse_ttl_by_data_type():
+    assert parse_ttl_by_data_type(" message=60, step=120,") == {"message": 60, "step": 120}
+    assert parse_ttl_by_data_type("") == {}
+    with pytest.raises(ValueError):
+        parse_ttl_by_data_type("message=soon")
+
+
+@pytest.mark.asyncio
+async def test_time_to_live_is_set_by_data_type():
+    memory = make_memory()
+    await seed_session(memory, "session-1", status=PlanStatus.in_progress)
+
+    ttls = {d["data_type"]: d.get("ttl") for d in documents_of(memory, "session-1")}
+    assert ttls == {"plan": None, "step": None, "agent_message": 3600}
+
+
+@pytest.mark.asyncio
+async def test_finished_sessions_are_archived_and_readable():
+    memory = make_memory()
+    await seed_session(memory, "session-1")
+    await seed_session(memory, "session-2", status=PlanStatus.failed)
+    active = await seed_session(memory, "session-3", status=PlanStatus.in_progress)
+
+    archived = await memory.archive_finished_sessions()
+
+    assert sorted(archived) == ["session-1", "session-2"]
+    assert sorted(d["id"] for d in documents_of(memory, "session-1")) == [
+        archive_id("session-1"),
+        archive_chunk_id("session-1", 0),
+    ]
+    assert len(documents_of(memory, "session-3")) == 6
+    assert await memory.get_plan_by_session("session-3") is not None
+
+    restored = await memory.get_archived_session("session-1")
+    assert sorted(d["data_type"] for d in restored) == ["agent_message"] * 3 + ["plan"] + ["step"] * 2
+    assert all(not key.startswith("_") or key == "_ts" for d in restored for key in d)
+    assert await memory.get_archived_session(active.session_id) == []
+
+
+@pytest.mark.asyncio
+async def test_recently_finished_sessions_are_kept(policy):
+    memory = make_memory()
+    await seed_session(memory, "session-1")
+    policy.archive_min_age_seconds = 3600
+
+    assert await memory.archive_finished_sessions() == []
+    # An explicit age overrides the policy
+    assert await memory.archive_finished_sessions(min_age_seconds=-1) == ["session-1"]
+
+
+@pytest.mark.asyncio
+async def test_archiving_again_keeps_the_earlier_archive():
+    memory = make_memory()
+    plan = await seed_session(memory, "session-1")
+    await memory.archive_session("session-1")
+
+    late = AgentMessage(session_id="session-1", user_id="user-1", plan_id=plan.id, content="late", source="Hr_Agent")
+    await memory.add_item(late)
+    archive = await memory.archive_session("session-1")
+
+    assert archive["document_count"] == 7 and archive["chunk_count"] == 2
+    assert archive["data_type"] == ARCHIVE_DATA_TYPE
+    # The earlier chunk is left as it was
+    assert [d["chunk"] for d in documents_of(memory, "session-1") if d["data_type"] == ARCHIVE_CHUNK_DATA_TYPE] == [0, 1]
+    assert "late" in [d.get("content") for d in await memory.get_archived_session("session-1")]
+    assert await memory.archive_session("session-1") is None
+
+
+@pytest.mark.asyncio
+async def test_archives_are_exported_to_the_export_dir(policy, tmp_path):
+    policy.archive_export_dir = str(tmp_path)
+    memory = make_memory()
+    await seed_session(memory, "session-1")
+
+    await memory.archive_session("session-1")
+
+    [chunk] = [d for d in documents_of(memory, "session-1") if d["data_type"] == ARCHIVE_CHUNK_DATA_TYPE]
+    assert chunk["encoding"] == ARCHIVE_EXPORT_ENCODING and "payload" not in chunk
+    assert os.path.exists(chunk["location"])
+    assert len(await memory.get_archived_session("session-1")) == 6
+
+
+@pytest.mark.asyncio
+async def test_export_missing_on_this_instance_is_reported(policy, tmp_path):
+    policy.archive_export_dir = str(tmp_path)
+    memory = make_memory()
+    await seed_session(memory, "session-1")
+    await memory.archive_session("session-1")
+    [chunk] = [d for d in documents_of(memory, "session-1") if d["data_type"] == ARCHIVE_CHUNK_DATA_TYPE]
+    os.remove(chunk["location"])
+
+    with pytest.raises(ArchiveUnavailableError):
+        await memory.get_archived_session("session-1")
+
+
+@pytest.mark.asyncio
+async def test_documents_left_by_a_failed_delete_are_not_archived_twice(monkeypatch):
+    memory = make_memory()
+    await seed_session(memory, "session-1")
+    delete = memory.bulk_write
+
+    async def delete_nothing(operations, **kwargs):
+        return await delete([], **kwargs)
+
+    monkeypatch.setattr(memory, "bulk_write", delete_nothing)
+    await memory.archive_session("session-1")
+    monkeypatch.setattr(memory, "bulk_write", delete)
+    archive = await memory.archive_session("session-1")
+
+    assert archive["document_count"] == 6 and archive["chunk_count"] == 1
+    assert len(await memory.get_archived_session("session-1")) == 6
+    assert sorted(d["id"] for d in documents_of(memory, "session-1")) == [
+        archive_id("session-1"),
+        archive_chunk_id("session-1", 0),
+    ]
+
+
+def test_large_archives_are_split_into_chunks(monkeypatch):
+    monkeypatch.setattr("context.retention.MAX_INLINE_ARCHIVE_BYTES", 2000)
+    documents = [{"id": f"d{i}", "data_type": "message", "content": os.urandom(600).hex()} for i in range(10)]
+
+    archive, chunks = RetentionPolicy().build_archive("session-1", "user-1", documents)
+
+    assert len(chunks) > 1 and archive["chunk_count"] == len(chunks)
+    assert all(len(chunk["payload"]) <= 2000 for chunk in chunks)
+    assert RetentionPolicy.load_archive(list(reversed(chunks))) == documents
+
+
+def test_document_too_large_for_a_chunk_needs_an_export_dir(monkeypatch):
+    monkeypatch.setattr("context.retention.MAX_INLINE_ARCHIVE_BYTES", 10)
+    with pytest.raises(ValueError):
+        RetentionPolicy().build_archive("session-1", "user-1", [{"id": "a", "content": "x" * 100}])
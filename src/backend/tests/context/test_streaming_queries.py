@@ -0,0 +1,77 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from benchmarks.cosmos_standin import StandInContainer  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from context.local_memory_kernel import LocalMemoryContext  # noqa: E402
+from context.local_store import InMemoryLocalStore  # noqa: E402
+from models.messages_kernel import AgentMessage, Plan  # noqa: E402
+
+
+def cosmos_memory():
+    memory = CosmosMemoryContext("session-1", "user-1", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory")
+    return memory
+
+
+def local_memory():
+    return LocalMemoryContext("session-1", "user-1", store=InMemoryLocalStore())
+
+
+async def add_messages(memory, count):
+    messages = [
+        AgentMessage(session_id="session-1", user_id="user-1", plan_id="p", content=f"m{i}", source="Hr_Agent")
+        for i in range(count)
+    ]
+    for message in messages:
+        await memory.add_item(message)
+    return messages
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make_memory", [cosmos_memory, local_memory])
+async def test_data_by_type_streams_the_same_models_in_pages(make_memory):
+    memory = make_memory()
+    await add_messages(memory, 25)
+
+    pages = [page async for page in memory.iter_data_by_type("agent_message", page_size=10)]
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    streamed = [message for page in pages for message in page]
+    assert all(isinstance(message, AgentMessage) for message in streamed)
+    assert [m.id for m in streamed] == [m.id for m in await memory.get_data_by_type("agent_message")]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make_memory", [cosmos_memory, local_memory])
+async def test_messages_stream_every_document_of_the_user(make_memory):
+    memory = make_memory()
+    messages = await add_messages(memory, 7)
+    plan = Plan(session_id="session-2", user_id="user-1", initial_goal="goal")
+    await memory.add_plan(plan)
+    await memory.add_plan(Plan(session_id="session-3", user_id="someone-else", initial_goal="goal"))
+
+    pages = [page async for page in memory.iter_messages(page_size=3)]
+
+    assert all(len(page) <= 3 for page in pages)
+    documents = [document for page in pages for document in page]
+    assert all(isinstance(document, dict) for document in documents)
+    assert sorted(d["id"] for d in documents) == sorted([m.id for m in messages] + [plan.id])
+
+
+@pytest.mark.asyncio
+async def test_cosmos_stream_reads_one_page_per_round_trip():
+    memory = cosmos_memory()
+    await add_messages(memory, 30)
+    container = memory._container
+
+    trips = container.round_trips
+    pages = memory.iter_data_by_type("agent_message", page_size=10)
+    first = await pages.__anext__()
+    assert len(first) == 10
+    assert container.round_trips == trips + 1
+    assert sum([len(page) async for page in pages]) == 20
@@ -0,0 +1,76 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from benchmarks.cosmos_standin import StandInContainer  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from context.vector_search import StreamingTopK, cosine_scores, stack_embeddings, top_k_indices  # noqa: E402
+from semantic_kernel.memory.memory_record import MemoryRecord  # noqa: E402
+
+
+def brute_force(query, embeddings, k):
+    scores = [
+        float(np.dot(query, e) / (np.linalg.norm(query) * np.linalg.norm(e))) for e in embeddings
+    ]
+    return sorted(range(len(embeddings)), key=lambda i: -scores[i])[:k], scores
+
+
+def test_scores_and_top_k_match_brute_force():
+    """The vectorized scores and argpartition top-k agree with a per-record loop."""
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(500, 16))
+    query = rng.normal(size=16)
+
+    matrix, norms = stack_embeddings(embeddings)
+    assert matrix.dtype == np.float32 and matrix.flags["C_CONTIGUOUS"]
+    scores = cosine_scores(query, matrix, norms)
+    expected_order, expected_scores = brute_force(query, embeddings, 10)
+
+    assert top_k_indices(scores, 10).tolist() == expected_order
+    assert np.allclose(scores, expected_scores, atol=1e-5)
+
+
+def test_streaming_top_k_equals_single_pass():
+    """Scanning in pages keeps the same winners as scoring everything at once."""
+    rng = np.random.default_rng(1)
+    embeddings = rng.normal(size=(1000, 8))
+    embeddings[3] = 0.0  # zero vectors score 0 instead of NaN
+    query = rng.normal(size=8)
+    items = list(range(1000))
+
+    top = StreamingTopK(query, limit=5, min_relevance_score=-1.0)
+    for start in range(0, 1000, 64):
+        top.add(items[start : start + 64], embeddings[start : start + 64])
+
+    expected_order, _ = brute_force(query, np.delete(embeddings, 3, axis=0), 5)
+    expected = [i if i < 3 else i + 1 for i in expected_order]
+    assert [item for item, _ in top.results()] == expected
+    assert top.scanned == 1000
+
+
+@pytest.mark.asyncio
+async def test_get_nearest_matches_scans_the_whole_collection():
+    """Records beyond the first hundred are found, and only winners become MemoryRecords."""
+    memory = CosmosMemoryContext("session-1", "user-1", cosmos_endpoint="https://standin")
+    memory._container = StandInContainer("memory")
+    records = [
+        MemoryRecord.local_record(
+            id=f"record-{index}",
+            text=f"memory {index}",
+            description=None,
+            additional_metadata=None,
+            embedding=np.array([float(index), 10.0]),
+        )
+        for index in range(250)
+    ]
+    await memory.upsert_batch("docs", records)
+
+    matches = await memory.get_nearest_matches("docs", np.array([1.0, 0.0]), limit=2)
+
+    assert [record.id for record, _ in matches] == ["record-249", "record-248"]
+    assert matches[0][0].embedding is None
+    assert matches[0][1] > matches[1][1]
@@ -0,0 +1,27 @@
+"""Helpers shared by the test modules."""
+
+from models.messages_kernel import Plan, Step
+
+
+class FakeClock:
+    """A clock that only moves when a test sets ``now``."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_plan(session_id="session-1"):
+    return Plan(session_id=session_id, user_id="user-1", initial_goal="Onboard a new hire")
+
+
+def make_step(plan, action="Do something"):
+    return Step(
+        plan_id=plan.id, session_id=plan.session_id, user_id="user-1", action=action, agent="Hr_Agent"
+    )
+
+
+def make_steps(plan, count):
+    return [make_step(plan, f"Step {index}") for index in range(count)]
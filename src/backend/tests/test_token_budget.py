@@ -0,0 +1,56 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils import token_budget  # noqa: E402
+
+
+class FlakyTiktoken:
+    """Fails the first load, then returns a fake encoding."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_encoding(self, name):
+        self.calls += 1
+        if self.calls == 1:
+            raise OSError("download failed")
+        return "encoding"
+
+
+@pytest.fixture
+def tiktoken(monkeypatch):
+    fake = FlakyTiktoken()
+    monkeypatch.setattr(token_budget, "tiktoken", fake)
+    monkeypatch.setattr(token_budget, "_loaded_encoding", None)
+    monkeypatch.setattr(token_budget, "_failed_at", None)
+    return fake
+
+
+def test_failed_load_is_retried_later(tiktoken, monkeypatch):
+    assert token_budget.load_encoding() is None
+    # Within the retry interval the failure is not retried
+    assert token_budget.load_encoding() is None
+    assert tiktoken.calls == 1
+
+    monkeypatch.setattr(token_budget, "LOAD_RETRY_SECONDS", 0)
+    assert token_budget.load_encoding() == "encoding"
+    assert tiktoken.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_event_loop_never_loads_inline(tiktoken, monkeypatch):
+    monkeypatch.setattr(token_budget, "LOAD_RETRY_SECONDS", 0)
+    loaded = []
+    monkeypatch.setattr(token_budget, "preload_encoding", lambda: loaded.append(True))
+
+    assert token_budget._encoding() is None
+    assert loaded and tiktoken.calls == 0
+
+    await asyncio.to_thread(token_budget.load_encoding)
+    await asyncio.to_thread(token_budget.load_encoding)
+    assert token_budget._encoding() == "encoding"
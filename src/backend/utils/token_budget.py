@@ -0,0 +1,111 @@
+"""Token counting for keeping prompts within a budget."""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Encoding of the GPT-4o family of models
+DEFAULT_ENCODING = "o200k_base"
+# Characters per token assumed when tiktoken or its encoding is not available
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = " [...]"
+# Seconds before loading the encoding is tried again after it failed
+LOAD_RETRY_SECONDS = 60.0
+
+if tiktoken is None:
+    logger.warning("tiktoken is not installed, estimating token counts from the text length")
+
+_loaded_encoding: Optional[Any] = None
+_failed_at: Optional[float] = None
+_loading = False
+_load_lock = threading.Lock()
+
+
+def _retry_due() -> bool:
+    return _failed_at is None or time.monotonic() - _failed_at >= LOAD_RETRY_SECONDS
+
+
+def load_encoding() -> Optional[Any]:
+    """Load the tiktoken encoding, or return None if it is not available.
+
+    The first load may download the BPE file, so this blocks; call it off the event
+    loop. A failure is not retried for LOAD_RETRY_SECONDS, after which the next call
+    tries again.
+    """
+    global _loaded_encoding, _failed_at
+    if _loaded_encoding is not None or tiktoken is None:
+        return _loaded_encoding
+    with _load_lock:
+        if _loaded_encoding is None and _retry_due():
+            try:
+                _loaded_encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+                _failed_at = None
+            except Exception as e:
+                _failed_at = time.monotonic()
+                logger.warning(f"Failed to load the {DEFAULT_ENCODING} encoding, estimating token counts: {e}")
+    return _loaded_encoding
+
+
+def preload_encoding() -> None:
+    """Start loading the encoding in a background thread, e.g. at startup."""
+    global _loading
+    if _loaded_encoding is not None or tiktoken is None or _loading or not _retry_due():
+        return
+    _loading = True
+
+    def run() -> None:
+        global _loading
+        try:
+            load_encoding()
+        finally:
+            _loading = False
+
+    threading.Thread(target=run, name="tiktoken-encoding", daemon=True).start()
+
+
+def _encoding() -> Optional[Any]:
+    """The encoding, or None while it is not available.
+
+    On an event loop the encoding is never loaded inline: until the background load
+    has finished, token counts are estimated.
+    """
+    if _loaded_encoding is not None or tiktoken is None:
+        return _loaded_encoding
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return load_encoding()
+    preload_encoding()
+    return None
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """Number of tokens in text, estimated from its length when tiktoken is not available."""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens, marking where it was cut."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= count_tokens(TRUNCATION_MARKER):
+        return ""
+    keep = max_tokens - count_tokens(TRUNCATION_MARKER)
+    encoding = _encoding()
+    if encoding is None:
+        return text[: keep * CHARS_PER_TOKEN] + TRUNCATION_MARKER
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:keep]) + TRUNCATION_MARKER
@@ -208,7 +208,7 @@
         window.headers
             .then(headers => {
                 console.log('Headers resolved, making fetch request');
-                fetch('/api/plans', {  // Using relative URL for the proxy
+                fetch('/api/plans?include_steps=false', {  // Using relative URL for the proxy; the list only shows step counts
                     method: 'GET',
                     headers: headers,
                 })